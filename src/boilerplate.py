@@ -0,0 +1,170 @@
+# src/boilerplate.py
+"""
+網站樣板 (頁首、頁尾、側欄) 的偵測與去除
+
+CMS 匯出的網站有成千上萬個頁面共用相同的頁首、頁尾與側欄，其中常有相同的聯絡人姓名與電話，
+逐頁掃描會重複掃描這些文字，並產生大量重複的發現。啟用 --boilerplate 時：
+1. 學習：每個網站 (掃描根目錄下的第一層目錄) 取樣部分網頁，以「行」為 shingle 計算 MinHash 簽章，
+   透過 LSH 分桶把相似的頁面歸為同一個版型；同一版型中出現在過半數頁面的行即為樣板，
+   連續的樣板行合併為一個樣板區塊。
+2. 去除：工作進程把頁面中的樣板行以等長的空白取代 (位移與位置對照不變)，只有其餘的內容交給插件與 NLP 模型。
+3. 回報：每個樣板區塊在主進程只掃描一次，發現附在第一個包含它的頁面，location 標示區塊編號與出現的頁數。
+只比對完全相同的行 (忽略空白差異)：近似但不相同的行可能正好差在個資，仍逐頁掃描。
+"""
+import dataclasses
+import hashlib
+import math
+import pathlib
+import random
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Iterable, Optional
+
+from src.parsers.markup import MARKUP_EXTENSIONS
+
+SAMPLE_PAGES_PER_SITE = 200
+# 一行至少要出現在這麼多個頁面、且佔版型頁數的比例達 MIN_SHARE，才視為樣板
+MIN_PAGES = 3
+MIN_SHARE = 0.5
+MIN_LINE_CHARS = 2
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 每段 4 列：Jaccard 約 0.5 以上的頁面有很高的機率落入同一桶
+_MERSENNE_PRIME = (1 << 61) - 1
+_LINE = re.compile(r'[^\n]+')
+ROOT_SITE = "."
+
+
+def normalize_line(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _stable_hash(value: str) -> int:
+    """跨進程穩定的 64 位元雜湊 (內建 hash() 每個進程的種子不同)。"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def site_of(file_path: pathlib.Path, root: pathlib.Path) -> str:
+    try: parts = file_path.relative_to(root).parts
+    except ValueError: parts = file_path.parts
+    return parts[0] if len(parts) > 1 else ROOT_SITE
+
+
+def is_page(file_path: pathlib.Path) -> bool:
+    return file_path.suffix.lower() in MARKUP_EXTENSIONS
+
+
+class MinHasher:
+    """以 (a·x + b) mod p 模擬 NUM_PERMUTATIONS 個隨機排列；種子固定，簽章可重現。"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 0x5EED):
+        rng = random.Random(seed)
+        self.coefficients = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_permutations)]
+
+    def signature(self, values: set[int]) -> tuple[int, ...]:
+        if not values: return ()
+        return tuple(min((a * value + b) % _MERSENNE_PRIME for value in values) for a, b in self.coefficients)
+
+
+def cluster_pages(signatures: list[tuple[int, ...]], bands: int = LSH_BANDS) -> list[list[int]]:
+    """LSH 分桶後以聯集-尋找合併同桶的頁面，回傳各版型的頁面索引。"""
+    parent = list(range(len(signatures)))
+    def find(i: int) -> int:
+        while parent[i] != i: parent[i] = parent[parent[i]]; i = parent[i]
+        return i
+    buckets: dict[tuple, int] = {}
+    for index, signature in enumerate(signatures):
+        if not signature: continue
+        rows = len(signature) // bands
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows])
+            other = buckets.setdefault(key, index)
+            if other != index: parent[find(index)] = find(other)
+    clusters: dict[int, list[int]] = defaultdict(list)
+    for index in range(len(signatures)): clusters[find(index)].append(index)
+    return list(clusters.values())
+
+
+@dataclasses.dataclass(frozen=True)
+class BoilerplateBlock:
+    block_id: str; site: str; text: str
+    first_page: pathlib.Path
+
+
+@dataclasses.dataclass
+class BoilerplateModel:
+    """學習到的樣板：各網站的 {正規化後的行: 區塊編號} 與區塊內容。體積與樣板文字量相當，作為 initializer 參數傳給工作進程。"""
+    root: pathlib.Path
+    lines: dict[str, dict[str, str]] = dataclasses.field(default_factory=dict)
+    blocks: dict[str, BoilerplateBlock] = dataclasses.field(default_factory=dict)
+
+    def __bool__(self) -> bool: return bool(self.blocks)
+
+    def strip(self, text: str, file_path: pathlib.Path) -> tuple[str, set[str]]:
+        """把樣板行換成等長的空白，回傳 (去除後的文字, 出現的區塊編號)。不是網頁或沒有樣板時原樣回傳。"""
+        lines = self.lines.get(site_of(file_path, self.root)) if is_page(file_path) else None
+        if not lines: return text, set()
+        pieces: list[str] = []; found: set[str] = set()
+        position = 0
+        for match in _LINE.finditer(text):
+            block_id = lines.get(normalize_line(match.group()))
+            if block_id is None: continue
+            pieces.append(text[position:match.start()]); pieces.append(" " * (match.end() - match.start()))
+            position = match.end(); found.add(block_id)
+        if not found: return text, found
+        pieces.append(text[position:])
+        return "".join(pieces), found
+
+
+def sample_pages(files: Iterable[pathlib.Path], root: pathlib.Path, per_site: int = SAMPLE_PAGES_PER_SITE) -> dict[str, list[pathlib.Path]]:
+    """各網站依路徑排序後等距取樣，避免只取到同一個子目錄的頁面。"""
+    by_site: dict[str, list[pathlib.Path]] = defaultdict(list)
+    for file_path in files:
+        if is_page(file_path): by_site[site_of(file_path, root)].append(file_path)
+    samples = {}
+    for site, pages in by_site.items():
+        if len(pages) < MIN_PAGES: continue
+        pages.sort()
+        step = max(1, len(pages) / per_site)
+        samples[site] = [pages[int(i * step)] for i in range(min(per_site, len(pages)))]
+    return samples
+
+
+def _learn_site(site: str, pages: list[tuple[pathlib.Path, list[str]]], hasher: MinHasher, model: BoilerplateModel):
+    signatures = [hasher.signature({_stable_hash(line) for line in lines}) for _, lines in pages]
+    site_lines = model.lines.setdefault(site, {})
+    for cluster in cluster_pages(signatures):
+        if len(cluster) < MIN_PAGES: continue
+        frequency = Counter(line for index in cluster for line in set(pages[index][1]))
+        threshold = max(MIN_PAGES, math.ceil(MIN_SHARE * len(cluster)))
+        shared = {line for line, count in frequency.items() if count >= threshold}
+        if not shared: continue
+        # 連續的樣板行合併為一個區塊；同一行只屬於第一個包含它的區塊
+        for index in cluster:
+            page, lines = pages[index]
+            run: list[str] = []
+            for line in lines + [""]:
+                if line in shared and line not in site_lines: run.append(line); continue
+                if run:
+                    text = "\n".join(run)
+                    block_id = hashlib.blake2b(f"{site}\0{text}".encode('utf-8'), digest_size=4).hexdigest()
+                    model.blocks.setdefault(block_id, BoilerplateBlock(block_id, site, text, page))
+                    for run_line in run: site_lines[run_line] = block_id
+                    run = []
+    if not site_lines: del model.lines[site]
+
+
+def learn_boilerplate(files: Iterable[pathlib.Path], root: pathlib.Path, read_text: Callable[[pathlib.Path], Optional[str]],
+                      per_site: int = SAMPLE_PAGES_PER_SITE) -> BoilerplateModel:
+    """
+    Args:
+        read_text: 讀取並正規化一個頁面的文字；無法讀取時回傳 None。
+    """
+    model = BoilerplateModel(root)
+    hasher = MinHasher()
+    for site, sample in sample_pages(files, root, per_site).items():
+        pages = []
+        for file_path in sample:
+            text = read_text(file_path)
+            if text: pages.append((file_path, [line for line in map(normalize_line, _LINE.findall(text)) if len(line) >= MIN_LINE_CHARS]))
+        _learn_site(site, pages, hasher, model)
+    return model
@@ -0,0 +1,157 @@
+# src/checkpoint.py
+"""
+掃描檢查點日誌 (journal)
+
+掃描結果原本只存在記憶體中，直到最後產生報告才寫出；長時間掃描中途中斷 (OOM、Ctrl+C、主機重開) 就會全部遺失。
+本模組把每個已完成檔案的處理結果以 JSON Lines 附加寫入輸出目錄中的日誌檔：
+- 寫入經過緩衝，每累積一定筆數或經過一定秒數才 flush + fsync 一次，將檢查點的額外負擔控制在固定比例內。
+- 以 --resume 重新執行時，讀回日誌中已完成的檔案與發現，只掃描其餘檔案，最後合併為同一份報告。
+- 中斷時最後一行可能只寫了一半，讀取時會忽略並在續寫前截斷。
+"""
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+from src.shared_data_model import (
+    FileContext, ScanReport, ScanResult,
+    context_from_dict, context_to_dict, result_from_dict, result_to_dict,
+)
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def journal_path_for(output_path: pathlib.Path) -> pathlib.Path:
+    """報告 scan_report.xlsx 對應的日誌檔為同目錄下的 scan_report.journal.jsonl。"""
+    return output_path.with_name(output_path.stem + JOURNAL_SUFFIX)
+
+
+@dataclass
+class JournalState:
+    """從日誌讀回的已完成進度。"""
+    results: ScanReport = field(default_factory=list)
+    files_with_errors: list[dict] = field(default_factory=list)
+    file_contexts: list[FileContext] = field(default_factory=list)
+    completed: set[pathlib.Path] = field(default_factory=set)
+    valid_bytes: int = 0
+
+
+def load_journal(path: pathlib.Path, scan_path: pathlib.Path) -> JournalState:
+    """
+    讀取日誌。日誌必須屬於同一個掃描路徑，否則拋出 ValueError。
+    無法解析的最後一行 (寫到一半時中斷) 會被忽略，valid_bytes 記錄最後一筆完整紀錄的結尾位置。
+    """
+    state = JournalState()
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f):
+            if not line.endswith(b'\n'): break
+            try: record = json.loads(line)
+            except ValueError: break
+            if line_number == 0:
+                if record.get('type') != 'header' or record.get('version') != JOURNAL_VERSION:
+                    raise ValueError(f"'{path}' 不是相容的掃描日誌檔。")
+                if record.get('scan_path') != str(scan_path):
+                    raise ValueError(f"日誌檔 '{path}' 屬於另一個掃描路徑 '{record.get('scan_path')}'，無法接續。")
+            else:
+                file_path = pathlib.Path(record['path'])
+                file_context = context_from_dict(record['context']) if record.get('context') else None
+                if file_context: state.file_contexts.append(file_context)
+                if record.get('error'): state.files_with_errors.append({'path': file_path, 'error': record['error']})
+                if file_context: state.results.extend(result_from_dict(data, file_context=file_context) for data in record.get('results', []))
+                state.completed.add(file_path)
+            state.valid_bytes += len(line)
+    return state
+
+
+class ScanJournal:
+    """
+    附加寫入的檢查點日誌 (執行緒安全，可同時用於本機掃描與分散式協調者)。
+
+    Args:
+        path: 日誌檔路徑。
+        scan_path: 掃描路徑，寫入檔頭以避免接續到其他掃描的日誌。
+        resume_from: 接續時傳入 load_journal 的結果；日誌會在最後一筆完整紀錄之後續寫。
+        flush_every: 累積多少筆紀錄後 fsync 一次。
+        flush_interval: 距離上次 fsync 超過多少秒後，下一筆紀錄寫入時即 fsync。
+    """
+
+    def __init__(self, path: pathlib.Path, scan_path: pathlib.Path, resume_from: Optional[JournalState] = None,
+                 flush_every: int = 200, flush_interval: float = 30.0):
+        self.path = path; self.flush_every = flush_every; self.flush_interval = flush_interval
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        if resume_from is not None:
+            self._file = open(path, 'r+b')
+            self._file.truncate(resume_from.valid_bytes); self._file.seek(resume_from.valid_bytes)
+        else:
+            self._file = open(path, 'wb')
+            header = {'type': 'header', 'version': JOURNAL_VERSION, 'scan_path': str(scan_path),
+                      'started_utc': datetime.now(timezone.utc).isoformat()}
+            self._write_line(header); self._sync()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    def _write_line(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        self._file.write(line)
+        self.stats['bytes'] += len(line)
+
+    def _sync(self):
+        started = time.perf_counter()
+        self._file.flush(); os.fsync(self._file.fileno())
+        self.stats['fsyncs'] += 1; self.stats['sync_seconds'] += time.perf_counter() - started
+        self._pending = 0; self._last_sync = time.monotonic()
+
+    def record(self, file_path: pathlib.Path, file_context: Optional[FileContext], error: Optional[str], results: Sequence[ScanResult]):
+        """記錄一個已處理完畢的檔案 (成功、跳過或錯誤皆算完成)。"""
+        started = time.perf_counter()
+        record = {
+            'path': str(file_path), 'context': context_to_dict(file_context) if file_context else None, 'error': error,
+            'results': [result_to_dict(result, include_context=False) for result in results],
+        }
+        with self._lock:
+            self._write_line(record)
+            self.stats['records'] += 1; self._pending += 1
+            if self._pending >= self.flush_every or time.monotonic() - self._last_sync >= self.flush_interval: self._sync()
+            self.stats['write_seconds'] += time.perf_counter() - started
+
+    def close(self):
+        with self._lock:
+            if self._file.closed: return
+            if self._pending: self._sync()
+            self._file.close()
+
+    def remove(self):
+        """報告成功產生後刪除日誌 (日誌中含有個資原文，不應長期留存)。"""
+        self.close()
+        try: self.path.unlink()
+        except FileNotFoundError: pass
+
+    def log_stats(self, elapsed_seconds: float):
+        overhead = self.stats['write_seconds']
+        share = overhead / elapsed_seconds * 100 if elapsed_seconds > 0 else 0.0
+        logging.info(f"檢查點統計: 寫入 {self.stats['records']} 筆紀錄 ({self.stats['bytes'] / 1024 / 1024:.1f} MB)，"
+                     f"fsync {self.stats['fsyncs']} 次，共耗時 {overhead:.2f} 秒 (佔掃描時間 {share:.1f}%)。")
+
+
+def open_journal(output_path: pathlib.Path, scan_path: pathlib.Path, resume: bool,
+                 flush_interval: float = 30.0) -> tuple[ScanJournal, JournalState]:
+    """建立或接續日誌，回傳 (日誌, 已完成的進度)。未接續時進度為空。"""
+    path = journal_path_for(output_path)
+    if resume and path.exists():
+        state = load_journal(path, scan_path)
+        logging.info(f"從日誌 '{path}' 接續掃描：已完成 {len(state.completed)} 個檔案、{len(state.results)} 筆發現。")
+        return ScanJournal(path, scan_path, resume_from=state, flush_interval=flush_interval), state
+    if resume: logging.warning(f"找不到日誌檔 '{path}'，將從頭開始掃描。")
+    elif path.exists(): logging.warning(f"日誌檔 '{path}' 已存在，未指定 --resume，將覆寫並從頭開始掃描。")
+    return ScanJournal(path, scan_path, flush_interval=flush_interval), JournalState()
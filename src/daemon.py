@@ -0,0 +1,355 @@
+# src/daemon.py
+"""
+常駐掃描服務 (daemon)
+
+上傳閘道等需要「同步」檢查單一文件的場景，若每個檔案都執行一次 `python -m src.main`，
+每次都要重新匯入 pandas / torch / transformers、載入 NLP 模型並探索插件，啟動成本遠大於掃描本身。
+常駐服務只在啟動時建立一次 CoreEngine (插件、NLP 模型、解析器)，之後透過 HTTP/JSON 接受掃描請求：
+- 可監聽本機 Unix socket (--socket，以檔案權限控管存取) 或 TCP 連接埠。
+- 掃描在固定數量的執行緒中進行 (--max-concurrency)；另有排隊上限 (--max-queue)，
+  超過時立即回應 503 與 Retry-After，讓呼叫端自行退避，而不是讓請求無限堆積。
+- 上傳的檔案由各執行緒專屬的受監督工作進程解析與掃描：解析時間上限 (--parse-timeout) 在工作進程的主執行緒生效，
+  超過處理時間上限 (--file-timeout) 的進程會被終止，文件記為錯誤，惡意構造的檔案不會永久佔住掃描名額。
+- /scan/batch 可在一次請求中送出多份文件，分散到同一組執行緒平行掃描，減少往返次數。
+
+端點：
+- POST /scan?filename=履歷.docx      內容為檔案原始位元組，依副檔名選擇解析器。
+- POST /scan/batch                    {"documents": [{"filename": ..., "content": <base64>} 或 {"filename": ..., "text": ...}]}
+- GET  /health                        插件、處理中請求數與近期延遲 (p50 / p99)。
+
+延遲基準測試：python -m src.daemon benchmark 檔案 [--runs N] [--cold-runs N]
+"""
+import argparse
+import base64
+import binascii
+import hmac
+import json
+import logging
+import math
+import os
+import pathlib
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Sequence, Union
+
+from src.distributed import TOKEN_ENV_VAR, TOKEN_HEADER
+from src.engine import CoreEngine, ScanConfig
+from src.executor import SupervisedExecutor
+from src.shared_data_model import context_to_dict, result_to_dict
+
+DEFAULT_PORT = 8766
+
+_RETRY_AFTER_SECONDS = 1
+_LATENCY_WINDOW = 1000          # /health 的延遲統計只看最近幾次請求
+_WARMUP_TEXT = "王小明 電話 0912-345-678 身分證 A123456789 地址 臺北市中正區重慶南路一段122號"
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """最近排名法的百分位數 (q 介於 0 與 1)。"""
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class ScanDaemon:
+    """
+    持有一份已載入插件的 CoreEngine，並以有上限的執行緒池處理掃描請求 (執行緒安全)。
+
+    Args:
+        config: 掃描設定；scan_path / output_path 不會被使用。
+        max_concurrency: 同時掃描的文件數，預設為 CPU 核心數。
+        max_queue: 除了掃描中的文件以外，最多還能排隊等候的文件數。
+        max_batch: 一次批次請求最多可包含的文件數。
+        max_body_bytes: 單一請求內容的大小上限。
+    """
+
+    def __init__(self, config: ScanConfig, max_concurrency: Optional[int] = None, max_queue: int = 64,
+                 max_batch: int = 32, max_body_bytes: int = 64 * 1024 * 1024, token: Optional[str] = None):
+        self.engine = CoreEngine(config)
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.max_queue = max_queue; self.max_body_bytes = max_body_bytes
+        # 超過總容量的批次永遠無法被接受，直接以批次上限拒絕
+        self.max_batch = min(max_batch, self.max_concurrency + max_queue)
+        self.token = token
+        self.started_at = time.time()
+        self.stats: Counter = Counter()
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency + max_queue)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="daemon-scan")
+        self._local = threading.local()
+        self._executors: list[SupervisedExecutor] = []
+        self.plugin_names: list[str] = []
+
+    def warm_up(self):
+        """建立嵌入式掃描器並先掃描一段範例文字，讓 NLP 模型等延遲初始化的元件在第一個請求之前就緒。"""
+        plugins = self.engine.plugin_manager.get_enabled(self.engine.config.enabled_plugins)
+        if not plugins: raise ValueError("沒有任何啟用的插件。")
+        self.plugin_names = [plugin.name for plugin in plugins]
+        started = time.perf_counter()
+        self.engine.scan_text(_WARMUP_TEXT, "<warmup>")
+        logging.info(f"已載入 {len(plugins)} 個插件並完成暖機 ({time.perf_counter() - started:.2f} 秒)。")
+
+    def _executor(self) -> SupervisedExecutor:
+        """目前掃描執行緒專屬的單一工作進程執行器 (第一次使用時建立)。"""
+        executor = getattr(self._local, "executor", None)
+        if executor is None:
+            plugins = self.engine.plugin_manager.get_enabled(self.engine.config.enabled_plugins)
+            executor = self._local.executor = self.engine.create_executor(plugins, num_workers=1)
+            with self._lock: self._executors.append(executor)
+        return executor
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+        with self._lock: executors, self._executors = self._executors, []
+        for executor in executors: executor.shutdown()
+
+    # --- 准入控制 ---
+    def _admit(self, count: int) -> bool:
+        acquired = 0
+        while acquired < count and self._slots.acquire(blocking=False): acquired += 1
+        if acquired == count: return True
+        for _ in range(acquired): self._slots.release()
+        return False
+
+    def _scan_one(self, filename: str, content: Union[bytes, str]) -> dict[str, Any]:
+        started = time.perf_counter()
+        if isinstance(content, str):
+            findings = self.engine.scan_text(content, filename)
+            reply = {"filename": filename, "status": "SUCCESS", "error": None, "file": None}
+        else:
+            result = self.engine.scan_bytes(content, filename, self._executor())
+            findings = result.results
+            reply = {"filename": filename, "status": result.status, "error": result.error_message,
+                     "file": context_to_dict(result.file_context) if result.file_context else None}
+        if reply["status"] != "SUCCESS": logging.warning(f"掃描 '{filename}' 失敗: {reply['error']}")
+        reply["findings"] = [result_to_dict(finding, include_context=False) for finding in findings]
+        reply["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return reply
+
+    def scan_documents(self, documents: list[tuple[str, Union[bytes, str]]]) -> Optional[list[dict[str, Any]]]:
+        """平行掃描多份文件並依原順序回傳結果；排隊已滿時回傳 None。"""
+        if not self._admit(len(documents)):
+            with self._lock: self.stats['rejected'] += 1
+            return None
+        started = time.perf_counter()
+        with self._lock: self._in_flight += len(documents)
+        try:
+            futures = [self._pool.submit(self._scan_one, filename, content) for filename, content in documents]
+            replies = [future.result() for future in futures]
+        finally:
+            with self._lock: self._in_flight -= len(documents)
+            for _ in documents: self._slots.release()
+        with self._lock:
+            self.stats['requests'] += 1; self.stats['documents'] += len(documents)
+            self.stats['failed'] += sum(1 for reply in replies if reply["status"] != "SUCCESS")
+            self._latencies.append(time.perf_counter() - started)
+        return replies
+
+    def health(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                "ok": True, "uptime_seconds": round(time.time() - self.started_at, 1), "plugins": self.plugin_names,
+                "max_concurrency": self.max_concurrency, "max_queue": self.max_queue, "in_flight": self._in_flight,
+                "requests": self.stats['requests'], "documents": self.stats['documents'],
+                "failed": self.stats['failed'], "rejected": self.stats['rejected'],
+                "latency_ms": {"p50": round(percentile(latencies, 0.5) * 1000, 2), "p99": round(percentile(latencies, 0.99) * 1000, 2)},
+            }
+
+    # --- 伺服器 ---
+    def create_server(self, socket_path: Optional[pathlib.Path] = None, host: str = "127.0.0.1",
+                      port: int = DEFAULT_PORT) -> socketserver.BaseServer:
+        # TCP 需關閉 Nagle：回應的標頭與內容分兩次寫出，與延遲 ACK 交互作用會讓每個請求多等約 40 ms (Unix socket 不支援此選項)
+        handler = type("DaemonRequestHandler", (_DaemonRequestHandler,), {"daemon": self, "disable_nagle_algorithm": socket_path is None})
+        if socket_path is None:
+            server: socketserver.BaseServer = ThreadingHTTPServer((host, port), handler)
+            if not self.token and host not in ("127.0.0.1", "localhost", "::1"):
+                logging.warning("未設定共用金鑰 (--token)，任何能連線的主機都可以送出掃描請求。")
+        else:
+            if socket_path.is_socket(): socket_path.unlink()  # 上次未正常結束留下的 socket 檔
+            server = _ThreadingUnixHTTPServer(str(socket_path), handler)
+            os.chmod(socket_path, 0o660)
+        server.daemon_threads = True
+        return server
+
+    def serve_forever(self, socket_path: Optional[pathlib.Path] = None, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        server = self.create_server(socket_path, host, port)
+        address = f"unix:{socket_path}" if socket_path else f"http://{host}:{server.server_address[1]}"
+        logging.info(f"掃描服務已在 {address} 就緒 (同時掃描 {self.max_concurrency} 份，排隊上限 {self.max_queue} 份)。")
+        try: server.serve_forever()
+        finally:
+            server.server_close(); self.shutdown()
+            if socket_path and socket_path.is_socket(): socket_path.unlink()
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+class _DaemonRequestHandler(BaseHTTPRequestHandler):
+    daemon: ScanDaemon
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # Unix socket 的 client_address 是空字串
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any):
+        logging.debug(f"[{self.address_string()}] {format % args}")
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items(): self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> Optional[bytes]:
+        """讀取請求內容；長度不明或過大時已回應錯誤並回傳 None。"""
+        length = self.headers.get("Content-Length")
+        if length is None: self._send_json(411, {"error": "需要 Content-Length。"}); return None
+        if int(length) > self.daemon.max_body_bytes:
+            self.close_connection = True
+            self._send_json(413, {"error": f"請求內容超過上限 {self.daemon.max_body_bytes} 位元組。"}); return None
+        return self.rfile.read(int(length))
+
+    def _authorized(self) -> bool:
+        token = self.daemon.token
+        if not token or hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), token): return True
+        self._send_json(401, {"error": "金鑰不正確。"})
+        return False
+
+    def _reply_scanned(self, documents: list[tuple[str, Union[bytes, str]]], single: bool):
+        replies = self.daemon.scan_documents(documents)
+        if replies is None:
+            return self._send_json(503, {"error": "掃描佇列已滿，請稍後再試。"}, {"Retry-After": str(_RETRY_AFTER_SECONDS)})
+        self._send_json(200, replies[0] if single else {"results": replies})
+
+    def do_GET(self):
+        if not self._authorized(): return
+        if urllib.parse.urlsplit(self.path).path != "/health": return self._send_json(404, {"error": f"未知的路徑: {self.path}"})
+        self._send_json(200, self.daemon.health())
+
+    def do_POST(self):
+        if not self._authorized(): return
+        url = urllib.parse.urlsplit(self.path)
+        if url.path not in ("/scan", "/scan/batch"): return self._send_json(404, {"error": f"未知的路徑: {self.path}"})
+        body = self._read_body()
+        if body is None: return
+        try:
+            if url.path == "/scan":
+                filename = urllib.parse.parse_qs(url.query).get("filename", [""])[0] or self.headers.get("X-Filename", "")
+                if not filename: raise ValueError("需要以 ?filename= 指定檔名 (用於選擇解析器)。")
+                return self._reply_scanned([(pathlib.PurePath(filename).name, body)], single=True)
+            documents = []
+            for document in json.loads(body)["documents"]:
+                filename = pathlib.PurePath(str(document["filename"])).name
+                if "text" in document: documents.append((filename, str(document["text"])))
+                else: documents.append((filename, base64.b64decode(document["content"], validate=True)))
+            if not documents: raise ValueError("documents 不能是空的。")
+            if len(documents) > self.daemon.max_batch: raise ValueError(f"一次最多 {self.daemon.max_batch} 份文件。")
+            self._reply_scanned(documents, single=False)
+        except (ValueError, KeyError, TypeError, binascii.Error) as e:
+            self._send_json(400, {"error": f"請求格式不正確: {e}"})
+
+
+# --- 基準測試 ---
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float = 300.0):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _timed_requests(connect, data: bytes, filename: str, runs: int, token: Optional[str]) -> list[float]:
+    headers = {"Content-Type": "application/octet-stream"}
+    if token: headers[TOKEN_HEADER] = token
+    connection = connect()
+    timings = []
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            connection.request("POST", f"/scan?filename={urllib.parse.quote(filename)}", body=data, headers=headers)
+            response = connection.getresponse(); payload = response.read()
+            if response.status != 200: raise RuntimeError(f"掃描服務回應 {response.status}: {payload.decode('utf-8', 'replace')}")
+            timings.append(time.perf_counter() - started)
+    finally: connection.close()
+    return timings
+
+
+def _cold_cli_timings(path: pathlib.Path, runs: int) -> list[float]:
+    repo_root = pathlib.Path(__file__).resolve().parent.parent
+    timings = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for _ in range(runs):
+            command = [sys.executable, "-m", "src.main", str(path), "-o", str(pathlib.Path(temp_dir) / "report.jsonl"),
+                       "-f", "-l", "ERROR", "--executor", "serial"]
+            started = time.perf_counter()
+            subprocess.run(command, cwd=repo_root, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _describe(label: str, timings: list[float]):
+    print(f"{label:12s} n={len(timings):<4d} p50 {percentile(timings, 0.5) * 1000:9.1f} ms   "
+          f"p99 {percentile(timings, 0.99) * 1000:9.1f} ms   max {max(timings) * 1000:9.1f} ms")
+
+
+def run_benchmark(path: pathlib.Path, runs: int, cold_runs: int, socket_path: Optional[pathlib.Path],
+                  url: Optional[str], token: Optional[str]) -> int:
+    data = path.read_bytes()
+    print(f"測試檔案: {path.name} ({len(data) / 1024:.1f} KB)")
+    if socket_path: connect = lambda: _UnixHTTPConnection(str(socket_path))
+    elif url:
+        target = urllib.parse.urlsplit(url)
+        connect = lambda: HTTPConnection(target.hostname, target.port or DEFAULT_PORT, timeout=300.0)
+    else:
+        # 未指定既有的服務時，在本程序內啟動一個 (只計算請求延遲，不含啟動與暖機)
+        daemon = ScanDaemon(ScanConfig(scan_path=pathlib.Path.cwd(), output_path=pathlib.Path(os.devnull)), max_concurrency=1)
+        daemon.warm_up()
+        server = daemon.create_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        connect = lambda: HTTPConnection("127.0.0.1", port, timeout=300.0)
+    _timed_requests(connect, data, path.name, 1, token)  # 第一個請求不計入
+    _describe("常駐服務", _timed_requests(connect, data, path.name, runs, token))
+    if cold_runs: _describe("冷啟動 CLI", _cold_cli_timings(path, cold_runs))
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.daemon", description="常駐掃描服務的延遲基準測試 (與冷啟動 CLI 比較)")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("path", type=pathlib.Path, help="測試用的文件，例如 100 KB 的 DOCX。")
+    parser.add_argument("--runs", type=int, default=200, help="送給常駐服務的請求數。預設為 200。")
+    parser.add_argument("--cold-runs", dest="cold_runs", type=int, default=10, help="冷啟動 CLI 的執行次數，0 表示略過。預設為 10。")
+    parser.add_argument("--socket", dest="socket_path", type=pathlib.Path, default=None, help="既有服務的 Unix socket 路徑。")
+    parser.add_argument("--url", default=None, help="既有服務的位址，例如 http://127.0.0.1:8766。兩者皆未指定時在本程序內啟動服務。")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV_VAR))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    if not args.path.is_file(): parser.error(f"找不到檔案: '{args.path}'")
+    if args.runs < 1 or args.cold_runs < 0: parser.error("--runs 必須大於 0，--cold-runs 不能是負數。")
+    return run_benchmark(args.path, args.runs, args.cold_runs, args.socket_path, args.url, args.token)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+# src/distributed.py
+"""
+分散式掃描模式 (協調者 / 工作節點)
+
+單機的進程池受限於一台主機的 CPU，同時稽核多個機關的網站根目錄時，改由一個協調者與多個工作節點分工：
+- 協調者 (`pii_scanner serve`)：探索檔案並切分為「租約」，透過簡單的 HTTP/JSON 協定分派給工作節點，
+  收集結果後合併為一份報告。協調者本身不載入插件與 NLP 模型。
+- 工作節點 (`pii_scanner worker`)：向協調者領取租約，以既有的解析器與插件流程 (受監督的本機進程池) 掃描，
+  再把精簡的結果 (以檔案編號對應，不重複傳送檔案資訊，並以 gzip 壓縮) 回傳。
+
+租約有效期限 (TTL) 由工作節點定期送出心跳延長；工作節點失聯時租約到期，檔案會重新排入佇列交給其他節點。
+同一檔案的結果只會被合併一次，因此逾期後才回傳的重複結果會被忽略。
+協調者與工作節點之間以明文 HTTP 傳遞結果 (含個資)，請只在受信任的網路中使用，並以 --token 設定共用金鑰。
+"""
+import dataclasses
+import gzip
+import hmac
+import json
+import logging
+import math
+import os
+import pathlib
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from tqdm import tqdm
+
+from src.checkpoint import open_journal
+from src.engine import CoreEngine, ScanConfig
+from src.name_dictionary import NAME_PROFILE_BERT
+from src.result_filter import TypeFilterRule
+from src.shared_data_model import (
+    FileContext, ScanReport, TriageAction, TriageCategory,
+    context_from_dict, context_to_dict, result_from_dict, result_to_dict,
+)
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 8765
+TOKEN_HEADER = "X-Scan-Token"
+TOKEN_ENV_VAR = "PII_SCANNER_TOKEN"
+
+_MAX_ATTEMPTS = 3               # 同一檔案的租約最多逾期幾次，超過即視為處理失敗，避免有問題的檔案無限輪轉
+_IDLE_WAIT_SECONDS = 2.0        # 佇列暫時為空 (其他租約尚未完成) 時，請工作節點稍後再來
+_DONE_GRACE_SECONDS = 5.0       # 全部完成後保留伺服器一段時間，讓輪詢中的工作節點收到結束通知
+_MAX_BODY_BYTES = 512 * 1024 * 1024
+_GZIP_MIN_BYTES = 4096
+_REQUEST_TIMEOUT_SECONDS = 60.0
+
+
+# --- 租約管理 ---
+@dataclass
+class Lease:
+    lease_id: str; worker_id: str; file_ids: list[int]; expires_at: float
+
+
+class LeaseTable:
+    """
+    與傳輸協定無關的租約狀態 (執行緒安全)。檔案以編號表示。
+
+    Args:
+        total_files: 檔案總數，編號為 0..total_files-1。
+        lease_size: 每個工作進程一次領取的檔案數；實際租約大小為 lease_size × 節點容量。
+        lease_ttl: 租約有效秒數，工作節點需在期限內送出心跳。
+    """
+
+    def __init__(self, total_files: int, lease_size: int, lease_ttl: float, max_attempts: int = _MAX_ATTEMPTS):
+        self.total_files = total_files; self.lease_size = lease_size
+        self.lease_ttl = lease_ttl; self.max_attempts = max_attempts
+        self._pending: deque[int] = deque(range(total_files))
+        self._leases: dict[str, Lease] = {}
+        self._done: set[int] = set()
+        self._attempts: dict[int, int] = {}
+        self._workers_seen: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        with self._lock: return len(self._done) >= self.total_files
+
+    @property
+    def completed_count(self) -> int:
+        with self._lock: return len(self._done)
+
+    def _active_workers(self, now: float) -> int:
+        return sum(1 for seen in self._workers_seen.values() if now - seen <= self.lease_ttl) or 1
+
+    def acquire(self, worker_id: str, capacity: int) -> Optional[Lease]:
+        """分派一份租約；目前沒有可分派的檔案時回傳 None。"""
+        now = time.monotonic()
+        with self._lock:
+            self._workers_seen[worker_id] = now
+            # 接近尾聲時依活躍節點數平均分配剩餘檔案，避免單一節點拿走最後一大批而拖長整體時間
+            fair_share = math.ceil(len(self._pending) / self._active_workers(now))
+            size = min(self.lease_size * capacity, max(capacity, fair_share))
+            file_ids = []
+            while self._pending and len(file_ids) < size:
+                file_id = self._pending.popleft()
+                if file_id in self._done: continue
+                self._attempts[file_id] = self._attempts.get(file_id, 0) + 1
+                file_ids.append(file_id)
+            if not file_ids: return None
+            lease = Lease(lease_id=uuid.uuid4().hex, worker_id=worker_id, file_ids=file_ids, expires_at=now + self.lease_ttl)
+            self._leases[lease.lease_id] = lease
+            return lease
+
+    def renew(self, lease_id: str) -> bool:
+        with self._lock:
+            lease = self._leases.get(lease_id)
+            if lease is None: return False
+            now = time.monotonic()
+            lease.expires_at = now + self.lease_ttl
+            self._workers_seen[lease.worker_id] = now
+            return True
+
+    def complete(self, lease_id: str, file_ids: list[int]) -> list[int]:
+        """
+        標記租約中的檔案已完成，回傳本次「新」完成的檔案編號 (呼叫端只合併這些檔案的結果)。
+        租約即使已逾期仍接受回報；租約中未被回報的檔案會重新排入佇列。
+        """
+        with self._lock:
+            accepted = [i for i in dict.fromkeys(file_ids) if 0 <= i < self.total_files and i not in self._done]
+            self._done.update(accepted)
+            lease = self._leases.pop(lease_id, None)
+            if lease:
+                missing = [i for i in lease.file_ids if i not in self._done]
+                self._pending.extendleft(reversed(missing))
+            return accepted
+
+    def reap(self) -> list[int]:
+        """回收逾期的租約，回傳因逾期次數過多而放棄的檔案編號 (已標記為完成)。"""
+        now = time.monotonic()
+        abandoned = []
+        with self._lock:
+            for lease_id in [lid for lid, lease in self._leases.items() if lease.expires_at < now]:
+                lease = self._leases.pop(lease_id)
+                requeue = []
+                for file_id in lease.file_ids:
+                    if file_id in self._done: continue
+                    if self._attempts.get(file_id, 0) >= self.max_attempts:
+                        self._done.add(file_id); abandoned.append(file_id)
+                    else: requeue.append(file_id)
+                # 逾期的檔案優先重新分派
+                self._pending.extendleft(reversed(requeue))
+                logging.warning(f"工作節點 '{lease.worker_id}' 的租約已逾期，{len(requeue)} 個檔案將重新分派。")
+        return abandoned
+
+
+# --- 協調者 ---
+class _CoordinatorRequestHandler(BaseHTTPRequestHandler):
+    coordinator: "ScanCoordinator"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any):
+        logging.debug(f"[{self.address_string()}] {format % args}")
+
+    def _authorized(self) -> bool:
+        token = self.coordinator.token
+        return not token or hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), token)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > _MAX_BODY_BYTES: raise ValueError("請求內容過大。")
+        body = self.rfile.read(length)
+        if self.headers.get("Content-Encoding") == "gzip": body = gzip.decompress(body)
+        return json.loads(body or b"{}")
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, routes: dict):
+        if not self._authorized(): return self._send_json(401, {"error": "金鑰不正確。"})
+        route = routes.get(self.path)
+        if route is None: return self._send_json(404, {"error": f"未知的路徑: {self.path}"})
+        try: self._send_json(200, route(self._read_json() if self.command == "POST" else {}))
+        except (ValueError, KeyError, TypeError) as e: self._send_json(400, {"error": f"請求格式不正確: {e}"})
+
+    def do_GET(self):
+        self._dispatch({"/config": self.coordinator.handle_config, "/status": self.coordinator.handle_status})
+
+    def do_POST(self):
+        self._dispatch({
+            "/lease": self.coordinator.handle_lease, "/heartbeat": self.coordinator.handle_heartbeat,
+            "/complete": self.coordinator.handle_complete,
+        })
+
+
+class ScanCoordinator(CoreEngine):
+    """
+    協調者：沿用 CoreEngine 的檔案探索與報告產製，掃描工作則透過租約分派給工作節點。
+    """
+
+    def __init__(self, config: ScanConfig, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 lease_size: int = 16, lease_ttl: float = 120.0, token: Optional[str] = None):
+        self.host = host; self.port = port
+        self.lease_size = lease_size; self.lease_ttl = lease_ttl; self.token = token
+        super().__init__(config)
+
+    def _initialize_components(self):
+        logging.info("協調者模式：掃描由工作節點執行，本機不載入插件與 NLP 模型。")
+
+    # --- HTTP 端點 ---
+    def handle_config(self, _: dict) -> dict:
+        return {
+            "protocol": PROTOCOL_VERSION, "scan_root": str(self._root),
+            "enabled_plugins": self.config.enabled_plugins,
+            "triage_policy": {c.value: a.value for c, a in self.config.triage_policy.items()} if self.config.triage_policy else None,
+            "parse_timeout": self.config.parse_timeout, "file_timeout": self.config.file_timeout,
+            "result_filters": {t: dataclasses.asdict(rule) for t, rule in self.config.result_filters.items()} if self.config.result_filters else None,
+            "lease_ttl": self.lease_ttl, "name_profile": self.config.name_profile,
+        }
+
+    def handle_status(self, _: dict) -> dict:
+        return {"total": self._table.total_files, "completed": self._table.completed_count, "finished": self._table.finished}
+
+    def handle_lease(self, request: dict) -> dict:
+        if self._table.finished: return {"done": True}
+        lease = self._table.acquire(str(request["worker_id"]), max(1, int(request.get("capacity", 1))))
+        if lease is None: return {"wait": _IDLE_WAIT_SECONDS}
+        logging.debug(f"分派租約 {lease.lease_id} ({len(lease.file_ids)} 個檔案) 給 '{lease.worker_id}'。")
+        return {"lease_id": lease.lease_id, "ttl": self.lease_ttl,
+                "files": [[file_id, self._relative_paths[file_id]] for file_id in lease.file_ids]}
+
+    def handle_heartbeat(self, request: dict) -> dict:
+        return {"ok": self._table.renew(str(request["lease_id"]))}
+
+    def handle_complete(self, request: dict) -> dict:
+        entries = {int(entry["id"]): entry for entry in request["files"]}
+        accepted = self._table.complete(str(request["lease_id"]), list(entries))
+        with self._merge_lock:
+            contexts: dict[int, FileContext] = {}
+            for file_id in accepted:
+                entry = entries[file_id]
+                if entry.get("context"):
+                    # 檔案路徑以協調者端的掃描根目錄為準，工作節點的掛載位置可能不同
+                    contexts[file_id] = dataclasses.replace(context_from_dict(entry["context"]), file_path=self._files[file_id])
+                    self._file_contexts.append(contexts[file_id])
+                if entry.get("error"):
+                    self._files_with_errors.append({"path": self._files[file_id], "error": entry["error"]})
+                    logging.warning(f"處理檔案 '{self._files[file_id]}' 時發生錯誤: {entry['error']}")
+            results_by_file: dict[int, ScanReport] = {}
+            for data in request.get("results", []):
+                file_id = int(data["id"])
+                if file_id in contexts: results_by_file.setdefault(file_id, []).append(result_from_dict(data, file_context=contexts[file_id]))
+            for file_id in accepted:
+                file_results = results_by_file.get(file_id, [])
+                self._all_results.extend(file_results)
+                self._journal.record(self._files[file_id], contexts.get(file_id), entries[file_id].get("error"), file_results)
+                self._summary.add_file(self._files[file_id], file_results)
+            self._progress.update(len(accepted))
+        if self._table.finished: self._finished.set()
+        return {"accepted": len(accepted)}
+
+    # --- 主流程 ---
+    def run_scan(self):
+        start_time = time.perf_counter()
+        logging.info("分散式掃描任務開始 (協調者)。")
+        files = self._discover_files()
+        if not files: logging.warning("在指定路徑下未找到任何檔案，掃描終止。"); return
+        files = self._plan_delta(files)
+        scan_path = self.config.scan_path
+        self._journal, resumed = open_journal(self.config.output_path, scan_path, self.config.resume, self.config.checkpoint_interval)
+        with self._journal:
+            self._files = [f for f in files if f not in resumed.completed]
+            self._all_results: ScanReport = resumed.results
+            self._files_with_errors: list[dict] = resumed.files_with_errors
+            self._file_contexts: list[FileContext] = resumed.file_contexts
+            self._summary = self._start_summary(resumed)
+            if self._files: self._serve(scan_path if scan_path.is_dir() else scan_path.parent)
+        self._journal.log_stats(time.perf_counter() - start_time)
+        if self._finalize_scan(self._all_results, self._files_with_errors, self._file_contexts, start_time, self._summary): self._journal.remove()
+
+    def _serve(self, root: pathlib.Path):
+        """啟動 HTTP 伺服器並等待所有檔案完成 (或因租約多次逾期而放棄)。"""
+        self._root = root
+        self._relative_paths = [f.relative_to(self._root).as_posix() for f in self._files]
+        self._table = LeaseTable(len(self._files), self.lease_size, self.lease_ttl)
+        self._merge_lock = threading.Lock(); self._finished = threading.Event()
+
+        handler = type("CoordinatorRequestHandler", (_CoordinatorRequestHandler,), {"coordinator": self})
+        server = ThreadingHTTPServer((self.host, self.port), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="coordinator-http", daemon=True).start()
+        logging.info(f"協調者已在 http://{self.host}:{server.server_address[1]} 等待工作節點連線。")
+        if not self.token: logging.warning("未設定共用金鑰 (--token)，任何能連線的主機都可以領取租約與回報結果。")
+
+        self._progress = tqdm(total=len(self._files), desc="掃描進度", unit="file")
+        try:
+            while not self._finished.wait(min(self.lease_ttl / 4, 5.0)):
+                abandoned = self._table.reap()
+                with self._merge_lock:
+                    for file_id in abandoned:
+                        error = f"租約逾期 {_MAX_ATTEMPTS} 次，工作節點可能在處理此檔案時失聯。"
+                        self._files_with_errors.append({"path": self._files[file_id], "error": error})
+                        self._journal.record(self._files[file_id], None, error, [])
+                        logging.error(f"檔案 '{self._files[file_id]}' {error}")
+                    self._progress.update(len(abandoned))
+                if self._table.finished: break
+            time.sleep(_DONE_GRACE_SECONDS)
+        finally:
+            self._progress.close()
+            server.shutdown(); server.server_close()
+
+
+# --- 工作節點 ---
+class CoordinatorUnavailableError(ConnectionError):
+    """在重試期限內無法連上協調者。"""
+
+
+class ScanWorker:
+    """
+    工作節點：向協調者領取租約並以本機的受監督進程池掃描。
+
+    Args:
+        coordinator_url: 協調者位址，例如 http://10.0.0.5:8765。
+        root: 本機上對應掃描根目錄的路徑；未指定時使用協調者的路徑 (共用掛載點或同一台主機)。
+        retry_seconds: 連不上協調者時持續重試的秒數。
+    """
+
+    def __init__(self, coordinator_url: str, root: Optional[pathlib.Path] = None, num_workers: Optional[int] = None,
+                 token: Optional[str] = None, log_level: str = "INFO", max_tasks_per_child: Optional[int] = 200,
+                 max_worker_memory_mb: Optional[float] = 2048.0, retry_seconds: float = 60.0):
+        self.base_url = coordinator_url.rstrip("/")
+        self.root = root; self.num_workers = num_workers; self.token = token; self.log_level = log_level
+        self.max_tasks_per_child = max_tasks_per_child; self.max_worker_memory_mb = max_worker_memory_mb
+        self.retry_seconds = retry_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None) -> dict:
+        body = None; headers = {"Accept": "application/json"}
+        if self.token: headers[TOKEN_HEADER] = self.token
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json; charset=utf-8"
+            if len(body) >= _GZIP_MIN_BYTES: body = gzip.compress(body, compresslevel=5); headers["Content-Encoding"] = "gzip"
+        deadline = time.monotonic() + self.retry_seconds
+        delay = 0.5
+        while True:
+            request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+            try:
+                with urllib.request.urlopen(request, timeout=_REQUEST_TIMEOUT_SECONDS) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                # 4xx 代表請求本身有問題 (金鑰錯誤、格式錯誤)，重試也不會成功
+                if e.code < 500: raise
+                error: Exception = e
+            except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+                error = e
+            if time.monotonic() >= deadline:
+                raise CoordinatorUnavailableError(f"無法連線至協調者 {self.base_url}: {error}")
+            time.sleep(delay); delay = min(delay * 2, 5.0)
+
+    def _build_engine(self, settings: dict) -> tuple[CoreEngine, pathlib.Path]:
+        if settings.get("protocol") != PROTOCOL_VERSION:
+            raise ValueError(f"協調者的協定版本 {settings.get('protocol')} 與本機 ({PROTOCOL_VERSION}) 不相容。")
+        root = (self.root or pathlib.Path(settings["scan_root"])).resolve()
+        if not root.is_dir(): raise ValueError(f"本機找不到掃描根目錄: '{root}'，請以 --root 指定對應的路徑。")
+        policy = settings.get("triage_policy")
+        filters = settings.get("result_filters")
+        config = ScanConfig(
+            scan_path=root,
+            output_path=pathlib.Path(os.devnull),  # 工作節點不產生報告
+            log_level=self.log_level, enabled_plugins=settings.get("enabled_plugins"), overwrite_output=False,
+            num_workers=self.num_workers,
+            triage_policy={TriageCategory(c): TriageAction(a) for c, a in policy.items()} if policy else None,
+            parse_timeout=settings.get("parse_timeout"), file_timeout=settings.get("file_timeout"),
+            max_tasks_per_child=self.max_tasks_per_child, max_worker_memory_mb=self.max_worker_memory_mb,
+            result_filters={t: TypeFilterRule(**rule) for t, rule in filters.items()} if filters else None,
+            name_profile=settings.get("name_profile") or NAME_PROFILE_BERT,
+        )
+        return CoreEngine(config), root
+
+    @staticmethod
+    def _resolve(root: pathlib.Path, relative_path: str) -> Optional[pathlib.Path]:
+        """只接受位於掃描根目錄之下的相對路徑。"""
+        path = pathlib.PurePosixPath(relative_path)
+        if path.is_absolute() or ".." in path.parts: return None
+        return root.joinpath(*path.parts)
+
+    def _heartbeat(self, lease_id: str, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            try:
+                if not self._request("POST", "/heartbeat", {"lease_id": lease_id}).get("ok"):
+                    logging.warning(f"租約 {lease_id} 已被協調者收回，完成後的結果可能被忽略。")
+            except (CoordinatorUnavailableError, urllib.error.HTTPError) as e:
+                logging.warning(f"送出心跳失敗: {e}")
+
+    def _process_lease(self, executor, root: pathlib.Path, lease: dict) -> int:
+        paths: dict[pathlib.Path, int] = {}
+        entries = []
+        for file_id, relative_path in lease["files"]:
+            path = self._resolve(root, relative_path)
+            if path is None: entries.append({"id": file_id, "context": None, "error": f"不合法的檔案路徑: {relative_path}"})
+            else: paths[path] = file_id
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease["lease_id"], lease["ttl"] / 3, stop), daemon=True)
+        heartbeat.start()
+        results = []
+        try:
+            for result in executor.imap_unordered(list(paths)):
+                file_id = paths[result.file_path]
+                entries.append({
+                    "id": file_id, "context": context_to_dict(result.file_context) if result.file_context else None,
+                    "error": result.error_message if result.status != "SUCCESS" else None,
+                })
+                results.extend({"id": file_id, **result_to_dict(r, include_context=False)} for r in result.results)
+        finally:
+            stop.set(); heartbeat.join()
+        reply = self._request("POST", "/complete", {"lease_id": lease["lease_id"], "files": entries, "results": results})
+        return reply.get("accepted", 0)
+
+    def run(self) -> int:
+        settings = self._request("GET", "/config")
+        engine, root = self._build_engine(settings)
+        enabled_plugins = engine.plugin_manager.get_enabled(engine.config.enabled_plugins)
+        if not enabled_plugins: logging.error("沒有任何啟用的插件，工作節點結束。"); return 1
+        logging.info(f"工作節點 '{self.worker_id}' 已連線至 {self.base_url}，掃描根目錄: '{root}'。")
+
+        processed = 0
+        with engine.create_executor(enabled_plugins) as executor:
+            while True:
+                try: reply = self._request("POST", "/lease", {"worker_id": self.worker_id, "capacity": executor.num_workers})
+                except CoordinatorUnavailableError as e:
+                    # 協調者在全部完成並關閉後即無法連線，對工作節點而言與收到結束通知相同
+                    logging.warning(f"{e}，工作節點結束。"); break
+                if reply.get("done"): break
+                if "wait" in reply: time.sleep(reply["wait"]); continue
+                processed += self._process_lease(executor, root, reply)
+        logging.info(f"工作節點結束，共回報 {processed} 個檔案的結果。")
+        return 0
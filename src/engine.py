@@ -1,29 +1,92 @@
 # src/engine.py
 
+import argparse
+import contextlib
+import dataclasses
+import json
 import logging
+import mimetypes
 import multiprocessing
 import os
 import pathlib
+import sys
+import tempfile
+import threading
 import time
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import Iterable, Optional, List
+from typing import Callable, Iterable, Optional, List, Mapping, Union
 
 from tqdm import tqdm
 
-from src.shared_data_model import ScanReport, FileContext, FileStatus
+from src.shared_data_model import ScanReport, ScanResult, FileContext, FileStatus, TriageAction, TriageCategory
+from src.plugins.base import TextFeatures
 from src.plugins.manager import PluginManager
 from src.parsers import FileParserDispatcher
-from src.reporting import generate_report
+from src.parsers.located_text import LocatedText
+from src.parsers.mapped_text import MappedText
+from src.parsers.markup import NormalizedText
+from src.parsers.tabular import ColumnPruner, TabularSource
+from src.report_writers import FORMAT_JSONL, FORMAT_XLSX, generate_reports, sample_path_for
+from src.summary import ScanSummary
+from src.boilerplate import BoilerplateModel, is_page, learn_boilerplate
+from src.nlp_cache import DEFAULT_CAPACITY, CacheStats, InferenceCache, model_identity, thread_stats
+from src.name_dictionary import NAME_PROFILE_BERT, NAME_PROFILE_FAST, NAME_PROFILES
+from src.sampling import StratifiedSampler
+from src.prioritizer import prioritize
+from src.executor import InProcessExecutor, SupervisedExecutor
+from src.checkpoint import JournalState, ScanJournal, open_journal
+from src.metrics import MetricsReporter, ScanMetrics
+from src.result_filter import REASON_LABELS, ResultFilter, TypeFilterRule
+from src.manifest import (
+    DeltaPlan, FileStat, FindingChange, CHANGE_ADDED, CHANGE_REMOVED,
+    build_entries, diff_findings, load_manifest, manifest_path_for, new_salt, plan_delta, write_manifest,
+)
+
+EXECUTOR_AUTO = "auto"
+EXECUTOR_PROCESS = "process"
+EXECUTOR_THREAD = "thread"
+EXECUTOR_SERIAL = "serial"
+EXECUTOR_MODES = (EXECUTOR_AUTO, EXECUTOR_PROCESS, EXECUTOR_THREAD, EXECUTOR_SERIAL)
+# auto 模式下，檔案數與總大小都不超過門檻時改在程序內以執行緒處理，省去啟動進程與載入插件的成本
+IN_PROCESS_MAX_FILES = 8
+IN_PROCESS_MAX_BYTES = 32 * 1024 * 1024
+# 超過此大小的純文字檔切成多個位元組範圍，分給多個工作進程平行掃描；每個範圍至少 MIN_RANGE_BYTES
+SPLIT_THRESHOLD_BYTES = 256 * 1024 * 1024
+MIN_RANGE_BYTES = 32 * 1024 * 1024
 
 @dataclass(frozen=True)
 class ScanConfig:
     """從 CLI 傳遞給核心引擎的標準化設定物件"""
     scan_path: pathlib.Path
     output_path: pathlib.Path
-    log_level: str
-    enabled_plugins: Optional[List[str]]
-    overwrite_output: bool
-    num_workers: Optional[int]
+    log_level: str = "INFO"
+    enabled_plugins: Optional[List[str]] = None
+    overwrite_output: bool = False
+    num_workers: Optional[int] = None
+    triage_policy: Optional[Mapping[TriageCategory, TriageAction]] = None
+    parse_timeout: Optional[float] = 120.0
+    file_timeout: Optional[float] = 600.0
+    max_tasks_per_child: Optional[int] = 200
+    max_worker_memory_mb: Optional[float] = 2048.0
+    resume: bool = False
+    checkpoint_interval: float = 30.0
+    since_manifest: Optional[pathlib.Path] = None
+    metrics_port: Optional[int] = None
+    status_file: Optional[pathlib.Path] = None
+    result_filters: Optional[Mapping[str, TypeFilterRule]] = None
+    report_formats: tuple[str, ...] = (FORMAT_XLSX,)
+    summary_depth: int = 2
+    executor_mode: str = EXECUTOR_AUTO
+    boilerplate: bool = False
+    nlp_cache_size: int = DEFAULT_CAPACITY
+    nlp_cache_dir: Optional[pathlib.Path] = None
+    name_profile: str = NAME_PROFILE_BERT
+    sample_fraction: Optional[float] = None  # 設定時為取樣估計模式
+    sample_seconds: Optional[float] = None   # 取樣模式中每層的掃描時間預算
+    prioritize: bool = False
+    time_budget: Optional[float] = None  # 從掃描開始起算的秒數，超過後不再分派新檔案 (隱含 prioritize)
+    split_threshold: Optional[int] = SPLIT_THRESHOLD_BYTES  # 檔案內平行掃描的門檻 (位元組)；None 表示不切分
 
 class MockNlpModel:
     """一個用於演示和測試的模擬 NLP 模型類別。"""
@@ -31,40 +94,272 @@ class MockNlpModel:
         if isinstance(text_or_list, str): return []
         elif isinstance(text_or_list, list): return [[] for _ in text_or_list]
 
+@dataclass(frozen=True)
+class FileRange:
+    """超大型檔案的一個位元組範圍 [start, end)，是檔案內平行掃描的一個任務 (第 index 個，共 count 個)。"""
+    file_path: pathlib.Path; start: int; end: int
+    index: int; count: int
+
 @dataclass
 class WorkerResult:
     status: str; file_path: pathlib.Path
     results: ScanReport = field(default_factory=list); error_message: Optional[str] = None
+    file_context: Optional[FileContext] = None
+    nlp_cache: Optional[CacheStats] = None  # 此檔案的 NLP 推論快取統計
+    seconds: float = 0.0  # 工作進程處理此檔案的時間
+    part: Optional[tuple[int, int]] = None  # 檔案內平行掃描的 (範圍序號, 範圍數)；整個檔案為 None
 
-worker_parser: Optional[FileParserDispatcher] = None
-worker_plugins: Optional[List] = None
+def filter_results(result_filter: Optional[ResultFilter], file_results: ScanReport, file_context: FileContext) -> tuple[ScanReport, FileContext]:
+    """依個資類型過濾一個檔案的結果，被過濾的筆數記錄在 FileContext.suppressed。"""
+    if result_filter and file_results:
+        file_results, suppressed = result_filter.apply(file_results)
+        if suppressed:
+            file_context = dataclasses.replace(file_context, suppressed=tuple((t, r, n) for (t, r), n in sorted(suppressed.items())))
+            file_results = [dataclasses.replace(result, file_context=file_context) for result in file_results]
+    return file_results, file_context
 
-def _initialize_worker(plugins: list):
-    """讓每一個子進程在自己內部建立一個全新的、乾淨的解析器實例。"""
-    global worker_parser, worker_plugins
-    worker_parser = FileParserDispatcher()
-    worker_plugins = plugins
-    logging.getLogger().setLevel(logging.ERROR)
+def merge_range_results(parts: list[WorkerResult], result_filter: Optional[ResultFilter] = None) -> WorkerResult:
+    """
+    把同一個檔案各位元組範圍的結果合併成一個檔案的結果。重疊區的發現只由起點所在的範圍回報，
+    合併時再以 (類型, 位移, 值) 去除殘餘的重複，之後才套用結果過濾 (去重、每檔上限是以整個檔案計算)。
+    所有結果改指向第一個範圍的 FileContext；任一範圍失敗時整個檔案記為錯誤。
+    """
+    parts = sorted(parts, key=lambda result: result.part[0])
+    file_path = parts[0].file_path; seconds = sum(part.seconds for part in parts)
+    cache_stats = None
+    for part in parts:
+        if part.nlp_cache:
+            if cache_stats is None: cache_stats = CacheStats()
+            cache_stats.add(part.nlp_cache)
+    failed = next((part for part in parts if part.status != 'SUCCESS'), None)
+    if failed:
+        return WorkerResult(status='ERROR', file_path=file_path, error_message=f"範圍 {failed.part[0] + 1}/{failed.part[1]}: {failed.error_message}",
+                            nlp_cache=cache_stats, seconds=seconds)
+    file_results: ScanReport = []; seen: set[tuple] = set()
+    for part in parts:
+        for result in part.results:
+            if result.offset is not None:
+                key = (result.pii_type, result.offset, result.matched_value)
+                if key in seen: continue
+                seen.add(key)
+            file_results.append(result)
+    file_results, file_context = filter_results(result_filter, file_results, parts[0].file_context)
+    file_results = [dataclasses.replace(result, file_context=file_context) for result in file_results]
+    return WorkerResult(status='SUCCESS', file_path=file_path, results=file_results, file_context=file_context, nlp_cache=cache_stats, seconds=seconds)
 
-def _scan_single_file_worker(file_path: pathlib.Path) -> WorkerResult:
-    if worker_parser is None or worker_plugins is None:
-        return WorkerResult(status='ERROR', file_path=file_path, error_message="工作進程未被正確初始化。")
-    try:
-        file_context, full_text = worker_parser(file_path)
-        if file_context.status != FileStatus.COMPLETED:
-             return WorkerResult(status='SUCCESS', file_path=file_path)
-        
-        file_results: ScanReport = []
-        for plugin in worker_plugins:
+def _merge_ranges(results: Iterable[WorkerResult], result_filter: Optional[ResultFilter] = None) -> Iterable[WorkerResult]:
+    """整個檔案的結果直接產生；位元組範圍的結果等同一檔案的範圍都完成後合併成一筆。"""
+    pending: dict[pathlib.Path, list[WorkerResult]] = {}
+    for result in results:
+        if result.part is None: yield result; continue
+        parts = pending.setdefault(result.file_path, [])
+        parts.append(result)
+        if len(parts) == result.part[1]: yield merge_range_results(pending.pop(result.file_path), result_filter)
+
+class FileScanner:
+    """
+    對單一檔案 (或已取得的文字) 執行解析、所有插件與結果過濾。
+    多進程模式下每個工作進程各建立一份；程序內模式與 scan_bytes/scan_text 直接沿用主進程已載入的插件。
+    """
+
+    def __init__(self, plugins: list, triage_policy: Optional[Mapping[TriageCategory, TriageAction]] = None, parse_timeout: Optional[float] = None,
+                 metrics: Optional[ScanMetrics] = None, result_filters: Optional[Mapping[str, TypeFilterRule]] = None,
+                 boilerplate: Optional[BoilerplateModel] = None):
+        self.parser = FileParserDispatcher(triage_policy=triage_policy, parse_timeout=parse_timeout)
+        # 低成本的插件先執行 (排序穩定，同成本者維持啟用順序)
+        self.plugins = sorted(plugins, key=lambda plugin: plugin.cost)
+        self.metrics = metrics
+        self.result_filter = ResultFilter(result_filters) if result_filters else None
+        self.boilerplate = boilerplate
+        # 程序內的執行緒共用同一列指標，更新時需要互斥
+        self._metrics_lock = threading.Lock()
+
+    def scan_content(self, full_text: Union[str, MappedText, TabularSource], file_context: FileContext,
+                     apply_filter: bool = True, owned: Optional[Callable[[ScanResult], bool]] = None
+                     ) -> tuple[ScanReport, FileContext, dict[str, int], dict[str, int]]:
+        """
+        以所有適用的插件掃描文字，回傳 (過濾後的結果, 更新後的 FileContext, 各插件命中數, 各插件略過次數)。
+        文字特徵 (數字、中日韓文字、@) 每份文字只計算一次，不可能命中的插件直接略過。
+        網站樣板已學習時，樣板行先換成空白 (位移不變)，出現的區塊記錄在 FileContext.boilerplate_blocks。
+        apply_filter: 只掃描檔案的一部分時為 False，結果過濾留到合併整個檔案之後。
+        owned: 只掃描檔案的一部分時，判斷結果是否屬於這個範圍 (重疊區的結果只算一次)；命中數也只計算保留的結果。
+        """
+        result_filter = self.result_filter if apply_filter else None
+        file_results: ScanReport = []; plugin_hits: dict[str, int] = {}; plugin_skips: dict[str, int] = {}
+        plugins = self.plugins
+        if file_context.triage and file_context.triage.action == TriageAction.REGEX_ONLY:
+            plugins = [plugin for plugin in self.plugins if not plugin.uses_nlp]
+        if isinstance(full_text, TabularSource):
+            file_results, plugin_hits, plugin_skips = self._scan_tabular(full_text, file_context, plugins)
+            return (*filter_results(result_filter, file_results, file_context), plugin_hits, plugin_skips)
+        # 大型檔案會以 MappedText 回傳，交由插件的 scan_mapped 直接在映射緩衝區上掃描
+        is_mapped = isinstance(full_text, MappedText)
+        # 插件實際掃描的文字：{id(原始文字): 去除樣板後的文字}
+        scan_texts = {id(full_text): full_text}
+        if isinstance(full_text, NormalizedText): scan_texts[id(full_text.visible)] = full_text.visible
+        if self.boilerplate and not is_mapped and is_page(file_context.file_path):
+            blocks: set[str] = set()
+            for key, text in scan_texts.items():
+                scan_texts[key], found = self.boilerplate.strip(text, file_context.file_path); blocks |= found
+            if blocks: file_context = dataclasses.replace(file_context, boilerplate_blocks=tuple(sorted(blocks)))
+        features: dict[int, TextFeatures] = {}
+        for plugin in plugins:
+            # 網頁類檔案：NLP 插件只看可見文字；結果位移換算回原始檔案的位元組位置
+            text = full_text.visible if isinstance(full_text, NormalizedText) and plugin.uses_nlp else full_text
+            if id(text) not in features: features[id(text)] = TextFeatures.from_mapped(text) if is_mapped else TextFeatures.from_text(scan_texts[id(text)])
+            if not plugin.is_applicable(file_context, features[id(text)]):
+                plugin_skips[plugin.name] = 1
+                continue
             try:
-                results = plugin.scan(full_text, file_context)
+                results = plugin.scan_mapped(text, file_context) if is_mapped else plugin.scan(scan_texts[id(text)], file_context)
+                if results and isinstance(text, NormalizedText): results = text.with_raw_offsets(results)
+                if results and owned: results = [result for result in results if owned(result)]
+                plugin_hits[plugin.name] = len(results) if results else 0
                 if results: file_results.extend(results)
             except Exception as e:
-                logging.error(f"插件 {plugin.name} 在掃描 {file_path} 時失敗: {e}", exc_info=True)
-        return WorkerResult(status='SUCCESS', file_path=file_path, results=file_results)
-    except Exception as e:
-        error_message = f"處理檔案時發生未知錯誤: {e.__class__.__name__}: {e}"
-        return WorkerResult(status='ERROR', file_path=file_path, error_message=error_message)
+                logging.error(f"插件 {plugin.name} 在掃描 {file_context.file_path} 時失敗: {e}", exc_info=True)
+        # 解析器附帶了段落、儲存格等位置時，把字元位移換成可讀的位置標籤
+        if isinstance(full_text, LocatedText) and file_results: file_results = full_text.with_locations(file_results)
+        # 在序列化回主進程之前依個資類型過濾，減少 IPC 與報告的資料量
+        return (*filter_results(result_filter, file_results, file_context), plugin_hits, plugin_skips)
+
+    def _scan_tabular(self, source: TabularSource, file_context: FileContext, plugins: list) -> tuple[ScanReport, dict[str, int], dict[str, int]]:
+        """
+        SQL 傾印與 CSV 依欄位分批串流掃描，結果的 location 為「資料表.欄位:列號」。
+        取樣足夠的值仍沒有命中的欄位 × 插件不再掃描；所有插件都停止的欄位在讀取時直接略過。
+        """
+        file_results: ScanReport = []; plugin_hits: dict[str, int] = {}
+        pruner = ColumnPruner(plugin.name for plugin in plugins)
+        for batch in source.iter_batches(pruner.skip_column):
+            features = TextFeatures.from_text(batch.text)
+            for plugin in plugins:
+                if pruner.is_pruned(batch.key, plugin.name): pruner.pruned_values += batch.values; continue
+                if not plugin.is_applicable(file_context, features): pruner.record(batch.key, plugin.name, batch.values, 0); continue
+                try: results = plugin.scan(batch.text, file_context)
+                except Exception as e:
+                    logging.error(f"插件 {plugin.name} 在掃描 {file_context.file_path} ({batch.table}.{batch.column}) 時失敗: {e}", exc_info=True)
+                    continue
+                pruner.record(batch.key, plugin.name, batch.values, len(results))
+                plugin_hits[plugin.name] = plugin_hits.get(plugin.name, 0) + len(results)
+                file_results.extend(dataclasses.replace(result, location=batch.text.locate(result.offset), offset=None)
+                                    if result.offset is not None else result for result in results)
+        pruned = pruner.pruned_columns()
+        if pruned: logging.debug(f"檔案 '{file_context.file_path.name}' 有 {len(pruned)} 個欄位在取樣後未再掃描: {', '.join(pruned[:20])}")
+        return file_results, plugin_hits, {plugin.name: 1 for plugin in plugins if plugin.name not in plugin_hits}
+
+    def scan_file(self, task: Union[pathlib.Path, FileRange]) -> WorkerResult:
+        """執行器的一個任務：整個檔案，或超大型檔案的一個位元組範圍。"""
+        # NLP 推論快取的統計以執行緒為單位累計，取掃描前後的差值即為此檔案的統計
+        cache_before = dataclasses.replace(thread_stats())
+        started = time.perf_counter()
+        result = self._scan_range(task) if isinstance(task, FileRange) else self._scan_file(task)
+        cache_stats = thread_stats().minus(cache_before)
+        return dataclasses.replace(result, nlp_cache=cache_stats if cache_stats.lookups else None, seconds=time.perf_counter() - started)
+
+    def _scan_file(self, file_path: pathlib.Path) -> WorkerResult:
+        size_bytes = 0; plugin_hits: dict[str, int] = {}; plugin_skips: dict[str, int] = {}
+        if self.metrics:
+            with self._metrics_lock: self.metrics.file_started(file_path)
+        try:
+            file_context, full_text = self.parser(file_path)
+            size_bytes = file_context.file_size_bytes
+            if file_context.status != FileStatus.COMPLETED:
+                return WorkerResult(status='SUCCESS', file_path=file_path, file_context=file_context)
+            try: file_results, file_context, plugin_hits, plugin_skips = self.scan_content(full_text, file_context)
+            finally:
+                if isinstance(full_text, MappedText): full_text.close()
+            return WorkerResult(status='SUCCESS', file_path=file_path, results=file_results, file_context=file_context)
+        except Exception as e:
+            error_message = f"處理檔案時發生未知錯誤: {e.__class__.__name__}: {e}"
+            return WorkerResult(status='ERROR', file_path=file_path, error_message=error_message)
+        finally:
+            if self.metrics:
+                with self._metrics_lock: self.metrics.file_finished(size_bytes, plugin_hits, plugin_skips)
+
+    def _scan_range(self, task: FileRange) -> WorkerResult:
+        """
+        掃描超大型檔案的一個位元組範圍 (加上重疊區)，只保留起點落在範圍內的結果，位移為檔案中的絕對位置。
+        結果過濾要在合併所有範圍後才套用；指標只累計此範圍的位元組與命中數，檔案數由主進程在合併後計算。
+        """
+        size_bytes = 0; plugin_hits: dict[str, int] = {}; plugin_skips: dict[str, int] = {}
+        part = (task.index, task.count)
+        if self.metrics:
+            with self._metrics_lock: self.metrics.file_started(task.file_path)
+        try:
+            file_context, full_text = self.parser(task.file_path)
+            try:
+                # 規劃之後檔案被換成較小的內容時不再走 mmap 路徑，改由第一個範圍整份掃描
+                if file_context.status != FileStatus.COMPLETED or (task.index and not isinstance(full_text, MappedText)):
+                    return WorkerResult(status='SUCCESS', file_path=task.file_path, file_context=file_context, part=part)
+                owned = None
+                if isinstance(full_text, MappedText):
+                    full_text.restrict(task.start, task.end); size_bytes = full_text.owned_end - full_text.start
+                    owned = lambda result: full_text.owns(result.offset) if result.offset is not None else task.index == 0
+                else: size_bytes = file_context.file_size_bytes
+                file_results, file_context, plugin_hits, plugin_skips = self.scan_content(full_text, file_context, apply_filter=False, owned=owned)
+            finally:
+                if isinstance(full_text, MappedText): full_text.close()
+            return WorkerResult(status='SUCCESS', file_path=task.file_path, results=file_results, file_context=file_context, part=part)
+        except Exception as e:
+            error_message = f"處理檔案時發生未知錯誤: {e.__class__.__name__}: {e}"
+            return WorkerResult(status='ERROR', file_path=task.file_path, error_message=error_message, part=part)
+        finally:
+            if self.metrics:
+                with self._metrics_lock: self.metrics.file_finished(size_bytes, plugin_hits, plugin_skips, part=part)
+
+
+worker_scanner: Optional[FileScanner] = None
+
+def _initialize_worker(plugins: list, triage_policy: Optional[Mapping[TriageCategory, TriageAction]] = None, parse_timeout: Optional[float] = None,
+                       metrics: Optional[ScanMetrics] = None, result_filters: Optional[Mapping[str, TypeFilterRule]] = None,
+                       boilerplate: Optional[BoilerplateModel] = None):
+    """讓每一個子進程在自己內部建立一個全新的、乾淨的解析器實例。"""
+    global worker_scanner
+    worker_scanner = FileScanner(plugins, triage_policy, parse_timeout, metrics, result_filters, boilerplate)
+    if metrics: metrics.claim_row()
+    logging.getLogger().setLevel(logging.ERROR)
+
+def _scan_single_file_worker(task: Union[pathlib.Path, FileRange]) -> WorkerResult:
+    if worker_scanner is None:
+        return _make_failure_result(task, "工作進程未被正確初始化。")
+    return worker_scanner.scan_file(task)
+
+
+def _make_failure_result(task: Union[pathlib.Path, FileRange], reason: str) -> WorkerResult:
+    """由執行器在主進程中呼叫，為超時或工作進程崩潰的檔案 (或檔案的一個範圍) 產生錯誤結果。"""
+    if isinstance(task, FileRange): return WorkerResult(status='ERROR', file_path=task.file_path, error_message=reason, part=(task.index, task.count))
+    return WorkerResult(status='ERROR', file_path=task, error_message=reason)
+
+
+def _walk_files(root: pathlib.Path) -> Iterable[tuple[pathlib.Path, FileStat]]:
+    """以 os.scandir 走訪目錄，直接取用目錄項目的 stat 結果。"""
+    for entry in _walk_entries(root):
+        try:
+            stat = entry.stat()
+            yield pathlib.Path(entry.path), (stat.st_size, stat.st_mtime_ns)
+        except OSError as e: logging.debug(f"無法讀取 '{entry.path}' 的檔案資訊: {e}")
+
+
+def _walk_entries(root: pathlib.Path) -> Iterable[os.DirEntry]:
+    """
+    逐一產生檔案的目錄項目，不對檔案呼叫 stat (類型取自目錄項目本身)，可邊走訪邊處理。
+    符號連結的目錄會跟隨，但每個目錄只走訪一次。
+    """
+    stack = [root]; visited: set[tuple[int, int]] = set()
+    while stack:
+        directory = stack.pop()
+        try:
+            stat = directory.stat()
+            if (stat.st_dev, stat.st_ino) in visited: continue
+            visited.add((stat.st_dev, stat.st_ino))
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(): stack.append(pathlib.Path(entry.path))
+                        elif entry.is_file(): yield entry
+                    except OSError as e: logging.debug(f"無法讀取 '{entry.path}' 的檔案資訊: {e}")
+        except OSError as e:
+            logging.warning(f"無法列出目錄 '{directory}': {e}")
 
 
 class CoreEngine:
@@ -72,13 +367,23 @@ class CoreEngine:
     # 核心引擎初始化
     def __init__(self, config: ScanConfig):
         self.config = config
+        self._scanner: Optional[FileScanner] = None
+        self._scanner_lock = threading.Lock()
         self._initialize_components()
 
     def _initialize_components(self):
         logging.info("正在初始化核心引擎元件...")
-        nlp_model = self._load_nlp_model()
+        nlp_cache = None
+        if self.config.name_profile == NAME_PROFILE_FAST:
+            logging.info("姓名掃描設定檔為 fast：以字典比對姓名，不載入 NLP 模型。")
+            nlp_model = MockNlpModel()
+        else:
+            nlp_model = self._load_nlp_model()
+            if self.config.nlp_cache_size or self.config.nlp_cache_dir:
+                nlp_cache = InferenceCache(model_identity(nlp_model), self.config.nlp_cache_size, self.config.nlp_cache_dir)
         plugins_path = pathlib.Path(__file__).parent / "plugins"
-        self.plugin_manager = PluginManager(plugin_dir=plugins_path, dependencies={'nlp_model': nlp_model})
+        self.plugin_manager = PluginManager(plugin_dir=plugins_path, dependencies={
+            'nlp_model': nlp_model, 'nlp_cache': nlp_cache, 'name_profile': self.config.name_profile})
         self.file_parser = FileParserDispatcher()
         logging.info("核心元件初始化完成。")
     
@@ -97,54 +402,362 @@ class CoreEngine:
     
     # 檔案探索與掃描
     def _discover_files(self) -> List[pathlib.Path]:
+        """探索檔案，同時記錄每個檔案的 (大小, 修改時間) 供掃描清單與差異掃描使用。"""
         path = self.config.scan_path
         logging.info(f"開始在 '{path}' 中探索檔案...")
-        if path.is_file(): files = [path]
-        else: files = [f for f in path.rglob('*') if f.is_file()]
+        if path.is_file():
+            stat = path.stat(); self._file_stats = {path: (stat.st_size, stat.st_mtime_ns)}
+        else: self._file_stats = dict(_walk_files(path))
+        files = list(self._file_stats)
         logging.info(f"檔案探索完成，共找到 {len(files)} 個檔案。")
         return files
 
+    @property
+    def _scan_root(self) -> pathlib.Path:
+        path = self.config.scan_path
+        return path if path.is_dir() else path.parent
+
+    def _plan_delta(self, files: List[pathlib.Path]) -> List[pathlib.Path]:
+        """指定 --since-manifest 時，只回傳新增或內容有變動的檔案。新清單沿用上一份清單的鹽值，否則產生新的鹽值。"""
+        self._delta: Optional[DeltaPlan] = None
+        self._manifest_salt = new_salt()
+        if not self.config.since_manifest: return files
+        previous, self._manifest_salt = load_manifest(self.config.since_manifest)
+        self._delta = plan_delta(previous, self._scan_root, self._file_stats)
+        return self._delta.to_scan
+
+    def _build_manifest(self, all_results: ScanReport, file_contexts: list[FileContext]) -> tuple[dict, Optional[list[FindingChange]]]:
+        """建立本次的掃描清單項目 (含沿用的項目)；差異掃描時一併計算與上次相比新增/移除的發現。"""
+        entries = build_entries(self._scan_root, self._file_stats, file_contexts, all_results, self._manifest_salt,
+                                self._delta.hashes if self._delta else None)
+        if not self._delta: return entries, None
+        entries = {**self._delta.carried, **entries}
+        changes = diff_findings(self._delta.previous, entries, self._scan_root, self._file_stats, all_results, self._manifest_salt)
+        counts = Counter(change.change for change in changes)
+        logging.info(f"差異比對：新增 {counts[CHANGE_ADDED]} 筆、移除 {counts[CHANGE_REMOVED]} 筆個資。")
+        return entries, changes
+
+    def _start_summary(self, resumed: JournalState) -> ScanSummary:
+        """建立摘要統計，並先累加從日誌接續的已完成檔案。"""
+        summary = ScanSummary(self._scan_root, directory_depth=self.config.summary_depth)
+        summary.add_report(resumed.completed, resumed.results)
+        return summary
+
+    def _plan_ranges(self, file_path: pathlib.Path, max_ranges: int) -> Optional[list[tuple[int, int]]]:
+        """超過門檻的純文字檔回傳要分別掃描的位元組範圍；其他檔案回傳 None。"""
+        threshold = self.config.split_threshold
+        if threshold is None or self._file_stats.get(file_path, (0, 0))[0] < threshold: return None
+        return self.file_parser.plan_ranges(file_path, MIN_RANGE_BYTES, max_ranges)
+
+    def _select_executor_mode(self, files: List[pathlib.Path]) -> str:
+        mode = self.config.executor_mode
+        if mode != EXECUTOR_AUTO: return mode
+        if len(files) > IN_PROCESS_MAX_FILES: return EXECUTOR_PROCESS
+        total_bytes = sum(self._file_stats.get(file_path, (0, 0))[0] for file_path in files)
+        if total_bytes > IN_PROCESS_MAX_BYTES: return EXECUTOR_PROCESS
+        # 執行緒無法被終止，也收不到 SIGALRM：設有檔案時間上限時仍用工作進程，只有解析時間上限時在主執行緒逐一掃描
+        if self.config.file_timeout: return EXECUTOR_PROCESS
+        return EXECUTOR_SERIAL if self.config.parse_timeout else EXECUTOR_THREAD
+
+    def create_executor(self, enabled_plugins: list, metrics: Optional[ScanMetrics] = None, mode: str = EXECUTOR_PROCESS,
+                        boilerplate: Optional[BoilerplateModel] = None, num_workers: Optional[int] = None) -> Union[SupervisedExecutor, InProcessExecutor]:
+        num_processes = num_workers or self.config.num_workers or os.cpu_count()
+        if mode in (EXECUTOR_THREAD, EXECUTOR_SERIAL):
+            # 程序內執行：直接使用已載入的插件，不啟動進程；執行緒無法被終止，因此不套用單檔處理時間上限
+            num_threads = 1 if mode == EXECUTOR_SERIAL else num_processes
+            logging.info(f"將在程序內以 {num_threads} 個執行緒進行掃描。")
+            if metrics: metrics.claim_row()
+            scanner = FileScanner(enabled_plugins, self.config.triage_policy, self.config.parse_timeout, metrics, self.config.result_filters, boilerplate)
+            return InProcessExecutor(scanner.scan_file, num_workers=num_threads, on_failure=_make_failure_result)
+        # 受監督的執行器：單檔超時會強制終止並隔離重試，工作進程依任務數與記憶體用量定期回收
+        logging.info(f"將使用 {num_processes} 個平行進程進行掃描。")
+        return SupervisedExecutor(
+            _scan_single_file_worker, num_workers=num_processes, on_failure=_make_failure_result,
+            initializer=_initialize_worker,
+            initargs=(enabled_plugins, self.config.triage_policy, self.config.parse_timeout, metrics, self.config.result_filters, boilerplate),
+            task_timeout=self.config.file_timeout, max_tasks_per_child=self.config.max_tasks_per_child,
+            max_rss_mb=self.config.max_worker_memory_mb)
+
+    def _learn_boilerplate(self, files: List[pathlib.Path]) -> Optional[BoilerplateModel]:
+        """--boilerplate：在主進程取樣網頁，學習各網站的樣板區塊。"""
+        def read_text(file_path: pathlib.Path) -> Optional[str]:
+            try: file_context, text = self.file_parser(file_path)
+            except Exception as e:
+                logging.debug(f"學習樣板時無法讀取 '{file_path}': {e}"); return None
+            if isinstance(text, MappedText): text.close(); return None
+            return text if file_context.status == FileStatus.COMPLETED else None
+        started = time.perf_counter()
+        model = learn_boilerplate(files, self._scan_root, read_text)
+        logging.info(f"樣板學習完成: {len(model.lines)} 個網站、{len(model.blocks)} 個樣板區塊，耗時 {time.perf_counter() - started:.2f} 秒。")
+        return model or None
+
+    def _scan_boilerplate_blocks(self, model: BoilerplateModel, enabled_plugins: list, file_contexts: list[FileContext]) -> ScanReport:
+        """每個出現過的樣板區塊只掃描一次，發現附在路徑最前面的頁面上，location 標示出現的頁數。"""
+        page_counts: Counter = Counter(); first_pages: dict[str, FileContext] = {}
+        for ctx in file_contexts:
+            for block_id in ctx.boilerplate_blocks:
+                page_counts[block_id] += 1
+                if block_id not in first_pages or ctx.file_path < first_pages[block_id].file_path: first_pages[block_id] = ctx
+        scanner = FileScanner(enabled_plugins, self.config.triage_policy, self.config.parse_timeout, result_filters=self.config.result_filters)
+        results: ScanReport = []
+        for block_id, pages in sorted(page_counts.items()):
+            block_results, _, _, _ = scanner.scan_content(model.blocks[block_id].text, first_pages[block_id])
+            results.extend(dataclasses.replace(result, offset=None, location=f"樣板區塊 {block_id} (出現於 {pages} 頁)") for result in block_results)
+        saved = sum(len(model.blocks[block_id].text) * (pages - 1) for block_id, pages in page_counts.items())
+        logging.info(f"樣板去除: {len(page_counts)} 個區塊出現於 {sum(1 for ctx in file_contexts if ctx.boilerplate_blocks)} 個頁面，"
+                     f"約少掃描 {saved} 字元；樣板區塊共 {len(results)} 筆發現 (各只回報一次)。")
+        return results
+
     # 掃描過程的核心(平行處理)
-    def _run_parallel_processing(self, files_to_scan: List[pathlib.Path], enabled_plugins: list) -> tuple[ScanReport, list[dict]]:
+    def _run_parallel_processing(self, files_to_scan: List[pathlib.Path], enabled_plugins: list,
+                                 journal: Optional[ScanJournal] = None, summary: Optional[ScanSummary] = None,
+                                 deadline: Optional[float] = None) -> tuple[ScanReport, list[dict], list[FileContext]]:
+        """
+        deadline (time.perf_counter 的時間點) 之後不再分派新檔案，其餘檔案以「待處理」狀態列入檔案清單。
+        超過 split_threshold 的純文字檔切成多個位元組範圍分別分派，完成後合併成一個檔案的結果。
+        """
         total_files = len(files_to_scan)
-        num_processes = self.config.num_workers or os.cpu_count()
-        logging.info(f"將使用 {num_processes} 個平行進程進行掃描。")
-        chunksize = max(1, total_files // (num_processes * 4)) if total_files > 0 else 1
-        all_results: ScanReport = []; files_with_errors = []
+        all_results: ScanReport = []; files_with_errors = []; file_contexts: list[FileContext] = []
+        unscanned: list[pathlib.Path] = []; split_files: list[pathlib.Path] = []
+        mode = self._select_executor_mode(files_to_scan)
+        max_ranges = 2 * (self.config.num_workers or os.cpu_count() or 1)
+
+        def scheduled() -> Iterable[Union[pathlib.Path, FileRange]]:
+            for index, file_path in enumerate(files_to_scan):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    unscanned.extend(files_to_scan[index:]); return
+                ranges = self._plan_ranges(file_path, max_ranges) if mode != EXECUTOR_SERIAL else None
+                if not ranges: yield file_path; continue
+                split_files.append(file_path)
+                yield from (FileRange(file_path, start, end, part, len(ranges)) for part, (start, end) in enumerate(ranges))
 
-        with multiprocessing.Pool(processes=num_processes, initializer=_initialize_worker, initargs=(enabled_plugins,)) as pool:
-            results_iterator = pool.imap_unordered(_scan_single_file_worker, files_to_scan, chunksize=chunksize)
+        metrics = None
+        if self.config.metrics_port is not None or self.config.status_file is not None:
+            # 每列對應一個工作進程；保留額外的列給隔離重試與回收交接中的進程
+            num_processes = self.config.num_workers or os.cpu_count()
+            metrics = ScanMetrics([plugin.name for plugin in enabled_plugins], rows=num_processes * 2 + 2)
+            metrics.files_total = total_files
+        reporter = MetricsReporter(metrics, port=self.config.metrics_port, status_file=self.config.status_file) if metrics else contextlib.nullcontext()
+        boilerplate = self._learn_boilerplate(files_to_scan) if self.config.boilerplate else None
+        with self.create_executor(enabled_plugins, metrics, mode, boilerplate) as executor, reporter:
+            result_filter = ResultFilter(self.config.result_filters) if self.config.result_filters else None
+            results_iterator = _merge_ranges(executor.imap_unordered(scheduled()), result_filter)
             progress_bar = tqdm(results_iterator, total=total_files, desc="掃描進度", unit="file")
             
             for result in progress_bar:
+                if metrics:
+                    metrics.files_completed += 1
+                    if result.status != 'SUCCESS': metrics.errors += 1
+                if journal: journal.record(result.file_path, result.file_context, result.error_message if result.status != 'SUCCESS' else None, result.results)
+                if summary:
+                    summary.add_file(result.file_path, result.results if result.status == 'SUCCESS' else [])
+                    if result.nlp_cache: summary.nlp_cache.add(result.nlp_cache)
+                if result.file_context: file_contexts.append(result.file_context)
                 if result.status == 'SUCCESS':
-                    if result.results: all_results.extend(result.results)
+                    if result.results:
+                        all_results.extend(result.results)
+                        progress_bar.set_postfix_str(f"發現 {len(all_results)} 筆", refresh=False)
                 else:
                     files_with_errors.append({'path': result.file_path, 'error': result.error_message})
                     logging.warning(f"處理檔案 '{result.file_path}' 時發生錯誤: {result.error_message}")
-        return all_results, files_with_errors
+        if split_files: logging.info(f"{len(split_files)} 個超大型檔案切成位元組範圍平行掃描 (最多 {max_ranges} 個範圍)。")
+        if unscanned:
+            logging.warning(f"已達時間預算，{len(unscanned)} 個檔案未掃描 (以「待處理」狀態列於檔案清單)。")
+            for file_path in unscanned:
+                file_contexts.append(FileContext(file_path=file_path, mime_type=mimetypes.guess_type(file_path.name)[0] or "application/octet-stream",
+                                                 file_size_bytes=self._file_stats.get(file_path, (0, 0))[0], status=FileStatus.PENDING,
+                                                 error_message="超過時間預算，尚未掃描"))
+            if summary: summary.files_not_scanned += len(unscanned)
+        stats = executor.stats
+        if stats['retried'] or stats['recycled']:
+            logging.info(f"工作進程統計: 隔離重試 {stats['retried']} 次、重試後仍失敗 {stats['failed']} 個、回收進程 {stats['recycled']} 次。")
+        if metrics:
+            skipped = {name: plugin['skipped'] for name, plugin in metrics.snapshot()['plugins'].items() if plugin['skipped']}
+            if skipped: logging.info("插件略過統計 (不可能命中的檔案): " + "、".join(f"{name} {count} 個" for name, count in skipped.items()))
+        if boilerplate:
+            block_results = self._scan_boilerplate_blocks(boilerplate, enabled_plugins, file_contexts)
+            all_results.extend(block_results)
+            if summary:
+                for result in block_results: summary.add_extra_findings(result.file_context.file_path, [result])
+        return all_results, files_with_errors, file_contexts
 
     # 掃描結果處理與報告產製
-    def _finalize_scan(self, all_results: ScanReport, files_with_errors: list[dict], start_time: float):
+    def _finalize_scan(self, all_results: ScanReport, files_with_errors: list[dict], file_contexts: list[FileContext], start_time: float,
+                       summary: Optional[ScanSummary] = None) -> bool:
+        """回傳報告是否成功產生。"""
         end_time = time.perf_counter()
         logging.info(f"所有檔案掃描完成，耗時 {end_time - start_time:.2f} 秒。")
         logging.info(f"共發現 {len(all_results)} 筆個人資料。")
         if files_with_errors: logging.warning(f"有 {len(files_with_errors)} 個檔案處理失敗。")
+        triage_counts = Counter((ctx.triage.category.value, ctx.triage.action.value) for ctx in file_contexts if ctx.triage)
+        for (category, action), count in sorted(triage_counts.items()):
+            logging.info(f"分流統計: {category} → {action}: {count} 個檔案。")
+        suppressed_counts = Counter()
+        for ctx in file_contexts:
+            for pii_type, reason, count in ctx.suppressed: suppressed_counts[(pii_type, reason)] += count
+        for (pii_type, reason), count in sorted(suppressed_counts.items()):
+            logging.info(f"結果過濾: {pii_type} 因{REASON_LABELS.get(reason, reason)}略過 {count} 筆。")
+        if summary and summary.nlp_cache.lookups:
+            cache = summary.nlp_cache
+            logging.info(f"NLP 推論快取: 命中 {cache.hits}/{cache.lookups} 個分段 ({cache.hit_rate:.1%}，其中磁碟 {cache.disk_hits})，"
+                         f"推論耗時 {cache.inference_seconds:.1f} 秒，估計節省 {cache.saved_seconds:.1f} 秒。")
+        if summary:
+            for prefix, _, pii_type, count, files in summary.directory_rows()[:5]:
+                logging.info(f"熱點目錄: '{prefix}' 有 {count} 筆 {pii_type} (分布於 {files} 個檔案)。")
+        manifest_entries, changes = self._build_manifest(all_results, file_contexts)
         
-        if all_results or not files_with_errors:
-            logging.info(f"正在產生報告至 {self.config.output_path}...")
-            generate_report(all_results, self.config.output_path)
+        if all_results or not files_with_errors or changes:
+            logging.info(f"正在產生報告 ({', '.join(self.config.report_formats)}) 至 {self.config.output_path}...")
+            if not generate_reports(all_results, self.config.output_path, self.config.report_formats, file_contexts, changes, summary): return False
             logging.info("報告產生完畢。")
-        else:
-            logging.info("未發現任何個人資料，且有檔案處理失敗，故不產生報告。")
+            # 清單在報告成功後才寫出，下次差異掃描以它為基準
+            write_manifest(manifest_path_for(self.config.output_path), self._scan_root, manifest_entries.values(), self._manifest_salt)
+            return True
+        logging.info("未發現任何個人資料，且有檔案處理失敗，故不產生報告。")
+        return False
     
+    # --- 嵌入式 API：沿用已載入的插件，在呼叫端的執行緒中掃描單一內容 ---
+    def _embedded_scanner(self) -> FileScanner:
+        with self._scanner_lock:
+            if self._scanner is None:
+                plugins = self.plugin_manager.get_enabled(self.config.enabled_plugins)
+                self._scanner = FileScanner(plugins, self.config.triage_policy, self.config.parse_timeout, result_filters=self.config.result_filters)
+            return self._scanner
+
+    def scan_text(self, text: str, filename: str = "<text>") -> ScanReport:
+        """掃描一段已取得的文字 (不經過解析器與分流)，回傳過濾後的發現。可由多個執行緒同時呼叫。"""
+        file_context = FileContext(file_path=pathlib.Path(filename), mime_type="text/plain", file_size_bytes=len(text.encode('utf-8')),
+                                   status=FileStatus.COMPLETED, encoding="utf-8")
+        results, _, _, _ = self._embedded_scanner().scan_content(text, file_context)
+        return results
+
+    def scan_bytes(self, data: bytes, filename: str, executor: Optional[SupervisedExecutor] = None) -> WorkerResult:
+        """
+        掃描一份檔案內容 (例如上傳的文件)，依 filename 的副檔名選擇解析器。
+        內容會寫入暫存檔後交給解析器，回傳結果中的檔案路徑為 filename。
+        指定 executor 時在它的工作進程中解析與掃描 (套用解析與處理時間上限)，否則在呼叫端的執行緒中掃描。
+        """
+        file_path = pathlib.Path(filename)
+        fd, temp_name = tempfile.mkstemp(suffix=file_path.suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f: f.write(data)
+            temp_path = pathlib.Path(temp_name)
+            result = next(executor.imap_unordered([temp_path])) if executor else self._embedded_scanner().scan_file(temp_path)
+        finally:
+            os.unlink(temp_name)
+        if result.file_context is None: return dataclasses.replace(result, file_path=file_path)
+        file_context = dataclasses.replace(result.file_context, file_path=file_path)
+        return dataclasses.replace(result, file_path=file_path, file_context=file_context,
+                                   results=[dataclasses.replace(res, file_context=file_context) for res in result.results])
+
+    # 取樣估計模式
+    def _run_sample(self, enabled_plugins: list, start_time: float):
+        """--sample：邊走訪邊分層取樣掃描，外推各類型與各目錄的個資筆數，不寫日誌與掃描清單。"""
+        root = self._scan_root
+        sampler = StratifiedSampler(root, self.config.sample_fraction, self.config.sample_seconds)
+        files = [self.config.scan_path] if self.config.scan_path.is_file() else (pathlib.Path(entry.path) for entry in _walk_entries(root))
+        summary = ScanSummary(root, directory_depth=self.config.summary_depth)
+        all_results: ScanReport = []; files_with_errors = []; file_contexts: list[FileContext] = []
+        logging.info(f"取樣模式：每個檔案以 {self.config.sample_fraction:.2%} 的機率選中"
+                     + (f"，每層 (第一層目錄 × 副檔名) 的掃描時間預算 {self.config.sample_seconds:g} 秒。" if self.config.sample_seconds else "。"))
+        # 檔案數未知，auto 一律使用工作進程
+        mode = EXECUTOR_PROCESS if self.config.executor_mode == EXECUTOR_AUTO else self.config.executor_mode
+        with self.create_executor(enabled_plugins, mode=mode) as executor:
+            for result in tqdm(executor.imap_unordered(sampler.select(files)), desc="取樣掃描", unit="file"):
+                succeeded = result.status == 'SUCCESS'
+                sampler.record(result.file_path, result.results if succeeded else None, result.seconds)
+                summary.add_file(result.file_path, result.results if succeeded else [])
+                if result.file_context: file_contexts.append(result.file_context)
+                if succeeded: all_results.extend(result.results)
+                else: files_with_errors.append({'path': result.file_path, 'error': result.error_message})
+        sample = sampler.to_dict()
+        logging.info(f"取樣完成: 走訪 {sample['files']} 個檔案，掃描 {sample['scanned']} 個，耗時 {time.perf_counter() - start_time:.2f} 秒。")
+        for estimate in sample['estimates']:
+            logging.info(f"估計 {estimate['pii_type']}: 約 {estimate['estimated']:.0f} 筆 (95% 信賴區間 {estimate['ci95_low']:.0f}–{estimate['ci95_high']:.0f}，樣本中 {estimate['observed']} 筆)。")
+        for rank, row in enumerate(sample['recommended_directories'][:10], 1):
+            note = f"，{row['unsampled_files']} 個檔案所在的層未取樣" if row['unsampled_files'] else ""
+            logging.info(f"建議完整掃描 #{rank}: '{row['directory']}' 估計 {row['estimated_total']:.0f} 筆 ({row['files']} 個檔案、已掃描 {row['scanned']} 個{note})。")
+        sample_path = sample_path_for(self.config.output_path)
+        sampler.write_json(sample_path)
+        logging.info(f"已寫出取樣估計: {sample_path}")
+        generate_reports(all_results, self.config.output_path, self.config.report_formats, file_contexts, None, summary)
+
     # main 的入口
     def run_scan(self):
         start_time = time.perf_counter()
         logging.info("掃描任務開始。")
         enabled_plugins = self.plugin_manager.get_enabled(self.config.enabled_plugins)
         if not enabled_plugins: logging.warning("沒有任何啟用的插件，掃描終止。"); return
+        if self.config.sample_fraction is not None: self._run_sample(enabled_plugins, start_time); return
         files_to_scan = self._discover_files()
         if not files_to_scan: logging.warning("在指定路徑下未找到任何檔案，掃描終止。"); return
-        all_results, files_with_errors = self._run_parallel_processing(files_to_scan, enabled_plugins)
-        self._finalize_scan(all_results, files_with_errors, start_time)
\ No newline at end of file
+        files_to_scan = self._plan_delta(files_to_scan)
+        journal, resumed = open_journal(self.config.output_path, self.config.scan_path, self.config.resume, self.config.checkpoint_interval)
+        deadline = start_time + self.config.time_budget if self.config.time_budget else None
+        with journal:
+            files_to_scan = [f for f in files_to_scan if f not in resumed.completed]
+            if self.config.prioritize or deadline is not None:
+                files_to_scan = prioritize(files_to_scan, self._file_stats, self._scan_root)
+                if files_to_scan: logging.info(f"已依風險排定掃描順序，最優先: '{files_to_scan[0]}'。")
+            all_results, files_with_errors, file_contexts = resumed.results, resumed.files_with_errors, resumed.file_contexts
+            summary = self._start_summary(resumed)
+            if files_to_scan:
+                new_results, new_errors, new_contexts = self._run_parallel_processing(files_to_scan, enabled_plugins, journal, summary, deadline)
+                all_results += new_results; files_with_errors += new_errors; file_contexts += new_contexts
+        journal.log_stats(time.perf_counter() - start_time)
+        unscanned = summary.files_not_scanned
+        # 日誌在報告成功產生後才刪除；報告產生失敗時可以 --resume 直接重新產生報告，不必重新掃描
+        # 有檔案因時間預算未掃描時保留日誌，之後可以 --resume 只掃描剩下的檔案
+        if self._finalize_scan(all_results, files_with_errors, file_contexts, start_time, summary):
+            if unscanned: logging.info(f"部分報告已產生；以 --resume 重新執行即可只掃描其餘 {unscanned} 個檔案。")
+            else: journal.remove()
+
+
+# --- 基準測試：python -m src.engine benchmark 路徑 ---
+def _read_findings(output_path: pathlib.Path) -> set[tuple]:
+    if not output_path.exists(): return set()
+    with open(output_path, encoding='utf-8') as f:
+        return {(row['file_path'], row['pii_type'], row['offset'], row['matched_value']) for row in map(json.loads, f)}
+
+
+def run_benchmark(path: pathlib.Path, workers: int, split_threshold: int, name_profile: str) -> int:
+    """在只有一個 (或少數) 超大型檔案的目錄樹上，比較整份由單一工作進程掃描與檔案內平行掃描的端對端時間。"""
+    files = [path] if path.is_file() else [file_path for file_path, _ in _walk_files(path)]
+    total_bytes = sum(file_path.stat().st_size for file_path in files)
+    print(f"測試路徑: {path} ({len(files)} 個檔案，{total_bytes / 2**20:,.1f} MB)，{workers} 個工作進程")
+    timings: dict[str, float] = {}; findings: dict[str, set] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for label, threshold in (("整份掃描", None), ("檔案內平行", split_threshold)):
+            output_path = pathlib.Path(directory) / f"{len(timings)}.jsonl"
+            # 不切分時單一檔案可能超過預設的處理時間上限，兩種方式都不設限以便比較
+            config = ScanConfig(scan_path=path.resolve(), output_path=output_path, log_level="WARNING", num_workers=workers,
+                                executor_mode=EXECUTOR_PROCESS, file_timeout=None, report_formats=(FORMAT_JSONL,),
+                                name_profile=name_profile, split_threshold=threshold)
+            engine = CoreEngine(config)
+            started = time.perf_counter(); engine.run_scan(); timings[label] = time.perf_counter() - started
+            findings[label] = _read_findings(output_path)
+            print(f"{label:8s} {timings[label]:9.2f} 秒  {total_bytes / 2**20 / timings[label]:8.1f} MB/s  {len(findings[label])} 筆發現")
+    baseline, parallel = timings.values()
+    print(f"加速 {baseline / max(parallel, 1e-9):.2f}x；兩種方式的發現{'一致' if len(set(map(frozenset, findings.values()))) == 1 else '不一致'}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.engine", description="檔案內平行掃描的端對端基準測試 (與整份由單一工作進程掃描比較)")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("path", type=pathlib.Path, help="測試用的超大型純文字檔 (例如應用程式日誌)，或只含少數這類檔案的目錄。")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="工作進程數。預設為 CPU 核心數。")
+    parser.add_argument("--split-threshold", dest="split_threshold_mb", type=float, default=SPLIT_THRESHOLD_BYTES / 2**20, metavar="MB",
+                        help=f"檔案內平行掃描的門檻 (MB)。預設為 {SPLIT_THRESHOLD_BYTES // 2**20}。")
+    parser.add_argument("--name-profile", dest="name_profile", choices=NAME_PROFILES, default=NAME_PROFILE_FAST,
+                        help="姓名掃描設定檔。預設為 fast (不載入 NLP 模型)。")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    if not args.path.exists(): parser.error(f"找不到路徑: '{args.path}'")
+    if args.workers < 1 or args.split_threshold_mb <= 0: parser.error("--workers 與 --split-threshold 必須大於 0。")
+    return run_benchmark(args.path, args.workers, int(args.split_threshold_mb * 2**20), args.name_profile)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
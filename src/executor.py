@@ -0,0 +1,278 @@
+# src/executor.py
+"""
+受監督的多進程執行器
+
+取代 multiprocessing.Pool.imap_unordered，提供 Pool 沒有的保護機制：
+- 單一任務時間上限：超時的工作進程會被強制終止並重新啟動，任務改在全新的進程中「隔離重試」一次，
+  仍然超時才回報為錯誤，整體掃描不會卡在單一檔案上。
+- 工作進程回收：處理一定數量的任務，或常駐記憶體 (RSS) 超過上限後自動退出並由新進程取代，
+  避免 fitz/openpyxl 等函式庫的記憶體洩漏在數千個檔案後累積。
+- 工作進程意外死亡 (例如被 OOM killer 終止) 時，同樣視為失敗並隔離重試。
+
+每個工作進程各自使用一條 Pipe 與主進程溝通，強制終止某個進程不會影響其他進程的通道。
+
+少量檔案時啟動進程、在每個進程重建解析器並 pickle 插件的成本遠大於掃描本身，
+InProcessExecutor 提供相同介面的程序內版本 (單執行緒依序處理或執行緒池)，沿用已載入的插件。
+"""
+import collections
+import concurrent.futures
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+_POLL_INTERVAL_SECONDS = 0.5
+_JOIN_TIMEOUT_SECONDS = 5.0
+
+
+def current_rss_bytes() -> Optional[int]:
+    """回傳目前進程的常駐記憶體大小；無法取得時回傳 None。"""
+    try:
+        with open('/proc/self/statm') as f: return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError): pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 為單位，macOS 以 bytes 為單位；這裡取的是峰值，作為保守估計
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError): return None
+
+
+def _worker_main(conn: multiprocessing.connection.Connection, func: Callable, initializer: Optional[Callable],
+                 initargs: tuple, max_tasks: Optional[int], max_rss_bytes: Optional[int]):
+    """工作進程主迴圈：逐一接收任務，回傳 (task_id, 結果, 是否要求回收)。"""
+    if initializer: initializer(*initargs)
+    completed = 0
+    while True:
+        try: message = conn.recv()
+        except (EOFError, OSError): break
+        if message is None: break
+        task_id, item = message
+        try: result, error = func(item), None
+        except Exception as e: result, error = None, f"{e.__class__.__name__}: {e}"
+        completed += 1
+        rss = current_rss_bytes() if max_rss_bytes else None
+        recycle = bool((max_tasks and completed >= max_tasks) or (rss and rss > max_rss_bytes))
+        try: conn.send((task_id, result, error, recycle))
+        except (BrokenPipeError, OSError): break
+        if recycle: break
+    conn.close()
+
+
+_END = object()
+
+
+class _PendingItems:
+    """
+    延遲從來源取出任務的佇列 (介面與 deque 相同的部分)。來源可以是產生器：邊走訪目錄邊分派，
+    或依已完成的結果決定是否還要排入新任務 (取樣、時間預算)。判斷是否還有任務時最多預先取出一個。
+    """
+
+    def __init__(self, items: Iterable[Any]):
+        self._source = iter(items); self._buffer: collections.deque = collections.deque()
+
+    def __bool__(self) -> bool:
+        if not self._buffer:
+            item = next(self._source, _END)
+            if item is _END: return False
+            self._buffer.append(item)
+        return True
+
+    def popleft(self) -> Any:
+        if not self: raise IndexError("沒有待分派的任務。")
+        return self._buffer.popleft()
+
+    def appendleft(self, item: Any): self._buffer.appendleft(item)
+
+
+@dataclass
+class _WorkerHandle:
+    process: multiprocessing.process.BaseProcess
+    conn: multiprocessing.connection.Connection
+    isolated: bool = False
+    task_id: Optional[int] = None
+    started_at: float = 0.0
+
+
+class SupervisedExecutor:
+    """
+    受監督的進程池。用法與 Pool.imap_unordered 類似：
+
+        with SupervisedExecutor(func, num_workers=4, task_timeout=300, on_failure=make_error) as executor:
+            for result in executor.imap_unordered(items): ...
+
+    Args:
+        func: 在工作進程中對每個項目執行的頂層函式 (必須可被 pickle)。
+        on_failure: 在主進程中呼叫，為超時或進程死亡的項目產生替代結果：on_failure(item, 錯誤訊息)。
+        task_timeout: 單一任務的秒數上限；None 表示不限制。
+        max_tasks_per_child: 每個工作進程處理多少任務後回收；None 表示不回收。
+        max_rss_mb: 工作進程常駐記憶體超過多少 MB 後回收；None 表示不限制。
+    """
+
+    def __init__(self, func: Callable[[Any], Any], num_workers: int, on_failure: Callable[[Any, str], Any],
+                 initializer: Optional[Callable] = None, initargs: tuple = (),
+                 task_timeout: Optional[float] = None, max_tasks_per_child: Optional[int] = None,
+                 max_rss_mb: Optional[float] = None):
+        self.func = func; self.num_workers = max(1, num_workers); self.on_failure = on_failure
+        self.initializer = initializer; self.initargs = initargs
+        self.task_timeout = task_timeout; self.max_tasks_per_child = max_tasks_per_child
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024) if max_rss_mb else None
+        self._context = multiprocessing.get_context()
+        self._workers: list[_WorkerHandle] = []
+        self.stats = collections.Counter()
+
+    # --- 生命週期 ---
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.shutdown()
+
+    def _spawn(self, isolated: bool = False) -> _WorkerHandle:
+        parent_conn, child_conn = self._context.Pipe(duplex=True)
+        # 隔離重試的進程只處理一個任務，完成後即回收
+        max_tasks = 1 if isolated else self.max_tasks_per_child
+        process = self._context.Process(
+            target=_worker_main, daemon=True,
+            args=(child_conn, self.func, self.initializer, self.initargs, max_tasks, self.max_rss_bytes))
+        process.start(); child_conn.close()
+        handle = _WorkerHandle(process=process, conn=parent_conn, isolated=isolated)
+        self._workers.append(handle)
+        return handle
+
+    def _retire(self, handle: _WorkerHandle, kill: bool = False):
+        if handle in self._workers: self._workers.remove(handle)
+        if kill and handle.process.is_alive():
+            handle.process.kill()
+        else:
+            try: handle.conn.send(None)
+            except (BrokenPipeError, OSError): pass
+        handle.process.join(_JOIN_TIMEOUT_SECONDS)
+        if handle.process.is_alive(): handle.process.kill(); handle.process.join(_JOIN_TIMEOUT_SECONDS)
+        handle.conn.close()
+
+    def shutdown(self):
+        for handle in list(self._workers): self._retire(handle, kill=handle.task_id is not None)
+
+    # --- 排程 ---
+    def imap_unordered(self, items: Iterable[Any]) -> Iterator[Any]:
+        queue = _PendingItems(items)
+        retry_queue: collections.deque = collections.deque()
+        tasks: dict[int, Any] = {}
+        retried: set[int] = set()
+        next_task_id = 0
+        # 同一個執行器可以多次呼叫 imap_unordered (例如分散式工作節點逐批處理租約)，閒置的進程會沿用
+        while sum(1 for h in self._workers if not h.isolated) < self.num_workers: self._spawn()
+
+        def assign(handle: _WorkerHandle, task_id: int) -> bool:
+            handle.task_id = task_id; handle.started_at = time.monotonic()
+            try: handle.conn.send((task_id, tasks[task_id])); return True
+            except (BrokenPipeError, OSError):
+                # 工作進程在閒置時已經結束，換一個新的進程，任務稍後重新分派
+                handle.task_id = None
+                self._retire(handle, kill=True); self._spawn(isolated=handle.isolated)
+                return False
+
+        def fail(handle: _WorkerHandle, reason: str) -> Optional[Any]:
+            """處理超時或死亡的工作進程；第一次失敗的任務排入隔離重試，否則回傳替代結果。"""
+            task_id = handle.task_id
+            self._retire(handle, kill=True)
+            if task_id not in retried:
+                retried.add(task_id); retry_queue.append(task_id)
+                self.stats['retried'] += 1
+                logging.warning(f"任務 '{tasks[task_id]}' {reason}，將在獨立進程中重試一次。")
+                self._spawn(isolated=True)
+                return None
+            self.stats['failed'] += 1
+            logging.error(f"任務 '{tasks[task_id]}' 重試後仍然{reason}，記為錯誤。")
+            self._spawn()
+            return self.on_failure(tasks.pop(task_id), reason)
+
+        while queue or retry_queue or any(h.task_id is not None for h in self._workers):
+            # 1. 把任務分派給閒置的工作進程；隔離進程只接重試任務
+            for handle in list(self._workers):
+                if handle.task_id is not None: continue
+                if handle.isolated and retry_queue:
+                    task_id = retry_queue.popleft()
+                    if not assign(handle, task_id): retry_queue.appendleft(task_id)
+                elif not handle.isolated and queue:
+                    tasks[next_task_id] = queue.popleft()
+                    if not assign(handle, next_task_id): queue.appendleft(tasks.pop(next_task_id))
+                    else: next_task_id += 1
+
+            # 2. 等待結果
+            busy = {h.conn: h for h in self._workers if h.task_id is not None}
+            ready = multiprocessing.connection.wait(list(busy), timeout=_POLL_INTERVAL_SECONDS) if busy else []
+            for conn in ready:
+                handle = busy[conn]
+                try: task_id, result, error, recycle = conn.recv()
+                except (EOFError, OSError):
+                    replacement = fail(handle, "執行中的工作進程意外結束")
+                    if replacement is not None: yield replacement
+                    continue
+                item = tasks.pop(task_id)
+                handle.task_id = None
+                self.stats['completed'] += 1
+                if recycle or handle.isolated:
+                    if not handle.isolated: self.stats['recycled'] += 1
+                    self._retire(handle); self._spawn()
+                yield result if error is None else self.on_failure(item, error)
+
+            # 3. 檢查超時
+            if self.task_timeout:
+                now = time.monotonic()
+                for handle in [h for h in self._workers if h.task_id is not None and now - h.started_at > self.task_timeout]:
+                    replacement = fail(handle, f"超過 {self.task_timeout:g} 秒的處理時間上限")
+                    if replacement is not None: yield replacement
+
+            # 4. 補上因故消失的工作進程，維持固定的進程數量
+            while len(self._workers) < self.num_workers and queue:
+                self._spawn()
+
+
+class InProcessExecutor:
+    """
+    與 SupervisedExecutor 介面相同的程序內執行器，不啟動任何進程。
+    num_workers 為 1 時在呼叫端的執行緒中依序處理，否則使用執行緒池 (regex 與 PyMuPDF 在大部分時間會釋放 GIL)。
+    執行緒無法被強制終止，因此沒有單一任務時間上限與回收機制；只適合少量檔案或嵌入其他服務使用。
+
+    Args:
+        func: 對每個項目執行的函式，不需要可被 pickle。
+        on_failure: func 拋出例外時，為該項目產生替代結果：on_failure(item, 錯誤訊息)。
+    """
+
+    def __init__(self, func: Callable[[Any], Any], num_workers: int, on_failure: Callable[[Any, str], Any]):
+        self.func = func; self.num_workers = max(1, num_workers); self.on_failure = on_failure
+        self.stats = collections.Counter()
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.shutdown()
+
+    def shutdown(self):
+        if self._pool: self._pool.shutdown(wait=True, cancel_futures=True); self._pool = None
+
+    def _call(self, item: Any) -> Any:
+        try: return self.func(item)
+        except Exception as e: return self.on_failure(item, f"{e.__class__.__name__}: {e}")
+
+    def imap_unordered(self, items: Iterable[Any]) -> Iterator[Any]:
+        if self.num_workers == 1:
+            for item in items:
+                self.stats['completed'] += 1
+                yield self._call(item)
+            return
+        if self._pool is None: self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="scan")
+        # 同時排入的任務數有上限，避免一次為大量項目建立 Future
+        pending: set[concurrent.futures.Future] = set()
+
+        for item in items:
+            pending.add(self._pool.submit(self._call, item))
+            if len(pending) < self.num_workers * 2: continue
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                self.stats['completed'] += 1
+                yield future.result()
+        for future in concurrent.futures.as_completed(pending):
+            self.stats['completed'] += 1
+            yield future.result()
@@ -8,48 +8,202 @@ import pathlib
 import sys
 from typing import Optional, Sequence
 
-from src.engine import CoreEngine, ScanConfig
+from src.engine import EXECUTOR_AUTO, EXECUTOR_MODES, SPLIT_THRESHOLD_BYTES, CoreEngine, ScanConfig
+from src.distributed import DEFAULT_PORT, TOKEN_ENV_VAR, ScanCoordinator, ScanWorker
+from src.daemon import DEFAULT_PORT as DAEMON_PORT, ScanDaemon
+from src.nlp_cache import DEFAULT_CAPACITY as NLP_CACHE_CAPACITY
+from src.name_dictionary import NAME_PROFILE_BERT, NAME_PROFILES
+from src.sampling import DEFAULT_FRACTION as SAMPLE_FRACTION
+from src.parsers.triage import parse_policy
+from src.report_writers import FORMAT_EXTENSIONS, REPORT_FORMATS, check_formats, output_paths, resolve_formats
+from src.regex_backend import BACKEND_CHOICES, set_default_backend
+from src.result_filter import parse_filter_rules
 
-def setup_argument_parser() -> argparse.ArgumentParser:
+def setup_argument_parser(serve: bool = False) -> argparse.ArgumentParser:
     try: from src import __version__
     except ImportError: __version__ = "1.0.0"
     
     parser = argparse.ArgumentParser(
-        prog="pii_scanner",
-        description="ROCPII 白箱個資掃描器",
+        prog="pii_scanner serve" if serve else "pii_scanner",
+        description="ROCPII 白箱個資掃描器 (分散式協調者)" if serve else "ROCPII 白箱個資掃描器",
         epilog=f"版本 {__version__}",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument("scan_path", type=pathlib.Path, help="要掃描的目標檔案或目錄路徑。")
-    parser.add_argument("-o", "--output", dest="output_path", type=pathlib.Path, default=None, help="指定輸出的 Excel 報告路徑。若未指定，將自動產生檔名。")
+    parser.add_argument("-o", "--output", dest="output_path", type=pathlib.Path, default=None, help="指定輸出的報告路徑，未指定 --format 時依副檔名決定格式 (.xlsx、.jsonl、.jsonl.gz、.parquet)。若未指定，將自動產生檔名。")
     parser.add_argument("-l", "--log-level", dest="log_level", type=str, choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], default="INFO", help="設定日誌記錄的詳細等級。預設為 INFO。")
     parser.add_argument("-p", "--plugins", dest="enabled_plugins", nargs="+", default=None, metavar="PLUGIN_NAME", help="指定要啟用的插件名稱(以空白分隔)。若未指定，則預設啟用所有可用插件。")
+    parser.add_argument("--format", dest="report_formats", nargs="+", choices=REPORT_FORMATS, default=None, help="報告格式，可同時指定多個 (例如 xlsx parquet)，以同一次走訪結果寫出，檔名與輸出路徑相同、副檔名不同。jsonl 與 parquet 另寫出檔案清單 (*.files.*)。預設依輸出路徑的副檔名，否則為 xlsx。")
+    parser.add_argument("--summary-depth", dest="summary_depth", type=int, default=2, metavar="N", help="摘要的目錄統計彙整到掃描根目錄下第幾層。預設為 2。")
     parser.add_argument("-f", "--force", dest="overwrite_output", action="store_true", help="如果輸出檔案已存在，強制覆寫它。")
     parser.add_argument("-w", "--workers", dest="num_workers", type=int, default=None, help="指定用於掃描的平行工作進程數量。預設為系統的 CPU 核心數。")
+    parser.add_argument("--executor", dest="executor_mode", choices=EXECUTOR_MODES, default=EXECUTOR_AUTO, help="執行方式。process 使用受監督的工作進程；thread 在程序內以執行緒掃描，省去啟動進程與載入插件的時間，但不套用 --file-timeout 與進程回收；serial 在程序內逐一掃描。auto 在檔案不超過 8 個且總大小不超過 32MB 時在程序內掃描 (設有 --file-timeout 時仍使用 process；只設有 --parse-timeout 時使用 serial，兩者皆為 0 時使用 thread)，否則使用 process。預設為 auto。")
+    parser.add_argument("--triage-policy", dest="triage_policy", nargs="+", default=None, metavar="類別=處理方式", help="覆寫檔案分流策略，例如 minified=skip base64=scan。類別: text, binary, minified, base64, generated；處理方式: scan, skip, sample, regex_only。")
+    parser.add_argument("--filter", dest="result_filters", nargs="+", default=None, metavar="類型=選項", help="在工作進程內依個資類型過濾結果，例如 PASSPORT_NUMBER=min:0.6,max:50,dedup 或 *=dedup。選項: min (最低信賴分數), max (每個檔案最多保留筆數), dedup (同一檔案相同值只保留一筆)。")
+    parser.add_argument("--regex-backend", dest="regex_backend", choices=BACKEND_CHOICES, default=None, help="Regex 插件使用的引擎。auto 在安裝 RE2 (google-re2) 時，把能以 RE2 等價表達的樣式改用線性時間的 RE2，其餘使用 re；re 一律使用 Python 內建引擎。預設為 auto。")
+    parser.add_argument("--parse-timeout", dest="parse_timeout", type=float, default=120.0, metavar="SECONDS", help="單一檔案的解析時間上限(秒)，逾時的檔案會記為處理錯誤。以 SIGALRM 計時，只在工作進程與 serial 模式的主執行緒生效；--executor thread 不生效。設為 0 表示不限制。預設為 120。")
+    parser.add_argument("--file-timeout", dest="file_timeout", type=float, default=600.0, metavar="SECONDS", help="單一檔案(解析加掃描)的處理時間上限(秒)。超時的工作進程會被終止，檔案在獨立進程中重試一次後仍超時則記為錯誤。設為 0 表示不限制。預設為 600。")
+    parser.add_argument("--max-tasks-per-child", dest="max_tasks_per_child", type=int, default=200, metavar="N", help="每個工作進程處理 N 個檔案後即回收重啟，以釋放解析函式庫累積的記憶體。設為 0 表示不回收。預設為 200。")
+    parser.add_argument("--max-worker-memory", dest="max_worker_memory_mb", type=float, default=2048.0, metavar="MB", help="工作進程常駐記憶體超過此上限(MB)時，在完成目前檔案後回收重啟。設為 0 表示不限制。預設為 2048。")
+    parser.add_argument("--resume", action="store_true", help="從輸出目錄中的檢查點日誌接續上次中斷的掃描，只處理尚未完成的檔案。")
+    parser.add_argument("--checkpoint-interval", dest="checkpoint_interval", type=float, default=30.0, metavar="SECONDS", help="檢查點日誌最長每隔幾秒同步到磁碟一次 (另每 200 個檔案同步一次)。預設為 30。")
+    parser.add_argument("--since-manifest", dest="since_manifest", type=pathlib.Path, default=None, metavar="MANIFEST", help="差異掃描：以上次掃描產生的清單檔 (*.manifest.jsonl.gz) 為基準，只掃描新增或修改的檔案，並在報告中列出新增與移除的個資。")
+    parser.add_argument("--metrics-port", dest="metrics_port", type=int, default=None, metavar="PORT", help="在本機指定連接埠提供 Prometheus 格式的掃描指標 (http://127.0.0.1:PORT/metrics)。")
+    parser.add_argument("--status-file", dest="status_file", type=pathlib.Path, default=None, metavar="PATH", help="每 5 秒將掃描狀態 (吞吐量、佇列長度、插件命中率、最慢的處理中檔案、工作進程記憶體) 覆寫到此 JSON 檔。")
     parser.add_argument("-v", "--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("--nlp-cache-size", dest="nlp_cache_size", type=int, default=NLP_CACHE_CAPACITY, metavar="N", help=f"每個工作進程在記憶體中快取的 NLP 推論分段數 (LRU)，相同的文字分段只推論一次。0 表示停用記憶體快取。預設為 {NLP_CACHE_CAPACITY}。")
+    parser.add_argument("--nlp-cache-dir", dest="nlp_cache_dir", type=pathlib.Path, default=None, metavar="DIR", help="NLP 推論快取的磁碟目錄 (SQLite)，由所有工作進程與之後的掃描共用。快取內容包含偵測到的姓名，請存放在受保護的位置。")
+    parser.add_argument("--name-profile", dest="name_profile", choices=NAME_PROFILES, default=NAME_PROFILE_BERT, help="中文姓名的掃描方式。bert 以 NLP 模型掃描全文；fast 只以姓氏字典與常用字比對，不載入模型，速度與 Regex 插件相當但精確率與召回率較低；cascade 先以字典找出候選，模型只確認候選附近的文字。未以 -p 指定插件時生效。預設為 bert。")
+    if not serve:
+        parser.add_argument("--prioritize", action="store_true", help="依風險排定掃描順序：依副檔名 (試算表、CSV、SQL 優先)、目錄與檔名 (upload、backup、export、member 等)、大小與修改時間評分，高分的檔案先掃描，發現會盡早出現在進度與檢查點日誌中。")
+        parser.add_argument("--time-budget", dest="time_budget", type=float, default=None, metavar="SECONDS", help="時間預算 (秒，從掃描開始起算，隱含 --prioritize)：超過後不再分派新檔案，處理中的檔案完成後產生部分報告，未掃描的檔案以「待處理」狀態列於檔案清單；檢查點日誌會保留，之後以 --resume 接續其餘檔案。")
+        parser.add_argument("--sample", dest="sample_fraction", type=float, nargs="?", const=SAMPLE_FRACTION, default=None, metavar="FRACTION", help=f"取樣估計模式：依第一層目錄與副檔名分層，每個檔案以 FRACTION 的機率選中 (每層至少 3 個) 並邊走訪邊掃描，外推各類型與各目錄的個資筆數 (95%% 信賴區間)，列出建議優先完整掃描的目錄，另寫出 <報告名稱>.sample.json。未指定 FRACTION 時為 {SAMPLE_FRACTION}。")
+        parser.add_argument("--sample-time", dest="sample_seconds", type=float, default=None, metavar="SECONDS", help="取樣模式中每層累計掃描時間的預算 (秒)，超過後該層不再排入新檔案。單獨指定時以預設比例取樣。")
+        parser.add_argument("--split-threshold", dest="split_threshold_mb", type=float, default=SPLIT_THRESHOLD_BYTES / 2**20, metavar="MB", help=f"檔案內平行掃描：超過此大小 (MB) 的純文字檔 (例如應用程式日誌) 依行切成多個位元組範圍，分給多個工作進程同時掃描，結果合併為同一個檔案。低於 64MB 的檔案不會切分。設為 0 表示不切分。預設為 {SPLIT_THRESHOLD_BYTES // 2**20}。")
+        parser.add_argument("--boilerplate", action="store_true", help="網站匯出適用：取樣 HTML/XML 網頁學習各網站共用的頁首、頁尾與側欄，逐頁掃描時略過這些樣板，樣板區塊只掃描並回報一次 (標示出現的頁數)。")
+    if serve:
+        group = parser.add_argument_group("分散式協調者")
+        group.add_argument("--host", default="127.0.0.1", help="協調者監聽的位址。讓其他主機的工作節點連線時請設為 0.0.0.0。預設為 127.0.0.1。")
+        group.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"協調者監聽的連接埠。預設為 {DEFAULT_PORT}。")
+        group.add_argument("--lease-size", dest="lease_size", type=int, default=16, metavar="N", help="每個工作進程一次領取的檔案數，租約大小為 N 乘以工作節點的進程數。預設為 16。")
+        group.add_argument("--lease-ttl", dest="lease_ttl", type=float, default=120.0, metavar="SECONDS", help="租約有效秒數，工作節點失聯超過此時間後檔案會重新分派。預設為 120。")
+        group.add_argument("--token", default=os.environ.get(TOKEN_ENV_VAR), help=f"協調者與工作節點共用的金鑰，亦可透過環境變數 {TOKEN_ENV_VAR} 設定。")
     return parser
 
+def setup_worker_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pii_scanner worker", description="ROCPII 白箱個資掃描器 (分散式工作節點)")
+    parser.add_argument("coordinator_url", help="協調者位址，例如 http://10.0.0.5:8765。")
+    parser.add_argument("--root", type=pathlib.Path, default=None, help="本機上對應掃描根目錄的路徑。若未指定，使用協調者端的路徑 (共用掛載點)。")
+    parser.add_argument("-l", "--log-level", dest="log_level", type=str, choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], default="INFO", help="設定日誌記錄的詳細等級。預設為 INFO。")
+    parser.add_argument("-w", "--workers", dest="num_workers", type=int, default=None, help="本節點的平行工作進程數量。預設為系統的 CPU 核心數。")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV_VAR), help=f"與協調者共用的金鑰，亦可透過環境變數 {TOKEN_ENV_VAR} 設定。")
+    parser.add_argument("--max-tasks-per-child", dest="max_tasks_per_child", type=int, default=200, metavar="N", help="每個工作進程處理 N 個檔案後即回收重啟。設為 0 表示不回收。預設為 200。")
+    parser.add_argument("--max-worker-memory", dest="max_worker_memory_mb", type=float, default=2048.0, metavar="MB", help="工作進程常駐記憶體上限(MB)。設為 0 表示不限制。預設為 2048。")
+    parser.add_argument("--regex-backend", dest="regex_backend", choices=BACKEND_CHOICES, default=None, help="Regex 插件使用的引擎 (auto / re / re2)。預設為 auto。")
+    parser.add_argument("--retry-seconds", dest="retry_seconds", type=float, default=60.0, metavar="SECONDS", help="連不上協調者時持續重試的秒數。預設為 60。")
+    return parser
+
+def run_worker(argv: Sequence[str]) -> int:
+    args = setup_worker_argument_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.root and not args.root.is_dir(): logging.error(f"掃描根目錄不存在: '{args.root}'"); return 1
+    try:
+        if args.regex_backend: set_default_backend(args.regex_backend)
+    except ValueError as e: logging.error(str(e)); return 1
+    try:
+        worker = ScanWorker(
+            args.coordinator_url, root=args.root, num_workers=args.num_workers, token=args.token,
+            log_level=args.log_level.upper(), max_tasks_per_child=args.max_tasks_per_child or None,
+            max_worker_memory_mb=args.max_worker_memory_mb or None, retry_seconds=args.retry_seconds)
+        return worker.run()
+    except KeyboardInterrupt:
+        logging.warning("\n偵測到使用者中斷操作 (Ctrl+C)。工作節點結束，未完成的租約將由協調者重新分派。")
+        return 130
+    except Exception as e:
+        logging.critical(f"工作節點發生致命錯誤: {e}", exc_info=True)
+        return 1
+
+def setup_daemon_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pii_scanner daemon", description="ROCPII 白箱個資掃描器 (常駐掃描服務)")
+    listen = parser.add_mutually_exclusive_group()
+    listen.add_argument("--socket", dest="socket_path", type=pathlib.Path, default=None, help="監聽的 Unix socket 路徑 (權限 660)。若未指定，改為監聽 TCP 連接埠。")
+    listen.add_argument("--host", default="127.0.0.1", help="監聽的位址。預設為 127.0.0.1。")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help=f"監聽的連接埠。預設為 {DAEMON_PORT}。")
+    parser.add_argument("-l", "--log-level", dest="log_level", type=str, choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], default="INFO", help="設定日誌記錄的詳細等級。預設為 INFO。")
+    parser.add_argument("-p", "--plugins", dest="enabled_plugins", nargs="+", default=None, metavar="PLUGIN_NAME", help="指定要啟用的插件名稱(以空白分隔)。若未指定，則預設啟用所有可用插件。")
+    parser.add_argument("--name-profile", dest="name_profile", choices=NAME_PROFILES, default=NAME_PROFILE_BERT, help="中文姓名的掃描方式 (bert / fast / cascade)，說明同一般掃描。預設為 bert。")
+    parser.add_argument("--triage-policy", dest="triage_policy", nargs="+", default=None, metavar="類別=處理方式", help="覆寫檔案分流策略，格式同一般掃描。")
+    parser.add_argument("--filter", dest="result_filters", nargs="+", default=None, metavar="類型=選項", help="依個資類型過濾結果，格式同一般掃描。")
+    parser.add_argument("--regex-backend", dest="regex_backend", choices=BACKEND_CHOICES, default=None, help="Regex 插件使用的引擎 (auto / re / re2)。預設為 auto。")
+    parser.add_argument("--parse-timeout", dest="parse_timeout", type=float, default=30.0, metavar="SECONDS", help="單一文件的解析時間上限(秒)，逾時的文件記為處理錯誤。設為 0 表示不限制。預設為 30。")
+    parser.add_argument("--file-timeout", dest="file_timeout", type=float, default=60.0, metavar="SECONDS", help="單一文件(解析加掃描)的處理時間上限(秒)。超時的工作進程會被終止，文件在獨立進程中重試一次後仍超時則記為錯誤。設為 0 表示不限制。預設為 60。")
+    parser.add_argument("--max-concurrency", dest="max_concurrency", type=int, default=None, metavar="N", help="同時掃描的文件數。預設為系統的 CPU 核心數。")
+    parser.add_argument("--max-queue", dest="max_queue", type=int, default=64, metavar="N", help="掃描中以外最多可排隊的文件數，超過時回應 503。預設為 64。")
+    parser.add_argument("--max-batch", dest="max_batch", type=int, default=32, metavar="N", help="一次批次請求最多可包含的文件數。預設為 32。")
+    parser.add_argument("--max-body", dest="max_body_mb", type=float, default=64.0, metavar="MB", help="單一請求內容的大小上限(MB)。預設為 64。")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV_VAR), help=f"呼叫端需以 X-Scan-Token 標頭提供的金鑰，亦可透過環境變數 {TOKEN_ENV_VAR} 設定。")
+    return parser
+
+def run_daemon(argv: Sequence[str]) -> int:
+    args = setup_daemon_argument_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.parse_timeout < 0: logging.error(f"解析時間上限不能是負數: {args.parse_timeout}"); return 1
+    if args.file_timeout < 0: logging.error(f"文件處理時間上限不能是負數: {args.file_timeout}"); return 1
+    if (args.max_concurrency is not None and args.max_concurrency <= 0) or args.max_queue < 0 or args.max_batch <= 0 or args.max_body_mb <= 0:
+        logging.error("並行數、批次大小與請求大小上限必須大於 0，排隊上限不能是負數。"); return 1
+    try:
+        if args.regex_backend: set_default_backend(args.regex_backend)
+        config = ScanConfig(
+            scan_path=pathlib.Path.cwd(), output_path=pathlib.Path(os.devnull),  # 常駐服務不產生報告
+            log_level=args.log_level.upper(), enabled_plugins=args.enabled_plugins,
+            triage_policy=parse_policy(args.triage_policy), parse_timeout=args.parse_timeout or None,
+            file_timeout=args.file_timeout or None,
+            result_filters=parse_filter_rules(args.result_filters) or None, name_profile=args.name_profile,
+        )
+    except ValueError as e: logging.error(str(e)); return 1
+    try:
+        daemon = ScanDaemon(config, max_concurrency=args.max_concurrency, max_queue=args.max_queue, max_batch=args.max_batch,
+                            max_body_bytes=int(args.max_body_mb * 1024 * 1024), token=args.token)
+        daemon.warm_up()
+        daemon.serve_forever(args.socket_path.resolve() if args.socket_path else None, args.host, args.port)
+    except KeyboardInterrupt:
+        logging.warning("\n偵測到使用者中斷操作 (Ctrl+C)。掃描服務結束。")
+        return 130
+    except Exception as e:
+        logging.critical(f"掃描服務發生致命錯誤: {e}", exc_info=True)
+        return 1
+    return 0
+
 def _validate_arguments(args: argparse.Namespace) -> Optional[str]:
     if not args.scan_path.exists(): return f"掃描路徑不存在: '{args.scan_path}'"
     if not os.access(args.scan_path, os.R_OK): return f"沒有足夠的權限讀取掃描路徑: '{args.scan_path}'"
+    if args.parse_timeout < 0: return f"解析時間上限不能是負數: {args.parse_timeout}"
+    if args.since_manifest and not args.since_manifest.is_file(): return f"找不到掃描清單檔: '{args.since_manifest}'"
+    if args.metrics_port is not None and not 0 <= args.metrics_port <= 65535: return f"指標連接埠不正確: {args.metrics_port}"
+    if args.status_file and args.status_file.is_dir(): return f"狀態檔路徑不能是一個目錄: '{args.status_file}'"
+    if args.summary_depth < 1: return f"摘要目錄層級必須大於 0: {args.summary_depth}"
+    if args.checkpoint_interval < 0: return f"檢查點間隔不能是負數: {args.checkpoint_interval}"
+    if args.file_timeout < 0: return f"檔案處理時間上限不能是負數: {args.file_timeout}"
+    if args.max_tasks_per_child < 0 or args.max_worker_memory_mb < 0: return "工作進程回收門檻不能是負數。"
+    if getattr(args, "lease_size", 1) <= 0 or getattr(args, "lease_ttl", 1) <= 0: return "租約大小與有效秒數必須大於 0。"
+    if getattr(args, "time_budget", None) is not None and args.time_budget <= 0: return f"時間預算必須大於 0: {args.time_budget}"
+    if getattr(args, "split_threshold_mb", 0) < 0: return f"檔案內平行掃描的門檻不能是負數: {args.split_threshold_mb}"
+    if getattr(args, "sample_seconds", None) is not None and args.sample_fraction is None: args.sample_fraction = SAMPLE_FRACTION
+    if getattr(args, "sample_fraction", None) is not None:
+        if not 0 < args.sample_fraction <= 1: return f"取樣比例必須介於 0 (不含) 與 1 之間: {args.sample_fraction}"
+        if args.sample_seconds is not None and args.sample_seconds <= 0: return f"每層的取樣時間預算必須大於 0: {args.sample_seconds}"
+        if args.resume or args.since_manifest or args.boilerplate: return "取樣模式不能與 --resume、--since-manifest 或 --boilerplate 同時使用。"
+    try:
+        parse_policy(args.triage_policy); parse_filter_rules(args.result_filters); check_formats(args.report_formats)
+        # 在建立插件之前設定，工作進程透過環境變數沿用
+        if args.regex_backend: set_default_backend(args.regex_backend)
+    except ValueError as e: return str(e)
     if args.output_path:
         if args.output_path.is_dir(): return f"輸出路徑不能是一個目錄: '{args.output_path}'"
         output_dir = args.output_path.parent
         output_dir.mkdir(parents=True, exist_ok=True)
         if not os.access(output_dir, os.W_OK): return f"沒有足夠的權限寫入輸出目錄: '{output_dir}'"
-        if args.output_path.exists() and not args.overwrite_output: return f"輸出檔案 '{args.output_path}' 已存在。請使用 -f 或 --force 旗標進行覆寫。"
+        for path in output_paths(args.output_path, args.report_formats).values():
+            if path.exists() and not args.overwrite_output: return f"輸出檔案 '{path}' 已存在。請使用 -f 或 --force 旗標進行覆寫。"
     return None
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
-    parser = setup_argument_parser()
-    args = parser.parse_args(argv)
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # 子命令：worker 為分散式工作節點；daemon 為常駐掃描服務；serve 為協調者，其餘參數與一般掃描相同
+    if argv and argv[0] == "worker": return run_worker(argv[1:])
+    if argv and argv[0] == "daemon": return run_daemon(argv[1:])
+    serve = bool(argv) and argv[0] == "serve"
+    parser = setup_argument_parser(serve=serve)
+    args = parser.parse_args(argv[1:] if serve else argv)
     logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
     
     if args.output_path is None:
         from datetime import datetime
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        args.output_path = pathlib.Path(f"scan_report_{timestamp}.xlsx")
+        extension = FORMAT_EXTENSIONS[args.report_formats[0]][0] if args.report_formats else ".xlsx"
+        args.output_path = pathlib.Path(f"scan_report_{timestamp}{extension}")
         logging.info(f"未指定輸出路徑，將使用預設檔名: {args.output_path}")
+    args.report_formats = resolve_formats(args.output_path, args.report_formats)
     
     validation_error = _validate_arguments(args)
     if validation_error:
@@ -63,9 +217,35 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             log_level=args.log_level.upper(),
             enabled_plugins=args.enabled_plugins,
             overwrite_output=args.overwrite_output,
-            num_workers=args.num_workers
+            num_workers=args.num_workers,
+            triage_policy=parse_policy(args.triage_policy),
+            parse_timeout=args.parse_timeout or None,
+            file_timeout=args.file_timeout or None,
+            max_tasks_per_child=args.max_tasks_per_child or None,
+            max_worker_memory_mb=args.max_worker_memory_mb or None,
+            resume=args.resume,
+            checkpoint_interval=args.checkpoint_interval,
+            since_manifest=args.since_manifest.resolve() if args.since_manifest else None,
+            metrics_port=args.metrics_port,
+            status_file=args.status_file.resolve() if args.status_file else None,
+            result_filters=parse_filter_rules(args.result_filters) or None,
+            report_formats=args.report_formats,
+            summary_depth=args.summary_depth,
+            executor_mode=args.executor_mode,
+            boilerplate=getattr(args, 'boilerplate', False),
+            nlp_cache_size=max(0, args.nlp_cache_size),
+            nlp_cache_dir=args.nlp_cache_dir.resolve() if args.nlp_cache_dir else None,
+            name_profile=args.name_profile,
+            sample_fraction=getattr(args, 'sample_fraction', None),
+            sample_seconds=getattr(args, 'sample_seconds', None),
+            prioritize=getattr(args, 'prioritize', False),
+            time_budget=getattr(args, 'time_budget', None),
+            split_threshold=int(args.split_threshold_mb * 2**20) if getattr(args, 'split_threshold_mb', None) else None
         )
-        engine = CoreEngine(config=scan_config)
+        if serve:
+            engine = ScanCoordinator(scan_config, host=args.host, port=args.port,
+                                     lease_size=args.lease_size, lease_ttl=args.lease_ttl, token=args.token)
+        else: engine = CoreEngine(config=scan_config)
         engine.run_scan()
     except KeyboardInterrupt:
         logging.warning("\n偵測到使用者中斷操作 (Ctrl+C)。正在提前終止程式...")
@@ -0,0 +1,216 @@
+# src/manifest.py
+"""
+掃描清單 (manifest) 與差異掃描
+
+每次掃描成功產生報告後，在報告旁寫出清單 `<報告檔名>.manifest.jsonl.gz`，每個檔案一行：
+相對路徑、大小、修改時間、內容雜湊與發現摘要 (個資類型、指紋與遮罩後的值；清單本身不保存個資原文)。
+指紋是以清單標頭中的隨機鹽值為金鑰的 BLAKE2b：沒有鹽值無法以窮舉身分證號、電話等取值範圍小的個資反推。
+差異掃描寫出的新清單沿用上一份清單的鹽值，前後的指紋才能比對。
+
+以 --since-manifest 指定上一次的清單時：
+1. 只用 stat 的大小與修改時間比對，未變動的檔案直接沿用上次的結果，不讀取內容。
+2. stat 有變動但上次有內容雜湊的檔案，先計算雜湊；內容相同 (例如只被 touch 或重新部署) 也沿用。
+   內容雜湊只在不必另外讀取檔案時取得：純文字檔由解析器已讀入的位元組計算，差異比對時算出的雜湊也寫入新清單；
+   其他檔案 (以及依策略跳過的檔案) 沒有雜湊，之後只有修改時間變動時會重新掃描。
+3. 其餘新增或修改的檔案才交給解析與掃描流程。
+最後比對前後兩份清單的發現指紋，產出新增與移除的個資清單。
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import secrets
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Mapping, Optional, Sequence
+
+from src.shared_data_model import FileContext, FileStatus, ScanReport, ScanResult
+
+MANIFEST_VERSION = 2
+MANIFEST_SUFFIX = ".manifest.jsonl.gz"
+CHANGE_ADDED = "新增"
+CHANGE_REMOVED = "移除"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+_HASH_THREADS = 8
+# 這些狀態代表檔案已被完整判定 (處理完成或依策略跳過)，可以沿用；處理錯誤的檔案不寫入清單，下次一定重新掃描
+_MANIFEST_STATUSES = (FileStatus.COMPLETED, FileStatus.SKIPPED)
+
+FileStat = tuple[int, int]  # (檔案大小, 修改時間 ns)
+
+
+def manifest_path_for(output_path: pathlib.Path) -> pathlib.Path:
+    return output_path.with_name(output_path.stem + MANIFEST_SUFFIX)
+
+
+def hash_bytes(data: bytes) -> str:
+    """與 hash_file 相同的雜湊，用於解析器已讀入記憶體的內容。"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hash_file(file_path: pathlib.Path) -> Optional[str]:
+    """以 BLAKE2b 串流計算檔案內容雜湊；無法讀取時回傳 None。"""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(_HASH_CHUNK_SIZE): digest.update(chunk)
+    except OSError as e:
+        logging.debug(f"無法計算 '{file_path}' 的雜湊: {e}")
+        return None
+    return digest.hexdigest()
+
+
+def new_salt() -> str:
+    return secrets.token_hex(16)
+
+
+def finding_fingerprint(result: ScanResult, salt: str) -> str:
+    """同一檔案中的同一個值視為同一筆發現，與所在位置無關 (內容前後移動不算新增或移除)。"""
+    return hashlib.blake2b(f"{result.pii_type}\0{result.matched_value}".encode('utf-8'), digest_size=12, key=bytes.fromhex(salt)).hexdigest()
+
+
+def mask_value(value: str) -> str:
+    if len(value) < 4: return "***"
+    quarter = len(value) // 4
+    return f"{value[:quarter]}...{value[-quarter:]}"
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestEntry:
+    path: str; size: int; mtime_ns: int; content_hash: Optional[str]; status: str
+    findings: tuple[tuple[str, str, str], ...] = ()  # (個資類型, 指紋, 遮罩後的值)
+
+
+@dataclass(frozen=True, slots=True)
+class FindingChange:
+    """差異報告中的一筆變化。移除的發現只剩遮罩後的值 (清單不保存原文)。"""
+    change: str; pii_type: str; value: str; file_path: pathlib.Path
+
+
+@dataclass
+class DeltaPlan:
+    previous: dict[str, ManifestEntry]
+    to_scan: list[pathlib.Path]
+    carried: dict[str, ManifestEntry] = field(default_factory=dict)
+    hashes: dict[str, str] = field(default_factory=dict)  # 比對時算出、但內容已變動而需重新掃描的檔案的雜湊
+    counts: Counter = field(default_factory=Counter)
+
+
+def load_manifest(path: pathlib.Path) -> tuple[dict[str, ManifestEntry], str]:
+    """回傳 (相對路徑 → 清單項目, 指紋的鹽值)。"""
+    entries: dict[str, ManifestEntry] = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('type') == 'header' and header.get('version') == 1:
+            raise ValueError(f"'{path}' 是舊版的掃描清單 (指紋未加鹽)，無法作為差異掃描的基準；請先執行一次完整掃描。")
+        if header.get('type') != 'header' or header.get('version') != MANIFEST_VERSION or not header.get('salt'):
+            raise ValueError(f"'{path}' 不是相容的掃描清單檔。")
+        for line in f:
+            data = json.loads(line)
+            data['findings'] = tuple(tuple(finding) for finding in data.get('findings', ()))
+            entries[data['path']] = ManifestEntry(**data)
+    logging.info(f"已載入上次的掃描清單 '{path}'：{len(entries)} 個檔案 (掃描於 {header.get('created_utc')})。")
+    return entries, header['salt']
+
+
+def write_manifest(path: pathlib.Path, scan_root: pathlib.Path, entries: Iterable[ManifestEntry], salt: str):
+    """先寫入暫存檔再取代，避免中斷時留下不完整的清單。"""
+    temp_path = path.with_name(path.name + '.tmp')
+    count = 0
+    with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        header = {'type': 'header', 'version': MANIFEST_VERSION, 'scan_root': str(scan_root),
+                  'created_utc': datetime.now(timezone.utc).isoformat(), 'salt': salt}
+        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        for entry in entries:
+            f.write(json.dumps({
+                'path': entry.path, 'size': entry.size, 'mtime_ns': entry.mtime_ns, 'content_hash': entry.content_hash,
+                'status': entry.status, 'findings': entry.findings,
+            }, ensure_ascii=False) + '\n')
+            count += 1
+    os.replace(temp_path, path)
+    logging.info(f"已寫出掃描清單 '{path}'，共 {count} 個檔案。")
+
+
+def _relative(root: pathlib.Path, file_path: pathlib.Path) -> str:
+    return file_path.relative_to(root).as_posix()
+
+
+def plan_delta(previous: dict[str, ManifestEntry], root: pathlib.Path, file_stats: Mapping[pathlib.Path, FileStat]) -> DeltaPlan:
+    """依 stat 與內容雜湊決定哪些檔案需要重新掃描。"""
+    plan = DeltaPlan(previous=previous, to_scan=[])
+    needs_hash: list[tuple[pathlib.Path, str, ManifestEntry]] = []
+    for file_path, (size, mtime_ns) in file_stats.items():
+        relative_path = _relative(root, file_path)
+        entry = previous.get(relative_path)
+        if entry is None:
+            plan.to_scan.append(file_path); plan.counts['added'] += 1
+        elif entry.size == size and entry.mtime_ns == mtime_ns:
+            plan.carried[relative_path] = entry; plan.counts['unchanged'] += 1
+        elif entry.content_hash and entry.size == size:
+            needs_hash.append((file_path, relative_path, entry))
+        else:
+            plan.to_scan.append(file_path); plan.counts['modified'] += 1
+
+    # 雜湊計算以 I/O 為主 (hashlib 會釋放 GIL)，用執行緒平行處理即可
+    with ThreadPoolExecutor(max_workers=_HASH_THREADS) as pool:
+        hashes = pool.map(hash_file, [file_path for file_path, _, _ in needs_hash])
+        for (file_path, relative_path, entry), content_hash in zip(needs_hash, hashes):
+            if content_hash == entry.content_hash:
+                size, mtime_ns = file_stats[file_path]
+                plan.carried[relative_path] = ManifestEntry(relative_path, size, mtime_ns, content_hash, entry.status, entry.findings)
+                plan.counts['touched'] += 1
+            else:
+                plan.to_scan.append(file_path); plan.counts['modified'] += 1
+                if content_hash: plan.hashes[relative_path] = content_hash
+
+    current_paths = {_relative(root, file_path) for file_path in file_stats}
+    plan.counts['removed'] = sum(1 for relative_path in previous if relative_path not in current_paths)
+    logging.info(f"差異掃描：新增 {plan.counts['added']}、修改 {plan.counts['modified']}、未變動 {plan.counts['unchanged']}、"
+                 f"僅修改時間變動 {plan.counts['touched']}、已刪除 {plan.counts['removed']} 個檔案；需掃描 {len(plan.to_scan)} 個。")
+    return plan
+
+
+def build_entries(root: pathlib.Path, file_stats: Mapping[pathlib.Path, FileStat],
+                  file_contexts: Sequence[FileContext], results: ScanReport, salt: str,
+                  known_hashes: Optional[Mapping[str, str]] = None) -> dict[str, ManifestEntry]:
+    """由本次掃描的結果建立清單項目。known_hashes: 解析時沒有取得雜湊的檔案，改用這裡的雜湊 (相對路徑 → 雜湊)。"""
+    findings: dict[pathlib.Path, dict[str, tuple[str, str, str]]] = {}
+    for result in results:
+        fingerprint = finding_fingerprint(result, salt)
+        findings.setdefault(result.file_context.file_path, {})[fingerprint] = (result.pii_type, fingerprint, mask_value(result.matched_value))
+    entries = {}
+    for ctx in file_contexts:
+        stat = file_stats.get(ctx.file_path)
+        if stat is None or ctx.status not in _MANIFEST_STATUSES: continue
+        relative_path = _relative(root, ctx.file_path)
+        entries[relative_path] = ManifestEntry(
+            relative_path, stat[0], stat[1], ctx.content_hash or (known_hashes or {}).get(relative_path), ctx.status.name,
+            tuple(sorted(findings.get(ctx.file_path, {}).values())))
+    return entries
+
+
+def diff_findings(previous: Mapping[str, ManifestEntry], current: Mapping[str, ManifestEntry],
+                  root: pathlib.Path, file_stats: Mapping[pathlib.Path, FileStat], results: ScanReport, salt: str) -> list[FindingChange]:
+    """
+    比對前後兩份清單的發現 (salt 為兩份清單共用的鹽值)。仍存在但本次處理失敗 (不在新清單中) 的檔案不列入比對，避免誤報為移除。
+    新增的發現附上完整的值；移除的發現只有遮罩後的值。
+    """
+    present = {_relative(root, file_path) for file_path in file_stats}
+    values = {(result.file_context.file_path, finding_fingerprint(result, salt)): result.matched_value for result in results}
+    changes = []
+    for relative_path in sorted(set(previous) | set(current)):
+        if relative_path not in current and relative_path in present: continue
+        old = {fingerprint: (pii_type, masked) for pii_type, fingerprint, masked in previous[relative_path].findings} if relative_path in previous else {}
+        new = {fingerprint: (pii_type, masked) for pii_type, fingerprint, masked in current[relative_path].findings} if relative_path in current else {}
+        file_path = root / relative_path
+        for fingerprint in new.keys() - old.keys():
+            pii_type, masked = new[fingerprint]
+            changes.append(FindingChange(CHANGE_ADDED, pii_type, values.get((file_path, fingerprint), masked), file_path))
+        for fingerprint in old.keys() - new.keys():
+            pii_type, masked = old[fingerprint]
+            changes.append(FindingChange(CHANGE_REMOVED, pii_type, masked, file_path))
+    return changes
@@ -0,0 +1,244 @@
+# src/metrics.py
+"""
+掃描進度與效能指標
+
+工作進程透過共享記憶體更新計數器，不需要為每個事件做進程間通訊：
+- 每個工作進程在初始化時認領一列 (row)，之後只寫自己那一列，因此不需要鎖。
+- 進程被回收或終止後，新的進程會接手同一列並在原有數值上繼續累加，總數不會遺失。
+- 「目前處理中的檔案」與常駐記憶體只反映該列目前的進程。
+
+主進程定期彙整成快照，可透過兩種方式輸出 (皆為選用)：
+- Prometheus 文字格式的 HTTP 端點 (--metrics-port)。
+- 定期覆寫的 JSON 狀態檔 (--status-file)。
+"""
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Sequence
+
+from src.executor import current_rss_bytes
+
+_PATH_BYTES = 256
+_SLOWEST_FILES = 5
+_STATUS_INTERVAL_SECONDS = 5.0
+
+# 每一列的固定欄位，之後接著每個插件的 (命中數, 掃描檔案數, 略過檔案數)
+_PID, _FILES, _BYTES, _FINDINGS, _CURRENT_START, _RSS = range(6)
+_FIXED_FIELDS = 6
+_PLUGIN_FIELDS = 3
+
+
+def _pid_alive(pid: int) -> bool:
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except PermissionError: return True
+    return True
+
+
+class ScanMetrics:
+    """
+    共享記憶體計數器。在主進程建立後作為 initializer 參數傳給工作進程。
+
+    Args:
+        plugin_names: 啟用插件的名稱，決定每列的插件欄位順序。
+        rows: 可同時存在的工作進程數上限 (含隔離重試的進程)；沒有空位的進程不回報指標。
+    """
+
+    def __init__(self, plugin_names: Sequence[str], rows: int):
+        context = multiprocessing.get_context()
+        self.plugin_names = list(plugin_names)
+        self.rows = rows
+        self.row_size = _FIXED_FIELDS + _PLUGIN_FIELDS * len(self.plugin_names)
+        self._values = context.Array('d', rows * self.row_size, lock=False)
+        self._paths = context.Array('c', rows * _PATH_BYTES, lock=False)
+        self._claim_lock = context.Lock()
+        self._row: Optional[int] = None
+        self._plugin_index = {name: i for i, name in enumerate(self.plugin_names)}
+        # 以下只在主進程使用
+        self.started_at = time.time()
+        self.files_total = 0; self.files_completed = 0; self.errors = 0
+        self._last_sample: tuple[float, int] = (self.started_at, 0)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy(); state['_row'] = None
+        return state
+
+    # --- 工作進程端 ---
+    def claim_row(self):
+        """由工作進程的 initializer 呼叫：認領一個沒有存活進程的列。"""
+        pid = os.getpid()
+        with self._claim_lock:
+            for row in range(self.rows):
+                owner = int(self._values[row * self.row_size + _PID])
+                if owner == 0 or owner == pid or not _pid_alive(owner):
+                    base = row * self.row_size
+                    self._values[base + _PID] = pid; self._values[base + _CURRENT_START] = 0.0
+                    self._row = row
+                    return
+        logging.debug(f"指標列已滿，進程 {pid} 不回報指標。")
+
+    def file_started(self, file_path: pathlib.Path):
+        if self._row is None: return
+        encoded = str(file_path).encode('utf-8', errors='replace')[:_PATH_BYTES - 1]
+        start = self._row * _PATH_BYTES
+        self._paths[start:start + len(encoded) + 1] = encoded + b'\0'
+        self._values[self._row * self.row_size + _CURRENT_START] = time.time()
+
+    def file_finished(self, size_bytes: int, plugin_hits: dict[str, int], plugin_skips: Optional[dict[str, int]] = None,
+                      part: Optional[tuple[int, int]] = None):
+        """
+        part: 檔案內平行掃描的 (範圍序號, 範圍數)。範圍只累計自己的位元組與命中數，不計入工作進程完成的檔案數
+        (整個檔案由主進程在合併後計為一個)；插件的掃描與略過檔案數只由第一個範圍計入。
+        """
+        if self._row is None: return
+        base = self._row * self.row_size
+        values = self._values
+        if part is None: values[base + _FILES] += 1
+        values[base + _BYTES] += size_bytes
+        values[base + _FINDINGS] += sum(plugin_hits.values())
+        counts_file = part is None or part[0] == 0
+        for name, hits in plugin_hits.items():
+            index = self._plugin_index.get(name)
+            if index is None: continue
+            values[base + _FIXED_FIELDS + _PLUGIN_FIELDS * index] += hits
+            if counts_file: values[base + _FIXED_FIELDS + _PLUGIN_FIELDS * index + 1] += 1
+        for name, skipped in (plugin_skips or {}).items() if counts_file else ():
+            index = self._plugin_index.get(name)
+            if index is not None: values[base + _FIXED_FIELDS + _PLUGIN_FIELDS * index + 2] += skipped
+        values[base + _CURRENT_START] = 0.0
+        values[base + _RSS] = current_rss_bytes() or 0
+
+    # --- 主進程端 ---
+    def snapshot(self) -> dict[str, Any]:
+        now = time.time()
+        values = self._values[:]
+        totals = [0.0] * self.row_size
+        workers, current = [], []
+        for row in range(self.rows):
+            base = row * self.row_size
+            for i in range(self.row_size): totals[i] += values[base + i]
+            pid = int(values[base + _PID])
+            if not pid or not _pid_alive(pid): continue
+            workers.append({'pid': pid, 'rss_bytes': int(values[base + _RSS]), 'files_completed': int(values[base + _FILES])})
+            if values[base + _CURRENT_START]:
+                raw = bytes(self._paths[row * _PATH_BYTES:(row + 1) * _PATH_BYTES]).split(b'\0', 1)[0]
+                current.append({'pid': pid, 'path': raw.decode('utf-8', errors='replace'),
+                                'elapsed_seconds': round(now - values[base + _CURRENT_START], 1)})
+        current.sort(key=lambda item: item['elapsed_seconds'], reverse=True)
+
+        elapsed = max(now - self.started_at, 1e-9)
+        last_time, last_completed = self._last_sample
+        recent = (self.files_completed - last_completed) / max(now - last_time, 1e-9)
+        self._last_sample = (now, self.files_completed)
+        plugins = {}
+        for i, name in enumerate(self.plugin_names):
+            hits, files, skipped = totals[_FIXED_FIELDS + _PLUGIN_FIELDS * i:_FIXED_FIELDS + _PLUGIN_FIELDS * (i + 1)]
+            plugins[name] = {'hits': int(hits), 'files': int(files), 'skipped': int(skipped),
+                             'hit_rate': round(hits / files, 4) if files else 0.0}
+        return {
+            'elapsed_seconds': round(elapsed, 1), 'files_total': self.files_total, 'files_completed': self.files_completed,
+            'files_in_progress': len(current), 'queue_depth': max(self.files_total - self.files_completed - len(current), 0),
+            'errors': self.errors, 'throughput_files_per_second': round(self.files_completed / elapsed, 3),
+            'recent_files_per_second': round(recent, 3), 'bytes_scanned': int(totals[_BYTES]),
+            'findings_total': int(totals[_FINDINGS]), 'plugins': plugins,
+            'slowest_current_files': current[:_SLOWEST_FILES], 'workers': workers,
+        }
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus(snapshot: dict[str, Any]) -> str:
+    """把快照轉成 Prometheus 文字格式 (exposition format 0.0.4)。"""
+    lines = []
+    def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]):
+        lines.append(f"# HELP pii_scanner_{name} {help_text}")
+        lines.append(f"# TYPE pii_scanner_{name} {kind}")
+        lines.extend(f"pii_scanner_{name}{labels} {value}" for labels, value in samples)
+    metric("files_total", "gauge", "Files discovered for this scan.", [("", snapshot['files_total'])])
+    metric("files_completed_total", "counter", "Files finished (including failures).", [("", snapshot['files_completed'])])
+    metric("files_in_progress", "gauge", "Files currently being processed.", [("", snapshot['files_in_progress'])])
+    metric("queue_depth", "gauge", "Files waiting to be processed.", [("", snapshot['queue_depth'])])
+    metric("errors_total", "counter", "Files that failed to process.", [("", snapshot['errors'])])
+    metric("bytes_scanned_total", "counter", "Bytes of files scanned by workers.", [("", snapshot['bytes_scanned'])])
+    metric("findings_total", "counter", "Findings reported by plugins.", [("", snapshot['findings_total'])])
+    metric("throughput_files_per_second", "gauge", "Average files per second since the scan started.", [("", snapshot['throughput_files_per_second'])])
+    metric("recent_files_per_second", "gauge", "Files per second since the previous sample.", [("", snapshot['recent_files_per_second'])])
+    metric("plugin_hits_total", "counter", "Findings per plugin.",
+           [(f'{{plugin="{_escape_label(name)}"}}', stats['hits']) for name, stats in snapshot['plugins'].items()])
+    metric("plugin_files_total", "counter", "Files scanned per plugin.",
+           [(f'{{plugin="{_escape_label(name)}"}}', stats['files']) for name, stats in snapshot['plugins'].items()])
+    metric("plugin_skipped_total", "counter", "Files skipped per plugin because the text cannot match (file type or text features).",
+           [(f'{{plugin="{_escape_label(name)}"}}', stats['skipped']) for name, stats in snapshot['plugins'].items()])
+    metric("worker_rss_bytes", "gauge", "Resident memory of each worker process.",
+           [(f'{{pid="{w["pid"]}"}}', w['rss_bytes']) for w in snapshot['workers']])
+    metric("current_file_seconds", "gauge", "Elapsed time of the slowest files currently in progress.",
+           [(f'{{pid="{f["pid"]}",path="{_escape_label(f["path"])}"}}', f['elapsed_seconds']) for f in snapshot['slowest_current_files']])
+    return "\n".join(lines) + "\n"
+
+
+class MetricsReporter:
+    """
+    在掃描期間輸出指標的背景服務 (context manager)。
+
+    Args:
+        port: Prometheus 端點的連接埠 (只監聽本機)；None 表示不啟動。
+        status_file: 定期覆寫的 JSON 狀態檔；None 表示不寫出。
+    """
+
+    def __init__(self, metrics: ScanMetrics, port: Optional[int] = None, status_file: Optional[pathlib.Path] = None,
+                 host: str = "127.0.0.1"):
+        self.metrics = metrics; self.port = port; self.status_file = status_file; self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _snapshot(self) -> dict[str, Any]:
+        with self._lock: return self.metrics.snapshot()
+
+    def _write_status(self):
+        temp_path = self.status_file.with_name(self.status_file.name + '.tmp')
+        temp_path.write_text(json.dumps(self._snapshot(), ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(temp_path, self.status_file)
+
+    def _status_loop(self):
+        while not self._stop.wait(_STATUS_INTERVAL_SECONDS):
+            try: self._write_status()
+            except OSError as e: logging.warning(f"無法寫入狀態檔 '{self.status_file}': {e}")
+
+    def __enter__(self):
+        if self.port is not None:
+            reporter = self
+            class Handler(BaseHTTPRequestHandler):
+                def log_message(self, format: str, *args: Any): pass
+                def do_GET(self):
+                    if self.path not in ("/metrics", "/"): self.send_error(404); return
+                    body = to_prometheus(reporter._snapshot()).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers(); self.wfile.write(body)
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            logging.info(f"指標端點已啟動: http://{self.host}:{self._server.server_address[1]}/metrics")
+        if self.status_file is not None:
+            self._writer = threading.Thread(target=self._status_loop, name="metrics-status", daemon=True)
+            self._writer.start()
+            logging.info(f"掃描狀態將每 {_STATUS_INTERVAL_SECONDS:g} 秒寫入 '{self.status_file}'。")
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._writer:
+            self._writer.join()
+            try: self._write_status()  # 最後一次寫出完成時的狀態
+            except OSError as e: logging.warning(f"無法寫入狀態檔 '{self.status_file}': {e}")
+        if self._server: self._server.shutdown(); self._server.server_close()
@@ -0,0 +1,203 @@
+# src/name_dictionary.py
+"""
+中文姓名的字典式快速比對
+
+台灣人名大多是「姓氏 + 1~2 個字」，且常緊鄰「先生」「小姐」「姓名：」等提示詞。
+NameMatcher 不執行模型推論，以正規表示式找出姓氏首字的位置後：
+- 沿姓氏字典樹 (含「歐陽」「張簡」等複姓) 比對姓氏。
+- 依名字常用字的權重、前後提示詞與邊界 (標點、空白) 為「姓氏 + 1 字」與「姓氏 + 2 字」評分，取較高者。
+用途有二：DictionaryNameScanner 插件單獨使用 (fast 設定檔)；或作為候選產生器，只把候選附近的文字交給
+NlpNameScanner 確認 (cascade 設定檔)。
+
+與 BERT 的比較：python -m src.name_dictionary benchmark 標註檔.jsonl [--bert]
+標註檔每行一個 JSON：{"text": "...", "names": ["王小明", ...]}，以每份文字中的姓名集合計算精確率與召回率。
+"""
+import argparse
+import dataclasses
+import json
+import pathlib
+import re
+import sys
+import time
+from typing import Callable, Iterable, Optional, Sequence
+
+NAME_PROFILE_BERT = "bert"        # 只使用 NLP 模型 (預設)
+NAME_PROFILE_FAST = "fast"        # 只使用字典比對，不載入模型推論
+NAME_PROFILE_CASCADE = "cascade"  # 字典比對產生候選，NLP 模型只確認候選附近的文字
+NAME_PROFILES = (NAME_PROFILE_BERT, NAME_PROFILE_FAST, NAME_PROFILE_CASCADE)
+
+SINGLE_SURNAMES = (
+    "陳林黃張李王吳劉蔡楊許鄭謝郭洪曾邱廖賴周徐蘇葉莊呂江何蕭羅高潘簡朱鍾彭游詹胡施沈余盧梁趙顏柯翁魏孫戴"
+    "范方宋鄧杜傅侯曹薛丁卓阮馬董温溫唐藍石蔣古紀姚連馮歐程湯田康姜白汪鄒尤巫鐘黎涂凃龔嚴韓袁金童陸夏柳邵"
+    "錢伍倪于譚駱熊任甘秦顧毛章史官萬俞雷粘饒辜孔易武常包喬賀龍文聶殷岳左段凌莫邢尹符易車霍褚盛桂歐塗"
+    "鄔練麥樊單蒲利卜戚祝鄞艾池郝賈閻覃柴牛關區房滕衛欒冉屈蘭喻闕闞宮華晏伏寇席雲商苗應麻臧邴池諶穆"
+    "黃陈刘张杨许郑谢郭钟赵吴苏叶庄吕萧罗潘邓卢梁颜魏孙戴范蒋纪姚连冯汤龚严韩陆钱谭骆顾饶"
+)
+COMPOUND_SURNAMES = (
+    "歐陽", "張簡", "范姜", "周黃", "張廖", "張李", "陳黃", "江謝", "簡李", "司馬", "諸葛", "上官", "東方", "皇甫",
+    "司徒", "夏侯", "慕容", "令狐", "公孫", "端木", "西門", "南宮", "長孫", "尉遲", "宇文", "鍾離", "欧阳",
+)
+
+# 名字常用字的權重；未列出的中日韓文字為 _UNKNOWN_WEIGHT，_BLOCKED 中的虛詞與單位字不可能是名字
+_GIVEN_NAME_TIERS = (
+    (1.0, "家志明俊宏建文雅怡婷美淑慧玲芳惠佳欣宇翔傑偉豪華君如柏信冠瑋哲銘凱嘉儀珮琪郁涵筱庭萱瑜秀麗鳳英珍"
+          "玉蘭春國正榮德成忠仁義勇輝政安世承育昌彥賢達峰鴻祥宗耀永光振清思宜靜真心容婉琳蓉菁娟萍敏雯慈晴"
+          "晨蕙瑩穎潔綺彤妤昀芸倫毅軒豪鈞霖恩蓁瑄薇詩琦璇嵐廷皓崴睿翰禹鈺祐佑妍媛姿瑤璟宥昱勳昇"),
+    (0.7, "子小大中天立至元偉雄龍山明金水木火土松柏竹梅月秀雲霞玫瑰素碧麗寶珠惠蓮桂芬芝蘋梨菊琴鶯燕珊瑛瓊"
+          "淑貞慧卿宗祖孟仲伯叔賓友朋聖信良善道德智勇強剛毅健康寧靖平和順樂福祿壽喜財貴富盛興隆昌茂吉利"
+          "源澤洋海江河湖波濤浩淵濱漢鑫銓鋒鐘錦鎮岳峻崇嶺岩森林楷楨樺楓晉晟昊旻暉曜曉暐煒炫燁焜熙騰駿"),
+    (0.45, "一二三四五六七八九十百千萬文武方正東南西北上新舊紅綠青白黑黃長高美好佳嘉承繼紹緒維綸經緯純紘"),
+)
+_UNKNOWN_WEIGHT = 0.15
+_BLOCKED = frozenset("的了是在和與及或等也都就而之為們這那此其所於對從把被讓給向說會將已要到還又再很最更並但若則因由"
+                     "至每該請著過後裡個第次條項元年日號路街市縣區樓室段巷弄鄰里先生姐女士表示指出係屬各本")
+_CUES_BEFORE = ("姓名", "聯絡人", "承辦人", "負責人", "申請人", "代理人", "經辦人", "收件人", "寄件人", "收件者", "寄件者",
+                "客戶", "病患", "病人", "學生", "員工", "會員", "家長", "醫師", "醫生", "老師", "教授", "主任", "經理",
+                "委員", "議員", "院長", "校長", "局長", "董事長", "總經理", "聯絡", "署名", "簽名", "監護人", "法定代理人")
+_CUES_AFTER = ("先生", "小姐", "女士", "同學", "老師", "醫師", "醫生", "教授", "經理", "主任", "委員", "議員", "院長",
+               "校長", "局長", "董事長", "總經理", "表示", "指出", "提到", "認為", "強調", "等人", "夫婦", "君", "說")
+# 提示詞與姓名之間可以有的分隔字元
+_CUE_SEPARATORS = " \t:：="
+
+_CJK = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+# 單獨使用時回報的門檻，與作為 cascade 候選時的門檻 (偏重召回率)
+REPORT_THRESHOLD = 0.6
+CANDIDATE_THRESHOLD = 0.4
+
+
+def _is_cjk(char: str) -> bool: return bool(char) and _CJK.match(char) is not None
+
+
+class SurnameTrie:
+    """姓氏字典樹：每個節點是 {字: 子節點}，節點中的 None 鍵表示到此為一個完整的姓氏。"""
+
+    def __init__(self, surnames: Iterable[str]):
+        self.root: dict = {}
+        for surname in surnames:
+            node = self.root
+            for char in surname: node = node.setdefault(char, {})
+            node[None] = True
+
+    def first_chars(self) -> str: return "".join(char for char in self.root if char is not None)
+
+    def matches(self, text: str, start: int) -> list[str]:
+        """回傳從 start 開始的所有姓氏 (由長到短)。"""
+        found = []; node = self.root; position = start
+        while position < len(text) and text[position] in node:
+            node = node[text[position]]; position += 1
+            if None in node: found.append(text[start:position])
+        return found[::-1]
+
+
+@dataclasses.dataclass(frozen=True)
+class NameCandidate:
+    start: int; end: int; surname: str; score: float
+
+    @property
+    def length(self) -> int: return self.end - self.start
+
+
+def _build_weights() -> dict[str, float]:
+    weights: dict[str, float] = {}
+    for weight, chars in _GIVEN_NAME_TIERS:
+        for char in chars: weights.setdefault(char, weight)
+    return weights
+
+
+class NameMatcher:
+    """無狀態、可由多個執行緒共用。"""
+
+    def __init__(self):
+        self.trie = SurnameTrie(list(SINGLE_SURNAMES) + list(COMPOUND_SURNAMES))
+        self.weights = _build_weights()
+        self._starts = re.compile(f"[{re.escape(self.trie.first_chars())}]")
+        self._cues_before = sorted(_CUES_BEFORE, key=len, reverse=True)
+
+    def _given_weight(self, char: str) -> float:
+        if char in _BLOCKED or not _is_cjk(char): return 0.0
+        return self.weights.get(char, _UNKNOWN_WEIGHT)
+
+    def _cue_before(self, text: str, start: int) -> bool:
+        position = start
+        while position > 0 and text[position - 1] in _CUE_SEPARATORS and start - position < 2: position -= 1
+        return any(text.endswith(cue, 0, position) for cue in self._cues_before)
+
+    def _score(self, text: str, start: int, surname: str, given: str, cue_before: bool) -> float:
+        weights = [self._given_weight(char) for char in given]
+        if not all(weights): return 0.0
+        end = start + len(surname) + len(given)
+        score = (0.35 if len(surname) > 1 else 0.25) + 0.35 * sum(weights) / len(weights)
+        if cue_before: score += 0.35
+        if text.startswith(_CUES_AFTER, end): score += 0.3
+        if start == 0 or not _is_cjk(text[start - 1]): score += 0.1
+        if end >= len(text) or not _is_cjk(text[end]): score += 0.1
+        return min(score, 0.99)
+
+    def find(self, text: str, threshold: float = REPORT_THRESHOLD) -> list[NameCandidate]:
+        """回傳分數達門檻的姓名候選 (依位置排列、互不重疊)。"""
+        candidates: list[NameCandidate] = []
+        position = 0
+        for match in self._starts.finditer(text):
+            start = match.start()
+            if start < position: continue
+            cue_before = self._cue_before(text, start)
+            best: Optional[NameCandidate] = None
+            for surname in self.trie.matches(text, start):
+                given_start = start + len(surname)
+                for given_length in (2, 1):
+                    given = text[given_start:given_start + given_length]
+                    if len(given) < given_length: continue
+                    # 大多數台灣人名為三個字，同分時偏好兩字名
+                    score = self._score(text, start, surname, given, cue_before) + (0.02 if given_length == 2 else 0.0)
+                    if score >= threshold and (best is None or score > best.score):
+                        best = NameCandidate(start, given_start + given_length, surname, round(min(score, 0.99), 4))
+            if best: candidates.append(best); position = best.end
+        return candidates
+
+
+# --- 與 BERT 的比較 ---
+def _evaluate(samples: Sequence[dict], find_names: Callable[[str], set[str]]) -> dict:
+    true_positive = predicted = expected = 0; characters = 0
+    started = time.perf_counter()
+    for sample in samples:
+        found = find_names(sample['text']); gold = set(sample['names'])
+        true_positive += len(found & gold); predicted += len(found); expected += len(gold); characters += len(sample['text'])
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    precision = true_positive / predicted if predicted else 0.0
+    recall = true_positive / expected if expected else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            'seconds': elapsed, 'chars_per_second': characters / elapsed}
+
+
+def run_benchmark(labels: pathlib.Path, with_bert: bool = False) -> int:
+    samples = [json.loads(line) for line in labels.read_text(encoding='utf-8').splitlines() if line.strip()]
+    if not samples: print("標註檔沒有任何樣本。"); return 1
+    matcher = NameMatcher()
+    rows = [("字典 (fast)", _evaluate(samples, lambda text: {text[c.start:c.end] for c in matcher.find(text)}))]
+    if with_bert:
+        from transformers import pipeline  # 只有比較 BERT 時需要
+        from src.plugins.nlp_name_scanner import NlpNameScanner
+        from src.shared_data_model import FileContext, FileStatus
+        model = pipeline("ner", model="ckiplab/bert-base-chinese-ner", aggregation_strategy="max")
+        context = FileContext(file_path=labels, mime_type="text/plain", file_size_bytes=0, status=FileStatus.COMPLETED)
+        for label, profile in (("BERT (bert)", NAME_PROFILE_BERT), ("字典 + BERT (cascade)", NAME_PROFILE_CASCADE)):
+            scanner = NlpNameScanner(nlp_model=model, name_profile=profile)
+            rows.append((label, _evaluate(samples, lambda text: {r.matched_value for r in scanner.scan(text, context)})))
+    print(f"樣本 {len(samples)} 份，標註姓名 {sum(len(s['names']) for s in samples)} 個")
+    for label, stats in rows:
+        print(f"{label:24s} 精確率 {stats['precision']:.3f}  召回率 {stats['recall']:.3f}  F1 {stats['f1']:.3f}"
+              f"  {stats['chars_per_second'] / 1000:10.1f} K 字/秒")
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.name_dictionary", description="字典式姓名比對與 BERT 的精確率、召回率與速度比較")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("labels", type=pathlib.Path, help='標註檔 (JSONL)，每行 {"text": ..., "names": [...]}。')
+    parser.add_argument("--bert", action="store_true", help="一併評估 BERT 與 cascade (需要 transformers 與模型)。")
+    args = parser.parse_args(argv)
+    return run_benchmark(args.labels, args.bert)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
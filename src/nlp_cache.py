@@ -0,0 +1,193 @@
+# src/nlp_cache.py
+"""
+NLP 推論快取
+
+共用的頁尾、免責聲明、重複的表頭等相同的文字分段會在許多檔案中重複出現，每次都重新執行 BERT 推論。
+快取以「模型識別 + 分段內容」的雜湊為鍵，保存分組後的實體：
+- 記憶體層：每個工作進程各自的 LRU。
+- 磁碟層 (選用)：同一目錄下的 SQLite 檔，由所有工作進程與之後的掃描共用。
+命中次數與估計節省的推論時間以每個執行緒各自的計數器累計，由 FileScanner 逐檔取差值回傳主進程彙整。
+"""
+from __future__ import annotations
+import dataclasses
+import hashlib
+import json
+import logging
+import pathlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+
+DEFAULT_CAPACITY = 4096
+CACHE_FILE_NAME = "nlp_cache.sqlite3"
+# 快取內容的格式版本；分組邏輯改變時遞增，使舊的磁碟快取失效
+CACHE_FORMAT = 1
+_ENTITY_FIELDS = ('entity_group', 'word', 'start', 'end', 'score')
+_SQL_BATCH = 500
+
+
+@dataclasses.dataclass
+class CacheStats:
+    lookups: int = 0; memory_hits: int = 0; disk_hits: int = 0
+    inference_seconds: float = 0.0  # 未命中分段的實際推論時間
+    saved_seconds: float = 0.0      # 命中分段依平均推論時間估計節省的時間
+
+    @property
+    def hits(self) -> int: return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float: return self.hits / self.lookups if self.lookups else 0.0
+
+    def add(self, other: CacheStats):
+        for field in dataclasses.fields(self): setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+    def minus(self, other: CacheStats) -> CacheStats:
+        return CacheStats(**{field.name: getattr(self, field.name) - getattr(other, field.name) for field in dataclasses.fields(self)})
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'lookups': self.lookups, 'hits': self.hits, 'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits,
+                'hit_rate': round(self.hit_rate, 4), 'inference_seconds': round(self.inference_seconds, 3),
+                'saved_seconds': round(self.saved_seconds, 3)}
+
+
+_thread_stats = threading.local()
+
+
+def thread_stats() -> CacheStats:
+    """目前執行緒的累計統計 (執行緒內模式下多個執行緒共用同一個快取，各自計數才能逐檔取差值)。"""
+    stats = getattr(_thread_stats, 'stats', None)
+    if stats is None: stats = _thread_stats.stats = CacheStats()
+    return stats
+
+
+def model_identity(model: Any) -> str:
+    """transformers pipeline 以模型名稱識別；其他物件 (例如模擬模型) 以類別名稱識別。"""
+    name = getattr(getattr(model, 'model', None), 'name_or_path', None)
+    params = getattr(model, '_postprocess_params', None)
+    strategy = params.get('aggregation_strategy', '') if isinstance(params, dict) else ''
+    return f"{name or type(model).__name__}|{strategy}|v{CACHE_FORMAT}"
+
+
+class InferenceCache:
+    """
+    Args:
+        model_id: 模型識別，與分段內容一起構成快取鍵。
+        capacity: 記憶體 LRU 的分段數上限；0 表示不使用記憶體層。
+        directory: 磁碟層的目錄；None 表示不使用磁碟層。
+    以 pickle 傳給工作進程時只保留設定，記憶體內容與資料庫連線在各進程重新建立。
+    """
+
+    def __init__(self, model_id: str, capacity: int = DEFAULT_CAPACITY, directory: Optional[pathlib.Path] = None):
+        self.model_id = model_id; self.capacity = capacity; self.directory = directory
+        self._setup()
+
+    def _setup(self):
+        self._memory: OrderedDict[str, list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connections = threading.local()
+        self._disk_enabled = self.directory is not None
+        self._average_seconds = 0.0; self._timed_chunks = 0
+
+    def __getstate__(self) -> dict:
+        return {'model_id': self.model_id, 'capacity': self.capacity, 'directory': self.directory}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state); self._setup()
+
+    def key(self, chunk: str) -> str:
+        return hashlib.blake2b(f"{self.model_id}\0{chunk}".encode('utf-8'), digest_size=16).hexdigest()
+
+    # --- 磁碟層 ---
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self._disk_enabled: return None
+        connection = getattr(self._connections, 'connection', None)
+        if connection is not None: return connection
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.directory / CACHE_FILE_NAME, timeout=30.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS entities (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            # 每個分段的平均推論時間：之後的掃描全部命中時，仍能估計節省的時間
+            connection.execute("CREATE TABLE IF NOT EXISTS timings (model_id TEXT PRIMARY KEY, seconds_per_chunk REAL NOT NULL)")
+            connection.commit()
+            row = connection.execute("SELECT seconds_per_chunk FROM timings WHERE model_id = ?", (self.model_id,)).fetchone()
+        except (OSError, sqlite3.Error) as e:
+            self._disable_disk(e); return None
+        with self._lock:
+            if row and not self._timed_chunks: self._average_seconds = row[0]
+        self._connections.connection = connection
+        return connection
+
+    def _disable_disk(self, error: Exception):
+        if self._disk_enabled: logging.warning(f"NLP 推論快取的磁碟層無法使用，改為只使用記憶體: {error}")
+        self._disk_enabled = False
+
+    def _disk_get(self, keys: Sequence[str]) -> dict[str, list[dict]]:
+        connection = self._connection()
+        if connection is None or not keys: return {}
+        found = {}
+        try:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start:start + _SQL_BATCH]
+                rows = connection.execute(f"SELECT key, value FROM entities WHERE key IN ({','.join('?' * len(batch))})", batch)
+                found.update((key, json.loads(value)) for key, value in rows)
+        except (sqlite3.Error, ValueError) as e:
+            self._disable_disk(e); return {}
+        return found
+
+    def _disk_put(self, entries: dict[str, list[dict]], seconds_per_chunk: float):
+        connection = self._connection()
+        if connection is None or not entries: return
+        try:
+            with connection:
+                connection.executemany("INSERT OR IGNORE INTO entities (key, value) VALUES (?, ?)",
+                                       [(key, json.dumps(value, ensure_ascii=False)) for key, value in entries.items()])
+                connection.execute("INSERT OR REPLACE INTO timings (model_id, seconds_per_chunk) VALUES (?, ?)", (self.model_id, seconds_per_chunk))
+        except sqlite3.Error as e:
+            self._disable_disk(e)
+
+    # --- 記憶體層 ---
+    def _remember(self, key: str, entities: list[dict]):
+        if not self.capacity: return
+        with self._lock:
+            self._memory[key] = entities; self._memory.move_to_end(key)
+            while len(self._memory) > self.capacity: self._memory.popitem(last=False)
+
+    def lookup(self, chunks: Sequence[str]) -> tuple[list[str], list[Optional[list[dict]]]]:
+        """回傳 (各分段的快取鍵, 各分段快取的實體或 None)。"""
+        keys = [self.key(chunk) for chunk in chunks]
+        cached: list[Optional[list[dict]]] = [None] * len(keys)
+        stats = thread_stats(); stats.lookups += len(keys)
+        with self._lock:
+            for index, key in enumerate(keys):
+                entities = self._memory.get(key)
+                if entities is not None: self._memory.move_to_end(key); cached[index] = entities; stats.memory_hits += 1
+        missing = [key for key, entities in zip(keys, cached) if entities is None]
+        if missing:
+            from_disk = self._disk_get(missing)
+            for index, key in enumerate(keys):
+                if cached[index] is None and key in from_disk:
+                    cached[index] = from_disk[key]; stats.disk_hits += 1; self._remember(key, from_disk[key])
+        hits = sum(1 for entities in cached if entities is not None)
+        stats.saved_seconds += hits * self._average_seconds
+        return keys, cached
+
+    def store(self, keys: Sequence[str], entities: Sequence[list[dict]], inference_seconds: float):
+        """記錄未命中分段的推論結果與花費的時間 (用來估計命中節省的時間)。"""
+        if not keys: return
+        thread_stats().inference_seconds += inference_seconds
+        with self._lock:
+            self._timed_chunks += len(keys)
+            self._average_seconds += (inference_seconds - self._average_seconds * len(keys)) / self._timed_chunks
+            average = self._average_seconds
+        entries = {key: [{field: _plain(entity.get(field)) for field in _ENTITY_FIELDS} for entity in value] for key, value in zip(keys, entities)}
+        for key, value in entries.items(): self._remember(key, value)
+        self._disk_put(entries, average)
+
+
+def _plain(value: Any) -> Any:
+    """模型輸出的分數可能是 numpy 型別，轉成可序列化的內建型別。"""
+    if isinstance(value, (str, int, float)) or value is None: return value
+    try: return value.item()
+    except AttributeError: return float(value)
@@ -1,18 +1,24 @@
 # src/parsers/__init__.py (最終版 - TxtParser 全覆蓋策略)
 
+import dataclasses
 import logging
 import os
 import pathlib
-import magic
-from typing import Iterable
+from typing import Mapping, Optional, Union
 
-from src.shared_data_model import FileContext, FileStatus
-from src.parsers.base_parser import BaseParser
+from src.shared_data_model import FileContext, FileStatus, TriageAction, TriageCategory
+from src.parsers.base_parser import BaseParser, ParseTimeoutError, parse_time_limit
 # 我們現在只需要匯入這幾個核心解析器
 from src.parsers.docx_parser import DocxParser
 from src.parsers.pdf_parser import PdfParser
 from src.parsers.xlsx_parser import XlsxParser
 from src.parsers.txt_parser import TxtParser
+from src.parsers.doc_parser import DocParser
+from src.parsers.xls_parser import XlsParser
+from src.parsers.tabular_parser import TabularParser
+from src.parsers.mapped_text import MappedText
+from src.parsers.triage import FileTriage, HEAD_SIZE, SAMPLE_BYTES
+from src.parsers.mime import MIME_OLE2, MimeSniffer, detect_ole_mime
 
 
 class FileParserDispatcher:
@@ -20,12 +26,15 @@ class FileParserDispatcher:
     一個根據檔案副檔名和 MIME 類型來分派任務給不同解析器的可呼叫類別。
     本版本採用「全面性優先」策略，所有基於文字的格式都由 TxtParser 處理。
     """
-    def __init__(self):
+    def __init__(self, triage_policy: Optional[Mapping[TriageCategory, TriageAction]] = None, parse_timeout: Optional[float] = None):
         # 實例化所有解析器 # <- 新增
         docx_parser = DocxParser()
         xlsx_parser = XlsxParser()
         pdf_parser = PdfParser()
+        doc_parser = DocParser() # Word 97-2003，純 Python (olefile)，不需 pywin32
+        xls_parser = XlsParser() # Excel 97-2003，透過 xlrd 讀取 BIFF
         txt_parser = TxtParser() # 所有純文字類型共用這一個解析器
+        tabular_parser = TabularParser() # SQL 傾印與 CSV/TSV：依欄位串流，不整份讀入記憶體
 
         # 【最終決定】擴充副檔名映射表，將所有網頁和純文字檔案類型全部指向 TxtParser
         self.extension_map = { # <- 新增
@@ -33,6 +42,8 @@ class FileParserDispatcher:
             '.docx': docx_parser,
             '.xlsx': xlsx_parser,
             '.pdf': pdf_parser,
+            '.doc': doc_parser,
+            '.xls': xls_parser,
             # Common Text & Web Files - ALL use TxtParser
             '.txt': txt_parser,
             '.html': txt_parser,
@@ -44,22 +55,80 @@ class FileParserDispatcher:
             '.svg': txt_parser,
             '.md': txt_parser,
             '.log': txt_parser,
-            '.csv': txt_parser,
+            '.csv': tabular_parser,
+            '.tsv': tabular_parser,
+            '.sql': tabular_parser,
             '.ini': txt_parser,
             '.conf': txt_parser,
         }
         # 用於MIME類型匹配的後備列表
-        self.mime_parsers: list[BaseParser] = [docx_parser, xlsx_parser, pdf_parser, txt_parser] # <- 新增
+        self.mime_parsers: list[BaseParser] = [docx_parser, xlsx_parser, pdf_parser, doc_parser, xls_parser, txt_parser] # <- 新增
+        # 單一檔案的解析時間上限 (秒)；超過時該檔案記為錯誤，不會卡住整個工作進程
+        self.parse_timeout = parse_timeout
+        # 文字類檔案在完整解析前，先依開頭內容分流 (跳過二進位、壓縮程式碼等)
+        self.triage = FileTriage(triage_policy)
+        # 常駐的 MIME 偵測器：內建簽章表優先，libmagic 只作為後備
+        self.mime_sniffer = MimeSniffer()
         logging.info(f"檔案解析分派器已初始化，支援 {len(self.extension_map)} 種副檔名。")
 
-    # __call__ 和 _get_mime_type 方法與前一版完全相同，保持不變
-    def _get_mime_type(self, file_path: pathlib.Path) -> str | None:
-        try: return magic.from_file(str(file_path), mime=True)
-        except magic.MagicException as e:
-            logging.error(f"使用 python-magic 識別 '{file_path.name}' 時發生錯誤: {e}")
-            return None
+    def _get_mime_type(self, file_path: pathlib.Path, head: bytes) -> str | None:
+        """由已讀取的開頭位元組判斷 MIME 類型，不再讓 libmagic 重新開啟整個檔案。"""
+        mime_type = self.mime_sniffer.sniff(head, file_path.stat().st_size)
+        if mime_type == MIME_OLE2: mime_type = detect_ole_mime(file_path) or mime_type
+        return mime_type
 
-    def __call__(self, file_path: pathlib.Path) -> tuple[FileContext, str]:
+    def _read_head(self, file_path: pathlib.Path) -> bytes:
+        with open(file_path, 'rb') as f: return f.read(HEAD_SIZE)
+
+    def _parse_with(self, parser: BaseParser, file_path: pathlib.Path, head: Optional[bytes] = None) -> tuple[FileContext, Union[str, MappedText]]:
+        """
+        Office/PDF 直接解析；文字類檔案先分流，再依處理方式決定跳過、取樣或完整解析。
+        head: 若已為了 MIME 偵測讀取過檔案開頭，直接沿用同一份緩衝區。
+        """
+        if not isinstance(parser, TxtParser): return self._timed_parse(parser, file_path)
+        decision = self.triage(file_path, head if head is not None else self._read_head(file_path))
+        if decision.action == TriageAction.SKIP:
+            logging.debug(f"檔案 '{file_path.name}' 被分流判定為 {decision.category.value}，跳過掃描: {decision.reason}")
+            ctx = FileContext(file_path=file_path, mime_type="", file_size_bytes=file_path.stat().st_size, status=FileStatus.SKIPPED,
+                              error_message=f"分流判定跳過: {decision.reason}", triage=decision)
+            return ctx, ""
+        max_bytes = SAMPLE_BYTES if decision.action == TriageAction.SAMPLE else None
+        ctx, text = self._timed_parse(parser, file_path, max_bytes=max_bytes)
+        return dataclasses.replace(ctx, triage=decision), text
+
+    def plan_ranges(self, file_path: pathlib.Path, min_range_bytes: int, max_ranges: int) -> Optional[list[tuple[int, int]]]:
+        """
+        超大型純文字檔的檔案內平行掃描：回傳起點對齊行首的位元組範圍，由多個工作進程分別掃描。
+        不適合切分的檔案 (非純文字、未達 mmap 門檻、分流判定跳過或取樣、切不出 2 個範圍) 回傳 None，照常整份處理。
+        """
+        try:
+            size = file_path.stat().st_size
+            head = self._read_head(file_path)
+            parser = self.extension_map.get(file_path.suffix.lower())
+            if parser is None:
+                mime_type = self._get_mime_type(file_path, head)
+                parser = next((candidate for candidate in self.mime_parsers if mime_type and candidate.supports(mime_type)), None)
+            # 只有一般純文字走 mmap 路徑；SQL/CSV 等子類別有自己的串流方式
+            if type(parser) is not TxtParser or size < parser.LARGE_FILE_THRESHOLD: return None
+            if self.triage(file_path, head).action in (TriageAction.SKIP, TriageAction.SAMPLE): return None
+            count = min(max_ranges, size // max(1, min_range_bytes))
+            if count < 2: return None
+            with parser.open_mapped(file_path) as mapped: ranges = mapped.plan_ranges(count)
+        except (OSError, ValueError) as e:
+            logging.debug(f"無法規劃 '{file_path}' 的檔案內平行掃描: {e}"); return None
+        return ranges if len(ranges) > 1 else None
+
+    def _timed_parse(self, parser: BaseParser, file_path: pathlib.Path, **kwargs) -> tuple[FileContext, Union[str, MappedText]]:
+        """在解析時間上限內呼叫解析器；逾時的檔案回傳 ERROR 狀態而不是讓工作進程一直等待。"""
+        try:
+            with parse_time_limit(self.parse_timeout):
+                return parser.parse(file_path, **kwargs)
+        except ParseTimeoutError as e:
+            logging.warning(f"檔案 '{file_path.name}' 解析逾時: {e}")
+            ctx = FileContext(file_path=file_path, mime_type="", file_size_bytes=file_path.stat().st_size, status=FileStatus.ERROR, error_message=str(e))
+            return ctx, ""
+
+    def __call__(self, file_path: pathlib.Path) -> tuple[FileContext, Union[str, MappedText]]:
         try:
             if not file_path.is_file(): raise FileNotFoundError("路徑不是一個有效的檔案")
             if not os.access(file_path, os.R_OK): raise PermissionError("沒有足夠的權限讀取檔案")
@@ -74,14 +143,15 @@ class FileParserDispatcher:
         if file_ext in self.extension_map:
             parser = self.extension_map[file_ext]
             logging.debug(f"檔案 '{file_path.name}' 根據副檔名 '{file_ext}' 分派給 {parser.__class__.__name__}。")
-            return parser.parse(file_path)
+            return self._parse_with(parser, file_path)
 
-        mime_type = self._get_mime_type(file_path)
+        head = self._read_head(file_path)
+        mime_type = self._get_mime_type(file_path, head)
         if mime_type:
             for parser in self.mime_parsers:
                 if parser.supports(mime_type):
                     logging.debug(f"檔案 '{file_path.name}' 根據 MIME 類型 '{mime_type}' 分派給 {parser.__class__.__name__}。")
-                    return parser.parse(file_path)
+                    return self._parse_with(parser, file_path, head)
 
         final_mime = mime_type or "未知"
         logging.warning(f"檔案 '{file_path.name}' (副檔名: '{file_ext}', MIME: {final_mime}) 沒有找到支援的解析器，將跳過。")
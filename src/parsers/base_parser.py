@@ -1,12 +1,35 @@
 # src/parsers/base_parser.py
 from __future__ import annotations
 import abc
+import contextlib
 import pathlib
-from typing import Iterable
+import signal
+import threading
+from typing import Iterator, Optional
 from src.shared_data_model import FileContext
 
+class ParseTimeoutError(Exception):
+    """單一檔案解析時間超過上限。"""
+
+@contextlib.contextmanager
+def parse_time_limit(seconds: Optional[float]) -> Iterator[None]:
+    """
+    在區塊執行超過 `seconds` 秒時拋出 ParseTimeoutError。
+    使用 SIGALRM 計時器，只在支援的平台 (POSIX) 且位於主執行緒時生效，其餘情況不設限。
+    注意：訊號只會在 Python 位元組碼之間被處理，卡在 C 擴充模組內的呼叫需由上層的工作進程監控處理。
+    """
+    if not seconds or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield; return
+    def _on_timeout(signum, frame): raise ParseTimeoutError(f"解析時間超過 {seconds:g} 秒上限。")
+    previous_handler = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try: yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
 class BaseParser(abc.ABC):
     @abc.abstractmethod
     def supports(self, mime_type: str) -> bool: ...
     @abc.abstractmethod
-    def parse(self, file_path: pathlib.Path) -> tuple[FileContext, str]: ...
\ No newline at end of file
+    def parse(self, file_path: pathlib.Path) -> tuple[FileContext, str]: ...
@@ -0,0 +1,121 @@
+# src/parsers/doc_parser.py
+"""
+Word 97-2003 (.doc) 解析器
+
+不依賴 pywin32/COM，直接以 olefile 讀取 OLE2 容器中的 WordDocument 串流，
+透過 FIB 找到 Table 串流中的 piece table (Clx)，逐一解碼每個文字片段。
+本文、註腳、頁首頁尾與註解都在同一個 CP 範圍內，因此會一併被擷取。
+"""
+import logging
+import pathlib
+import struct
+from typing import Iterator
+
+import olefile
+
+from src.shared_data_model import FileContext, FileStatus
+from src.parsers.base_parser import BaseParser, ParseTimeoutError
+from src.parsers.mime import MIME_DOC
+
+_FIB_MAGIC = 0xA5EC
+_FIB_FLAGS_OFFSET = 0x0A
+_FLAG_ENCRYPTED = 0x0100
+_FLAG_WHICH_TABLE = 0x0200
+# FibRgFcLcb97 中 fcClx / lcbClx 的索引 (以 32 位元整數為單位)
+_FC_CLX_INDEX = 66
+_LCB_CLX_INDEX = 67
+# 單一片段超過此大小視為檔案損毀，避免惡意檔案耗盡記憶體
+_MAX_PIECE_BYTES = 256 * 1024 * 1024
+
+# Word 內部控制字元 → 純文字：段落/儲存格結尾換行，欄位代碼標記與物件錨點移除
+_CONTROL_TRANSLATION = str.maketrans({
+    '\r': '\n', '\x07': '\n', '\x0b': '\n', '\x0c': '\n', '\x0e': '\n',
+    '\x01': None, '\x08': None, '\x13': None, '\x14': None, '\x15': None,
+    '\x1e': '-', '\x1f': None, '\xa0': ' ',
+})
+
+
+class DocFormatError(ValueError):
+    """WordDocument 串流結構不符合預期 (檔案損毀或非 Word 97 以後的格式)。"""
+
+class DocEncryptedError(DocFormatError):
+    """文件受密碼保護。"""
+
+
+def _read_clx_offsets(word_stream: bytes) -> tuple[str, int, int]:
+    """解析 FIB，回傳 (Table 串流名稱, fcClx, lcbClx)。"""
+    if len(word_stream) < 0x9A or struct.unpack_from('<H', word_stream, 0)[0] != _FIB_MAGIC:
+        raise DocFormatError("WordDocument 串流缺少有效的 FIB。")
+    flags = struct.unpack_from('<H', word_stream, _FIB_FLAGS_OFFSET)[0]
+    if flags & _FLAG_ENCRYPTED: raise DocEncryptedError("檔案已加密，無法解析。")
+    table_name = '1Table' if flags & _FLAG_WHICH_TABLE else '0Table'
+
+    position = 0x20
+    csw = struct.unpack_from('<H', word_stream, position)[0]; position += 2 + csw * 2
+    cslw = struct.unpack_from('<H', word_stream, position)[0]; position += 2 + cslw * 4
+    cb_rg_fc_lcb = struct.unpack_from('<H', word_stream, position)[0]; position += 2
+    if cb_rg_fc_lcb <= _LCB_CLX_INDEX // 2:
+        raise DocFormatError("FIB 過短，不是 Word 97 以後的格式。")
+    fc_clx, lcb_clx = struct.unpack_from('<II', word_stream, position + _FC_CLX_INDEX * 4)
+    return table_name, fc_clx, lcb_clx
+
+
+def _read_piece_table(clx: bytes) -> Iterator[tuple[int, int, int, bool]]:
+    """解析 Clx，逐一產生 (cp 起點, cp 終點, 檔案位移 fc, 是否為 8 位元壓縮文字)。"""
+    position = 0
+    # 跳過所有 Prc (0x01 開頭的屬性修改群組)
+    while position < len(clx) and clx[position] == 0x01:
+        cb_grpprl = struct.unpack_from('<h', clx, position + 1)[0]
+        position += 3 + cb_grpprl
+    if position >= len(clx) or clx[position] != 0x02: raise DocFormatError("找不到 piece table (Pcdt)。")
+    lcb = struct.unpack_from('<I', clx, position + 1)[0]
+    plc = clx[position + 5: position + 5 + lcb]
+    if len(plc) != lcb or (lcb - 4) % 12: raise DocFormatError("piece table 長度不正確。")
+    count = (lcb - 4) // 12
+    cps = struct.unpack_from(f'<{count + 1}I', plc, 0)
+    for i in range(count):
+        fc_compressed = struct.unpack_from('<I', plc, (count + 1) * 4 + i * 8 + 2)[0]
+        is_compressed = bool(fc_compressed & 0x40000000)
+        fc = fc_compressed & 0x3FFFFFFF
+        yield cps[i], cps[i + 1], (fc // 2 if is_compressed else fc), is_compressed
+
+
+def iter_doc_text(ole: olefile.OleFileIO) -> Iterator[str]:
+    """逐片段 (piece) 產生已清理的文字，讓呼叫端可以分段處理並在片段之間檢查逾時。"""
+    word_stream = ole.openstream('WordDocument').read()
+    table_name, fc_clx, lcb_clx = _read_clx_offsets(word_stream)
+    if not ole.exists(table_name): raise DocFormatError(f"找不到 {table_name} 串流。")
+    table_stream = ole.openstream(table_name).read()
+    clx = table_stream[fc_clx: fc_clx + lcb_clx]
+    if len(clx) != lcb_clx: raise DocFormatError("Clx 超出 Table 串流範圍。")
+
+    for cp_start, cp_end, fc, is_compressed in _read_piece_table(clx):
+        length = (cp_end - cp_start) * (1 if is_compressed else 2)
+        if length <= 0: continue
+        if length > _MAX_PIECE_BYTES or fc + length > len(word_stream):
+            raise DocFormatError("文字片段超出 WordDocument 串流範圍。")
+        raw = word_stream[fc: fc + length]
+        text = raw.decode('cp1252', errors='replace') if is_compressed else raw.decode('utf-16-le', errors='replace')
+        yield text.translate(_CONTROL_TRANSLATION)
+
+
+class DocParser(BaseParser):
+    def supports(self, mime_type: str) -> bool: return mime_type == MIME_DOC
+    def parse(self, file_path: pathlib.Path) -> tuple[FileContext, str]:
+        ctx_args = {"file_path": file_path, "mime_type": MIME_DOC, "file_size_bytes": file_path.stat().st_size}
+        try:
+            with olefile.OleFileIO(str(file_path)) as ole:
+                if not ole.exists('WordDocument'): raise DocFormatError("OLE2 容器中沒有 WordDocument 串流。")
+                full_text = "".join(iter_doc_text(ole))
+            ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED)
+            return ctx, full_text
+        except ParseTimeoutError: raise
+        except DocFormatError as e:
+            logging.warning(f"'{file_path.name}': {e}")
+            status = FileStatus.SKIPPED if isinstance(e, DocEncryptedError) else FileStatus.ERROR
+            return FileContext(**ctx_args, status=status, error_message=str(e)), ""
+        except Exception as e:
+            msg = f"解析 DOC 檔案時發生錯誤: {e}"
+            logging.error(f"'{file_path.name}': {msg}", exc_info=True)
+            ctx = FileContext(**ctx_args, status=FileStatus.ERROR, error_message=str(e))
+            return ctx, ""
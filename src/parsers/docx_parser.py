@@ -1,34 +1,189 @@
 # src/parsers/docx_parser.py
+"""
+Word 2007+ (.docx) 串流解析器
+
+不建立 python-docx 的物件模型，直接從 zip 中逐一串流讀取 WordprocessingML 組件，
+以 iterparse 漸進解析，處理完的區塊立即釋放，記憶體用量不隨文件大小成長：
+- 本文 (word/document.xml)、頁首、頁尾、註腳、章節附註與註解 (含註解作者)。
+- 每個段落 (含表格儲存格與文字方塊中的段落) 各成一個片段，結果的 location 標示所在的段落或儲存格。
+- 合併儲存格只會出現一次 (python-docx 的 row.cells 會在每一列重複回傳同一個合併儲存格)。
+
+與 python-docx 路徑的比較：python -m src.parsers.docx_parser benchmark 檔案或目錄...
+"""
+import argparse
 import logging
 import pathlib
-import docx
+import re
+import sys
+import time
+import zipfile
+from typing import Iterator, Optional, Sequence
+from xml.etree.ElementTree import iterparse
+
 from src.shared_data_model import FileContext, FileStatus
-from src.parsers.base_parser import BaseParser
+from src.parsers.base_parser import BaseParser, ParseTimeoutError
+from src.parsers.located_text import LocatedText
+from src.parsers.mime import MIME_DOCX
+
+# Transitional 與 Strict 兩種命名空間
+_NAMESPACES = ("http://schemas.openxmlformats.org/wordprocessingml/2006/main", "http://purl.oclc.org/ooxml/wordprocessingml/main")
+_ELEMENTS = ("p", "t", "tab", "br", "cr", "noBreakHyphen", "tbl", "tr", "tc", "gridSpan", "gridBefore", "footnote", "endnote", "comment")
+_LOCAL_NAMES = {f"{{{ns}}}{name}": name for ns in _NAMESPACES for name in _ELEMENTS}
+_ATTRIBUTES = {name: tuple(f"{{{ns}}}{name}" for ns in _NAMESPACES) for name in ("val", "id", "author")}
+_RUN_TEXT = {"tab": "\t", "br": "\n", "cr": "\n", "noBreakHyphen": "-"}
+# 註腳、章節附註與註解的容器元素 → 標籤
+_NOTE_LABELS = {"footnote": "註腳", "endnote": "章節附註", "comment": "註解"}
+# 解壓縮後超過此大小的組件視為惡意或損毀的檔案
+_MAX_PART_BYTES = 512 * 1024 * 1024
+_PART_PATTERN = re.compile(r"word/(header|footer)(\d*)\.xml")
+_PART_LABELS = {"header": "頁首", "footer": "頁尾"}
+
+
+class DocxFormatError(ValueError):
+    """zip 容器中缺少 word/document.xml 或組件大小異常。"""
+
+
+def _attribute(element, name: str) -> Optional[str]:
+    for key in _ATTRIBUTES[name]:
+        value = element.get(key)
+        if value is not None: return value
+    return None
+
+
+def _document_parts(archive: zipfile.ZipFile) -> list[tuple[str, str]]:
+    """依閱讀順序列出要解析的組件：(zip 內路徑, 標籤前綴)。"""
+    names = set(archive.namelist())
+    if "word/document.xml" not in names: raise DocxFormatError("找不到 word/document.xml，不是有效的 Word 文件。")
+    parts = [("word/document.xml", "")]
+    headers_footers = []
+    for name in names:
+        match = _PART_PATTERN.fullmatch(name)
+        if match: headers_footers.append((match.group(1) != "header", int(match.group(2) or 0), name, f"{_PART_LABELS[match.group(1)]} {match.group(1)}{match.group(2)} "))
+    parts.extend((name, prefix) for _, _, name, prefix in sorted(headers_footers))
+    parts.extend((name, "") for name in ("word/footnotes.xml", "word/endnotes.xml", "word/comments.xml") if name in names)
+    return parts
+
+
+def iter_part_segments(stream, prefix: str = "") -> Iterator[tuple[str, str]]:
+    """
+    漸進解析一個 WordprocessingML 組件，依文件順序產生 (位置標籤, 段落文字)，略過空白段落。
+    巢狀段落 (文字方塊) 與外層段落各自成為片段。
+    """
+    paragraphs: list[list[str]] = []   # 每個開啟中的段落各一個緩衝區
+    tables: list[list[int]] = []       # [表格編號, 列, 欄, 下一個欄位]
+    elements = []
+    paragraph_count = table_count = 0
+    note: Optional[str] = None
+    for event, element in iterparse(stream, events=("start", "end")):
+        name = _LOCAL_NAMES.get(element.tag)
+        if event == "start":
+            elements.append(element)
+            if name == "p":
+                paragraphs.append([])
+                if not tables: paragraph_count += 1
+            elif name == "tbl": table_count += 1; tables.append([table_count, 0, 0, 1])
+            elif name == "tr" and tables: tables[-1][1] += 1; tables[-1][3] = 1
+            elif name == "tc" and tables: tables[-1][2] = tables[-1][3]; tables[-1][3] += 1
+            elif name in _NOTE_LABELS:
+                note = f"{prefix}{_NOTE_LABELS[name]} {_attribute(element, 'id')}"
+                author = _attribute(element, "author")
+                if author: yield f"{note} 作者", author
+            continue
+
+        elements.pop()
+        if name == "t" and paragraphs: paragraphs[-1].append(element.text or "")
+        elif name in _RUN_TEXT and paragraphs: paragraphs[-1].append(_RUN_TEXT[name])
+        elif name == "gridSpan" and tables: tables[-1][3] = tables[-1][2] + max(1, int(_attribute(element, "val") or 1))
+        elif name == "gridBefore" and tables: tables[-1][3] += max(0, int(_attribute(element, "val") or 0))
+        elif name == "tbl" and tables: tables.pop()
+        elif name in _NOTE_LABELS: note = None
+        elif name == "p" and paragraphs:
+            text = "".join(paragraphs.pop())
+            if text.strip():
+                if tables: where = f"表格 {tables[-1][0]} 第 {tables[-1][1]} 列第 {tables[-1][2]} 欄"
+                else: where = "" if note else f"段落 {paragraph_count}"
+                yield (f"{note} {where}".rstrip() if note else f"{prefix}{where}"), text
+        # 只保留開啟中的元素：區塊結束後就清空容器 (document 的 body 或組件的根元素)，已處理的內容不留在記憶體
+        if len(elements) <= 2 and elements: elements[-1].clear()
+
+
+def extract_segments(file_path: pathlib.Path) -> Iterator[tuple[str, str]]:
+    with zipfile.ZipFile(file_path) as archive:
+        for part_name, prefix in _document_parts(archive):
+            if archive.getinfo(part_name).file_size > _MAX_PART_BYTES:
+                raise DocxFormatError(f"組件 {part_name} 解壓縮後超過 {_MAX_PART_BYTES // 1024 // 1024} MB。")
+            with archive.open(part_name) as stream:
+                yield from iter_part_segments(stream, prefix)
+
 
 class DocxParser(BaseParser):
     def supports(self, mime_type: str) -> bool:
-        return mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        return mime_type == MIME_DOCX
     def parse(self, file_path: pathlib.Path) -> tuple[FileContext, str]:
-        ctx_args = {"file_path": file_path, "mime_type": self.supports.__annotations__['mime_type'], "file_size_bytes": file_path.stat().st_size}
+        ctx_args = {"file_path": file_path, "mime_type": MIME_DOCX, "file_size_bytes": file_path.stat().st_size}
         try:
-            document = docx.Document(file_path)
-            all_text = []
-            def extract_from(container):
-                if container is None: return
-                for para in container.paragraphs: all_text.append(para.text)
-                for table in container.tables:
-                    for row in table.rows:
-                        for cell in row.cells: all_text.append(cell.text)
-            extract_from(document)
-            for section in document.sections:
-                extract_from(section.header)
-                extract_from(section.footer)
-            full_text = "\n".join(filter(None, all_text))
+            full_text = LocatedText(extract_segments(file_path))
             ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED)
             return ctx, full_text
+        except ParseTimeoutError: raise
+        except zipfile.BadZipFile:
+            # 加密的 OOXML 文件實際上是 OLE2 容器，不是 zip
+            msg = "檔案可能已加密或已損毀，無法解析。"
+            logging.warning(f"'{file_path.name}': {msg}")
+            ctx = FileContext(**ctx_args, status=FileStatus.ERROR, error_message=msg)
+            return ctx, ""
         except Exception as e:
             msg = f"解析 DOCX 檔案時發生錯誤: {e}"
-            if 'encrypted' in str(e).lower(): msg = "檔案可能已加密或已損毀，無法解析。"
             logging.error(f"'{file_path.name}': {msg}", exc_info=True)
             ctx = FileContext(**ctx_args, status=FileStatus.ERROR, error_message=msg)
-            return ctx, ""
\ No newline at end of file
+            return ctx, ""
+
+
+# --- 與 python-docx 路徑的基準測試 ---
+def extract_text_python_docx(file_path: pathlib.Path) -> str:
+    """舊版以 python-docx 物件模型擷取文字的方式，只用於基準比較。"""
+    import docx  # 只有基準測試需要 python-docx
+    document = docx.Document(file_path)
+    all_text = []
+    def extract_from(container):
+        if container is None: return
+        for para in container.paragraphs: all_text.append(para.text)
+        for table in container.tables:
+            for row in table.rows:
+                for cell in row.cells: all_text.append(cell.text)
+    extract_from(document)
+    for section in document.sections:
+        extract_from(section.header)
+        extract_from(section.footer)
+    return "\n".join(filter(None, all_text))
+
+
+def run_benchmark(paths: Sequence[pathlib.Path], repeat: int = 3) -> int:
+    files = [p for path in paths for p in ([path] if path.is_file() else sorted(path.rglob("*.docx")))]
+    if not files: print("找不到 .docx 檔案。"); return 1
+    totals = [0.0, 0.0]
+    for file_path in files:
+        timings, sizes = [], []
+        for extract in (lambda p: LocatedText(extract_segments(p)), extract_text_python_docx):
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter(); text = extract(file_path); best = min(best, time.perf_counter() - started)
+            timings.append(best); sizes.append(len(text))
+        totals[0] += timings[0]; totals[1] += timings[1]
+        print(f"{file_path.name:40s} {file_path.stat().st_size / 1024:9.1f} KB  串流 {timings[0] * 1000:9.1f} ms ({sizes[0]} 字)"
+              f"  python-docx {timings[1] * 1000:9.1f} ms ({sizes[1]} 字)  {timings[1] / max(timings[0], 1e-9):6.1f}x")
+    print(f"合計: 串流 {totals[0]:.2f} 秒，python-docx {totals[1]:.2f} 秒")
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.parsers.docx_parser", description="DOCX 串流解析與 python-docx 的速度比較")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("paths", nargs="+", type=pathlib.Path, help=".docx 檔案或包含 .docx 的目錄。")
+    parser.add_argument("--repeat", type=int, default=3, help="每個檔案重複幾次，取最快的一次。預設為 3。")
+    args = parser.parse_args(argv)
+    return run_benchmark(args.paths, max(1, args.repeat))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
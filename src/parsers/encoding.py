@@ -0,0 +1,98 @@
+# src/parsers/encoding.py
+"""
+文字編碼偵測模組
+
+只讀取檔案開頭的一小段樣本 (BOM + 啟發式評分) 來決定編碼，
+避免像過去一樣對整個檔案逐一嘗試每一種編碼。
+"""
+import codecs
+from typing import Optional
+
+# 候選編碼的順序同時也是評分相同時的優先順序 (台灣網站以 big5 為主)
+CANDIDATE_ENCODINGS = ['utf-8', 'big5', 'gbk', 'latin-1']
+SAMPLE_SIZE = 64 * 1024
+
+# BOM 對應表：(BOM, 去除 BOM 後使用的編碼)
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF32_LE, 'utf-32-le'), (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+# ASCII 字元在位元組層級維持原樣 (且多位元組字元不會出現 ASCII 位元組) 的編碼，
+# 只有這些編碼可以直接在位元組緩衝區上執行 ASCII 正規表示式。
+# big5/gbk 的第二個位元組可能落在 0x40-0x7E，因此不在此列。
+ASCII_TRANSPARENT_ENCODINGS = frozenset({'utf-8', 'ascii', 'latin-1'})
+
+
+def detect_bom(sample: bytes) -> tuple[Optional[str], int]:
+    """回傳 (編碼, BOM 長度)；若沒有 BOM 則回傳 (None, 0)。"""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom): return encoding, len(bom)
+    return None, 0
+
+
+def _score(text: str) -> float:
+    """粗略的「像不像正常文字」評分：常用中日韓字與 ASCII 加分，私用區與控制字元扣分。"""
+    if not text: return 0.0
+    score = 0
+    for ch in text:
+        code = ord(ch)
+        if code < 0x80: score += 1 if (ch.isprintable() or ch in '\r\n\t') else -5
+        elif 0x4E00 <= code <= 0x9FFF or 0x3000 <= code <= 0x303F or 0xFF00 <= code <= 0xFFEF: score += 2
+        elif 0xE000 <= code <= 0xF8FF or code == 0xFFFD: score -= 5
+    return score / len(text)
+
+
+def _strict_decode(sample: bytes, encoding: str, truncated: bool) -> Optional[str]:
+    """嚴格解碼樣本；若樣本是被截斷的，容許結尾最多 3 個位元組的不完整字元。"""
+    for cut in range(0, 4 if truncated else 1):
+        try: return sample[:len(sample) - cut].decode(encoding)
+        except UnicodeDecodeError: continue
+    return None
+
+
+def detect_encoding(sample: bytes, truncated: bool = False) -> str:
+    """
+    根據檔案開頭的樣本推測編碼。
+
+    Args:
+        sample: 檔案開頭的位元組 (通常為 SAMPLE_SIZE 大小)。
+        truncated: 樣本是否只是檔案的一部分 (結尾可能切在多位元組字元中間)。
+
+    Returns:
+        推測出的編碼名稱 (不含 BOM，例如 'utf-8' 而非 'utf-8-sig')。
+    """
+    bom_encoding, _ = detect_bom(sample)
+    if bom_encoding: return bom_encoding
+    if sample.isascii(): return 'utf-8'
+    # UTF-8 的結構性很強，能嚴格解碼幾乎就代表是 UTF-8
+    if _strict_decode(sample, 'utf-8', truncated) is not None: return 'utf-8'
+
+    best_encoding, best_score = 'latin-1', float('-inf')
+    for encoding in CANDIDATE_ENCODINGS[1:-1]:
+        text = _strict_decode(sample, encoding, truncated)
+        if text is None: continue
+        score = _score(text)
+        if score > best_score: best_encoding, best_score = encoding, score
+    return best_encoding
+
+
+def decode_with_fallback(data: bytes, encoding: str, truncated: bool = False) -> tuple[str, str]:
+    """
+    以偵測到的編碼解碼整份資料；失敗時才依序改用其餘候選編碼。
+    資料只會被讀取一次，後備嘗試都在記憶體中完成。
+
+    Args:
+        truncated: 資料是否只是檔案開頭的一部分 (結尾容許不完整的字元)。
+
+    Returns:
+        (解碼後的文字, 實際使用的編碼)
+    """
+    _, bom_length = detect_bom(data)
+    payload = data[bom_length:] if bom_length else data
+    for candidate in [encoding] + [e for e in CANDIDATE_ENCODINGS if e != encoding]:
+        text = _strict_decode(payload, candidate, truncated)
+        if text is not None: return text, candidate
+    # latin-1 永遠可以解碼，理論上不會走到這裡
+    return payload.decode('latin-1', errors='replace'), 'latin-1'
@@ -0,0 +1,132 @@
+# src/parsers/legacy_benchmark.py
+"""
+舊版 Office (.doc / .xls) 解析器的基準測試
+
+    python -m src.parsers.legacy_benchmark <檔案或目錄...> [--parse-timeout 秒] [--mutations N] [--seed N]
+
+1. 吞吐量：以 FileParserDispatcher 逐一解析語料中的 .doc/.xls，列出 MB/s、各狀態的檔案數與最慢的檔案。
+2. 損毀檔案：每個檔案另產生數個變形 (截斷、後半清零、FAT 自我循環、隨機位元組翻轉)，確認每一個都在解析時間上限內
+   以錯誤或跳過收場，而不是卡住工作進程或拋出未處理的例外。有變形超過上限 (逾時沒有攔住) 或拋出例外時結束碼為 1。
+解析在主執行緒中進行，--parse-timeout 以 SIGALRM 生效，與工作進程內的行為相同。
+"""
+import argparse
+import logging
+import pathlib
+import random
+import struct
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Callable, Optional, Sequence
+
+from src.parsers import FileParserDispatcher
+
+LEGACY_SUFFIXES = ('.doc', '.xls')
+# 逾時機制的容許誤差：超過 上限 × 此倍數 + 1 秒才視為沒有攔住
+_TIMEOUT_SLACK = 1.5
+_OLE_SECTOR_SHIFT_OFFSET = 0x1E
+_OLE_FIRST_DIFAT_OFFSET = 0x4C
+
+
+def _truncate(data: bytes, rng: random.Random) -> bytes:
+    return data[:len(data) // 2]
+
+
+def _zero_tail(data: bytes, rng: random.Random) -> bytes:
+    half = len(data) // 2
+    return data[:half] + bytes(len(data) - half)
+
+
+def _fat_loop(data: bytes, rng: random.Random) -> bytes:
+    """第一個 FAT 區段的每個項目都指向自己：所有串流的區段鏈都成為無窮迴圈。"""
+    if len(data) < 512: return data
+    sector_size = 1 << struct.unpack_from('<H', data, _OLE_SECTOR_SHIFT_OFFSET)[0]
+    fat_sector = struct.unpack_from('<I', data, _OLE_FIRST_DIFAT_OFFSET)[0]
+    start = (fat_sector + 1) * sector_size
+    if sector_size not in (512, 4096) or start + sector_size > len(data): return data
+    loop = b''.join(struct.pack('<I', index) for index in range(sector_size // 4))
+    return data[:start] + loop + data[start + sector_size:]
+
+
+def _flip_bytes(data: bytes, rng: random.Random) -> bytes:
+    """標頭之後每 1KB 隨機翻轉一個位元組 (至少 16 個)。"""
+    mutated = bytearray(data)
+    if len(mutated) <= 512: return bytes(mutated)
+    for _ in range(max(16, len(mutated) // 1024)): mutated[rng.randrange(512, len(mutated))] ^= 1 << rng.randrange(8)
+    return bytes(mutated)
+
+
+MUTATIONS: list[tuple[str, Callable[[bytes, random.Random], bytes]]] = [
+    ("截斷", _truncate), ("後半清零", _zero_tail), ("FAT 循環", _fat_loop), ("位元組翻轉", _flip_bytes),
+]
+
+
+def _collect(paths: Sequence[pathlib.Path]) -> list[pathlib.Path]:
+    files = []
+    for root in paths:
+        candidates = [root] if root.is_file() else sorted(path for path in root.rglob('*') if path.is_file())
+        files.extend(path for path in candidates if path.suffix.lower() in LEGACY_SUFFIXES)
+    return files
+
+
+def _timed(dispatcher: FileParserDispatcher, file_path: pathlib.Path) -> tuple[float, str, Optional[str]]:
+    """回傳 (秒數, 狀態, 錯誤訊息)；解析器拋出的例外記為 EXCEPTION。"""
+    started = time.perf_counter()
+    try: ctx, _ = dispatcher(file_path)
+    except Exception as e: return time.perf_counter() - started, "EXCEPTION", f"{e.__class__.__name__}: {e}"
+    return time.perf_counter() - started, ctx.status.name, ctx.error_message
+
+
+def run_benchmark(paths: Sequence[pathlib.Path], parse_timeout: float, mutations: int, seed: int) -> int:
+    files = _collect(paths)
+    if not files: print("找不到 .doc 或 .xls 檔案。"); return 1
+    dispatcher = FileParserDispatcher(parse_timeout=parse_timeout)
+    total_bytes = sum(file_path.stat().st_size for file_path in files)
+    print(f"語料: {len(files)} 個檔案，{total_bytes / 2**20:,.1f} MB；解析時間上限 {parse_timeout:g} 秒")
+
+    timings = [(file_path, *_timed(dispatcher, file_path)) for file_path in files]
+    seconds = sum(elapsed for _, elapsed, _, _ in timings)
+    statuses = Counter(status for _, _, status, _ in timings)
+    print(f"吞吐量 {total_bytes / 2**20 / max(seconds, 1e-9):8.1f} MB/s ({seconds:.2f} 秒)；"
+          f"{'、'.join(f'{status} {count}' for status, count in statuses.most_common())}")
+    for file_path, elapsed, status, _ in sorted(timings, key=lambda item: -item[1])[:5]:
+        print(f"  {elapsed * 1000:9.1f} ms  {status:9s} {file_path}")
+
+    rng = random.Random(seed)
+    limit = parse_timeout * _TIMEOUT_SLACK + 1.0
+    failures = 0; worst = (0.0, "", None)
+    variant_statuses: Counter = Counter()
+    with tempfile.TemporaryDirectory() as directory:
+        for index, file_path in enumerate(files):
+            data = file_path.read_bytes()
+            for label, mutate in MUTATIONS[:mutations]:
+                variant = pathlib.Path(directory) / f"{index}{file_path.suffix.lower()}"
+                variant.write_bytes(mutate(data, rng))
+                elapsed, status, error = _timed(dispatcher, variant)
+                variant_statuses[status] += 1
+                worst = max(worst, (elapsed, label, file_path))
+                if elapsed > limit or status == "EXCEPTION":
+                    failures += 1
+                    print(f"  [失敗] {file_path} ({label}): {elapsed:.2f} 秒，{status} {error or ''}")
+    print(f"損毀變形 {sum(variant_statuses.values())} 個：{'、'.join(f'{status} {count}' for status, count in variant_statuses.most_common())}；"
+          f"最慢 {worst[0] * 1000:.1f} ms ({worst[1]}，{worst[2]})")
+    print("所有變形都在時間上限內結束。" if not failures else f"{failures} 個變形超過時間上限或拋出例外。")
+    return 1 if failures else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.parsers.legacy_benchmark", description="舊版 Office (.doc / .xls) 解析器的吞吐量與損毀檔案測試")
+    parser.add_argument("paths", nargs="+", type=pathlib.Path, help="含 .doc/.xls 的檔案或目錄。")
+    parser.add_argument("--parse-timeout", dest="parse_timeout", type=float, default=30.0, metavar="SECONDS", help="單一檔案的解析時間上限(秒)。預設為 30。")
+    parser.add_argument("--mutations", type=int, default=len(MUTATIONS), choices=range(0, len(MUTATIONS) + 1), metavar="N",
+                        help=f"每個檔案產生的損毀變形數 (0-{len(MUTATIONS)})。預設為 {len(MUTATIONS)}。")
+    parser.add_argument("--seed", type=int, default=0, help="隨機位元組翻轉的亂數種子。預設為 0。")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.CRITICAL, format='%(levelname)s - %(message)s')
+    if args.parse_timeout <= 0: parser.error("--parse-timeout 必須大於 0。")
+    return run_benchmark(args.paths, args.parse_timeout, args.mutations, args.seed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# src/parsers/located_text.py
+"""
+附帶位置標籤的解析結果
+
+解析器把文件拆成許多片段 (段落、表格儲存格、註腳…) 時，可回傳 LocatedText 取代一般的 str：
+它本身就是串接後的文字，插件照常掃描；掃描完成後再依結果的字元位移查出所在片段，
+把「段落 12」、「表格 2 第 3 列第 1 欄」等標籤寫入結果的 location。
+"""
+from __future__ import annotations
+import bisect
+import dataclasses
+from typing import Iterable, Optional
+
+from src.shared_data_model import ScanReport
+
+
+class LocatedText(str):
+    """
+    由 (標籤, 文字) 片段依序串接而成的字串，片段之間以 separator 分隔。
+    str 的子類別不支援 __slots__，標籤表存放在實例屬性中。
+    """
+
+    def __new__(cls, segments: Iterable[tuple[str, str]], separator: str = "\n") -> LocatedText:
+        labels: list[str] = []; starts: list[int] = []; texts: list[str] = []
+        position = 0
+        for label, text in segments:
+            labels.append(label); starts.append(position); texts.append(text)
+            position += len(text) + len(separator)
+        instance = super().__new__(cls, separator.join(texts))
+        instance._starts = starts; instance._labels = labels
+        return instance
+
+    @property
+    def segment_count(self) -> int: return len(self._labels)
+
+    def locate(self, offset: int) -> Optional[str]:
+        """回傳字元位移所在片段的標籤。"""
+        index = bisect.bisect_right(self._starts, offset) - 1
+        return self._labels[index] if index >= 0 else None
+
+    def with_locations(self, results: ScanReport) -> ScanReport:
+        """把有字元位移的結果的 location 換成片段標籤 (保留位移以便對照)。"""
+        located = []
+        for result in results:
+            label = self.locate(result.offset) if result.offset is not None else None
+            located.append(dataclasses.replace(result, location=f"{label} (char ~{result.offset})") if label else result)
+        return located
@@ -0,0 +1,150 @@
+# src/parsers/mapped_text.py
+"""
+大型純文字檔的記憶體映射 (mmap) 存取物件
+
+TxtParser 對超過門檻的檔案不再一次解碼成 str，而是回傳 MappedText：
+- ASCII 正規表示式插件可在只含 ASCII 的分段上直接以位元組模式掃描 `buffer` (零複製)。
+- 需要上下文或中日韓文字的插件，只解碼所需的視窗或分段。
+所有位移 (offset) 皆為相對於檔案開頭的位元組位置。
+超大型檔案可切成多個對齊行首的位元組範圍，由不同工作進程各自以 restrict() 限定掃描範圍。
+"""
+from __future__ import annotations
+import codecs
+import mmap
+import pathlib
+import re
+from typing import Iterable, Iterator, Optional
+
+from src.parsers.encoding import ASCII_TRANSPARENT_ENCODINGS
+
+DEFAULT_SEGMENT_SIZE = 8 * 1024 * 1024
+DEFAULT_SEGMENT_OVERLAP = 4 * 1024
+# 對齊分段起點時，最多往後尋找換行字元的距離
+_ALIGN_SEARCH_LIMIT = 64 * 1024
+# 單一字元在任何候選編碼中最多佔用的位元組數，用於估算上下文視窗
+_MAX_BYTES_PER_CHAR = 4
+# ASCII 之外的位元組 (以及 str 樣式的 \s 才比對得到的 \x1c-\x1f)：\b \d \w \s 與忽略大小寫在 bytes 與 str 樣式中語意不同
+_BYTES_UNSAFE = re.compile(rb'[\x1c-\x1f\x80-\xff]')
+
+
+class MappedText:
+    """以唯讀 mmap 開啟的大型文字檔。使用完畢後必須呼叫 close() (或使用 with 陳述式)。"""
+
+    def __init__(self, file_path: pathlib.Path, encoding: str, data_start: int = 0):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.data_start = data_start
+        self._file = open(file_path, 'rb')
+        try:
+            self._mmap: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close(); raise
+        self.size = len(self._mmap)
+        # 插件掃描的範圍 [start, end)；owned_end 之後 (重疊區) 的結果由下一個範圍負責
+        self.start = data_start; self.end = self.size; self.owned_end = self.size
+        self._plain_ascii: dict[tuple[int, int], bool] = {}
+
+    # --- 生命週期 ---
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close(); self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> MappedText: return self
+    def __exit__(self, *exc): self.close()
+
+    @property
+    def buffer(self) -> mmap.mmap:
+        if self._mmap is None: raise ValueError(f"'{self.file_path.name}' 的映射已關閉。")
+        return self._mmap
+
+    @property
+    def is_ascii_transparent(self) -> bool:
+        """是否可以在位元組層級直接執行 ASCII 正規表示式。"""
+        return self.encoding in ASCII_TRANSPARENT_ENCODINGS
+
+    def is_plain_ascii(self, start: int, end: int) -> bool:
+        """
+        [start, end) 是否可直接以位元組樣式掃描 (只含 ASCII，結果與解碼後以 str 樣式掃描相同)。
+        依範圍快取，同一分段在各插件之間只檢查一次。
+        """
+        key = (start, end)
+        if key not in self._plain_ascii:
+            self._plain_ascii[key] = self.is_ascii_transparent and _BYTES_UNSAFE.search(self.buffer, start, end) is None
+        return self._plain_ascii[key]
+
+    # --- 解碼 ---
+    def decode(self, start: int, end: int) -> str:
+        """解碼 [start, end) 位元組範圍；切在字元中間的殘缺位元組會被忽略。"""
+        start = max(self.data_start, start); end = min(self.size, end)
+        if start >= end: return ""
+        return self.buffer[start:end].decode(self.encoding, errors='ignore')
+
+    def context(self, start: int, end: int, window: int) -> str:
+        """回傳匹配範圍前後各 `window` 個字元的上下文 (只解碼這一小段)。"""
+        span = window * _MAX_BYTES_PER_CHAR
+        before = self.decode(start - span, start)[-window:] if window else ""
+        after = self.decode(end, end + span)[:window] if window else ""
+        return before + self.decode(start, end) + after
+
+    def _align(self, position: int) -> int:
+        """把分段起點對齊到下一行的開頭，避免切在多位元組字元中間。"""
+        if position <= self.data_start: return self.data_start
+        if position >= self.size: return self.size
+        newline = self.buffer.find(b'\n', position, min(self.size, position + _ALIGN_SEARCH_LIMIT))
+        if newline != -1: return newline + 1
+        if self.encoding == 'utf-8':
+            # UTF-8 可自我同步：跳過延續位元組 (10xxxxxx) 即可
+            while position < self.size and (self.buffer[position] & 0xC0) == 0x80: position += 1
+        elif self.encoding.startswith(('utf-16', 'utf-32')):
+            unit = 2 if self.encoding.startswith('utf-16') else 4
+            position += (unit - (position - self.data_start) % unit) % unit
+        return position
+
+    def plan_ranges(self, count: int) -> list[tuple[int, int]]:
+        """把檔案切成約 count 個大小相近、起點對齊行首的位元組範圍 [start, end)。"""
+        step = max(1, (self.size - self.data_start) // max(1, count))
+        boundaries = [self.data_start]
+        for index in range(1, count):
+            boundary = self._align(self.data_start + index * step)
+            if boundaries[-1] < boundary < self.size: boundaries.append(boundary)
+        boundaries.append(self.size)
+        return list(zip(boundaries, boundaries[1:]))
+
+    def restrict(self, start: int, end: int, overlap: int = DEFAULT_SEGMENT_OVERLAP):
+        """只掃描 [start, end) 再加上 overlap 的範圍；起點落在重疊區的結果由下一個範圍回報。"""
+        self.start = max(self.data_start, start); self.owned_end = min(self.size, end)
+        self.end = min(self.size, self.owned_end + overlap)
+
+    def owns(self, offset: int) -> bool:
+        return self.start <= offset < self.owned_end
+
+    def iter_segments(self, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                      overlap: int = DEFAULT_SEGMENT_OVERLAP) -> Iterator[tuple[int, int, int]]:
+        """
+        把掃描範圍 [start, end) 切成分段，呼叫端逐段解碼 (decode) 或直接掃描，記憶體用量以 segment_size 為上限。
+
+        Yields:
+            (分段起點位元組, 分段「本體」結束位元組, 分段結束位元組)。
+            分段實際涵蓋到本體結束後再加上 overlap 的範圍，呼叫端應只保留
+            起點落在本體範圍內的結果，重疊區的結果交由下一段負責。
+        """
+        start = self.start
+        while start < self.end:
+            core_end = min(self.end, self._align(start + segment_size))
+            yield start, core_end, min(self.end, core_end + overlap) if core_end < self.end else self.end
+            start = core_end
+
+    def chars_to_bytes(self, segment_start: int, segment_text: str, char_offsets: Iterable[int]) -> dict[int, int]:
+        """
+        把分段文字中的字元位置換算回檔案中的絕對位元組位置，回傳 {字元位置: 位元組位置}。
+        位置排序後只編碼相鄰位置之間的文字，每個分段的成本與分段長度成正比。
+        """
+        byte_offsets: dict[int, int] = {}
+        encoder = codecs.getincrementalencoder(self.encoding)(errors='replace')
+        position, byte_position = 0, segment_start
+        for char_offset in sorted(set(char_offsets)):
+            byte_position += len(encoder.encode(segment_text[position:char_offset]))
+            position = char_offset
+            byte_offsets[char_offset] = byte_position
+        return byte_offsets
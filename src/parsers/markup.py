@@ -0,0 +1,244 @@
+# src/parsers/markup.py
+"""
+網頁類檔案的標記感知正規化
+
+HTML / XML / SVG / JS / JSON 原本逐字交給插件，插件 (特別是 NLP) 把大部分時間花在標籤、屬性、
+內嵌 CSS 與程式碼上，而以 HTML 實體 (&#48;&#57;…) 或 \\uXXXX 跳脫字元寫成的個資反而比不到。
+正規化在一次走訪中：
+- 去除標籤、<style> 與處理指令；文字節點與 CDATA 視為「可見文字」。
+- 屬性值、HTML 註解、<script> 與 .js/.json 中的字串常值、註解與長數字視為「程式碼區段」。
+- 解碼 HTML 實體與 JS/JSON 跳脫字元。
+- 保留正規化後位置 → 原始文字位置的對照表，結果的位移換算回原始檔案的位元組位置。
+Regex 插件掃描全部區段；NLP 插件只掃描可見文字。
+"""
+from __future__ import annotations
+import bisect
+import codecs
+import dataclasses
+import html
+import re
+from typing import Callable, Optional
+
+from src.shared_data_model import ScanReport
+
+MARKUP_EXTENSIONS = frozenset({'.html', '.htm', '.xhtml', '.xml', '.svg'})
+SCRIPT_EXTENSIONS = frozenset({'.js', '.mjs', '.json'})
+
+# 標籤之間不換行的行內元素：「王<b>小明</b>」應該還原成「王小明」
+_INLINE_TAGS = frozenset({
+    'a', 'abbr', 'b', 'bdi', 'bdo', 'cite', 'code', 'data', 'dfn', 'em', 'font', 'i', 'kbd', 'mark', 'q', 's',
+    'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u', 'var', 'wbr',
+})
+# 不含個資的排版屬性
+_SKIPPED_ATTRIBUTES = frozenset({'style', 'class'})
+
+_MARKUP_TOKEN = re.compile(
+    r'<!--(?P<comment>.*?)(?:-->|\Z)'
+    r'|<!\[CDATA\[(?P<cdata>.*?)(?:\]\]>|\Z)'
+    r'|<[!?][^>]*>'
+    r'|<(?P<close>/?)(?P<tag>[A-Za-z][\w:.-]*)(?P<attrs>(?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.S)
+_ATTRIBUTE = re.compile(r'([^\s=/>"\']+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+_ENTITY = re.compile(r'&(?:#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6}|[A-Za-z][A-Za-z0-9]{1,31});?')
+_SCRIPT_TOKEN = re.compile(
+    r'"(?P<dq>(?:[^"\\\n]|\\.)*)"'
+    r"|'(?P<sq>(?:[^'\\\n]|\\.)*)'"
+    r'|`(?P<bq>(?:[^`\\]|\\.)*)`'
+    r'|//(?P<line>[^\n]*)'
+    r'|/\*(?P<block>.*?)(?:\*/|\Z)'
+    r'|(?<![\w.])(?P<number>\d[\d_]{5,})(?![\w.])',
+    re.S)
+_SCRIPT_ESCAPE = re.compile(r'\\(?:u\{([0-9a-fA-F]{1,6})\}|u([0-9a-fA-F]{4})|x([0-9a-fA-F]{2})|(\r\n|[\s\S]))')
+_ESCAPE_LEADS = {_ENTITY: '&', _SCRIPT_ESCAPE: '\\'}
+_RAW_TEXT_CLOSING = {tag: re.compile(rf'</{tag}\s*>', re.I) for tag in ('script', 'style')}
+_SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0', '\n': '', '\r\n': ''}
+
+
+def _decode_entity(match: re.Match) -> str: return html.unescape(match.group(0))
+
+
+def _decode_script_escape(match: re.Match) -> str:
+    code = match.group(1) or match.group(2) or match.group(3)
+    if code:
+        try: return chr(int(code, 16))
+        except (ValueError, OverflowError): return match.group(0)
+    char = match.group(4)
+    return _SIMPLE_ESCAPES.get(char, char)
+
+
+class _Builder:
+    """累積正規化後的文字與對照表。每一段 (run) 內若長度與原始文字相同則逐字對應，否則整段對應到原始起點。"""
+
+    def __init__(self):
+        self.pieces: list[str] = []
+        self.norm_starts: list[int] = []; self.raw_starts: list[int] = []; self.linear: list[bool] = []
+        self.length = 0
+        # 下一段文字之前要插入的分隔：區塊邊界換行，文字節點邊緣的空白收合成一個空格
+        self.pending_break = False; self.pending_space = False
+
+    def _run(self, text: str, raw_start: int, linear: bool):
+        self.pieces.append(text)
+        self.norm_starts.append(self.length); self.raw_starts.append(raw_start); self.linear.append(linear)
+        self.length += len(text)
+
+    def add(self, raw: str, start: int, end: int, escape: Optional[re.Pattern] = None,
+            decode: Optional[Callable[[re.Match], str]] = None, strip: bool = True):
+        """
+        加入原始文字 raw[start:end] (必要時解碼跳脫字元)，與前一段之間視需要換行。
+        strip: 兩端的空白不逐字保留，而是收合成與前後文字之間的一個空格 (「<a>a@b.com</a> tw」不能黏成「a@b.comtw」)。
+        """
+        trailing_space = False
+        if strip:
+            content_start, content_end = start, end
+            while content_start < content_end and raw[content_start].isspace(): content_start += 1
+            while content_end > content_start and raw[content_end - 1].isspace(): content_end -= 1
+            if content_start > start: self.pending_space = True
+            trailing_space = content_end < end
+            start, end = content_start, content_end
+        if start >= end: return
+        if self.length and (self.pending_break or self.pending_space): self._run("\n" if self.pending_break else " ", start, False)
+        self.pending_break = False; self.pending_space = trailing_space
+        position = start
+        # 大部分文字沒有跳脫字元，先以 find 排除再跑正規表示式
+        if escape is not None and raw.find(_ESCAPE_LEADS[escape], start, end) != -1:
+            for match in escape.finditer(raw, start, end):
+                if match.start() > position: self._run(raw[position:match.start()], position, True)
+                decoded = decode(match)
+                if decoded: self._run(decoded, match.start(), len(decoded) == match.end() - match.start())
+                position = match.end()
+        if position < end: self._run(raw[position:end], position, True)
+
+    def build(self, raw: str, encoding: str, data_start: int) -> NormalizedText:
+        return NormalizedText("".join(self.pieces), self.norm_starts, self.raw_starts, self.linear, raw, encoding, data_start)
+
+
+class NormalizedText(str):
+    """
+    正規化後的文字，附帶回到原始文字的位置對照。
+    visible 是只含可見文字的版本 (同樣可換算回原始位置)；沒有可見文字時為空的 NormalizedText。
+    str 的子類別不支援 __slots__，對照表存放在實例屬性中。
+    """
+
+    def __new__(cls, text: str, norm_starts: list[int], raw_starts: list[int], linear: list[bool],
+                raw: str, encoding: str, data_start: int = 0) -> NormalizedText:
+        instance = super().__new__(cls, text)
+        instance._norm_starts = norm_starts; instance._raw_starts = raw_starts; instance._linear = linear
+        instance._raw = raw; instance.encoding = encoding; instance.data_start = data_start
+        instance.visible = instance
+        return instance
+
+    @property
+    def raw_length(self) -> int: return len(self._raw)
+
+    def raw_offset(self, offset: int) -> int:
+        """正規化文字中的字元位置 → 原始文字中的字元位置。"""
+        index = bisect.bisect_right(self._norm_starts, offset) - 1
+        if index < 0: return 0
+        start = self._raw_starts[index]
+        return start + (offset - self._norm_starts[index]) if self._linear[index] else start
+
+    def with_raw_offsets(self, results: ScanReport) -> ScanReport:
+        """把結果的字元位移換算為原始檔案中的位元組位置 (含 BOM)。"""
+        raw_chars = {result.offset: self.raw_offset(result.offset) for result in results if result.offset is not None}
+        byte_offsets: dict[int, int] = {}
+        encoder = codecs.getincrementalencoder(self.encoding)(errors='replace')
+        position, byte_position = 0, self.data_start
+        for char_offset in sorted(set(raw_chars.values())):
+            byte_position += len(encoder.encode(self._raw[position:char_offset]))
+            position = char_offset
+            byte_offsets[char_offset] = byte_position
+        located = []
+        for result in results:
+            if result.offset is None: located.append(result); continue
+            byte_offset = byte_offsets[raw_chars[result.offset]]
+            located.append(dataclasses.replace(result, offset=byte_offset, location=f"附近 (byte ~{byte_offset})"))
+        return located
+
+
+_JSON_KEY_SUFFIX = re.compile(r'\s*:')
+
+
+def _add_script(builder: _Builder, raw: str, start: int, end: int, values: Optional[_Builder] = None):
+    """
+    JS/JSON：只保留字串常值、註解與長數字。
+    values: 若指定，JSON 的字串值 (不含鍵) 另外加入此處，作為可見文字。
+    """
+    for match in _SCRIPT_TOKEN.finditer(raw, start, end):
+        kind = match.lastgroup
+        is_string = kind in ('dq', 'sq', 'bq')
+        targets = [builder]
+        if values is not None and is_string and not _JSON_KEY_SUFFIX.match(raw, match.end()): targets.append(values)
+        for target in targets:
+            target.pending_break = True
+            if is_string: target.add(raw, match.start(kind), match.end(kind), _SCRIPT_ESCAPE, _decode_script_escape)
+            else: target.add(raw, match.start(kind), match.end(kind))
+
+
+def _find_closing(raw: str, tag: str, position: int) -> tuple[int, int]:
+    """尋找 </tag>，回傳 (內容結束位置, 結束標籤之後的位置)。"""
+    match = _RAW_TEXT_CLOSING[tag].search(raw, position)
+    return (match.start(), match.end()) if match else (len(raw), len(raw))
+
+
+def _add_attributes(builder: _Builder, raw: str, start: int, end: int):
+    length, pending = builder.length, (builder.pending_break, builder.pending_space)
+    for match in _ATTRIBUTE.finditer(raw, start, end):
+        if match.group(1).lower() in _SKIPPED_ATTRIBUTES: continue
+        for group in (2, 3, 4):
+            if match.group(group) is not None:
+                builder.pending_break = True
+                builder.add(raw, match.start(group), match.end(group), _ENTITY, _decode_entity)
+                break
+    # 有加入屬性值時，與元素內的文字之間也要分隔 (即使是行內元素)；沒有屬性值的行內標籤不影響前後文字
+    if builder.length != length: builder.pending_break = True
+    else: builder.pending_break, builder.pending_space = pending
+
+
+def normalize_markup(raw: str, encoding: str, data_start: int = 0) -> NormalizedText:
+    """HTML / XML / SVG。"""
+    everything, visible = _Builder(), _Builder()
+    position = 0
+    length = len(raw)
+    while position < length:
+        match = _MARKUP_TOKEN.search(raw, position)
+        text_end = match.start() if match else length
+        if text_end > position:
+            for builder in (everything, visible): builder.add(raw, position, text_end, _ENTITY, _decode_entity)
+        if not match: break
+        position = match.end()
+        tag = match.group('tag')
+        if match.group('comment') is not None:
+            everything.pending_break = True
+            everything.add(raw, match.start('comment'), match.end('comment'), _ENTITY, _decode_entity)
+        elif match.group('cdata') is not None:
+            for builder in (everything, visible):
+                builder.pending_break = True; builder.add(raw, match.start('cdata'), match.end('cdata'))
+        elif tag:
+            name = tag.lower()
+            if name not in _INLINE_TAGS: everything.pending_break = visible.pending_break = True
+            if match.group('close'): continue
+            _add_attributes(everything, raw, match.start('attrs'), match.end('attrs'))
+            if name in ('script', 'style') and not match.group('attrs').rstrip().endswith('/'):
+                content_end, position = _find_closing(raw, name, position)
+                if name == 'script': _add_script(everything, raw, match.end(), content_end)
+                everything.pending_break = visible.pending_break = True
+    normalized = everything.build(raw, encoding, data_start)
+    normalized.visible = visible.build(raw, encoding, data_start)
+    return normalized
+
+
+def normalize_script(raw: str, encoding: str, data_start: int = 0, json_values: bool = False) -> NormalizedText:
+    """JS / JSON。JS 沒有可見文字；JSON 的字串值是資料本身，視為可見文字。"""
+    everything, visible = _Builder(), _Builder()
+    _add_script(everything, raw, 0, len(raw), visible if json_values else None)
+    normalized = everything.build(raw, encoding, data_start)
+    normalized.visible = visible.build(raw, encoding, data_start)
+    return normalized
+
+
+def normalize(raw: str, suffix: str, encoding: str, data_start: int = 0) -> Optional[NormalizedText]:
+    """依副檔名正規化；不是網頁類檔案時回傳 None。"""
+    suffix = suffix.lower()
+    if suffix in MARKUP_EXTENSIONS: return normalize_markup(raw, encoding, data_start)
+    if suffix in SCRIPT_EXTENSIONS: return normalize_script(raw, encoding, data_start, json_values=suffix == '.json')
+    return None
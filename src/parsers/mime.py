@@ -0,0 +1,105 @@
+# src/parsers/mime.py
+"""
+MIME 類型偵測模組
+
+以檔案開頭的一小段位元組 (與分流階段共用同一份緩衝區) 判斷 MIME 類型：
+1. 先比對內建的簽章表 (PDF、ZIP/OOXML、OLE2、純文字)，涵蓋我們實際會解析的格式。
+2. 簽章表無法判斷時，才交給每個工作進程常駐的 `magic.Magic` 實例處理。
+判斷結果以 (檔案大小, 開頭位元組雜湊) 為鍵快取，重複出現的檔案型態不必重新偵測。
+"""
+import hashlib
+import logging
+import pathlib
+from collections import OrderedDict
+from typing import Optional
+
+import magic
+import olefile
+
+from src.parsers.triage import _TEXT_CONTROL_BYTES, _UTF16_BOMS
+
+MIME_PDF = "application/pdf"
+MIME_ZIP = "application/zip"
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_OLE2 = "application/x-ole-storage"
+MIME_DOC = "application/msword"
+MIME_XLS = "application/vnd.ms-excel"
+MIME_TEXT = "text/plain"
+MIME_HTML = "text/html"
+MIME_XML = "text/xml"
+
+_OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06')
+# OOXML 套件中各文件類型的內部目錄名稱，通常出現在前幾個 ZIP 項目的檔名中
+_OOXML_MARKERS = ((b'word/', MIME_DOCX), (b'xl/', MIME_XLSX))
+
+
+def _looks_like_text(head: bytes) -> bool:
+    if head.startswith(_UTF16_BOMS): return True
+    if b'\x00' in head: return False
+    controls = sum(1 for b in head if b < 0x20 and b not in _TEXT_CONTROL_BYTES)
+    return controls <= len(head) * 0.01
+
+
+def sniff_signature(head: bytes) -> Optional[str]:
+    """只用內建簽章表判斷 MIME 類型；無法判斷時回傳 None。"""
+    if not head: return None
+    if head.startswith(b'%PDF-'): return MIME_PDF
+    if head.startswith(_ZIP_SIGNATURES):
+        for marker, mime_type in _OOXML_MARKERS:
+            if marker in head: return mime_type
+        # 只看得出是 ZIP，交給 libmagic 判斷是否為其他 ZIP 衍生格式
+        return None
+    if head.startswith(_OLE2_SIGNATURE): return MIME_OLE2
+    if _looks_like_text(head):
+        stripped = head.lstrip(b'\xef\xbb\xbf \t\r\n')[:256].lower()
+        if stripped.startswith(b'<?xml'): return MIME_XML
+        if stripped.startswith((b'<!doctype html', b'<html')): return MIME_HTML
+        return MIME_TEXT
+    return None
+
+
+def detect_ole_mime(file_path: pathlib.Path) -> Optional[str]:
+    """OLE2 容器的開頭無法區分 Word 與 Excel，需讀取目錄中的串流名稱才能判斷。"""
+    try:
+        with olefile.OleFileIO(str(file_path)) as ole:
+            if ole.exists('WordDocument'): return MIME_DOC
+            if ole.exists('Workbook') or ole.exists('Book'): return MIME_XLS
+    except Exception as e:
+        logging.debug(f"無法讀取 '{file_path.name}' 的 OLE2 目錄: {e}")
+    return None
+
+
+class MimeSniffer:
+    """每個工作進程持有一份的 MIME 偵測器，內含常駐的 libmagic 控制代碼與 LRU 快取。"""
+
+    def __init__(self, cache_size: int = 4096):
+        self._magic: Optional[magic.Magic] = None
+        self._cache: OrderedDict[tuple[int, bytes], Optional[str]] = OrderedDict()
+        self._cache_size = cache_size
+
+    def _libmagic(self, head: bytes) -> Optional[str]:
+        try:
+            if self._magic is None: self._magic = magic.Magic(mime=True)
+            return self._magic.from_buffer(head)
+        except magic.MagicException as e:
+            logging.error(f"使用 python-magic 識別 MIME 類型時發生錯誤: {e}")
+            return None
+
+    def sniff(self, head: bytes, file_size: int) -> Optional[str]:
+        """
+        Args:
+            head: 檔案開頭的位元組 (與分流階段共用)。
+            file_size: 檔案大小，作為快取鍵的一部分。
+        """
+        key = (file_size, hashlib.blake2b(head, digest_size=16).digest())
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        mime_type = sniff_signature(head) or self._libmagic(head)
+
+        self._cache[key] = mime_type
+        if len(self._cache) > self._cache_size: self._cache.popitem(last=False)
+        return mime_type
@@ -3,7 +3,7 @@ import logging
 import pathlib
 import fitz
 from src.shared_data_model import FileContext, FileStatus
-from src.parsers.base_parser import BaseParser
+from src.parsers.base_parser import BaseParser, ParseTimeoutError
 
 class PdfParser(BaseParser):
     def supports(self, mime_type: str) -> bool: return mime_type == "application/pdf"
@@ -19,6 +19,7 @@ class PdfParser(BaseParser):
                 full_text = "\n".join(pages_text)
                 ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED)
                 return ctx, full_text
+        except ParseTimeoutError: raise
         except Exception as e:
             msg = f"解析 PDF 檔案時發生錯誤: {e}"
             logging.error(f"'{file_path.name}': {msg}", exc_info=True)
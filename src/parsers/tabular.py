@@ -0,0 +1,448 @@
+# src/parsers/tabular.py
+"""
+SQL 傾印與 CSV 的串流、欄位感知解析
+
+留在網站根目錄的資料庫傾印與匯出的 CSV 是風險最高的檔案。TxtParser 把整份檔案讀成一個字串，
+不知道欄位；數 GB 的傾印會耗盡記憶體。TabularParser 改為回傳 TabularSource，由掃描端逐批取用：
+- SQL：以正規表示式逐個 token 串流切分，解析 INSERT/REPLACE ... VALUES (...) 的每個值組、
+  CREATE TABLE 的欄位名稱，以及 PostgreSQL COPY ... FROM stdin 的資料列。只含常值的值組
+  (mysqldump 的絕大多數資料) 以一次比對整組讀入。其他陳述式的內容 (例如 UPDATE ... SET email = '...')
+  以原文批次掃描，不會遺漏。
+- CSV/TSV：以 csv 模組逐列讀取，第一列看起來像標題時作為欄位名稱，分隔字元由第一列推測。
+每個資料表累積 BATCH_ROWS 列 (或 BATCH_CHARS 字元) 後，依欄位輸出批次：同一欄位的值以換行串接成
+ColumnText，位置標籤為「資料表.欄位:列號」(列號從 1 起算，不含標題列)。記憶體用量以一個批次為上限。
+ColumnPruner 記錄每個欄位 × 插件的命中情況：取樣 PRUNE_AFTER_VALUES 個值仍未命中的組合不再掃描，
+所有插件都停止的欄位在組成批次時直接略過。
+"""
+from __future__ import annotations
+import bisect
+import csv
+import dataclasses
+import io
+import itertools
+import operator
+import pathlib
+import re
+from collections import defaultdict
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from src.parsers.located_text import LocatedText
+
+SQL_EXTENSIONS = frozenset({'.sql'})
+BATCH_ROWS = 2000
+BATCH_CHARS = 1024 * 1024
+READ_CHUNK_CHARS = 1024 * 1024
+PRUNE_AFTER_VALUES = 1000
+_CSV_DELIMITERS = ',;\t|'
+_CSV_FIELD_LIMIT = 2**31 - 1
+# 其他陳述式的原文批次使用的資料表名稱 (位置標籤為「SQL 陳述式:序號」)
+STATEMENTS_LABEL = "SQL 陳述式"
+
+SkipColumn = Callable[[str, str], bool]
+
+
+@dataclasses.dataclass(frozen=True)
+class ColumnBatch:
+    """一個欄位的一批值；column 為 None 表示無法對應到欄位的原文 (SQL 的其他陳述式)。"""
+    table: str; column: Optional[str]
+    values: int
+    text: LocatedText
+
+    @property
+    def key(self) -> Optional[tuple[str, str]]: return (self.table, self.column) if self.column is not None else None
+
+
+class ColumnPruner:
+    """每個檔案一份：記錄各 (資料表, 欄位) × 插件掃描過的值數與命中數。"""
+
+    def __init__(self, plugins: Iterable[str], prune_after: int = PRUNE_AFTER_VALUES):
+        self.plugins = tuple(plugins); self.prune_after = prune_after
+        self._scanned: defaultdict[tuple, int] = defaultdict(int)
+        self._hits: defaultdict[tuple, int] = defaultdict(int)
+        self.pruned_values = 0  # 因修剪而未掃描的值數 (依插件計)
+
+    def is_pruned(self, key: Optional[tuple[str, str]], plugin: str) -> bool:
+        if key is None: return False
+        entry = (key, plugin)
+        return self._scanned[entry] >= self.prune_after and not self._hits[entry]
+
+    def record(self, key: Optional[tuple[str, str]], plugin: str, values: int, hits: int):
+        if key is None: return
+        self._scanned[(key, plugin)] += values; self._hits[(key, plugin)] += hits
+
+    def skip_column(self, table: str, column: str) -> bool:
+        """所有插件在此欄位都已停止時，組成批次前即可略過。"""
+        return bool(self.plugins) and all(self.is_pruned((table, column), plugin) for plugin in self.plugins)
+
+    def pruned_columns(self) -> list[str]:
+        columns = {key for key, _ in self._scanned}
+        return sorted(f"{table}.{column}" for table, column in columns if self.skip_column(table, column))
+
+
+class ColumnText(LocatedText):
+    """同一欄位的值以換行串接；位置標籤在查詢時才由列號組成，不必為每個值建立標籤字串。"""
+
+    def __new__(cls, prefix: str, rows: list[int], values: list[str]) -> ColumnText:
+        instance = str.__new__(cls, "\n".join(values))
+        # 第 i 個值的起點 = 前面各值的長度總和 + i 個分隔字元
+        instance._starts = list(map(operator.add, itertools.accumulate(map(len, values), initial=0), range(len(values))))
+        instance._prefix = prefix; instance._rows = rows
+        return instance
+
+    @property
+    def segment_count(self) -> int: return len(self._rows)
+
+    def locate(self, offset: int) -> Optional[str]:
+        index = bisect.bisect_right(self._starts, offset) - 1
+        return f"{self._prefix}:{self._rows[index]}" if 0 <= index < len(self._rows) else None
+
+
+class _TableBuffer:
+    """累積一個資料表的資料列，滿一批時依欄位輸出。"""
+
+    def __init__(self, table: str, columns: Optional[list[str]] = None, raw: bool = False):
+        """raw: 不分欄位的原文 (每列一個值)，批次的 column 為 None，不參與欄位修剪。"""
+        self.table = table; self.columns = list(columns or []); self.raw = raw
+        self.row_count = 0
+        self._rows: list[int] = []; self._pending: list[list[Optional[str]]] = []
+        self._chars = 0
+
+    def add(self, values: list[Optional[str]], chars: Optional[int] = None) -> bool:
+        """加入一列 (chars: 已知的原文長度，省去重新計算)，回傳是否已滿一批。"""
+        self.row_count += 1
+        self._rows.append(self.row_count); self._pending.append(values)
+        self._chars += chars if chars is not None else sum(len(value) for value in values if value)
+        return len(self._pending) >= BATCH_ROWS or self._chars >= BATCH_CHARS
+
+    def column_name(self, index: int) -> str:
+        return self.columns[index] if index < len(self.columns) and self.columns[index] else f"col{index + 1}"
+
+    def flush(self, skip: Optional[SkipColumn] = None) -> Iterator[ColumnBatch]:
+        if not self._pending: return
+        rows, pending = self._rows, self._pending
+        self._rows = []; self._pending = []; self._chars = 0
+        if self.raw:
+            yield ColumnBatch(self.table, None, len(rows), ColumnText(self.table, rows, [values[0] for values in pending]))
+            return
+        # 轉置成各欄位的值；NULL 與空字串不掃描
+        for index, column_values in enumerate(itertools.zip_longest(*pending)):
+            column = self.column_name(index)
+            if skip and skip(self.table, column): continue
+            values = list(filter(None, column_values))
+            if values: yield ColumnBatch(self.table, column, len(values), ColumnText(f"{self.table}.{column}", list(itertools.compress(rows, column_values)), values))
+
+
+# --- SQL ---
+_SQL_TOKEN = re.compile(r"""
+    '(?P<sq>[^'\\]*(?:(?:\\.|'')[^'\\]*)*)'
+  | "(?P<dq>[^"\\]*(?:(?:\\.|"")[^"\\]*)*)"
+  | `(?P<bq>[^`]*)`
+  | \[(?P<br>[^\]\n]*)\]
+  | (?P<comment>--[^\n]*\n|\#[^\n]*\n|/\*.*?\*/)
+  | (?P<punct>[();,])
+  | (?P<word>[^\s'"`()\[\];,]+)
+""", re.X | re.S)
+_SPACE = re.compile(r'\s*')
+# 快速路徑：只含常值 (字串、數字、NULL) 的值組以一次比對整個讀入；含函式呼叫等其他寫法時改走逐個 token 的解析
+_LITERAL = r"""'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'|"[^"\\]*(?:(?:\\.|"")[^"\\]*)*"|[^\s'"`()\[\],;]+"""
+_LITERAL_TUPLE = re.compile(rf"\s*\(\s*((?:(?:{_LITERAL})\s*,\s*)*(?:{_LITERAL}))\s*\)\s*(,?)")
+_LITERAL_VALUE = re.compile(r"""'([^'\\]*(?:(?:\\.|'')[^'\\]*)*)'|"([^"\\]*(?:(?:\\.|"")[^"\\]*)*)"|([^\s'"`()\[\],;]+)""")
+# 快速路徑一次比對的值組大小上限；更大的值組改走逐個 token 的解析
+_TUPLE_LOOKAHEAD = 64 * 1024
+_SQL_ESCAPE = re.compile(r'\\(.)', re.S)
+_SQL_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+_COPY_ESCAPE = re.compile(r'\\(.)')
+_COPY_ESCAPES = {'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v'}
+_CONSTRAINT_WORDS = frozenset({'PRIMARY', 'KEY', 'UNIQUE', 'CONSTRAINT', 'INDEX', 'FOREIGN', 'CHECK', 'FULLTEXT', 'SPATIAL', 'EXCLUDE', 'PERIOD', 'LIKE'})
+_IDENTIFIER_KINDS = ('word', 'bq', 'dq', 'br')
+
+
+def _unescape(value: str, quote: str) -> str:
+    if '\\' in value: value = _SQL_ESCAPE.sub(lambda m: _SQL_ESCAPES.get(m.group(1), m.group(1)), value)
+    return value.replace(quote * 2, quote) if quote * 2 in value else value
+
+
+class _SqlTokens:
+    """從文字串流逐個取出 SQL token；token 可能跨越讀取的區塊，必要時補讀。"""
+
+    def __init__(self, stream: TextIO, max_chars: Optional[int] = None):
+        self.stream = stream; self.remaining = max_chars
+        self.buffer = ""; self.position = 0; self.eof = False
+        self._peeked: Optional[tuple[str, str]] = None
+        self.values_ended = False
+
+    def _refill(self) -> bool:
+        if self.eof: return False
+        size = READ_CHUNK_CHARS if self.remaining is None else min(READ_CHUNK_CHARS, self.remaining)
+        chunk = self.stream.read(size) if size > 0 else ""
+        if self.remaining is not None: self.remaining -= len(chunk)
+        if not chunk: self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk; self.position = 0
+        return True
+
+    def next(self) -> Optional[tuple[str, str]]:
+        """回傳 (種類, 內容)；種類為 sq/dq/bq/br/punct/word。串流結束時回傳 None。"""
+        if self._peeked is not None:
+            token, self._peeked = self._peeked, None
+            return token
+        while True:
+            self.position = _SPACE.match(self.buffer, self.position).end()
+            if self.position >= len(self.buffer):
+                if not self._refill(): return None
+                continue
+            match = _SQL_TOKEN.match(self.buffer, self.position)
+            if match is None or (match.end() == len(self.buffer) and not self.eof):
+                if self._refill(): continue
+                # 串流已結束：未閉合的字串或註解視為一個 word
+                token = ('word', self.buffer[self.position:]); self.position = len(self.buffer)
+                return token
+            self.position = match.end()
+            kind = match.lastgroup
+            if kind == 'comment': continue
+            value = match.group(kind)
+            if kind == 'sq': value = _unescape(value, "'")
+            elif kind == 'dq': value = _unescape(value, '"')
+            return kind, value
+
+    def literal_tuples(self) -> Iterator[tuple[list[Optional[str]], int]]:
+        """
+        快速路徑：連續讀取只含常值的值組，產生 (各值, 原文字元數)。
+        值組後面沒有逗號時 values_ended 設為 True 並停止；遇到其他寫法時停在該值組之前，由呼叫端逐個 token 解析。
+        """
+        self.values_ended = False
+        if self._peeked is not None: return
+        match_tuple = _LITERAL_TUPLE.match; find_values = _LITERAL_VALUE.findall
+        while True:
+            if len(self.buffer) - self.position < _TUPLE_LOOKAHEAD: self._refill()
+            match = match_tuple(self.buffer, self.position)
+            if match is None: return
+            self.position = match.end()
+            yield [(None if word.upper() == 'NULL' else word) if word
+                   else (_unescape(double, '"') if double else _unescape(single, "'") if '\\' in single or "''" in single else single)
+                   for single, double, word in find_values(match.group(1))], match.end() - match.start()
+            if not match.group(2): self.values_ended = True; return
+
+    def peek(self) -> Optional[tuple[str, str]]:
+        if self._peeked is None: self._peeked = self.next()
+        return self._peeked
+
+    def read_line(self) -> Optional[str]:
+        """COPY 資料區：讀取下一行原文 (不含換行)。"""
+        while True:
+            newline = self.buffer.find('\n', self.position)
+            if newline != -1:
+                line = self.buffer[self.position:newline]; self.position = newline + 1
+                return line.rstrip('\r')
+            if not self._refill() or (self.eof and self.position >= len(self.buffer)):
+                if self.position >= len(self.buffer): return None
+                line = self.buffer[self.position:]; self.position = len(self.buffer)
+                return line
+
+
+def _is_word(token: Optional[tuple[str, str]], *words: str) -> bool:
+    return token is not None and token[0] == 'word' and token[1].upper() in words
+
+
+def _is_punct(token: Optional[tuple[str, str]], punct: str) -> bool:
+    return token is not None and token[0] == 'punct' and token[1] == punct
+
+
+class _SqlDump:
+    def __init__(self, tokens: _SqlTokens, skip: Optional[SkipColumn]):
+        self.tokens = tokens; self.skip = skip
+        self.schemas: dict[str, list[str]] = {}
+        self.current: Optional[_TableBuffer] = None
+        self.statements = _TableBuffer(STATEMENTS_LABEL, raw=True)
+        self._statement_words: list[str] = []; self._statement_chars = 0
+
+    # --- 共用 ---
+    def _read_name(self) -> Optional[str]:
+        """讀取 (可能含結構描述的) 資料表名稱，例如 `db`.`users` 或 public.users。"""
+        token = self.tokens.next()
+        if token is None or token[0] not in _IDENTIFIER_KINDS: return None
+        parts = [token[1]]
+        while True:
+            following = self.tokens.peek()
+            if following is None or following[0] != 'word' or not following[1].startswith('.'): break
+            self.tokens.next()
+            if following[1] != '.': parts.append(following[1][1:]); continue
+            token = self.tokens.next()
+            if token is not None and token[0] in _IDENTIFIER_KINDS: parts.append(token[1])
+        return ".".join(part for part in parts if part)
+
+    def _read_column_list(self) -> list[str]:
+        """讀取 ( a, b, c )；呼叫前已確認下一個 token 是 '('。"""
+        self.tokens.next()
+        columns = []
+        while (token := self.tokens.next()) is not None and not _is_punct(token, ')'):
+            if token[0] in _IDENTIFIER_KINDS: columns.append(token[1])
+        return columns
+
+    def _skip_statement(self, collect: bool = False):
+        while (token := self.tokens.next()) is not None and not _is_punct(token, ';'):
+            if collect and token[0] in ('sq', 'dq', 'word'): self._collect(token[1])
+
+    def _collect(self, text: str):
+        self._statement_words.append(text); self._statement_chars += len(text)
+
+    def _end_statement(self) -> Iterator[ColumnBatch]:
+        """其他陳述式的原文一個陳述式為一列。"""
+        if not self._statement_words: return
+        full = self.statements.add([" ".join(self._statement_words)])
+        self._statement_words = []; self._statement_chars = 0
+        if full: yield from self.statements.flush()
+
+    def _switch_table(self, table: str, columns: Optional[list[str]] = None) -> Iterator[ColumnBatch]:
+        """
+        傾印通常依資料表依序輸出：換到另一個資料表時先輸出前一個的批次，記憶體只保留一個資料表。
+        陳述式指定了不同的欄位清單 (或順序) 時也先輸出，同一批的資料列欄位一致；列號在同一個資料表內延續。
+        """
+        columns = list(columns or self.schemas.get(table) or [])
+        previous = self.current
+        if previous is not None and previous.table == table and previous.columns == columns: return
+        if previous is not None: yield from previous.flush(self.skip)
+        self.current = _TableBuffer(table, columns)
+        if previous is not None and previous.table == table: self.current.row_count = previous.row_count
+
+    # --- 陳述式 ---
+    def _create(self):
+        token = self.tokens.next()
+        while _is_word(token, 'TEMPORARY', 'TEMP', 'GLOBAL', 'LOCAL', 'UNLOGGED', 'OR', 'REPLACE'): token = self.tokens.next()
+        if not _is_word(token, 'TABLE'): self._skip_statement(); return
+        while _is_word(self.tokens.peek(), 'IF', 'NOT', 'EXISTS'): self.tokens.next()
+        table = self._read_name()
+        if table is None or not _is_punct(self.tokens.next(), '('): self._skip_statement(); return
+        columns = []; depth = 1; expecting = True
+        while depth and (token := self.tokens.next()) is not None:
+            kind, value = token
+            if kind == 'punct':
+                if value == '(': depth += 1
+                elif value == ')': depth -= 1
+                elif value == ',' and depth == 1: expecting = True
+                continue
+            if expecting and depth == 1:
+                expecting = False
+                if not (kind == 'word' and value.upper() in _CONSTRAINT_WORDS): columns.append(value)
+        self.schemas[table] = columns
+        self._skip_statement()
+
+    def _insert(self) -> Iterator[ColumnBatch]:
+        while _is_word(self.tokens.peek(), 'INTO', 'IGNORE', 'LOW_PRIORITY', 'DELAYED', 'HIGH_PRIORITY'): self.tokens.next()
+        table = self._read_name()
+        if table is None: self._skip_statement(collect=True); yield from self._end_statement(); return
+        columns = self._read_column_list() if _is_punct(self.tokens.peek(), '(') else None
+        if not _is_word(self.tokens.next(), 'VALUES', 'VALUE'):
+            self._skip_statement(collect=True); yield from self._end_statement(); return
+        yield from self._switch_table(table, columns)
+        while True:
+            for values, chars in self.tokens.literal_tuples():
+                if self.current.add(values, chars): yield from self.current.flush(self.skip)
+            if self.tokens.values_ended or not _is_punct(self.tokens.peek(), '('): break
+            self.tokens.next()
+            if self.current.add(self._read_tuple()): yield from self.current.flush(self.skip)
+            if not _is_punct(self.tokens.peek(), ','): break
+            self.tokens.next()
+        self._skip_statement()
+
+    def _read_tuple(self) -> list[Optional[str]]:
+        """讀取一個值組 (不含開頭的 '(')；字串常值優先 (例如 _utf8mb4'...'、X'...')，NULL 為 None。"""
+        values: list[Optional[str]] = []
+        value: Optional[str] = None; quoted = False; depth = 0
+        while (token := self.tokens.next()) is not None:
+            kind, text = token
+            if kind == 'punct':
+                if text == '(': depth += 1
+                elif text == ')':
+                    if depth == 0: break
+                    depth -= 1
+                elif text == ',' and depth == 0: values.append(value); value = None; quoted = False
+                continue
+            if kind in ('sq', 'dq'):
+                if not quoted: value = text; quoted = True
+            elif value is None and not quoted and depth == 0 and text.upper() != 'NULL': value = text
+        values.append(value)
+        return values
+
+    def _copy(self) -> Iterator[ColumnBatch]:
+        table = self._read_name()
+        if table is None: self._skip_statement(); return
+        columns = self._read_column_list() if _is_punct(self.tokens.peek(), '(') else None
+        words = []
+        while (token := self.tokens.next()) is not None and not _is_punct(token, ';'): words.append(token[1].upper())
+        if 'STDIN' not in words: return
+        yield from self._switch_table(table, columns)
+        self.tokens.read_line()  # ';' 之後的行尾
+        while (line := self.tokens.read_line()) is not None and line != '\\.':
+            values = [None if field == '\\N' else _COPY_ESCAPE.sub(lambda m: _COPY_ESCAPES.get(m.group(1), m.group(1)), field) if '\\' in field else field
+                      for field in line.split('\t')]
+            if self.current.add(values): yield from self.current.flush(self.skip)
+
+    def batches(self) -> Iterator[ColumnBatch]:
+        while (token := self.tokens.next()) is not None:
+            kind, value = token
+            keyword = value.upper() if kind == 'word' else None
+            if keyword in ('INSERT', 'REPLACE'): yield from self._insert()
+            elif keyword == 'CREATE': self._create()
+            elif keyword == 'COPY': yield from self._copy()
+            elif _is_punct(token, ';'): yield from self._end_statement()
+            elif kind in ('sq', 'dq', 'word'):
+                self._collect(value)
+                if self._statement_chars >= BATCH_CHARS: yield from self._end_statement()
+        yield from self._end_statement()
+        if self.current is not None: yield from self.current.flush(self.skip)
+        yield from self.statements.flush()
+
+
+# --- CSV ---
+def _looks_like_header(row: list[str]) -> bool:
+    """每一格都有值、沒有重複、沒有數字開頭的值也沒有 @：視為標題列。"""
+    cells = [cell.strip() for cell in row]
+    return (bool(cells) and all(cells) and len(set(cells)) == len(cells)
+            and not any(cell[0].isdigit() or cell[0] in '+-' or '@' in cell for cell in cells))
+
+
+def _limit_chars(lines: Iterable[str], max_chars: int) -> Iterator[str]:
+    """讀到累計約 max_chars 字元為止 (以整行為單位)。"""
+    for line in lines:
+        yield line
+        max_chars -= len(line)
+        if max_chars <= 0: return
+
+
+def _csv_batches(stream: TextIO, table: str, delimiter: Optional[str], skip: Optional[SkipColumn],
+                 max_chars: Optional[int] = None) -> Iterator[ColumnBatch]:
+    lines = iter(stream) if max_chars is None else _limit_chars(stream, max_chars)
+    first = next(lines, None)
+    if first is None: return
+    if delimiter is None: delimiter = max(_CSV_DELIMITERS, key=first.count) if any(d in first for d in _CSV_DELIMITERS) else ','
+    csv.field_size_limit(_CSV_FIELD_LIMIT)
+    reader = csv.reader(itertools.chain([first], lines), delimiter=delimiter)
+    header = next(reader, None)
+    if header is None: return
+    buffer = _TableBuffer(table, header if _looks_like_header(header) else None)
+    if not buffer.columns and buffer.add(list(header)): yield from buffer.flush(skip)
+    for row in reader:
+        if buffer.add(row): yield from buffer.flush(skip)
+    yield from buffer.flush(skip)
+
+
+class TabularSource:
+    """
+    SQL 傾印或 CSV 的串流來源 (不是 str)。iter_batches() 每次呼叫都重新開啟檔案。
+    Args:
+        max_chars: 只讀取開頭的這麼多字元 (分流策略為取樣時使用)。
+    """
+
+    def __init__(self, file_path: pathlib.Path, encoding: str, data_start: int = 0, max_chars: Optional[int] = None):
+        self.file_path = file_path; self.encoding = encoding; self.data_start = data_start; self.max_chars = max_chars
+        self.suffix = file_path.suffix.lower()
+
+    @property
+    def table(self) -> str: return self.file_path.stem
+
+    def iter_batches(self, skip: Optional[SkipColumn] = None) -> Iterator[ColumnBatch]:
+        with open(self.file_path, 'rb') as raw:
+            raw.seek(self.data_start)
+            stream = io.TextIOWrapper(raw, encoding=self.encoding, errors='replace', newline='')
+            if self.suffix in SQL_EXTENSIONS: yield from _SqlDump(_SqlTokens(stream, self.max_chars), skip).batches()
+            else: yield from _csv_batches(stream, self.table, '\t' if self.suffix == '.tsv' else None, skip, self.max_chars)
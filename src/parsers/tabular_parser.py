@@ -0,0 +1,28 @@
+# src/parsers/tabular_parser.py
+import logging
+import pathlib
+from typing import Optional, Union
+from src.shared_data_model import FileContext, FileStatus
+from src.parsers.base_parser import ParseTimeoutError
+from src.parsers.encoding import SAMPLE_SIZE, detect_bom, detect_encoding
+from src.parsers.tabular import TabularSource
+from src.parsers.txt_parser import TxtParser
+
+class TabularParser(TxtParser):
+    """SQL 傾印與 CSV/TSV：只偵測編碼，回傳串流的 TabularSource，由掃描端依欄位逐批讀取。"""
+    def parse(self, file_path: pathlib.Path, max_bytes: Optional[int] = None) -> tuple[FileContext, Union[str, TabularSource]]:
+        """max_bytes: 若指定，只讀取檔案開頭約這麼多位元組 (分流策略為取樣時使用)。"""
+        file_size = file_path.stat().st_size
+        ctx_args = {"file_path": file_path, "mime_type": "text/csv" if file_path.suffix.lower() != '.sql' else "application/sql", "file_size_bytes": file_size}
+        try:
+            with open(file_path, 'rb') as f: sample = f.read(SAMPLE_SIZE)
+            encoding = detect_encoding(sample, truncated=len(sample) < file_size)
+            _, bom_length = detect_bom(sample)
+            source = TabularSource(file_path, encoding, data_start=bom_length, max_chars=max_bytes)
+            logging.info(f"檔案 '{file_path.name}' 以欄位串流方式讀取，編碼 '{encoding}'。")
+            return FileContext(**ctx_args, status=FileStatus.COMPLETED, encoding=encoding), source
+        except ParseTimeoutError: raise
+        except Exception as e:
+            msg = f"讀取檔案時發生 I/O 錯誤: {e}"
+            logging.error(f"'{file_path.name}': {msg}", exc_info=True)
+            return FileContext(**ctx_args, status=FileStatus.ERROR, error_message=str(e)), ""
@@ -0,0 +1,132 @@
+# src/parsers/triage.py
+"""
+檔案分流 (Triage) 模組
+
+只讀取檔案開頭數 KB，就判斷檔案屬於一般文字、二進位、壓縮程式碼 (minified)、
+Base64 為主的內容或自動產生的檔案，再依照可設定的策略決定要完整掃描、
+只取樣開頭、只跑 Regex 插件，或直接跳過。判定結果會寫入 FileContext 供報告使用。
+"""
+import pathlib
+import re
+from typing import Mapping, Optional
+
+from src.shared_data_model import TriageAction, TriageCategory, TriageDecision
+
+HEAD_SIZE = 8 * 1024
+# 處理方式為 SAMPLE 時，只解析檔案開頭的這麼多位元組
+SAMPLE_BYTES = 256 * 1024
+
+DEFAULT_TRIAGE_POLICY: dict[TriageCategory, TriageAction] = {
+    TriageCategory.TEXT: TriageAction.SCAN,
+    TriageCategory.BINARY: TriageAction.SKIP,
+    TriageCategory.MINIFIED: TriageAction.REGEX_ONLY,
+    TriageCategory.BASE64_HEAVY: TriageAction.SAMPLE,
+    TriageCategory.GENERATED: TriageAction.REGEX_ONLY,
+}
+
+# 報告中使用的中文名稱
+CATEGORY_LABELS = {
+    TriageCategory.TEXT: "一般文字", TriageCategory.BINARY: "二進位",
+    TriageCategory.MINIFIED: "壓縮程式碼", TriageCategory.BASE64_HEAVY: "Base64 內容",
+    TriageCategory.GENERATED: "自動產生",
+}
+ACTION_LABELS = {
+    TriageAction.SCAN: "完整掃描", TriageAction.SKIP: "跳過",
+    TriageAction.SAMPLE: "僅取樣開頭", TriageAction.REGEX_ONLY: "僅 Regex 插件",
+}
+
+# --- 判定門檻 ---
+_MINIFIED_AVG_LINE_LENGTH = 500
+_MINIFIED_MAX_LINE_LENGTH = 5000
+_MINIFIED_EXTENSIONS = frozenset({'.js', '.css', '.json', '.mjs', '.svg'})
+_BASE64_RUN_RATIO = 0.5
+_CONTROL_CHAR_RATIO = 0.1
+
+_BASE64_RUN_REGEX = re.compile(rb'[A-Za-z0-9+/=]{256,}')
+_GENERATED_MARKERS = (
+    b'@generated', b'DO NOT EDIT', b'webpackBootstrap', b'__webpack_require__', b'"mappings":"',
+)
+_GENERATED_SUFFIXES = ('.map', '.min.js', '.min.css', '.bundle.js', '.chunk.js')
+# 允許出現在文字檔中的控制字元：\t \n \r \f 與 ESC
+_TEXT_CONTROL_BYTES = frozenset(b'\t\n\r\x0c\x1b')
+_UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
+
+
+def _is_binary(head: bytes) -> Optional[str]:
+    if head.startswith(_UTF16_BOMS): return None
+    if b'\x00' in head: return "含有 NUL 位元組"
+    controls = sum(1 for b in head if b < 0x20 and b not in _TEXT_CONTROL_BYTES)
+    if controls / len(head) > _CONTROL_CHAR_RATIO: return f"控制字元比例 {controls / len(head):.0%}"
+    return None
+
+
+def _is_minified(head: bytes, suffix: str) -> Optional[str]:
+    if suffix not in _MINIFIED_EXTENSIONS: return None
+    lines = head.split(b'\n')
+    # 最後一行可能被截斷，只有在超過一行時才排除它
+    complete = lines[:-1] if len(lines) > 1 else lines
+    longest = max(len(line) for line in complete)
+    average = sum(len(line) for line in complete) / len(complete)
+    if longest >= _MINIFIED_MAX_LINE_LENGTH or (len(lines) == 1 and len(head) >= _MINIFIED_MAX_LINE_LENGTH):
+        return f"最長行 {longest:,} 位元組"
+    if average >= _MINIFIED_AVG_LINE_LENGTH: return f"平均行長 {average:,.0f} 位元組"
+    return None
+
+
+def _is_base64_heavy(head: bytes) -> Optional[str]:
+    covered = sum(len(m.group(0)) for m in _BASE64_RUN_REGEX.finditer(head))
+    if covered / len(head) >= _BASE64_RUN_RATIO: return f"Base64 片段佔開頭 {covered / len(head):.0%}"
+    return None
+
+
+def _is_generated(head: bytes, name: str) -> Optional[str]:
+    if name.endswith(_GENERATED_SUFFIXES): return f"檔名 '{name}'"
+    for marker in _GENERATED_MARKERS:
+        if marker in head: return f"含有標記 '{marker.decode()}'"
+    return None
+
+
+def classify(file_path: pathlib.Path, head: bytes) -> tuple[TriageCategory, str]:
+    """根據檔名與開頭位元組判定檔案類別，回傳 (類別, 判定依據)。"""
+    if not head: return TriageCategory.TEXT, "空內容"
+    if (reason := _is_binary(head)): return TriageCategory.BINARY, reason
+    name = file_path.name.lower()
+    if (reason := _is_generated(head, name)): return TriageCategory.GENERATED, reason
+    if (reason := _is_base64_heavy(head)): return TriageCategory.BASE64_HEAVY, reason
+    if (reason := _is_minified(head, file_path.suffix.lower())): return TriageCategory.MINIFIED, reason
+    return TriageCategory.TEXT, "一般文字內容"
+
+
+def parse_policy(entries: Optional[list[str]]) -> dict[TriageCategory, TriageAction]:
+    """
+    解析 CLI 的分流策略設定 (例如 ["minified=skip", "base64=scan"])，未指定的類別沿用預設值。
+
+    Raises:
+        ValueError: 類別或處理方式名稱無效時。
+    """
+    policy = dict(DEFAULT_TRIAGE_POLICY)
+    for entry in entries or []:
+        category, sep, action = entry.partition('=')
+        if not sep: raise ValueError(f"無效的分流策略 '{entry}'，格式應為 類別=處理方式。")
+        try: policy[TriageCategory(category.strip().lower())] = TriageAction(action.strip().lower())
+        except ValueError:
+            raise ValueError(f"無效的分流策略 '{entry}'。類別可為 {[c.value for c in TriageCategory]}，"
+                             f"處理方式可為 {[a.value for a in TriageAction]}。") from None
+    return policy
+
+
+class FileTriage:
+    """依照策略產生 TriageDecision 的可呼叫物件，每個工作進程持有一份。"""
+
+    def __init__(self, policy: Optional[Mapping[TriageCategory, TriageAction]] = None):
+        self.policy = dict(DEFAULT_TRIAGE_POLICY)
+        if policy: self.policy.update(policy)
+
+    def __call__(self, file_path: pathlib.Path, head: bytes) -> TriageDecision:
+        category, reason = classify(file_path, head)
+        return TriageDecision(category=category, action=self.policy[category], reason=reason)
+
+
+def describe(decision: TriageDecision) -> str:
+    """產生報告用的中文描述，例如「壓縮程式碼 → 僅 Regex 插件 (平均行長 3,200 位元組)」。"""
+    return f"{CATEGORY_LABELS[decision.category]} → {ACTION_LABELS[decision.action]} ({decision.reason})"
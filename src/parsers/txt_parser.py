@@ -1,28 +1,56 @@
 # src/parsers/txt_parser.py
 import logging
 import pathlib
-from typing import ClassVar
+from typing import ClassVar, Optional, Union
 from src.shared_data_model import FileContext, FileStatus
-from src.parsers.base_parser import BaseParser
+from src.parsers.base_parser import BaseParser, ParseTimeoutError
+from src.manifest import hash_bytes
+from src.parsers.encoding import CANDIDATE_ENCODINGS, SAMPLE_SIZE, detect_bom, detect_encoding, decode_with_fallback
+from src.parsers.mapped_text import MappedText
+from src.parsers.markup import normalize
 
 class TxtParser(BaseParser):
-    ENCODINGS_TO_TRY: ClassVar[list[str]] = ['utf-8', 'big5', 'gbk', 'latin-1']
+    ENCODINGS_TO_TRY: ClassVar[list[str]] = CANDIDATE_ENCODINGS
+    # 超過此大小的檔案改走 mmap 路徑，不再整份解碼成字串
+    LARGE_FILE_THRESHOLD: ClassVar[int] = 64 * 1024 * 1024
     def supports(self, mime_type: str) -> bool: return mime_type.startswith('text/')
-    def parse(self, file_path: pathlib.Path) -> tuple[FileContext, str]:
-        ctx_args = {"file_path": file_path, "mime_type": "text/plain", "file_size_bytes": file_path.stat().st_size}
-        for encoding in self.ENCODINGS_TO_TRY:
-            try:
-                full_text = file_path.read_text(encoding=encoding)
-                ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED)
-                logging.info(f"檔案 '{file_path.name}' 成功使用 '{encoding}' 編碼讀取。")
-                return ctx, full_text
-            except UnicodeDecodeError: continue
-            except Exception as e:
-                msg = f"讀取檔案時發生 I/O 錯誤: {e}"
-                logging.error(f"'{file_path.name}': {msg}", exc_info=True)
-                ctx = FileContext(**ctx_args, status=FileStatus.ERROR, error_message=str(e))
-                return ctx, ""
-        msg = "嘗試所有可用編碼後，仍無法解碼檔案。"
-        logging.warning(f"'{file_path.name}': {msg}")
-        ctx = FileContext(**ctx_args, status=FileStatus.ERROR, error_message=msg)
-        return ctx, ""
\ No newline at end of file
+    def parse(self, file_path: pathlib.Path, max_bytes: Optional[int] = None) -> tuple[FileContext, Union[str, MappedText]]:
+        """max_bytes: 若指定，只讀取並解碼檔案開頭的這麼多位元組 (分流策略為取樣時使用)。"""
+        file_size = file_path.stat().st_size
+        ctx_args = {"file_path": file_path, "mime_type": "text/plain", "file_size_bytes": file_size}
+        try:
+            if file_size >= self.LARGE_FILE_THRESHOLD and max_bytes is None:
+                return self._parse_large(file_path, ctx_args)
+            # 只讀取一次檔案：先由開頭樣本偵測編碼，失敗時才在記憶體中改用其他編碼
+            if max_bytes is None: data = file_path.read_bytes()
+            else:
+                with open(file_path, 'rb') as f: data = f.read(max_bytes)
+            truncated = len(data) < file_size
+            encoding = detect_encoding(data[:SAMPLE_SIZE], truncated=truncated or len(data) > SAMPLE_SIZE)
+            full_text, encoding = decode_with_fallback(data, encoding, truncated=truncated)
+            # 整份讀入時順便計算內容雜湊 (寫入掃描清單，供下次差異掃描判斷內容是否真的變動)，不必再讀一次檔案
+            ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED, encoding=encoding, content_hash=None if truncated else hash_bytes(data))
+            logging.info(f"檔案 '{file_path.name}' 成功使用 '{encoding}' 編碼讀取。")
+            # 網頁類檔案去除標記、解碼實體與跳脫字元，結果位移由 NormalizedText 換算回原始位元組位置
+            normalized = normalize(full_text, file_path.suffix, encoding, data_start=detect_bom(data)[1])
+            if normalized is not None:
+                logging.debug(f"檔案 '{file_path.name}' 正規化後由 {len(full_text):,} 字減為 {len(normalized):,} 字 (可見文字 {len(normalized.visible):,} 字)。")
+                full_text = normalized
+            return ctx, full_text
+        except ParseTimeoutError: raise
+        except Exception as e:
+            msg = f"讀取檔案時發生 I/O 錯誤: {e}"
+            logging.error(f"'{file_path.name}': {msg}", exc_info=True)
+            ctx = FileContext(**ctx_args, status=FileStatus.ERROR, error_message=str(e))
+            return ctx, ""
+
+    def _parse_large(self, file_path: pathlib.Path, ctx_args: dict) -> tuple[FileContext, MappedText]:
+        mapped = self.open_mapped(file_path)
+        ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED, encoding=mapped.encoding)
+        logging.info(f"大型檔案 '{file_path.name}' ({ctx_args['file_size_bytes']:,} bytes) 以記憶體映射方式開啟，編碼 '{mapped.encoding}'。")
+        return ctx, mapped
+
+    def open_mapped(self, file_path: pathlib.Path) -> MappedText:
+        """由開頭樣本偵測編碼與 BOM，以 mmap 開啟整個檔案。"""
+        with open(file_path, 'rb') as f: sample = f.read(SAMPLE_SIZE)
+        return MappedText(file_path, detect_encoding(sample, truncated=True), data_start=detect_bom(sample)[1])
@@ -0,0 +1,44 @@
+# src/parsers/xls_parser.py
+import logging
+import pathlib
+from typing import Iterator
+import xlrd
+from src.shared_data_model import FileContext, FileStatus
+from src.parsers.base_parser import BaseParser, ParseTimeoutError
+from src.parsers.mime import MIME_XLS
+
+def iter_xls_text(workbook: xlrd.Book) -> Iterator[str]:
+    """逐工作表、逐列產生文字；每張工作表讀完即釋放，避免整本活頁簿常駐記憶體。"""
+    for sheet_index in range(workbook.nsheets):
+        sheet = workbook.sheet_by_index(sheet_index)
+        yield f"\n--- Sheet: {sheet.name} ---\n"
+        for row_index in range(sheet.nrows):
+            cell_values = [str(value) for value in sheet.row_values(row_index) if value not in ("", None)]
+            if cell_values: yield " ".join(cell_values)
+        workbook.unload_sheet(sheet_index)
+
+class XlsParser(BaseParser):
+    def supports(self, mime_type: str) -> bool: return mime_type == MIME_XLS
+    def parse(self, file_path: pathlib.Path) -> tuple[FileContext, str]:
+        ctx_args = {"file_path": file_path, "mime_type": MIME_XLS, "file_size_bytes": file_path.stat().st_size}
+        workbook = None
+        try:
+            # on_demand=True：工作表在被存取時才載入 (BIFF 格式，純 Python，不需 pywin32)
+            workbook = xlrd.open_workbook(str(file_path), on_demand=True)
+            full_text = "\n".join(iter_xls_text(workbook))
+            ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED)
+            return ctx, full_text
+        except ParseTimeoutError: raise
+        except xlrd.XLRDError as e:
+            is_encrypted = 'encrypt' in str(e).lower()
+            msg = "檔案已加密，無法解析。" if is_encrypted else f"檔案可能已損毀，無法解析: {e}"
+            logging.warning(f"'{file_path.name}': {msg}")
+            status = FileStatus.SKIPPED if is_encrypted else FileStatus.ERROR
+            return FileContext(**ctx_args, status=status, error_message=msg), ""
+        except Exception as e:
+            msg = f"解析 XLS 檔案時發生未知錯誤: {e}"
+            logging.error(f"'{file_path.name}': {msg}", exc_info=True)
+            ctx = FileContext(**ctx_args, status=FileStatus.ERROR, error_message=str(e))
+            return ctx, ""
+        finally:
+            if workbook: workbook.release_resources()
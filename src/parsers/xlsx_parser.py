@@ -4,7 +4,7 @@ import pathlib
 from zipfile import BadZipFile
 import openpyxl
 from src.shared_data_model import FileContext, FileStatus
-from src.parsers.base_parser import BaseParser
+from src.parsers.base_parser import BaseParser, ParseTimeoutError
 
 class XlsxParser(BaseParser):
     def supports(self, mime_type: str) -> bool:
@@ -23,6 +23,7 @@ class XlsxParser(BaseParser):
             full_text = "\n".join(all_text_chunks)
             ctx = FileContext(**ctx_args, status=FileStatus.COMPLETED)
             return ctx, full_text
+        except ParseTimeoutError: raise
         except (BadZipFile, KeyError):
             msg = "檔案可能已加密或已損毀，無法解析。"
             logging.warning(f"'{file_path.name}': {msg}")
@@ -1,12 +1,72 @@
 # src/plugins/base.py
 from __future__ import annotations
 import abc
-from typing import ClassVar
+import dataclasses
+import itertools
+import re
+import sys
+from typing import ClassVar, Optional, TYPE_CHECKING
 
 from src.shared_data_model import FileContext, ScanReport
 
+if TYPE_CHECKING:
+    from src.parsers.mapped_text import MappedText
+
+# 特徵計數的上限：插件的門檻都很小，數到上限即可停止，不必走訪整份文字
+FEATURE_COUNT_CAP = 64
+_DIGIT = re.compile(r'\d')
+_CJK = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+_ASCII_DIGIT_BYTES = re.compile(rb'[0-9]')
+_NON_ASCII_BYTES = re.compile(rb'[\x80-\xff]')
+
+
+def _count_up_to(pattern: re.Pattern, text, cap: int = FEATURE_COUNT_CAP, pos: int = 0, endpos: int = sys.maxsize) -> int:
+    return sum(1 for _ in itertools.islice(pattern.finditer(text, pos, endpos), cap))
+
+
+@dataclasses.dataclass(frozen=True)
+class TextFeatures:
+    """
+    每個檔案計算一次的廉價文字特徵，用來略過不可能命中的插件。
+    digits / cjk 是數到 FEATURE_COUNT_CAP 為止的字元數 (\\d 與插件的 Regex 一樣包含全形數字)。
+    """
+    digits: int
+    cjk: int
+    has_at_sign: bool
+
+    @classmethod
+    def from_text(cls, text: str) -> TextFeatures:
+        return cls(digits=_count_up_to(_DIGIT, text), cjk=_count_up_to(_CJK, text), has_at_sign='@' in text)
+
+    @classmethod
+    def from_mapped(cls, mapped: MappedText) -> TextFeatures:
+        """大型檔案只在純 ASCII 的內容上直接計算；含有其他位元組或編碼不相容時視為特徵未知，不略過任何插件。"""
+        buffer = mapped.buffer
+        if not mapped.is_ascii_transparent or _NON_ASCII_BYTES.search(buffer, mapped.start, mapped.end): return UNKNOWN_FEATURES
+        return cls(digits=_count_up_to(_ASCII_DIGIT_BYTES, buffer, pos=mapped.start, endpos=mapped.end), cjk=0,
+                   has_at_sign=buffer.find(b'@', mapped.start, mapped.end) != -1)
+
+
+UNKNOWN_FEATURES = TextFeatures(digits=FEATURE_COUNT_CAP, cjk=FEATURE_COUNT_CAP, has_at_sign=True)
+# 樣式表、壓縮後的程式碼與 source map：地址與姓名插件在這些檔案中不會有意義的命中
+STYLE_AND_BUNDLE_SUFFIXES = ('.css', '.min.js', '.min.mjs', '.map')
+
+
 class ScannerPlugin(abc.ABC):
     pii_type: ClassVar[str]
+    # 是否依賴 NLP 模型推論；分流策略為「僅 Regex」的檔案會略過這類插件
+    uses_nlp: ClassVar[bool] = False
+    # 相對成本：每個檔案依成本由低到高執行插件
+    cost: ClassVar[int] = 1
+    # 適用範圍：mime_types 為 None 表示不限；excluded_suffixes 比對小寫的檔名結尾 (可含 '.min.js' 這類多段副檔名)
+    mime_types: ClassVar[Optional[frozenset[str]]] = None
+    excluded_suffixes: ClassVar[tuple[str, ...]] = ()
+    # 文字至少要有的特徵，未達門檻的檔案直接略過
+    min_digits: ClassVar[int] = 0
+    min_cjk: ClassVar[int] = 0
+    requires_at_sign: ClassVar[bool] = False
+    # 只在這些姓名掃描設定檔 (src.name_dictionary.NAME_PROFILES) 下預設啟用；None 表示不受設定檔影響
+    name_profiles: ClassVar[Optional[frozenset[str]]] = None
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -20,6 +80,44 @@ class ScannerPlugin(abc.ABC):
     def __init__(self, **kwargs):
         pass
 
+    @classmethod
+    def applies_to(cls, file_context: FileContext) -> bool:
+        """依檔案類型判斷是否適用 (不需要文字內容)。"""
+        if cls.mime_types is not None and file_context.mime_type not in cls.mime_types: return False
+        return not (cls.excluded_suffixes and file_context.file_path.name.lower().endswith(cls.excluded_suffixes))
+
+    def is_applicable(self, file_context: FileContext, features: TextFeatures) -> bool:
+        """回傳 False 表示此插件不可能在這份文字中命中；需要更細緻判斷的插件可覆寫。"""
+        if features.digits < self.min_digits or features.cjk < self.min_cjk: return False
+        if self.requires_at_sign and not features.has_at_sign: return False
+        return self.applies_to(file_context)
+
     @abc.abstractmethod
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
-        ...
\ No newline at end of file
+        ...
+
+    def scan_ascii(self, mapped: MappedText, start: int, end: int, file_context: FileContext) -> Optional[ScanReport]:
+        """
+        在只含 ASCII 的位元組範圍 [start, end) 上直接以位元組樣式掃描，結果的位移為檔案中的位元組位置。
+        回傳 None 表示插件不支援，改為解碼後呼叫 scan()。
+        """
+        return None
+
+    def scan_mapped(self, mapped: MappedText, file_context: FileContext) -> ScanReport:
+        """
+        掃描以 mmap 開啟的大型檔案。逐段處理：只含 ASCII 的分段交給 scan_ascii() (位元組樣式在這種內容上與 str 樣式語意相同)，
+        其他分段 (或插件不支援時) 解碼後呼叫 scan()，並把結果位移換算為檔案中的位元組位置。
+        """
+        results: ScanReport = []
+        for segment_start, core_end, segment_end in mapped.iter_segments():
+            segment_results = self.scan_ascii(mapped, segment_start, segment_end, file_context) if mapped.is_plain_ascii(segment_start, segment_end) else None
+            if segment_results is None:
+                segment_text = mapped.decode(segment_start, segment_end)
+                segment_results = self.scan(segment_text, file_context)
+                byte_offsets = mapped.chars_to_bytes(segment_start, segment_text, (result.offset for result in segment_results if result.offset is not None))
+                segment_results = [result if result.offset is None else
+                                   dataclasses.replace(result, offset=byte_offsets[result.offset], location=f"附近 (byte ~{byte_offsets[result.offset]})")
+                                   for result in segment_results]
+            # 重疊區的結果由下一段負責，避免重複回報
+            results.extend(result for result in segment_results if result.offset is None or result.offset < core_end or core_end >= mapped.end)
+        return results
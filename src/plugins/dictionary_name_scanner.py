@@ -0,0 +1,49 @@
+# src/plugins/dictionary_name_scanner.py
+
+"""
+DictionaryNameScanner 插件
+
+以姓氏字典樹、名字常用字權重與前後提示詞 (src.name_dictionary) 比對中文姓名，不需要 NLP 模型。
+速度與 Regex 插件相當，精確率與召回率低於 BERT；只在 --name-profile fast 時預設啟用。
+"""
+
+from typing import ClassVar
+
+from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
+from src.plugins.base import STYLE_AND_BUNDLE_SUFFIXES, ScannerPlugin
+from src.name_dictionary import NAME_PROFILE_FAST, REPORT_THRESHOLD, NameMatcher
+
+CONTEXT_WINDOW_SIZE = 50
+
+
+class DictionaryNameScanner(ScannerPlugin):
+    """
+    一個以字典比對掃描中文姓名的具體插件實作。信心分數即比對分數 (REPORT_THRESHOLD ~ 0.99)。
+    """
+    pii_type: ClassVar[str] = "PERSON_NAME"
+    cost: ClassVar[int] = 2
+    excluded_suffixes: ClassVar[tuple[str, ...]] = STYLE_AND_BUNDLE_SUFFIXES
+    min_cjk: ClassVar[int] = 2
+    name_profiles: ClassVar[frozenset[str]] = frozenset({NAME_PROFILE_FAST})
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.matcher = NameMatcher()
+
+    def scan(self, text: str, file_context: FileContext) -> ScanReport:
+        results: ScanReport = []
+        for candidate in self.matcher.find(text, REPORT_THRESHOLD):
+            context_start = max(0, candidate.start - CONTEXT_WINDOW_SIZE)
+            context_end = min(len(text), candidate.end + CONTEXT_WINDOW_SIZE)
+            results.append(ScanResult(
+                file_context=file_context,
+                pii_type=self.pii_type,
+                matched_value=text[candidate.start:candidate.end],
+                confidence_score=candidate.score,
+                scanner_source=self.name,
+                validation_status=ValidationStatus.NOT_APPLICABLE,
+                context=text[context_start:context_end],
+                location=f"附近 (char ~{candidate.start})",
+                offset=candidate.start
+            ))
+        return results
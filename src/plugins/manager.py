@@ -70,7 +70,10 @@ class PluginManager:
 
     def get_enabled(self, enabled_names: Optional[List[str]]) -> List[ScannerPlugin]:
         all_plugins = self.get_all()
-        if not enabled_names: return all_plugins
+        if not enabled_names:
+            # 未指定插件時，依姓名掃描設定檔 (dependencies['name_profile']) 決定使用哪些姓名插件
+            profile = self.dependencies.get('name_profile')
+            return [p for p in all_plugins if profile is None or p.name_profiles is None or profile in p.name_profiles]
         loaded_plugins = []
         for name in enabled_names:
             name_lower = name.lower()
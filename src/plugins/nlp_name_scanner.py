@@ -1,16 +1,25 @@
 # src/plugins/nlp_name_scanner.py (優化版 - 僅掃描姓名)
 
 import logging
-from typing import ClassVar, List, Dict, Any
+import time
+import zlib
+from typing import ClassVar, List, Dict, Any, Optional
 
 from transformers import Pipeline
 
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
-from src.plugins.base import ScannerPlugin
+from src.plugins.base import STYLE_AND_BUNDLE_SUFFIXES, ScannerPlugin
+from src.nlp_cache import InferenceCache
+from src.name_dictionary import CANDIDATE_THRESHOLD, NAME_PROFILE_BERT, NAME_PROFILE_CASCADE, NameCandidate, NameMatcher
 
 CONTEXT_WINDOW_SIZE = 50
 MAX_CHUNK_LENGTH = 500
 CHUNK_STRIDE = 50
+# 依內容切分：雜湊值可被 _BOUNDARY_MODULUS 整除的行之後切開；分段短於 MIN_CHUNK_LENGTH 時不切
+MIN_CHUNK_LENGTH = 100
+_BOUNDARY_MODULUS = 8
+# cascade 設定檔：每個字典候選前後各取這麼多字交給模型確認 (模型需要上下文才能判斷)
+CASCADE_WINDOW = 30
 
 # 【優化】目標實體現在只剩下 "PERSON"
 TARGET_ENTITY_GROUP = "PERSON"
@@ -22,12 +31,21 @@ class NlpNameScanner(ScannerPlugin):
     """
     # 【優化】pii_type 改回更精確的名稱
     pii_type: ClassVar[str] = "PERSON_NAME"
+    uses_nlp: ClassVar[bool] = True
+    cost: ClassVar[int] = 100
+    excluded_suffixes: ClassVar[tuple[str, ...]] = STYLE_AND_BUNDLE_SUFFIXES
+    min_cjk: ClassVar[int] = 2
+    name_profiles: ClassVar[frozenset[str]] = frozenset({NAME_PROFILE_BERT, NAME_PROFILE_CASCADE})
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.model: Pipeline = kwargs.get('nlp_model')
         if not self.model:
             raise TypeError(f"{self.name} 需要一個 'nlp_model' 依賴項。")
+        # 選用：相同分段 (共用頁尾、免責聲明等) 只推論一次
+        self.cache: Optional[InferenceCache] = kwargs.get('nlp_cache')
+        # cascade：只推論字典候選附近的文字，並只保留與候選重疊的實體
+        self.matcher: Optional[NameMatcher] = NameMatcher() if kwargs.get('name_profile') == NAME_PROFILE_CASCADE else None
 
     @staticmethod
     def _group_contiguous_entities(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -49,27 +67,78 @@ class NlpNameScanner(ScannerPlugin):
         return grouped
 
     @staticmethod
-    def _chunk_text(text: str) -> list[str]:
-        # ... (此函式保持不變) ...
-        if len(text) <= MAX_CHUNK_LENGTH: return [text]
-        return [text[i: i + MAX_CHUNK_LENGTH] for i in range(0, len(text), MAX_CHUNK_LENGTH - CHUNK_STRIDE)]
+    def _chunk_text(text: str) -> list[tuple[int, str]]:
+        """
+        回傳 (起始位置, 分段)。分段邊界落在行尾，並由該行的內容決定，因此相同的段落 (共用頁尾、免責聲明)
+        在不同檔案中會切出相同的分段，推論快取才能命中。超過上限的長行以固定視窗 (含重疊) 切分；只有空白的分段略過。
+        """
+        if len(text) <= MAX_CHUNK_LENGTH: return [(0, text)]
+        chunks: list[tuple[int, str]] = []
+        def flush(end: int):
+            chunk = text[start:end]
+            if chunk.strip(): chunks.append((start, chunk))
+        start = position = 0; length = len(text)
+        while position < length:
+            newline = text.find('\n', position)
+            line_end = length if newline == -1 else newline + 1
+            if line_end - start > MAX_CHUNK_LENGTH:
+                if position > start: flush(position); start = position
+                while line_end - start > MAX_CHUNK_LENGTH:
+                    flush(start + MAX_CHUNK_LENGTH); start += MAX_CHUNK_LENGTH - CHUNK_STRIDE
+            line = text[position:line_end]; position = line_end
+            if position - start >= MIN_CHUNK_LENGTH and zlib.crc32(line.encode('utf-8', 'surrogatepass')) % _BOUNDARY_MODULUS == 0:
+                flush(position); start = position
+        if start < length: flush(length)
+        return chunks
+
+    def _cascade_chunks(self, text: str, candidates: list[NameCandidate]) -> list[tuple[int, str]]:
+        """把候選前後 CASCADE_WINDOW 字的視窗合併後切分；視窗在行內截斷的位置不影響模型判斷候選本身。"""
+        chunks: list[tuple[int, str]] = []
+        windows: list[list[int]] = []
+        for candidate in candidates:
+            start, end = max(0, candidate.start - CASCADE_WINDOW), min(len(text), candidate.end + CASCADE_WINDOW)
+            if windows and start <= windows[-1][1]: windows[-1][1] = max(windows[-1][1], end)
+            else: windows.append([start, end])
+        for start, end in windows:
+            chunks.extend((start + offset, chunk) for offset, chunk in self._chunk_text(text[start:end]))
+        return chunks
+
+    def _infer(self, text_chunks: list[str]) -> list[List[Dict[str, Any]]]:
+        """回傳各分段分組後的實體；有推論快取時只推論未命中的分段。"""
+        if self.cache is None:
+            return [self._group_contiguous_entities(r) if isinstance(r, list) else [] for r in self.model(text_chunks)]
+        keys, grouped = self.cache.lookup(text_chunks)
+        missing = [i for i, entities in enumerate(grouped) if entities is None]
+        if not missing: return grouped
+        started = time.perf_counter()
+        batch_results = self.model([text_chunks[i] for i in missing])
+        elapsed = time.perf_counter() - started
+        stored_keys, stored = [], []
+        for i, chunk_results in zip(missing, batch_results):
+            if not isinstance(chunk_results, list): grouped[i] = []; continue
+            grouped[i] = self._group_contiguous_entities(chunk_results)
+            stored_keys.append(keys[i]); stored.append(grouped[i])
+        self.cache.store(stored_keys, stored, elapsed)
+        return grouped
 
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
         if not text.strip(): return []
         results: ScanReport = []; found_entities = set()
-        text_chunks = self._chunk_text(text)
+        candidates: list[NameCandidate] = []
+        if self.matcher is None: chunks = self._chunk_text(text)
+        else:
+            candidates = self.matcher.find(text, CANDIDATE_THRESHOLD)
+            if not candidates: return []
+            chunks = self._cascade_chunks(text, candidates)
+        chunk_offsets, text_chunks = zip(*chunks)
 
         try:
-            batch_results = self.model(text_chunks)
+            chunk_entities = self._infer(list(text_chunks))
         except Exception as e:
             logging.error(f"'{self.name}' 在批次模型推論時發生錯誤: {e}", exc_info=True)
             return []
 
-        for i, chunk_results in enumerate(batch_results):
-            if not isinstance(chunk_results, list): continue
-            
-            grouped_chunk_entities = self._group_contiguous_entities(chunk_results)
-            chunk_offset = i * (MAX_CHUNK_LENGTH - CHUNK_STRIDE)
+        for chunk_offset, grouped_chunk_entities in zip(chunk_offsets, chunk_entities):
             
             for entity in grouped_chunk_entities:
                 # 【優化】現在只對 "PERSON" 類型的實體感興趣
@@ -78,6 +147,7 @@ class NlpNameScanner(ScannerPlugin):
                     absolute_start = entity['start'] + chunk_offset
                     
                     if (matched_text, absolute_start) in found_entities: continue
+                    if candidates and not any(c.start < absolute_start + len(matched_text) and absolute_start < c.end for c in candidates): continue
                     found_entities.add((matched_text, absolute_start))
 
                     context_start = max(0, absolute_start - CONTEXT_WINDOW_SIZE)
@@ -91,7 +161,8 @@ class NlpNameScanner(ScannerPlugin):
                         scanner_source=self.name,
                         validation_status=ValidationStatus.NOT_APPLICABLE,
                         context=text[context_start:context_end],
-                        location=f"附近 (char ~{absolute_start})"
+                        location=f"附近 (char ~{absolute_start})",
+                        offset=absolute_start
                     )
                     results.append(result)
         return results
\ No newline at end of file
@@ -1,12 +1,12 @@
-import re
 from typing import ClassVar
 
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
-from src.plugins.base import ScannerPlugin
+from src.plugins.base import STYLE_AND_BUNDLE_SUFFIXES, ScannerPlugin
+from src.regex_backend import BackendPattern, compile_pattern
 
 CONTEXT_WINDOW_SIZE = 100
 
-def _build_address_regex() -> re.Pattern:
+def _build_address_regex() -> BackendPattern:
     """
     根據使用者提供的邏輯，建立一個複雜的台灣地址正規表示式。
     """
@@ -21,20 +21,24 @@ def _build_address_regex() -> re.Pattern:
     ]
 
     # 主要部分：[縣市]...路/街...號
-    addr_main = '[%s]\w+?[路街鄉鎮市區]\w*?\d{1,5}號' % '|'.join(city + other_city)
+    addr_main = r'[%s]\w+?[路街鄉鎮市區]\w*?\d{1,5}號' % '|'.join(city + other_city)
     # 可選部分：樓、室、之X
     addr_optional = r'(?:\d{1,3}樓)?(?:之\d{1,3})?(?:\d{1,3}室)?'
     
     # 完整的 Regex 規則
     full_regex_str = addr_main + addr_optional
     
-    return re.compile(full_regex_str)
+    return compile_pattern(full_regex_str)
 
 class RegexAddressScanner(ScannerPlugin):
     """
     一個使用正規表示式來掃描台灣地址的插件。
     """
     pii_type: ClassVar[str] = "ADDRESS"
+    cost: ClassVar[int] = 5  # 含非貪婪 \w 的長 Regex
+    excluded_suffixes: ClassVar[tuple[str, ...]] = STYLE_AND_BUNDLE_SUFFIXES
+    min_digits: ClassVar[int] = 1
+    min_cjk: ClassVar[int] = 3  # 縣市、路街與「號」
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -60,7 +64,8 @@ class RegexAddressScanner(ScannerPlugin):
                 scanner_source=self.name,
                 validation_status=ValidationStatus.NOT_APPLICABLE,
                 context=context,
-                location=f"附近 (char ~{match.start()})"
+                location=f"附近 (char ~{match.start()})",
+                offset=match.start()
             )
             results.append(result)
             
@@ -1,44 +1,67 @@
-import re
-from typing import ClassVar
+from typing import ClassVar, TYPE_CHECKING
 
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
 from src.plugins.base import ScannerPlugin
+from src.regex_backend import compile_pattern
 from src.validators import is_valid_luhn
 
+if TYPE_CHECKING:
+    from src.parsers.mapped_text import MappedText
+
 CONTEXT_WINDOW_SIZE = 10
 # 這個 Regex 用於匹配常見的 13-16 位信用卡號格式，可以包含空格或破折號
 _CREDIT_CARD_REGEX_PATTERN = r'\b(?:(?:\d[ -]?){13,16})\b'
 
 class RegexCreditCardScanner(ScannerPlugin):
     pii_type: ClassVar[str] = "CREDIT_CARD"
+    cost: ClassVar[int] = 2  # Luhn 驗證
+    min_digits: ClassVar[int] = 13
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.regex = re.compile(_CREDIT_CARD_REGEX_PATTERN)
+        self.regex = compile_pattern(_CREDIT_CARD_REGEX_PATTERN)
+        # 位元組版本：供大型檔案只含 ASCII 的分段在 mmap 緩衝區上直接掃描
+        self.bytes_regex = compile_pattern(_CREDIT_CARD_REGEX_PATTERN.encode('ascii'))
+
+    @staticmethod
+    def _is_card_number(matched_text: str) -> bool:
+        # 先過濾掉明顯不是信用卡號的（例如，超過19個字元含分隔符）
+        if len(matched_text.replace(" ", "").replace("-", "")) > 16:
+            return False
+        # 關鍵步驟：呼叫 Luhn 演算法進行驗證
+        return is_valid_luhn(matched_text)
+
+    def _build_result(self, matched_text: str, context: str, location: str, offset: int, file_context: FileContext) -> ScanResult:
+        return ScanResult(
+            file_context=file_context,
+            pii_type=self.pii_type,
+            matched_value=matched_text,
+            confidence_score=1.0, # 通過 Luhn 驗證，給予最高信賴度
+            scanner_source=self.name,
+            validation_status=ValidationStatus.VALID,
+            context=context,
+            location=location,
+            offset=offset
+        )
 
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
         results: ScanReport = []
         for match in self.regex.finditer(text):
             matched_text = match.group(0)
-            
-            # 先過濾掉明顯不是信用卡號的（例如，超過19個字元含分隔符）
-            if len(matched_text.replace(" ", "").replace("-", "")) > 16:
-                continue
-
-            # 關鍵步驟：呼叫 Luhn 演算法進行驗證
-            if is_valid_luhn(matched_text):
-                context_start = max(0, match.start() - CONTEXT_WINDOW_SIZE)
-                context_end = min(len(text), match.end() + CONTEXT_WINDOW_SIZE)
-                
-                result = ScanResult(
-                    file_context=file_context,
-                    pii_type=self.pii_type,
-                    matched_value=matched_text,
-                    confidence_score=1.0, # 通過 Luhn 驗證，給予最高信賴度
-                    scanner_source=self.name,
-                    validation_status=ValidationStatus.VALID,
-                    context=text[context_start:context_end],
-                    location=f"附近 (char ~{match.start()})"
-                )
-                results.append(result)
+            if not self._is_card_number(matched_text): continue
+            context_start = max(0, match.start() - CONTEXT_WINDOW_SIZE)
+            context_end = min(len(text), match.end() + CONTEXT_WINDOW_SIZE)
+            results.append(self._build_result(
+                matched_text, text[context_start:context_end], f"附近 (char ~{match.start()})", match.start(), file_context))
+        return results
+
+    def scan_ascii(self, mapped: "MappedText", start: int, end: int, file_context: FileContext) -> ScanReport:
+        """大型檔案只含 ASCII 的分段：直接在映射緩衝區上以位元組比對，只解碼通過驗證者的上下文。"""
+        results: ScanReport = []
+        for match in self.bytes_regex.finditer(mapped.buffer, start, end):
+            matched_text = match.group(0).decode('ascii')
+            if not self._is_card_number(matched_text): continue
+            results.append(self._build_result(
+                matched_text, mapped.context(match.start(), match.end(), CONTEXT_WINDOW_SIZE),
+                f"附近 (byte ~{match.start()})", match.start(), file_context))
         return results
\ No newline at end of file
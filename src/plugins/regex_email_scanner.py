@@ -8,11 +8,15 @@ RegexEmailScanner 插件
 
 # --- 匯入 ---
 import re
-from typing import ClassVar
+from typing import ClassVar, TYPE_CHECKING
 
 # 從共享模組匯入必要的資料結構和型別別名
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
 from src.plugins.base import ScannerPlugin
+from src.regex_backend import compile_pattern
+
+if TYPE_CHECKING:
+    from src.parsers.mapped_text import MappedText
 
 # --- 常數定義 ---
 # 優化 2.1 & 4.1: 將上下文視窗大小和 Regex Pattern 定義為常數，提高可維護性。
@@ -30,6 +34,7 @@ class RegexEmailScanner(ScannerPlugin):
     """
     # 遵循契約，定義 pii_type
     pii_type: ClassVar[str] = "EMAIL"
+    requires_at_sign: ClassVar[bool] = True
 
     def __init__(self, **kwargs):
         """
@@ -37,7 +42,9 @@ class RegexEmailScanner(ScannerPlugin):
         """
         super().__init__(**kwargs)
         # 優化 1.1: 使用 re.IGNORECASE 旗標，讓模式更簡潔且不區分大小寫
-        self.regex = re.compile(_EMAIL_REGEX_PATTERN, re.IGNORECASE)
+        self.regex = compile_pattern(_EMAIL_REGEX_PATTERN, re.IGNORECASE)
+        # 位元組版本：供大型檔案只含 ASCII 的分段在 mmap 緩衝區上直接掃描
+        self.bytes_regex = compile_pattern(_EMAIL_REGEX_PATTERN.encode('ascii'), re.IGNORECASE)
 
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
         """
@@ -75,9 +82,27 @@ class RegexEmailScanner(ScannerPlugin):
                 scanner_source=self.name,
                 validation_status=ValidationStatus.NOT_APPLICABLE,
                 context=context,
-                # Regex 較難提供如頁碼等精確位置，故此處留空
-                location=None
+                # Regex 較難提供如頁碼等精確位置，只記錄大約的字元位置 (與其他 Regex 插件一致)
+                location=f"附近 (char ~{match.start()})",
+                offset=match.start()
             )
             results.append(result)
 
+        return results
+
+    def scan_ascii(self, mapped: "MappedText", start: int, end: int, file_context: FileContext) -> ScanReport:
+        """大型檔案只含 ASCII 的分段：直接在映射緩衝區上以位元組比對，只解碼上下文。"""
+        results: ScanReport = []
+        for match in self.bytes_regex.finditer(mapped.buffer, start, end):
+            results.append(ScanResult(
+                file_context=file_context,
+                pii_type=self.pii_type,
+                matched_value=match.group(0).decode('ascii'),
+                confidence_score=0.7,
+                scanner_source=self.name,
+                validation_status=ValidationStatus.NOT_APPLICABLE,
+                context=mapped.context(match.start(), match.end(), CONTEXT_WINDOW_SIZE),
+                location=f"附近 (byte ~{match.start()})",
+                offset=match.start()
+            ))
         return results
\ No newline at end of file
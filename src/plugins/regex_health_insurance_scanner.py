@@ -1,8 +1,8 @@
-import re
 from typing import ClassVar
 
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
 from src.plugins.base import ScannerPlugin
+from src.regex_backend import compile_pattern
 
 CONTEXT_WINDOW_SIZE = 10
 # 台灣健保卡號格式：12個數字
@@ -14,10 +14,11 @@ NEGATIVE_KEYWORDS = ["訂單號", "會員編號", "快遞單號", "案件編號"
 
 class RegexHealthInsuranceScanner(ScannerPlugin):
     pii_type: ClassVar[str] = "NHI_NUMBER"
+    min_digits: ClassVar[int] = 12
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.regex = re.compile(_NHI_REGEX_PATTERN)
+        self.regex = compile_pattern(_NHI_REGEX_PATTERN)
 
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
         results: ScanReport = []
@@ -46,7 +47,8 @@ class RegexHealthInsuranceScanner(ScannerPlugin):
                     scanner_source=self.name,
                     validation_status=ValidationStatus.NOT_APPLICABLE,
                     context=context,
-                    location=f"附近 (char ~{match.start()})"
+                    location=f"附近 (char ~{match.start()})",
+                    offset=match.start()
                 )
                 results.append(result)
         return results
\ No newline at end of file
@@ -1,10 +1,10 @@
 # src/plugins/regex_passport_scanner.py (v3.0 - 根據使用者回饋修正)
 
-import re
 from typing import ClassVar
 
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
 from src.plugins.base import ScannerPlugin
+from src.regex_backend import compile_pattern
 
 CONTEXT_WINDOW_SIZE = 10
 
@@ -23,10 +23,11 @@ class RegexPassportScanner(ScannerPlugin):
       - 將上下文關鍵字分析作為核心計分策略，以應對格式的模糊性。
     """
     pii_type: ClassVar[str] = "PASSPORT_NUMBER"
+    min_digits: ClassVar[int] = 9
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.regex = re.compile(_PASSPORT_REGEX_PATTERN)
+        self.regex = compile_pattern(_PASSPORT_REGEX_PATTERN)
 
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
         results: ScanReport = []
@@ -58,7 +59,8 @@ class RegexPassportScanner(ScannerPlugin):
                     scanner_source=self.name,
                     validation_status=ValidationStatus.NOT_APPLICABLE,
                     context=context,
-                    location=f"附近 (char ~{match.start()})"
+                    location=f"附近 (char ~{match.start()})",
+                    offset=match.start()
                 )
                 results.append(result)
                 
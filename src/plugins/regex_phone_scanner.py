@@ -1,8 +1,12 @@
 # src/plugins/regex_phone_scanner.py (最終版 - 處理 Unicode)
 import re
-from typing import ClassVar
+from typing import ClassVar, TYPE_CHECKING
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
 from src.plugins.base import ScannerPlugin
+from src.regex_backend import compile_pattern
+
+if TYPE_CHECKING:
+    from src.parsers.mapped_text import MappedText
 
 CONTEXT_WINDOW_SIZE = 10
 # 加入全形括號、多種破折號和點作為分隔符
@@ -58,29 +62,65 @@ _PHONE_REGEX_PATTERN = re.compile(r"""
     (?![=\d\w])
 """, re.VERBOSE)
 
+def _build_bytes_pattern(pattern: re.Pattern) -> re.Pattern:
+    """
+    把電話 Regex 轉成可直接在 UTF-8 位元組上執行的版本。
+    字元類別中的全形括號與長破折號是多位元組字元，必須改寫成分組選擇，否則會被拆成個別位元組。
+    """
+    source = (pattern.pattern
+              .replace('[-. –—\\s]', '(?:[-. \\s]|–|—)')
+              .replace('[\\(（]', '(?:\\(|（)')
+              .replace('[\\)）]', '(?:\\)|）)'))
+    return re.compile(source.encode('utf-8'), pattern.flags & ~re.UNICODE)
+
+_PHONE_BYTES_REGEX_PATTERN = _build_bytes_pattern(_PHONE_REGEX_PATTERN)
+
 # 增設正面詞與負面詞以減少誤判
 POSITIVE_KEYWORDS = ["電話", "手機", "市話", "專線", "致電", "TEL", "Phone", "Cell"] # 新增正面詞
 NEGATIVE_KEYWORDS = ["訂單", "編號", "發票", "貨號", "郵遞區號"] # 新增負面詞
 
 class RegexPhoneScanner(ScannerPlugin):
     pii_type: ClassVar[str] = "PHONE_NUMBER"
+    cost: ClassVar[int] = 3  # 多組分機格式與關鍵詞上下文
+    min_digits: ClassVar[int] = 9  # 最短的格式為 (0836)12345
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.regex = _PHONE_REGEX_PATTERN
+        self.regex = compile_pattern(_PHONE_REGEX_PATTERN.pattern, _PHONE_REGEX_PATTERN.flags)
+        self.bytes_regex = compile_pattern(_PHONE_BYTES_REGEX_PATTERN.pattern, _PHONE_BYTES_REGEX_PATTERN.flags)
+    @staticmethod
+    def _score(context: str) -> float:
+        confidence = 0.5
+        if any(kw.lower() in context.lower() for kw in NEGATIVE_KEYWORDS): confidence = 0.4
+        if any(kw.lower() in context.lower() for kw in POSITIVE_KEYWORDS): confidence = 0.6
+        return confidence
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
         results: ScanReport = []
         for match in self.regex.finditer(text):
-            confidence = 0.5
             context_start = max(0, match.start() - CONTEXT_WINDOW_SIZE)
             context_end = min(len(text), match.end() + CONTEXT_WINDOW_SIZE)
             context = text[context_start:context_end]
-            if any(kw.lower() in context.lower() for kw in NEGATIVE_KEYWORDS): confidence = 0.4
-            if any(kw.lower() in context.lower() for kw in POSITIVE_KEYWORDS): confidence = 0.6
+            confidence = self._score(context)
             if confidence > 0.:
                 results.append(ScanResult(
                     file_context=file_context, pii_type=self.pii_type, matched_value=match.group(0),
                     confidence_score=confidence, scanner_source=self.name,
                     validation_status=ValidationStatus.NOT_APPLICABLE, context=context,
-                    location=f"附近 (char ~{match.start()})"
+                    location=f"附近 (char ~{match.start()})",
+                    offset=match.start()
+                ))
+        return results
+    def scan_ascii(self, mapped: "MappedText", start: int, end: int, file_context: FileContext) -> ScanReport:
+        # 大型檔案只含 ASCII 的分段：全形括號與長破折號的分支不會命中，結果與 str 版本相同
+        results: ScanReport = []
+        for match in self.bytes_regex.finditer(mapped.buffer, start, end):
+            context = mapped.context(match.start(), match.end(), CONTEXT_WINDOW_SIZE)
+            confidence = self._score(context)
+            if confidence > 0.:
+                results.append(ScanResult(
+                    file_context=file_context, pii_type=self.pii_type, matched_value=match.group(0).decode('ascii'),
+                    confidence_score=confidence, scanner_source=self.name,
+                    validation_status=ValidationStatus.NOT_APPLICABLE, context=context,
+                    location=f"附近 (byte ~{match.start()})",
+                    offset=match.start()
                 ))
         return results
\ No newline at end of file
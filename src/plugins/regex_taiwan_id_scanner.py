@@ -5,14 +5,17 @@ RegexTaiwanIdScanner 插件
 並結合驗證演算法來大幅提升準確率。
 """
 
-import re
-from typing import ClassVar
+from typing import ClassVar, TYPE_CHECKING
 
 # 從專案的其他部分匯入我們需要的工具和資料結構
 from src.shared_data_model import FileContext, ScanReport, ScanResult, ValidationStatus
 from src.plugins.base import ScannerPlugin
+from src.regex_backend import compile_pattern
 from src.validators import is_valid_taiwan_id # <-- 匯入我們剛剛建立的驗證器
 
+if TYPE_CHECKING:
+    from src.parsers.mapped_text import MappedText
+
 # 定義常數，提高可讀性
 CONTEXT_WINDOW_SIZE = 10
 _TAIWAN_ID_REGEX_PATTERN = r'\b[A-Z][12]\d{8}\b'
@@ -24,13 +27,17 @@ class RegexTaiwanIdScanner(ScannerPlugin):
     """
     # 1. 遵循契約：定義 pii_type
     pii_type: ClassVar[str] = "TAIWAN_ID_CARD"
+    cost: ClassVar[int] = 2  # 檢查碼驗證
+    min_digits: ClassVar[int] = 9
 
     def __init__(self, **kwargs):
         """
         初始化時，預先編譯好 Regex 以提升效能。
         """
         super().__init__(**kwargs)
-        self.regex = re.compile(_TAIWAN_ID_REGEX_PATTERN)
+        self.regex = compile_pattern(_TAIWAN_ID_REGEX_PATTERN)
+        # 位元組版本：供大型檔案只含 ASCII 的分段在 mmap 緩衝區上直接掃描
+        self.bytes_regex = compile_pattern(_TAIWAN_ID_REGEX_PATTERN.encode('ascii'))
 
     def scan(self, text: str, file_context: FileContext) -> ScanReport:
         """
@@ -70,8 +77,31 @@ class RegexTaiwanIdScanner(ScannerPlugin):
                 scanner_source=self.name,
                 validation_status=validation_status,
                 context=context,
-                location=f"附近 (char ~{start_index})"
+                location=f"附近 (char ~{start_index})",
+                offset=start_index
             )
             results.append(result)
 
+        return results
+
+    def scan_ascii(self, mapped: "MappedText", start: int, end: int, file_context: FileContext) -> ScanReport:
+        """
+        大型檔案只含 ASCII 的分段：直接在映射緩衝區上以位元組比對，
+        只有通過檢查碼驗證的匹配才會解碼上下文。
+        """
+        results: ScanReport = []
+        for match in self.bytes_regex.finditer(mapped.buffer, start, end):
+            matched_text = match.group(0).decode('ascii')
+            if not is_valid_taiwan_id(matched_text): continue
+            results.append(ScanResult(
+                file_context=file_context,
+                pii_type=self.pii_type,
+                matched_value=matched_text,
+                confidence_score=1.0,
+                scanner_source=self.name,
+                validation_status=ValidationStatus.VALID,
+                context=mapped.context(match.start(), match.end(), CONTEXT_WINDOW_SIZE),
+                location=f"附近 (byte ~{match.start()})",
+                offset=match.start()
+            ))
         return results
\ No newline at end of file
@@ -0,0 +1,71 @@
+# src/prioritizer.py
+"""
+依風險排定掃描順序 (--prioritize / --time-budget)
+
+目錄走訪的順序與風險無關：有期限的緊急掃描可能把時間花在 .css 上，uploads/members.xlsx 卻排在最後。
+只用走訪時已取得的資訊 (路徑與 stat) 為每個檔案評分，分數高的先分派：
+- 副檔名：試算表、CSV、SQL 傾印最高，其次是 Word、PDF、純文字；樣式表與壓縮後的程式碼最低。
+- 目錄與檔名：含 upload、backup、export、member、會員、人事等字詞者加分；node_modules、assets 等減分。
+- 大小：空檔不可能含個資；1KB 到 1MB 之間隨大小加分，過大的檔案處理時間長，略為減分。
+- 修改時間：近 30 天、近一年修改的檔案加分。
+同分時維持走訪順序。
+"""
+import math
+import pathlib
+import re
+import time
+from typing import Iterable, Mapping, Optional
+
+from src.manifest import FileStat
+
+EXTENSION_SCORES = {
+    '.xlsx': 10.0, '.xls': 10.0, '.csv': 10.0, '.tsv': 10.0, '.sql': 10.0, '.xlsm': 9.0, '.ods': 9.0,
+    '.docx': 8.0, '.doc': 8.0, '.odt': 7.0, '.pdf': 6.0, '.txt': 5.0, '.json': 4.0, '.xml': 4.0,
+    '.log': 3.0, '.html': 3.0, '.htm': 3.0, '.eml': 6.0, '.js': 1.0, '.svg': 0.5, '.css': 0.0, '.map': 0.0,
+}
+DEFAULT_EXTENSION_SCORE = 2.0
+# 壓縮後的程式碼：多段副檔名，以檔名結尾比對
+BUNDLE_SUFFIXES = ('.min.js', '.min.mjs', '.min.css')
+
+_KEYWORDS = ('upload', 'backup', 'bak', 'export', 'dump', 'member', 'customer', 'client', 'user', 'account', 'staff',
+             'employee', 'hr', 'personnel', 'payroll', 'patient', 'student', 'contact', 'archive')
+# 英文字詞需要完整出現 (uploads、user_data 可以，chrome 中的 hr 不算)；中文直接比對子字串
+_KEYWORD_PATTERN = re.compile(rf"(?:^|[^a-z])(?:{'|'.join(_KEYWORDS)})s?(?:[^a-z]|$)")
+_CJK_KEYWORDS = ('上傳', '備份', '匯出', '會員', '客戶', '人事', '員工', '個資', '病歷', '學生', '薪資', '名冊', '通訊錄')
+_NOISE_DIRECTORIES = frozenset({'node_modules', 'vendor', 'static', 'assets', 'dist', 'build', '.git', '__pycache__', 'cache', 'fonts', 'images'})
+DIRECTORY_SCORE = 4.0
+FILE_NAME_SCORE = 2.0
+NOISE_PENALTY = 3.0
+LARGE_FILE_BYTES = 256 * 1024 * 1024
+_DAY_NS = 86_400 * 10**9
+
+
+def _has_keyword(name: str) -> bool:
+    name = name.lower()
+    return _KEYWORD_PATTERN.search(name) is not None or any(keyword in name for keyword in _CJK_KEYWORDS)
+
+
+def priority_score(file_path: pathlib.Path, stat: Optional[FileStat], root: pathlib.Path, now_ns: int) -> float:
+    name = file_path.name.lower()
+    score = 0.0 if name.endswith(BUNDLE_SUFFIXES) else EXTENSION_SCORES.get(file_path.suffix.lower(), DEFAULT_EXTENSION_SCORE)
+    try: directories = file_path.relative_to(root).parent.parts
+    except ValueError: directories = file_path.parent.parts
+    if any(_has_keyword(part) for part in directories): score += DIRECTORY_SCORE
+    if _has_keyword(file_path.stem): score += FILE_NAME_SCORE
+    if any(part.lower() in _NOISE_DIRECTORIES for part in directories): score -= NOISE_PENALTY
+    if stat is not None:
+        size, mtime_ns = stat
+        if size == 0: return score - 10.0
+        score += min(3.0, max(0.0, math.log10(size / 1024))) if size < LARGE_FILE_BYTES else 1.0
+        age_days = (now_ns - mtime_ns) / _DAY_NS
+        if age_days < 30: score += 2.0
+        elif age_days < 365: score += 1.0
+    return score
+
+
+def prioritize(files: Iterable[pathlib.Path], file_stats: Mapping[pathlib.Path, FileStat], root: pathlib.Path) -> list[pathlib.Path]:
+    """依分數由高到低排列 (排序穩定，同分時維持原本的順序)。"""
+    now_ns = time.time_ns()
+    scored = [(priority_score(file_path, file_stats.get(file_path), root, now_ns), file_path) for file_path in files]
+    scored.sort(key=lambda item: -item[0])
+    return [file_path for _, file_path in scored]
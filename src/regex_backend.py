@@ -0,0 +1,490 @@
+# src/regex_backend.py
+"""
+可替換的正規表示式引擎
+
+插件以 compile_pattern() 取代 re.compile()，取得的 BackendPattern 介面與 re.Pattern 相同 (finditer / search / ...)。
+- 安裝了 RE2 的 Python 綁定 (google-re2 或 pyre2，模組名稱皆為 re2) 時，能以 RE2 表達的樣式改用 RE2 執行；
+  RE2 保證線性時間，不會因惡意或異常輸入而災難性回溯。
+- 樣式開頭或結尾的邊界條件 (後顧否定 (?<!X)、前瞻否定 (?!X)、Unicode 版的 \\b) 是 RE2 無法表達的常見語法：
+  去掉邊界後的主體交給 RE2 找出候選起點，開頭的邊界以 Python 檢查，再由 re 在候選起點錨定比對確認，
+  結果與 re 完全相同，且不會在每個起點重試整個樣式 (災難性回溯的來源)。
+- 其餘 RE2 不支援的語法 (樣式中間的前後查找、反向參照等) 與未安裝時，一律使用 re。
+- 轉換後的樣式必須在內建語料 (加上呼叫端提供的樣本) 上與 re 產生完全相同的比對結果才會被採用，否則退回 re。
+
+Python 的 \\d \\w \\s 在 str 樣式中是 Unicode 語意，RE2 則只認 ASCII，因此轉換時改寫為等價的 Unicode 屬性類別。
+Hyperscan 只回報比對結束位置、不支援前後查找與擷取群組，無法在不改變插件結果的前提下取代 re，因此未納入。
+
+命令列工具 (不需要安裝 RE2 也能執行 re 的部分)：
+    python -m src.regex_backend compare <檔案或目錄...>    比對所有插件樣式在語料上的結果是否與 re 完全相同
+    python -m src.regex_backend benchmark [檔案或目錄...]  量測吞吐量與病態輸入下的最差延遲
+"""
+import argparse
+import logging
+import os
+import pathlib
+import re
+import sys
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Union
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+BACKEND_AUTO = "auto"
+BACKEND_RE = "re"
+BACKEND_RE2 = "re2"
+BACKEND_CHOICES = (BACKEND_AUTO, BACKEND_RE, BACKEND_RE2)
+BACKEND_ENV_VAR = "PII_SCANNER_REGEX_BACKEND"
+
+_default_backend = os.environ.get(BACKEND_ENV_VAR, BACKEND_AUTO)
+
+AnyPattern = Union[str, bytes]
+
+
+class UnsupportedPattern(ValueError):
+    """樣式使用了 RE2 無法等價表達的語法。"""
+
+
+def set_default_backend(name: str):
+    """設定之後 compile_pattern() 預設使用的引擎 (auto / re / re2)。"""
+    global _default_backend
+    if name not in BACKEND_CHOICES: raise ValueError(f"未知的 Regex 引擎: {name}，可用: {', '.join(BACKEND_CHOICES)}")
+    if name == BACKEND_RE2 and re2 is None: raise ValueError("未安裝 RE2 的 Python 綁定 (pip install google-re2)。")
+    _default_backend = name
+    os.environ[BACKEND_ENV_VAR] = name  # 讓之後建立的工作進程沿用相同設定
+
+
+def available_backends() -> list[str]:
+    return [BACKEND_RE] + ([BACKEND_RE2] if re2 is not None else [])
+
+
+# --- re 語法 → RE2 語法 ---
+# Python str 樣式的 \d \w \s 為 Unicode 語意：\d = Nd、\w = str.isalnum() 或底線、\s = str.isspace()
+_UNICODE_CLASS_BODY = {'d': r'\p{Nd}', 'w': r'\p{L}\p{N}_', 's': r'\t\n\x0b\f\r\x1c-\x1f\x85\p{Z}'}
+# bytes 樣式為 ASCII 語意，只有 \s 與 RE2 不同 (RE2 不含 \v)
+_BYTES_CLASS_BODY = {'s': r'\t\n\x0b\f\r\x20'}
+_INLINE_FLAGS = {'i': re.IGNORECASE, 's': re.DOTALL, 'm': re.MULTILINE, 'x': re.VERBOSE}
+# re 忽略大小寫時 İ (U+0130) 與 ı (U+0131) 也算是 i，RE2 則否；含有 i 的字元類別與字面 i 需補上這兩個字元
+_TURKISH_I = r'\x{130}\x{131}'
+# 樣式開頭的 \b 或 (?<!X)、結尾的 \b 或 (?!X)；X 為單一字元、跳脫序列或字元類別
+_LOOKAROUND_ATOM = r'(?:\\.|\[\^?\]?(?:\\.|[^\]\\])*\]|[^\\()\[\]|.])'
+_LEADING_ASSERTION = re.compile(rf'\\b|\(\?<!{_LOOKAROUND_ATOM}\)')
+_TRAILING_ASSERTION = re.compile(rf'(?<!\\)(?:\\b|\(\?!({_LOOKAROUND_ATOM})\))$')
+# 結尾 \b 之前一定是字詞字元 (例如 [A-Z]{2,}、\d{8}) 時，\b 等同 (?!\w)
+_WORD_ATOM_END = re.compile(r'(?:\\[dw]|\[(?:[A-Za-z0-9_](?:-[A-Za-z0-9_])?)+\])(?:\+|\{[1-9]\d*(?:,\d*)?\})?$')
+
+
+def to_re2_syntax(pattern: AnyPattern, flags: int = 0) -> str:
+    """
+    把 re 樣式改寫為語意相同的 RE2 樣式 (以 str 回傳；bytes 樣式以 Latin-1 對應)。
+
+    Raises:
+        UnsupportedPattern: 樣式含有 RE2 無法等價表達的語法。
+    """
+    is_bytes = isinstance(pattern, bytes)
+    source = pattern.decode('latin-1') if is_bytes else pattern
+    unicode_mode = not is_bytes and not flags & re.ASCII
+    class_body = _UNICODE_CLASS_BODY if unicode_mode else _BYTES_CLASS_BODY
+    verbose = bool(flags & re.VERBOSE)
+    fold_i = unicode_mode and bool(flags & re.IGNORECASE)
+    if flags & ~(re.IGNORECASE | re.DOTALL | re.MULTILINE | re.VERBOSE | re.UNICODE | re.ASCII):
+        raise UnsupportedPattern("不支援的旗標。")
+
+    out: list[str] = []
+    in_class = False; class_start = 0; class_out = 0
+    i = 0; n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch == '\\':
+            if i + 1 >= n: raise UnsupportedPattern("樣式以反斜線結尾。")
+            esc = source[i + 1]; i += 2
+            if esc in 'dws' and esc in class_body:
+                out.append(class_body[esc] if in_class else f"[{class_body[esc]}]")
+            elif esc in 'DWS' and esc.lower() in class_body:
+                if in_class: raise UnsupportedPattern(f"字元類別中的 \\{esc}")
+                out.append(f"[^{class_body[esc.lower()]}]")
+            elif esc in 'bB':
+                if in_class and esc == 'b': out.append(r'\x08')
+                elif unicode_mode: raise UnsupportedPattern("Unicode 版的字詞邊界 \\b")
+                else: out.append('\\' + esc)
+            elif esc == 'Z': out.append(r'\z')
+            elif esc.isdigit() and esc != '0': raise UnsupportedPattern("反向參照")
+            elif esc in 'uU':
+                width = 4 if esc == 'u' else 8
+                out.append(f"\\x{{{source[i:i + width]}}}"); i += width
+            elif esc in 'Ng': raise UnsupportedPattern(f"\\{esc}")
+            else: out.append('\\' + esc)
+            continue
+        if in_class:
+            # 類別開頭的 ] 是字面字元
+            if ch == ']' and i > class_start:
+                in_class = False
+                if fold_i and any(re.fullmatch(f'[{source[class_start:i]}]', letter) for letter in 'iI'):
+                    out.insert(class_out + (source[class_start] == ']'), _TURKISH_I)
+            elif ch == '[' and source[i + 1:i + 2] == ':': raise UnsupportedPattern("POSIX 字元類別語法")
+            out.append(ch); i += 1
+            continue
+        if verbose and ch in ' \t\n\r\f\v': i += 1; continue
+        if verbose and ch == '#':
+            while i < n and source[i] != '\n': i += 1
+            continue
+        if ch == '[':
+            in_class = True; out.append(ch); i += 1
+            if source[i:i + 1] == '^': out.append('^'); i += 1
+            class_start = i; class_out = len(out)
+            continue
+        if ch == '(' and source[i + 1:i + 2] == '?':
+            rest = source[i + 2:]
+            if rest.startswith(':'): out.append(ch); i += 1; continue
+            if rest.startswith('P<'):
+                # 群組名稱原樣保留 (不做 \d 或 i 的改寫)
+                name_end = source.find('>', i)
+                if name_end == -1: raise UnsupportedPattern("未結束的群組名稱")
+                out.append(source[i:name_end + 1]); i = name_end + 1; continue
+            flag_match = re.match(r'([a-zA-Z]+)\)', rest)
+            if flag_match and set(flag_match.group(1)) <= set(_INLINE_FLAGS):
+                if 'x' in flag_match.group(1): raise UnsupportedPattern("樣式內的 (?x) 旗標")
+                out.append(f"(?{flag_match.group(1)})"); i += 3 + len(flag_match.group(1))
+                fold_i = fold_i or (unicode_mode and 'i' in flag_match.group(1))
+                continue
+            raise UnsupportedPattern(f"群組語法 (?{rest[:3]}")
+        if ch in '*+?}' and source[i + 1:i + 2] == '+': raise UnsupportedPattern("佔有型量詞")
+        if ch == '{' and source[i + 1:i + 2] == ',': out.append('{0'); i += 1; continue
+        if ch == '$' and not flags & re.MULTILINE: raise UnsupportedPattern("$ 在 re 中可比對結尾換行之前的位置")
+        out.append(f"[{ch}{_TURKISH_I}]" if fold_i and ch in 'iI' else ch); i += 1
+    if in_class: raise UnsupportedPattern("未結束的字元類別")
+
+    prefix = ''.join(letter for letter, flag in (('i', re.IGNORECASE), ('s', re.DOTALL), ('m', re.MULTILINE)) if flags & flag)
+    translated = ''.join(out)
+    return f"(?{prefix}){translated}" if prefix else translated
+
+
+def _compile_re2(pattern: AnyPattern, flags: int):
+    translated = to_re2_syntax(pattern, flags)
+    if isinstance(pattern, bytes):
+        translated = translated.encode('latin-1')
+        if hasattr(re2, 'Options'):
+            # google-re2：bytes 樣式以 Latin-1 模式比對，才能在任意位元組 (含無效 UTF-8) 上與 re 一致
+            options = re2.Options(); options.encoding = re2.Options.Encoding.LATIN1
+            return re2.compile(translated, options)
+    return re2.compile(translated)
+
+
+def _has_top_level_branch(source: str, verbose: bool) -> bool:
+    """樣式最外層是否有 | (此時開頭的邊界只屬於第一個選項)。"""
+    depth = 0; in_class = False; i = 0
+    while i < len(source):
+        ch = source[i]
+        if ch == '\\': i += 2; continue
+        if in_class:
+            if ch == ']': in_class = False
+        elif verbose and ch == '#':
+            while i < len(source) and source[i] != '\n': i += 1
+            continue
+        elif ch == '[':
+            in_class = True
+            if source[i + 1:i + 2] == '^': i += 1
+            if source[i + 1:i + 2] == ']': i += 1
+        elif ch == '(': depth += 1
+        elif ch == ')': depth -= 1
+        elif ch == '|' and depth == 0: return True
+        i += 1
+    return False
+
+
+def _negated_class(atom: str) -> str:
+    """單一字元的前瞻否定 (?!X) 改為消耗下一個字元的類別：不屬於 X 的字元。"""
+    if atom.startswith('[^'): return '[' + atom[2:]
+    if atom.startswith('['): return '[^' + atom[1:]
+    return f'[^{atom}]'
+
+
+class _Utf8Offsets:
+    """str 與其 UTF-8 編碼之間的位置換算。查詢的位置必須遞增 (finditer 由前往後掃描)，整段掃描的換算成本與文字長度成正比。"""
+
+    def __init__(self, text: str, data: bytes):
+        self.text = text; self.data = data; self.char = 0; self.byte = 0
+
+    def to_byte(self, char_pos: int) -> int:
+        self.byte += len(self.text[self.char:char_pos].encode('utf-8')); self.char = char_pos
+        return self.byte
+
+    def to_char(self, byte_pos: int) -> int:
+        self.char += len(self.data[self.byte:byte_pos].decode('utf-8')); self.byte = byte_pos
+        return self.char
+
+
+class _GuardedPattern:
+    """
+    去掉開頭與結尾邊界的主體由 RE2 找出候選起點 (prefilter)，re 只在候選起點錨定比對確認 (reference.match)。
+    prefilter 在樣式能比對的每個起點都能比對 (邊界只會排除結果)，因此依序確認候選起點得到的結果與 re.finditer 相同；
+    re 不必在每個位置重試整個樣式，只在主體已經成立的起點執行一次。
+    開頭的邊界條件 (boundary) 以 re 的零寬度搜尋直接跳到下一個符合的位置，避免在長串不符合邊界的字元上反覆呼叫 RE2。
+    """
+
+    def __init__(self, reference: re.Pattern, prefilter: Any, boundary: Optional[re.Pattern]):
+        self.reference = reference; self.prefilter = prefilter; self.boundary = boundary
+
+    def finditer(self, string, pos: int = 0, endpos: Optional[int] = None) -> Iterator[re.Match]:
+        end = len(string) if endpos is None else min(endpos, len(string))
+        offsets = None
+        if isinstance(string, str):
+            # RE2 每次搜尋 str 都會重新編碼整段文字：這裡只編碼一次，以 UTF-8 位元組樣式搜尋再換算位置
+            try: view = string[:end].encode('utf-8')
+            except UnicodeEncodeError:
+                yield from self.reference.finditer(string, pos, end)
+                return
+            offsets = _Utf8Offsets(string, view)
+        else:
+            # RE2 的 \z 只認整個字串的結尾：有 endpos 時改給它到 endpos 為止的前綴 (位移不變；memoryview 不複製)
+            view = string if end >= len(string) else memoryview(string)[:end]
+        try:
+            while pos <= end:
+                if self.boundary is not None:
+                    hit = self.boundary.search(string, pos, end)
+                    if hit is None: return
+                    pos = hit.start()
+                candidate = self.prefilter.search(view, offsets.to_byte(pos) if offsets else pos)
+                if candidate is None: return
+                start = offsets.to_char(candidate.start()) if offsets else candidate.start()
+                boundary_ok = start == pos or self.boundary is None or self.boundary.match(string, start, end)
+                match = self.reference.match(string, start, end) if boundary_ok else None
+                if match is None: pos = start + 1; continue
+                yield match
+                pos = match.end() if match.end() > start else start + 1
+        finally:
+            if isinstance(view, memoryview): view.release()
+
+    def search(self, string, pos: int = 0, endpos: Optional[int] = None) -> Optional[re.Match]:
+        return next(self.finditer(string, pos, endpos), None)
+
+    def match(self, string, *args): return self.reference.match(string, *args)
+    def fullmatch(self, string, *args): return self.reference.fullmatch(string, *args)
+
+    def findall(self, string, *args) -> list:
+        groups = self.reference.groups
+        return [match.group(0) if groups == 0 else match.group(1) if groups == 1 else match.groups()
+                for match in self.finditer(string, *args)]
+
+
+def _compile_guarded(pattern: AnyPattern, flags: int, reference: re.Pattern) -> _GuardedPattern:
+    """
+    把開頭與結尾的邊界條件從樣式中拿掉，主體以 RE2 編譯。
+
+    Raises:
+        UnsupportedPattern: 樣式沒有可拿掉的邊界，或主體仍含有 RE2 無法表達的語法。
+    """
+    is_bytes = isinstance(pattern, bytes)
+    source = pattern.decode('latin-1') if is_bytes else pattern
+    verbose = bool(flags & re.VERBOSE)
+    core = source.strip() if verbose else source
+    leading = _LEADING_ASSERTION.match(core)
+    if leading: core = core[leading.end():]
+    trailing = _TRAILING_ASSERTION.search(core)
+    suffix = ''
+    if trailing:
+        core = core[:trailing.start()].rstrip() if verbose else core[:trailing.start()]
+        # 結尾的前瞻改為消耗下一個字元 (或字串結尾)：在樣式最後，兩者對是否比對成功的影響相同
+        if trailing.group(1): suffix = f'(?:{_negated_class(trailing.group(1))}|\\z)'
+        elif _WORD_ATOM_END.search(core): suffix = r'(?:\W|\z)'
+    if not leading and not trailing: raise UnsupportedPattern("樣式中間的前後查找")
+    prefilter_source = core + suffix
+    if is_bytes: prefilter = _compile_re2(prefilter_source.encode('latin-1'), flags)
+    else: prefilter = re2.compile(to_re2_syntax(prefilter_source, flags).encode('utf-8'))   # 比對 finditer 編碼好的 UTF-8 位元組
+    boundary = None
+    if leading and not _has_top_level_branch(core, verbose):
+        boundary_source = leading.group(0)
+        boundary = re.compile(boundary_source.encode('latin-1') if is_bytes else boundary_source, flags & ~re.VERBOSE)
+    return _GuardedPattern(reference, prefilter, boundary)
+
+
+def _compile_candidate(pattern: AnyPattern, flags: int, reference: re.Pattern) -> Any:
+    """整個樣式能以 RE2 表達時直接使用 RE2，否則嘗試拿掉邊界條件的 _GuardedPattern。"""
+    try: return _compile_re2(pattern, flags)
+    except UnsupportedPattern as direct:
+        try: return _compile_guarded(pattern, flags, reference)
+        except UnsupportedPattern: raise direct from None
+
+
+# --- 相容性驗證 ---
+_COMPAT_CORPUS = [
+    "聯絡人：王小明，電話 02-2345-6789，手機 0912-345-678，Email: Ming.Wang+test@Example.COM.tw。",
+    "身分證 A123456789、B287654321；護照號碼 312345678；健保卡 000012345678；卡號 4111 1111 1111 1111、5500-0000-0000-0004。",
+    "台北市中正區重慶南路一段122號3樓之1、臺中市西屯區台灣大道三段99號、高雄市苓雅區四維三路2號10樓301室。",
+    "全形數字 ０９１２３４５６７８ 與阿拉伯數字 ٠١٢٣٤٥٦٧٨٩、上標²³、羅馬數字Ⅻ、中文數字一二三。",
+    "空白\u3000全形\xa0不換行\u2028行分隔\u200b零寬\x1c\x1f\x0b\x85；組合字元 e\u0301 與 K\u212a ſ İ ß。",
+    "土耳其文 ı 與 İ：yıldız@örnek.com.tr、ADMİN@EXAMPLE.COM、info@ıstanbul.ıo、Iı_9@x.İT。",
+    "a@b.co, x_y@sub.domain.org; not-an-email@, @missing.com, trailing.dot.@x.y, 1234567890123456789012",
+    "\t\n  mixed\r\nlines\fwith\vcontrol 0800-000-123 (02)2345-6789 +886 2 2345 6789 +886-912-345-678\n",
+    "😀 emoji 𝟘𝟙𝟚 mathematical digits; Ａ１２３４５６７８９ full-width id; a1b2c3_d4 _under_score_",
+]
+
+
+def _match_signature(compiled: Any, text: AnyPattern) -> list[tuple]:
+    return [(m.start(), m.end(), m.group(0)) for m in compiled.finditer(text)]
+
+
+def is_equivalent(reference: re.Pattern, candidate: Any, samples: Iterable[AnyPattern] = ()) -> bool:
+    """在語料上比較兩個已編譯的樣式是否產生完全相同的比對 (起點、終點、內容)。"""
+    is_bytes = isinstance(reference.pattern, bytes)
+    corpus = [text.encode('utf-8') if is_bytes else text for text in _COMPAT_CORPUS]
+    corpus += [sample for sample in samples if isinstance(sample, bytes) == is_bytes]
+    corpus.append(b''.join(corpus) if is_bytes else ''.join(corpus))
+    try: return all(_match_signature(reference, text) == _match_signature(candidate, text) for text in corpus)
+    except Exception as e:
+        logging.debug(f"RE2 相容性驗證時發生錯誤: {e}")
+        return False
+
+
+class BackendPattern:
+    """
+    re.Pattern 的替代品：比對由選定的引擎執行，`reference` 永遠保留 re 編譯的版本供驗證與基準測試使用。
+    可被 pickle (傳給工作進程時依原始樣式重新編譯)。
+    """
+    __slots__ = ('pattern', 'flags', 'engine', 'reference', '_compiled', '_requested')
+
+    def __init__(self, pattern: AnyPattern, flags: int, engine: str, reference: re.Pattern, compiled: Any, requested: str):
+        self.pattern = pattern; self.flags = flags; self.engine = engine
+        self.reference = reference; self._compiled = compiled; self._requested = requested
+
+    def __reduce__(self): return (compile_pattern, (self.pattern, self.flags, self._requested))
+    def __repr__(self) -> str: return f"BackendPattern({self.pattern!r}, engine={self.engine!r})"
+
+    def finditer(self, string, *args): return self._compiled.finditer(string, *args)
+    def search(self, string, *args): return self._compiled.search(string, *args)
+    def match(self, string, *args): return self._compiled.match(string, *args)
+    def fullmatch(self, string, *args): return self._compiled.fullmatch(string, *args)
+    def findall(self, string, *args): return self._compiled.findall(string, *args)
+
+
+def compile_pattern(pattern: AnyPattern, flags: int = 0, backend: Optional[str] = None,
+                    samples: Sequence[AnyPattern] = ()) -> BackendPattern:
+    """
+    依設定的引擎編譯樣式。RE2 無法等價表達或驗證不一致時自動退回 re。
+
+    Args:
+        backend: auto / re / re2；None 表示使用 set_default_backend() 的設定。
+        samples: 額外的驗證樣本，與內建語料一起確認 RE2 與 re 的結果一致。
+    """
+    requested = backend or _default_backend
+    reference = re.compile(pattern, flags)
+    if requested == BACKEND_RE or re2 is None:
+        return BackendPattern(pattern, flags, BACKEND_RE, reference, reference, requested)
+    try:
+        candidate = _compile_candidate(pattern, flags, reference)
+    except UnsupportedPattern as e:
+        logging.debug(f"樣式 {pattern!r:.60} 使用 re：RE2 不支援 {e}。")
+        return BackendPattern(pattern, flags, BACKEND_RE, reference, reference, requested)
+    except Exception as e:
+        logging.debug(f"樣式 {pattern!r:.60} 使用 re：RE2 編譯失敗 ({e})。")
+        return BackendPattern(pattern, flags, BACKEND_RE, reference, reference, requested)
+    if not is_equivalent(reference, candidate, samples):
+        logging.warning(f"樣式 {pattern!r:.60} 在 RE2 上的比對結果與 re 不一致，改用 re。")
+        return BackendPattern(pattern, flags, BACKEND_RE, reference, reference, requested)
+    return BackendPattern(pattern, flags, BACKEND_RE2, reference, candidate, requested)
+
+
+# --- 命令列：相容性比對與基準測試 ---
+def _plugin_patterns() -> list[tuple[str, BackendPattern]]:
+    from src.plugins.manager import PluginManager
+    plugins_path = pathlib.Path(__file__).parent / "plugins"
+    manager = PluginManager(plugin_dir=plugins_path, dependencies={'nlp_model': None})
+    patterns = []
+    for plugin in manager.get_all():
+        for attribute, value in vars(plugin).items():
+            if isinstance(value, BackendPattern): patterns.append((f"{plugin.name}.{attribute}", value))
+    return patterns
+
+
+def _load_corpus(paths: Sequence[pathlib.Path]) -> list[str]:
+    texts = []
+    for root in paths:
+        for path in ([root] if root.is_file() else sorted(p for p in root.rglob('*') if p.is_file())):
+            try: texts.append(path.read_bytes().decode('utf-8', errors='replace'))
+            except OSError as e: logging.warning(f"無法讀取 '{path}': {e}")
+    return texts
+
+
+# 病態輸入：(名稱, 產生長度約為 n 的字串)。針對會讓回溯式引擎退化的樣式設計
+PATHOLOGICAL_INPUTS: list[tuple[str, Callable[[int], str]]] = [
+    ("市×n", lambda n: "市" * n),
+    ("台+路 無號", lambda n: "台" + "路" * n),
+    ("數字+空白", lambda n: "1 " * (n // 2)),
+    ("連續數字", lambda n: "1" * n),
+    ("email 無頂級網域", lambda n: "a@" + "a." * (n // 2)),
+    ("email 多個 @", lambda n: "a" * (n // 2) + "@" * (n // 2)),
+    ("+886 重複", lambda n: "+886 " * (n // 5)),
+]
+
+
+def _time_finditer(compiled: Any, text: AnyPattern) -> float:
+    started = time.perf_counter()
+    for _ in compiled.finditer(text): pass
+    return time.perf_counter() - started
+
+
+def _engines(pattern: BackendPattern) -> list[tuple[str, Any]]:
+    engines = [(BACKEND_RE, pattern.reference)]
+    if pattern.engine == BACKEND_RE2: engines.append((BACKEND_RE2, pattern._compiled))
+    return engines
+
+
+def run_compare(paths: Sequence[pathlib.Path]) -> int:
+    corpus = _load_corpus(paths)
+    mismatches = 0
+    for name, pattern in _plugin_patterns():
+        if pattern.engine != BACKEND_RE2:
+            print(f"{name:45s} re   (RE2 不適用)"); continue
+        is_bytes = isinstance(pattern.pattern, bytes)
+        texts = [text.encode('utf-8') if is_bytes else text for text in corpus]
+        bad = [i for i, text in enumerate(texts) if _match_signature(pattern.reference, text) != _match_signature(pattern._compiled, text)]
+        mismatches += len(bad)
+        print(f"{name:45s} re2  {'一致' if not bad else f'{len(bad)} 份語料不一致'}")
+    return 1 if mismatches else 0
+
+
+def run_benchmark(paths: Sequence[pathlib.Path], sizes: Sequence[int] = (250, 1_000)) -> int:
+    corpus = "\n".join(_load_corpus(paths)) if paths else "\n".join(_COMPAT_CORPUS) * 2000
+    corpus_bytes = corpus.encode('utf-8')
+    print(f"語料大小: {len(corpus_bytes) / 1024 / 1024:.1f} MB；可用引擎: {', '.join(available_backends())}")
+    for name, pattern in _plugin_patterns():
+        is_bytes = isinstance(pattern.pattern, bytes)
+        text = corpus_bytes if is_bytes else corpus
+        for engine, compiled in _engines(pattern):
+            seconds = _time_finditer(compiled, text)
+            worst = []
+            for label, generate in PATHOLOGICAL_INPUTS:
+                times = []
+                for size in sizes:
+                    sample = generate(size)
+                    times.append(_time_finditer(compiled, sample.encode('utf-8') if is_bytes else sample))
+                worst.append((times[-1], label, times))
+            _, slowest_label, slowest_times = max(worst)
+            growth = "、".join(f"n={size}: {t * 1000:.1f} ms" for size, t in zip(sizes, slowest_times))
+            print(f"{name:45s} {engine:4s} 吞吐量 {len(corpus_bytes) / 1024 / 1024 / max(seconds, 1e-9):8.1f} MB/s；"
+                  f"最差延遲 [{slowest_label}] {growth}", flush=True)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.regex_backend", description="Regex 引擎相容性比對與基準測試")
+    parser.add_argument("command", choices=["compare", "benchmark"])
+    parser.add_argument("paths", nargs="*", type=pathlib.Path, help="語料檔案或目錄。")
+    parser.add_argument("--backend", choices=BACKEND_CHOICES, default=BACKEND_AUTO)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1_000],
+                        help="病態輸入的長度 (字元數)。re 在部分樣式上為多項式時間，長度過大時可能需要數分鐘。")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+    set_default_backend(args.backend)
+    if args.command == "compare":
+        if not args.paths: parser.error("compare 需要至少一個語料檔案或目錄。")
+        return run_compare(args.paths)
+    return run_benchmark(args.paths, args.sizes)
+
+
+if __name__ == "__main__":
+    # 以 -m 執行時本檔案是 __main__，需改用插件所匯入的同一個模組，預設引擎與 BackendPattern 型別才會一致
+    from src.regex_backend import main as _module_main
+    sys.exit(_module_main())
@@ -0,0 +1,300 @@
+# src/report_writers.py
+"""
+報告輸出格式
+
+同一次掃描的結果只走訪一次，依序分批交給每個選定格式的寫出器：
+- xlsx：原本的 Excel 報告 (reporting.generate_report)，供人工檢視。單一工作表最多約 104 萬列，超出的部分不寫入並提示改用其他格式。
+- jsonl：每筆發現一行 JSON，邊走訪邊寫出；檔名以 .gz 結尾時以 gzip 壓縮。適合串流匯入 SIEM。
+- parquet：以 Arrow 欄式格式分批寫入 (需要 pyarrow)，個資類型、掃描來源、驗證狀態與檔案路徑採字典編碼，檔案小、讀取快，適合資料湖。
+
+jsonl 與 parquet 另在旁邊寫出 `<報告名稱>.files.<副檔名>` (檔案清單) 與差異掃描時的 `<報告名稱>.changes.<副檔名>`。
+所有檔案先寫入暫存檔，全部成功後才取代正式檔名，避免留下部分格式是新的、部分是舊的報告。
+"""
+import abc
+import gzip
+import json
+import logging
+import os
+import pathlib
+from typing import Any, ClassVar, Iterable, Optional, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from src.manifest import FindingChange
+from src.parsers.triage import describe as describe_triage
+from src.reporting import generate_report
+from src.result_filter import describe_suppressed
+from src.shared_data_model import FileContext, ScanReport, ScanResult
+from src.summary import ScanSummary
+
+FORMAT_XLSX = "xlsx"
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+# 格式 → 可辨識的副檔名 (第一個為預設)
+FORMAT_EXTENSIONS = {FORMAT_XLSX: (".xlsx",), FORMAT_JSONL: (".jsonl", ".jsonl.gz", ".ndjson"), FORMAT_PARQUET: (".parquet",)}
+REPORT_FORMATS = tuple(FORMAT_EXTENSIONS)
+
+EXCEL_MAX_ROWS = 1_048_575  # 工作表上限 1,048,576 列，扣除標題列
+_BATCH_ROWS = 65_536
+SUMMARY_SUFFIX = ".summary.json"
+SAMPLE_SUFFIX = ".sample.json"
+
+
+def format_from_path(path: pathlib.Path) -> Optional[str]:
+    name = path.name.lower()
+    for report_format, extensions in FORMAT_EXTENSIONS.items():
+        if any(name.endswith(extension) for extension in extensions): return report_format
+    return None
+
+
+def resolve_formats(output_path: pathlib.Path, requested: Optional[Sequence[str]]) -> tuple[str, ...]:
+    """--format 未指定時依輸出檔的副檔名決定，無法辨識時沿用 Excel。"""
+    if requested: return tuple(dict.fromkeys(requested))
+    return (format_from_path(output_path) or FORMAT_XLSX,)
+
+
+def check_formats(formats: Sequence[str]):
+    """確認選定格式所需的套件都已安裝，否則拋出 ValueError。"""
+    if FORMAT_PARQUET in formats and pa is None: raise ValueError("輸出 Parquet 需要安裝 pyarrow (pip install pyarrow)。")
+
+
+def _base_name(output_path: pathlib.Path) -> str:
+    own_format = format_from_path(output_path)
+    if not own_format: return output_path.name
+    extension = next(ext for ext in FORMAT_EXTENSIONS[own_format] if output_path.name.lower().endswith(ext))
+    return output_path.name[:-len(extension)]
+
+
+def output_paths(output_path: pathlib.Path, formats: Sequence[str]) -> dict[str, pathlib.Path]:
+    """副檔名相符的格式直接使用輸出路徑，其餘格式以相同名稱搭配各自的預設副檔名。"""
+    own_format = format_from_path(output_path)
+    return {report_format: output_path if report_format == own_format else output_path.with_name(_base_name(output_path) + FORMAT_EXTENSIONS[report_format][0])
+            for report_format in formats}
+
+
+def summary_path_for(output_path: pathlib.Path) -> pathlib.Path:
+    return output_path.with_name(_base_name(output_path) + SUMMARY_SUFFIX)
+
+
+def sample_path_for(output_path: pathlib.Path) -> pathlib.Path:
+    return output_path.with_name(_base_name(output_path) + SAMPLE_SUFFIX)
+
+
+def _temp_path(path: pathlib.Path) -> pathlib.Path:
+    # 保留副檔名，寫出函式庫才能依副檔名判斷格式
+    return path.with_name(f".tmp-{path.name}")
+
+
+def _companion_path(path: pathlib.Path, kind: str, report_format: str) -> pathlib.Path:
+    """report.jsonl.gz → report.files.jsonl.gz"""
+    extension = next((ext for ext in FORMAT_EXTENSIONS[report_format] if path.name.lower().endswith(ext)), FORMAT_EXTENSIONS[report_format][0])
+    return path.with_name(f"{path.name[:-len(extension)]}.{kind}{extension}")
+
+
+def _result_record(result: ScanResult) -> dict[str, Any]:
+    return {
+        'file_path': str(result.file_context.file_path), 'pii_type': result.pii_type, 'matched_value': result.matched_value,
+        'confidence_score': result.confidence_score, 'scanner_source': result.scanner_source,
+        'validation_status': result.validation_status.name, 'location': result.location, 'offset': result.offset,
+        'context': result.context, 'timestamp_utc': result.timestamp_utc.isoformat(),
+    }
+
+
+def _file_record(ctx: FileContext) -> dict[str, Any]:
+    return {
+        'file_path': str(ctx.file_path), 'mime_type': ctx.mime_type, 'file_size_bytes': ctx.file_size_bytes,
+        'status': ctx.status.name, 'encoding': ctx.encoding, 'triage': describe_triage(ctx.triage) if ctx.triage else None,
+        'suppressed': describe_suppressed(ctx.suppressed) or None, 'error_message': ctx.error_message,
+    }
+
+
+def _change_record(change: FindingChange) -> dict[str, Any]:
+    return {'change': change.change, 'pii_type': change.pii_type, 'value': change.value, 'file_path': str(change.file_path)}
+
+
+class ReportWriter(abc.ABC):
+    """寫出器的共同介面：write_results() 依序收到每一批結果，finish() 寫入其餘內容，commit() 取代正式檔名。"""
+    format: ClassVar[str]
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._outputs: list[tuple[pathlib.Path, pathlib.Path]] = [(_temp_path(path), path)]  # (暫存檔, 正式檔)
+
+    def _add_output(self, path: pathlib.Path) -> pathlib.Path:
+        self._outputs.append((_temp_path(path), path))
+        return _temp_path(path)
+
+    @abc.abstractmethod
+    def write_results(self, batch: ScanReport):
+        ...
+
+    @abc.abstractmethod
+    def finish(self, file_contexts: Sequence[FileContext], changes: Optional[Sequence[FindingChange]],
+               summary: Optional[ScanSummary] = None):
+        ...
+
+    def commit(self):
+        for temp_path, path in self._outputs:
+            if temp_path.exists(): os.replace(temp_path, path)
+
+    def discard(self):
+        for temp_path, _ in self._outputs:
+            try: temp_path.unlink()
+            except FileNotFoundError: pass
+
+
+class ExcelReportWriter(ReportWriter):
+    format = FORMAT_XLSX
+
+    def __init__(self, path: pathlib.Path):
+        super().__init__(path)
+        self._results: ScanReport = []
+        self._overflow = 0
+
+    def write_results(self, batch: ScanReport):
+        room = EXCEL_MAX_ROWS - len(self._results)
+        self._results.extend(batch[:room])
+        self._overflow += max(len(batch) - room, 0)
+
+    def finish(self, file_contexts: Sequence[FileContext], changes: Optional[Sequence[FindingChange]],
+               summary: Optional[ScanSummary] = None):
+        if self._overflow:
+            logging.warning(f"發現筆數超過 Excel 工作表上限，'{self.path.name}' 只寫入前 {EXCEL_MAX_ROWS} 筆，"
+                            f"其餘 {self._overflow} 筆請改用 --format jsonl 或 parquet 輸出完整結果 (摘要工作表仍涵蓋全部發現)。")
+        if not generate_report(self._results, self._outputs[0][0], file_contexts, changes, summary):
+            raise RuntimeError("Excel 報告產生失敗。")
+
+
+class JsonlReportWriter(ReportWriter):
+    format = FORMAT_JSONL
+
+    def __init__(self, path: pathlib.Path):
+        super().__init__(path)
+        self._encoder = json.JSONEncoder(ensure_ascii=False, check_circular=False, default=str)
+        self._file = self._open(self._outputs[0][0])
+
+    def _open(self, path: pathlib.Path):
+        if path.name.lower().endswith('.gz'): return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+        return open(path, 'w', encoding='utf-8', buffering=1024 * 1024)
+
+    def _write_lines(self, f, records: Iterable[dict]):
+        encode = self._encoder.encode
+        f.writelines(encode(record) + '\n' for record in records)
+
+    def write_results(self, batch: ScanReport):
+        self._write_lines(self._file, map(_result_record, batch))
+
+    def finish(self, file_contexts: Sequence[FileContext], changes: Optional[Sequence[FindingChange]],
+               summary: Optional[ScanSummary] = None):
+        self._file.close()
+        with self._open(self._add_output(_companion_path(self.path, 'files', self.format))) as f: self._write_lines(f, map(_file_record, file_contexts))
+        if changes is not None:
+            with self._open(self._add_output(_companion_path(self.path, 'changes', self.format))) as f: self._write_lines(f, map(_change_record, changes))
+
+    def discard(self):
+        self._file.close()
+        super().discard()
+
+
+class ParquetReportWriter(ReportWriter):
+    format = FORMAT_PARQUET
+    _COMPRESSION = "zstd"
+
+    def __init__(self, path: pathlib.Path):
+        if pa is None: raise RuntimeError("輸出 Parquet 需要安裝 pyarrow (pip install pyarrow)。")
+        super().__init__(path)
+        labels = pa.dictionary(pa.int32(), pa.string())
+        self._schema = pa.schema([
+            ('file_path', labels), ('pii_type', labels), ('matched_value', pa.string()), ('confidence_score', pa.float32()),
+            ('scanner_source', labels), ('validation_status', labels), ('location', pa.string()), ('offset', pa.int64()),
+            ('context', pa.string()), ('timestamp_utc', pa.timestamp('us', tz='UTC')),
+        ])
+        self._writer = pq.ParquetWriter(self._outputs[0][0], self._schema, compression=self._COMPRESSION)
+
+    @staticmethod
+    def _columns_to_table(columns: dict[str, list], schema) -> "pa.Table":
+        arrays = []
+        for column in schema:
+            if pa.types.is_dictionary(column.type): arrays.append(pa.array(columns[column.name], type=pa.string()).dictionary_encode())
+            else: arrays.append(pa.array(columns[column.name], type=column.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def write_results(self, batch: ScanReport):
+        if not batch: return
+        # 直接逐欄建立陣列，不經過每筆一個 dict；同一檔案的路徑字串只轉換一次
+        paths: dict[int, str] = {}
+        for result in batch:
+            if id(result.file_context) not in paths: paths[id(result.file_context)] = str(result.file_context.file_path)
+        columns = {
+            'file_path': [paths[id(result.file_context)] for result in batch],
+            'pii_type': [result.pii_type for result in batch],
+            'matched_value': [result.matched_value for result in batch],
+            'confidence_score': [result.confidence_score for result in batch],
+            'scanner_source': [result.scanner_source for result in batch],
+            'validation_status': [result.validation_status.name for result in batch],
+            'location': [result.location for result in batch],
+            'offset': [result.offset for result in batch],
+            'context': [result.context for result in batch],
+            'timestamp_utc': [result.timestamp_utc for result in batch],
+        }
+        self._writer.write_table(self._columns_to_table(columns, self._schema))
+
+    def _write_table(self, kind: str, records: list[dict], schema):
+        columns = {column.name: [record[column.name] for record in records] for column in schema}
+        pq.write_table(self._columns_to_table(columns, schema), self._add_output(_companion_path(self.path, kind, self.format)), compression=self._COMPRESSION)
+
+    def finish(self, file_contexts: Sequence[FileContext], changes: Optional[Sequence[FindingChange]],
+               summary: Optional[ScanSummary] = None):
+        self._writer.close()
+        labels = pa.dictionary(pa.int32(), pa.string())
+        self._write_table('files', [_file_record(ctx) for ctx in file_contexts], pa.schema([
+            ('file_path', pa.string()), ('mime_type', labels), ('file_size_bytes', pa.int64()), ('status', labels),
+            ('encoding', labels), ('triage', pa.string()), ('suppressed', pa.string()), ('error_message', pa.string()),
+        ]))
+        if changes is not None:
+            self._write_table('changes', [_change_record(change) for change in changes], pa.schema([
+                ('change', labels), ('pii_type', labels), ('value', pa.string()), ('file_path', labels),
+            ]))
+
+    def discard(self):
+        self._writer.close()
+        super().discard()
+
+
+_WRITERS: dict[str, type[ReportWriter]] = {writer.format: writer for writer in (ExcelReportWriter, JsonlReportWriter, ParquetReportWriter)}
+
+
+def generate_reports(scan_results: ScanReport, output_path: pathlib.Path, formats: Sequence[str] = (FORMAT_XLSX,),
+                     file_contexts: Optional[Sequence[FileContext]] = None, changes: Optional[Sequence[FindingChange]] = None,
+                     summary: Optional[ScanSummary] = None) -> bool:
+    """
+    以單次走訪產生所有選定格式的報告，回傳是否全部成功；任一格式失敗時不取代任何既有報告。
+    有 summary 時另寫出 `<報告名稱>.summary.json`，並在 Excel 報告最前面加入摘要工作表。
+    """
+    writers: list[ReportWriter] = []
+    try:
+        if summary:
+            # 摘要最先寫出：即使之後明細寫出失敗，稽核人員仍可先看到熱點 (檔案很小，失敗時一併保留)
+            summary_path = summary_path_for(output_path)
+            summary.write_json(summary_path)
+            logging.info(f"已寫出掃描摘要: {summary_path}")
+        for report_format, path in output_paths(output_path, formats).items():
+            writers.append(_WRITERS[report_format](path))
+        for start in range(0, len(scan_results), _BATCH_ROWS):
+            batch = scan_results[start:start + _BATCH_ROWS]
+            for writer in writers: writer.write_results(batch)
+        for writer in writers: writer.finish(file_contexts or [], changes, summary)
+    except Exception as e:
+        logging.critical(f"生成報告時發生未預期錯誤: {e}", exc_info=True)
+        for writer in writers:
+            try: writer.discard()
+            except Exception as cleanup_error: logging.warning(f"清除未完成的 {writer.format} 報告 '{writer.path}' 時發生錯誤: {cleanup_error}")
+        return False
+    for writer in writers:
+        writer.commit()
+        logging.info(f"已寫出 {writer.format} 報告: {writer.path}")
+    return True
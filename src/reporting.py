@@ -2,12 +2,16 @@
 
 import logging
 import pathlib
-from typing import Optional
+from typing import Optional, Sequence
 
 import pandas as pd
 from xlsxwriter.utility import xl_col_to_name
 
-from src.shared_data_model import ScanReport
+from src.shared_data_model import FileContext, ScanReport
+from src.parsers.triage import describe as describe_triage
+from src.manifest import FindingChange
+from src.result_filter import describe_suppressed
+from src.summary import CONFIDENCE_BANDS, ScanSummary
 
 class ReportGenerator:
     """
@@ -26,7 +30,39 @@ class ReportGenerator:
         _COL_FILE_PATH, _COL_SOURCE, _COL_CONTEXT
     ]
 
+    # --- 檔案清單欄位常數 ---
+    _COL_MIME_TYPE = "MIME 類型"
+    _COL_FILE_SIZE = "檔案大小 (bytes)"
+    _COL_STATUS = "處理狀態"
+    _COL_ENCODING = "文字編碼"
+    _COL_TRIAGE = "分流判定"
+    _COL_SUPPRESSED = "已過濾發現"
+    _COL_NOTE = "備註"
+
+    _FILE_COLUMNS = [
+        _COL_FILE_PATH, _COL_MIME_TYPE, _COL_FILE_SIZE,
+        _COL_STATUS, _COL_ENCODING, _COL_TRIAGE, _COL_SUPPRESSED, _COL_NOTE
+    ]
+
+    # --- 差異比對欄位常數 ---
+    _COL_CHANGE = "變更"
+    _DIFF_COLUMNS = [_COL_CHANGE, _COL_PII_TYPE, _COL_MATCHED_VALUE, _COL_FILE_PATH]
+
+    # --- 摘要欄位常數 ---
+    _COL_FINDINGS = "發現筆數"
+    _COL_DIRECTORY = "目錄"
+    _COL_DEPTH = "層級"
+    _COL_FILE_COUNT = "檔案數"
+    _COL_HIGH_CONFIDENCE = "高信賴筆數 (>=0.8)"
+    _COL_BREAKDOWN = "類型明細"
+    _TOTAL_LABEL = "合計"
+
+    _SHEET_NAME_SUMMARY = "摘要"
+    _SHEET_NAME_DIRECTORIES = "目錄統計"
+    _SHEET_NAME_TOP_FILES = "高風險檔案"
     _SHEET_NAME_DETAILS = "掃描結果"
+    _SHEET_NAME_FILES = "檔案清單"
+    _SHEET_NAME_DIFF = "差異比對"
 
     # --- 樣式與格式化常數 ---
     # 【新功能】定義三種風險等級的顏色
@@ -59,6 +95,69 @@ class ReportGenerator:
             } for res in scan_results]
         return pd.DataFrame.from_records(records)[self._ORDERED_COLUMNS]
 
+    def _file_contexts_to_dataframe(self, file_contexts: Sequence[FileContext]) -> pd.DataFrame:
+        records = [{
+                self._COL_FILE_PATH: str(ctx.file_path), self._COL_MIME_TYPE: ctx.mime_type,
+                self._COL_FILE_SIZE: ctx.file_size_bytes, self._COL_STATUS: ctx.status.value,
+                self._COL_ENCODING: ctx.encoding or "", self._COL_TRIAGE: describe_triage(ctx.triage) if ctx.triage else "",
+                self._COL_SUPPRESSED: describe_suppressed(ctx.suppressed),
+                self._COL_NOTE: ctx.error_message or "",
+            } for ctx in file_contexts]
+        return pd.DataFrame.from_records(records, columns=self._FILE_COLUMNS)
+
+    def _changes_to_dataframe(self, changes: Sequence[FindingChange]) -> pd.DataFrame:
+        records = [{
+                self._COL_CHANGE: change.change, self._COL_PII_TYPE: change.pii_type,
+                self._COL_MATCHED_VALUE: change.value, self._COL_FILE_PATH: str(change.file_path),
+            } for change in changes]
+        return pd.DataFrame.from_records(records, columns=self._DIFF_COLUMNS)
+
+    def _summary_to_dataframes(self, summary: ScanSummary) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        bands = [label for _, label in CONFIDENCE_BANDS]
+        by_type = [{self._COL_PII_TYPE: pii_type, self._COL_FINDINGS: count,
+                    **{band: summary.by_confidence[(pii_type, band)] for band in bands}} for pii_type, count in summary.by_type.most_common()]
+        by_type.append({self._COL_PII_TYPE: self._TOTAL_LABEL, self._COL_FINDINGS: summary.total_findings,
+                        **{band: sum(summary.by_confidence[(pii_type, band)] for pii_type in summary.by_type) for band in bands}})
+        directories = [{self._COL_DIRECTORY: prefix, self._COL_DEPTH: depth, self._COL_PII_TYPE: pii_type,
+                        self._COL_FINDINGS: count, self._COL_FILE_COUNT: files} for prefix, depth, pii_type, count, files in summary.directory_rows()]
+        top_files = [{self._COL_FILE_PATH: path, self._COL_FINDINGS: total, self._COL_HIGH_CONFIDENCE: high,
+                      self._COL_BREAKDOWN: "、".join(f"{pii_type} ×{count}" for pii_type, count in sorted(per_type.items(), key=lambda item: -item[1]))}
+                     for total, high, path, per_type in summary.top_offenders()]
+        return (pd.DataFrame.from_records(by_type, columns=[self._COL_PII_TYPE, self._COL_FINDINGS, *bands]),
+                pd.DataFrame.from_records(directories, columns=[self._COL_DIRECTORY, self._COL_DEPTH, self._COL_PII_TYPE, self._COL_FINDINGS, self._COL_FILE_COUNT]),
+                pd.DataFrame.from_records(top_files, columns=[self._COL_FILE_PATH, self._COL_FINDINGS, self._COL_HIGH_CONFIDENCE, self._COL_BREAKDOWN]))
+
+    def _write_summary_sheets(self, writer: pd.ExcelWriter, summary: ScanSummary):
+        """摘要、目錄統計與高風險檔案三個工作表，放在明細之前，稽核人員不必開啟明細即可掌握熱點。"""
+        by_type, directories, top_files = self._summary_to_dataframes(summary)
+        self._write_files_sheet(writer, by_type, self._SHEET_NAME_SUMMARY)
+        worksheet = writer.sheets[self._SHEET_NAME_SUMMARY]
+        worksheet.write(len(by_type) + 2, 0, "掃描檔案數"); worksheet.write(len(by_type) + 2, 1, summary.files_scanned)
+        worksheet.write(len(by_type) + 3, 0, "含個資檔案數"); worksheet.write(len(by_type) + 3, 1, summary.files_with_findings)
+        row = len(by_type) + 4
+        if summary.files_not_scanned:
+            worksheet.write(row, 0, "未掃描檔案數 (超過時間預算)"); worksheet.write(row, 1, summary.files_not_scanned); row += 1
+        if summary.nlp_cache.lookups:
+            worksheet.write(row, 0, "NLP 快取命中率"); worksheet.write(row, 1, round(summary.nlp_cache.hit_rate, 4))
+            worksheet.write(row + 1, 0, "NLP 快取節省秒數"); worksheet.write(row + 1, 1, round(summary.nlp_cache.saved_seconds, 1))
+        self._write_files_sheet(writer, directories, self._SHEET_NAME_DIRECTORIES)
+        self._write_files_sheet(writer, top_files, self._SHEET_NAME_TOP_FILES)
+
+    def _write_files_sheet(self, writer: pd.ExcelWriter, df: pd.DataFrame, sheet_name: Optional[str] = None):
+        """每個檔案一列，記錄處理狀態、文字編碼與分流判定，方便稽核人員追查哪些檔案被降低優先度及原因。"""
+        sheet_name = sheet_name or self._SHEET_NAME_FILES
+        logging.debug(f"正在建立 '{sheet_name}' 工作表...")
+        df.to_excel(writer, sheet_name=sheet_name, index=False, header=False, startrow=1)
+        worksheet = writer.sheets[sheet_name]
+        for col_num, value in enumerate(df.columns.values):
+            worksheet.write(0, col_num, value, self.header_format)
+        worksheet.autofilter(0, 0, max(len(df), 1), len(df.columns) - 1)
+        worksheet.freeze_panes(1, 0)
+        for i, col in enumerate(df.columns):
+            sampled_df = df[col].head(self._COL_WIDTH_SAMPLE_ROWS).astype(str)
+            max_len = max(sampled_df.str.len().max(), len(col)) if not sampled_df.empty else len(col)
+            worksheet.set_column(i, i, min(max(max_len, 10) + 2, self._MAX_COL_WIDTH))
+
     def _write_details_sheet(self, writer: pd.ExcelWriter, df: pd.DataFrame):
         logging.debug(f"正在建立 '{self._SHEET_NAME_DETAILS}' 工作表...")
         df.to_excel(writer, sheet_name=self._SHEET_NAME_DETAILS, index=False, header=False, startrow=1)
@@ -111,10 +210,16 @@ class ReportGenerator:
             worksheet.set_column(i, i, width)
 
 # 外部呼叫的進入點函式
-def generate_report(scan_results: ScanReport, output_path: pathlib.Path):
+def generate_report(scan_results: ScanReport, output_path: pathlib.Path, file_contexts: Optional[Sequence[FileContext]] = None,
+                    changes: Optional[Sequence[FindingChange]] = None, summary: Optional[ScanSummary] = None) -> bool:
+    """
+    產生 Excel 報告，回傳是否成功。changes 不為 None 時 (差異掃描) 另建立「差異比對」工作表；
+    有 summary 時在最前面建立摘要工作表。
+    """
     try:
         with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
             reporter = ReportGenerator(writer.book)
+            if summary: reporter._write_summary_sheets(writer, summary)
             df = reporter._results_to_dataframe(scan_results)
 
             # 【客製化】移除總覽頁，只建立詳細結果工作表
@@ -125,5 +230,13 @@ def generate_report(scan_results: ScanReport, output_path: pathlib.Path):
                 worksheet = reporter.workbook.add_worksheet(reporter._SHEET_NAME_DETAILS)
                 worksheet.write('A1', "任務完成，未在任何檔案中發現個資。")
                 logging.info("未發現任何個人資料，已生成空的結果報告。")
+
+            if file_contexts:
+                reporter._write_files_sheet(writer, reporter._file_contexts_to_dataframe(file_contexts))
+            if changes is not None:
+                # 與檔案清單相同的簡單表格格式：標題列、篩選器、凍結窗格
+                reporter._write_files_sheet(writer, reporter._changes_to_dataframe(changes), reporter._SHEET_NAME_DIFF)
+        return True
     except Exception as e:
-        logging.critical(f"生成報告時發生未預期錯誤: {e}", exc_info=True)
\ No newline at end of file
+        logging.critical(f"生成報告時發生未預期錯誤: {e}", exc_info=True)
+        return False
\ No newline at end of file
@@ -0,0 +1,109 @@
+# src/result_filter.py
+"""
+依個資類型過濾掃描結果
+
+在工作進程內、結果序列化回主進程之前套用，數字密集的資料匯出檔 (例如每個 9 位數都會被護照插件回報)
+不必把大量低信賴度的結果傳回主進程、放進 DataFrame 再寫入 Excel。每種個資類型可設定：
+- 最低信賴分數 (min)
+- 同一檔案內相同值只保留一筆 (dedup)
+- 同一檔案最多保留幾筆 (max)，超出的依信賴分數由低到高捨棄
+被過濾掉的筆數依類型與原因記錄在 FileContext.suppressed，列於報告的「檔案清單」工作表。
+"""
+import dataclasses
+from collections import Counter
+from typing import Mapping, Optional
+
+from src.shared_data_model import ScanReport
+
+WILDCARD_TYPE = "*"
+
+REASON_LOW_CONFIDENCE = "low_confidence"
+REASON_DUPLICATE = "duplicate"
+REASON_OVER_LIMIT = "over_limit"
+REASON_LABELS = {REASON_LOW_CONFIDENCE: "信賴度不足", REASON_DUPLICATE: "重複", REASON_OVER_LIMIT: "超過上限"}
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TypeFilterRule:
+    min_confidence: float = 0.0
+    max_per_file: Optional[int] = None
+    dedup: bool = False
+
+
+def parse_filter_rules(entries: Optional[list[str]]) -> dict[str, TypeFilterRule]:
+    """
+    解析 CLI 的過濾設定，例如 ["PASSPORT_NUMBER=min:0.6,max:50,dedup", "*=dedup"]。
+    類型 * 套用於所有未個別設定的類型。
+
+    Raises:
+        ValueError: 格式或數值無效時。
+    """
+    rules: dict[str, TypeFilterRule] = {}
+    for entry in entries or []:
+        pii_type, sep, options = entry.partition('=')
+        pii_type = pii_type.strip().upper()
+        if not sep or not pii_type or not options.strip():
+            raise ValueError(f"無效的過濾設定 '{entry}'，格式應為 個資類型=min:分數,max:筆數,dedup。")
+        fields = {}
+        for option in options.split(','):
+            name, _, value = option.strip().partition(':')
+            try:
+                if name == 'min':
+                    fields['min_confidence'] = float(value)
+                    if not 0.0 <= fields['min_confidence'] <= 1.0: raise ValueError
+                elif name == 'max':
+                    fields['max_per_file'] = int(value)
+                    if fields['max_per_file'] < 0: raise ValueError
+                elif name == 'dedup' and not value: fields['dedup'] = True
+                else: raise ValueError
+            except ValueError:
+                raise ValueError(f"無效的過濾選項 '{option.strip()}' (於 '{entry}')。可用選項: min:0~1 的分數, max:非負整數, dedup。") from None
+        rules[pii_type] = TypeFilterRule(**fields)
+    return rules
+
+
+class ResultFilter:
+    """每個工作進程持有一份，對單一檔案的所有結果套用過濾規則。"""
+
+    def __init__(self, rules: Mapping[str, TypeFilterRule]):
+        self.rules = dict(rules)
+        self._default = self.rules.get(WILDCARD_TYPE)
+
+    def __bool__(self) -> bool: return bool(self.rules)
+
+    def apply(self, results: ScanReport) -> tuple[ScanReport, Counter]:
+        """回傳 (保留的結果, 以 (個資類型, 原因) 為鍵的過濾筆數)。保留的結果維持原本的順序。"""
+        suppressed: Counter = Counter()
+        by_type: dict[str, list[int]] = {}
+        for index, result in enumerate(results): by_type.setdefault(result.pii_type, []).append(index)
+
+        kept: set[int] = set()
+        for pii_type, indices in by_type.items():
+            rule = self.rules.get(pii_type, self._default)
+            if rule is None: kept.update(indices); continue
+            candidates = []
+            for index in indices:
+                if results[index].confidence_score < rule.min_confidence: suppressed[(pii_type, REASON_LOW_CONFIDENCE)] += 1
+                else: candidates.append(index)
+            if rule.dedup:
+                # 相同的值保留信賴分數最高的一筆 (同分時保留最先出現的)
+                best: dict[str, int] = {}
+                for index in candidates:
+                    value = results[index].matched_value
+                    if value not in best or results[index].confidence_score > results[best[value]].confidence_score: best[value] = index
+                suppressed[(pii_type, REASON_DUPLICATE)] += len(candidates) - len(best)
+                candidates = sorted(best.values())
+            if rule.max_per_file is not None and len(candidates) > rule.max_per_file:
+                ranked = sorted(candidates, key=lambda i: (-results[i].confidence_score, i))
+                suppressed[(pii_type, REASON_OVER_LIMIT)] += len(candidates) - rule.max_per_file
+                candidates = ranked[:rule.max_per_file]
+            kept.update(candidates)
+        return [result for index, result in enumerate(results) if index in kept], +suppressed
+
+
+def describe_suppressed(suppressed: tuple[tuple[str, str, int], ...]) -> str:
+    """產生報告用的描述，例如「PASSPORT_NUMBER 信賴度不足 ×120、重複 ×3」。"""
+    parts: dict[str, list[str]] = {}
+    for pii_type, reason, count in suppressed:
+        parts.setdefault(pii_type, []).append(f"{REASON_LABELS.get(reason, reason)} ×{count}")
+    return "；".join(f"{pii_type} {'、'.join(items)}" for pii_type, items in parts.items())
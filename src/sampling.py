@@ -0,0 +1,185 @@
+# src/sampling.py
+"""
+分層取樣估計 (--sample)
+
+完整稽核一棵數百萬個檔案的目錄樹需要數小時；取樣模式在幾分鐘內估計個資分布在哪裡：
+1. 分層：依「掃描根目錄下的第一層目錄 × 副檔名」分層。目錄走訪只讀取目錄項目，不對每個檔案 stat。
+2. 取樣：每個檔案依路徑的穩定雜湊以 fraction 的機率選中 (同一棵樹重跑時選中相同的檔案)，
+   走訪途中即開始掃描；走訪結束後，選中數不足 MIN_PER_STRATUM 的層以蓄水池中的檔案補足。
+   指定每層的時間預算時，該層累計的掃描時間超過預算後不再排入新檔案。
+3. 估計：各層以「母體檔案數 × 每檔平均筆數」外推各個資類型的總筆數，變異數採分層隨機抽樣公式
+   (含有限母體校正)，以常態近似給出 95% 信賴區間；再依目錄彙整，排出建議優先完整掃描的目錄。
+只掃描 1 個檔案的層無法估計變異數，以平均值本身作為標準差的保守近似。
+"""
+import dataclasses
+import hashlib
+import json
+import math
+import pathlib
+import random
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from src.shared_data_model import ScanReport
+
+DEFAULT_FRACTION = 0.02
+MIN_PER_STRATUM = 3
+Z_95 = 1.959964
+ROOT_DIRECTORY = "."
+NO_EXTENSION = "(無副檔名)"
+_HASH_SCALE = float(1 << 64)
+
+
+def stratum_of(file_path: pathlib.Path, root: pathlib.Path) -> tuple[str, str]:
+    """(第一層目錄, 小寫副檔名)；直接位於根目錄的檔案歸在 "."。"""
+    try: parts = file_path.relative_to(root).parts
+    except ValueError: parts = file_path.parts
+    return (parts[0] if len(parts) > 1 else ROOT_DIRECTORY), (file_path.suffix.lower() or NO_EXTENSION)
+
+
+def _selection_value(relative_path: str) -> float:
+    """路徑的穩定雜湊映射到 [0, 1)；跨進程與跨次執行都相同。"""
+    return int.from_bytes(hashlib.blake2b(relative_path.encode('utf-8', 'surrogateescape'), digest_size=8).digest(), 'big') / _HASH_SCALE
+
+
+@dataclasses.dataclass
+class Stratum:
+    directory: str; extension: str
+    population: int = 0
+    selected: int = 0
+    seconds: float = 0.0
+    # 已掃描檔案的各類型筆數 (每個檔案一個 Counter，沒有發現的檔案為空的 Counter)
+    scanned: list[Counter] = dataclasses.field(default_factory=list)
+    # 未被選中的檔案的蓄水池，走訪結束後用來補足最少取樣數
+    reservoir: list[pathlib.Path] = dataclasses.field(default_factory=list)
+
+    def estimate(self, pii_type: str) -> tuple[float, float]:
+        """回傳 (估計總筆數, 變異數)。"""
+        n = len(self.scanned)
+        if not n: return 0.0, 0.0
+        values = [counts.get(pii_type, 0) for counts in self.scanned]
+        mean = sum(values) / n
+        variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else mean ** 2
+        correction = max(0.0, 1 - n / self.population) if self.population else 0.0
+        return self.population * mean, self.population ** 2 * correction * variance / n
+
+
+@dataclasses.dataclass(frozen=True)
+class Estimate:
+    pii_type: str; observed: int; estimated: float; low: float; high: float
+
+    def to_dict(self) -> dict:
+        return {'pii_type': self.pii_type, 'observed': self.observed, 'estimated': round(self.estimated, 1),
+                'ci95_low': round(self.low, 1), 'ci95_high': round(self.high, 1)}
+
+
+def _combine(pii_type: str, strata: Iterable[Stratum]) -> Estimate:
+    total = variance = 0.0; observed = 0
+    for stratum in strata:
+        estimated, stratum_variance = stratum.estimate(pii_type)
+        total += estimated; variance += stratum_variance
+        observed += sum(counts.get(pii_type, 0) for counts in stratum.scanned)
+    margin = Z_95 * math.sqrt(variance)
+    # 已觀察到的筆數是確定的下限
+    return Estimate(pii_type, observed, total, max(float(observed), total - margin), max(float(observed), total + margin))
+
+
+class StratifiedSampler:
+    """
+    Args:
+        root: 掃描根目錄 (分層與選取雜湊都以相對路徑計算)。
+        fraction: 每個檔案被選中的機率。
+        seconds_per_stratum: 每層累計掃描時間的預算；None 表示不限制。
+    """
+
+    def __init__(self, root: pathlib.Path, fraction: float = DEFAULT_FRACTION, seconds_per_stratum: Optional[float] = None,
+                 min_per_stratum: int = MIN_PER_STRATUM, seed: int = 0):
+        self.root = root; self.fraction = fraction; self.seconds_per_stratum = seconds_per_stratum
+        self.min_per_stratum = min_per_stratum
+        self.strata: dict[tuple[str, str], Stratum] = {}
+        self._rng = random.Random(seed)
+        self._skipped_by_budget = 0
+
+    def _stratum(self, file_path: pathlib.Path) -> Stratum:
+        key = stratum_of(file_path, self.root)
+        stratum = self.strata.get(key)
+        if stratum is None: stratum = self.strata[key] = Stratum(*key)
+        return stratum
+
+    def _within_budget(self, stratum: Stratum) -> bool:
+        if self.seconds_per_stratum is None or stratum.seconds < self.seconds_per_stratum: return True
+        self._skipped_by_budget += 1
+        return False
+
+    def select(self, files: Iterable[pathlib.Path]) -> Iterable[pathlib.Path]:
+        """邊走訪邊產生要掃描的檔案；走訪結束後再產生補足最少取樣數的檔案。"""
+        for file_path in files:
+            stratum = self._stratum(file_path); stratum.population += 1
+            try: relative = file_path.relative_to(self.root).as_posix()
+            except ValueError: relative = file_path.as_posix()
+            if _selection_value(relative) < self.fraction:
+                if self._within_budget(stratum): stratum.selected += 1; yield file_path
+                continue
+            # 蓄水池抽樣：每個未選中的檔案以相同機率留在蓄水池中
+            unselected = stratum.population - stratum.selected
+            if len(stratum.reservoir) < self.min_per_stratum: stratum.reservoir.append(file_path)
+            else:
+                slot = self._rng.randrange(unselected)
+                if slot < self.min_per_stratum: stratum.reservoir[slot] = file_path
+        for stratum in self.strata.values():
+            shortfall = min(self.min_per_stratum, stratum.population) - stratum.selected
+            for file_path in stratum.reservoir[:max(0, shortfall)]:
+                if not self._within_budget(stratum): break
+                stratum.selected += 1; yield file_path
+            stratum.reservoir = []
+
+    def record(self, file_path: pathlib.Path, results: Optional[ScanReport], seconds: float):
+        """記錄一個已掃描的檔案；results 為 None 表示處理失敗 (只計入時間，不計入樣本)。"""
+        stratum = self._stratum(file_path)
+        stratum.seconds += seconds
+        if results is not None: stratum.scanned.append(Counter(result.pii_type for result in results))
+
+    # --- 估計 ---
+    @property
+    def pii_types(self) -> list[str]:
+        return sorted({pii_type for stratum in self.strata.values() for counts in stratum.scanned for pii_type in counts})
+
+    def estimates(self) -> list[Estimate]:
+        return sorted((_combine(pii_type, self.strata.values()) for pii_type in self.pii_types), key=lambda e: -e.estimated)
+
+    def directory_rankings(self) -> list[dict]:
+        """
+        依估計總筆數排列的目錄清單 (建議優先完整掃描的順序)。
+        有層完全沒有掃描到檔案的目錄無法估計，排在最後並標示未取樣的檔案數。
+        """
+        by_directory: dict[str, list[Stratum]] = defaultdict(list)
+        for stratum in self.strata.values(): by_directory[stratum.directory].append(stratum)
+        rows = []
+        for directory, strata in by_directory.items():
+            estimates = [_combine(pii_type, strata) for pii_type in self.pii_types]
+            estimates = [e for e in estimates if e.estimated > 0 or e.observed]
+            scanned = sum(len(s.scanned) for s in strata)
+            rows.append({
+                'directory': directory, 'files': sum(s.population for s in strata), 'scanned': scanned,
+                'unsampled_files': sum(s.population for s in strata if not s.scanned),
+                'estimated_total': round(sum(e.estimated for e in estimates), 1),
+                'ci95_high_total': round(sum(e.high for e in estimates), 1),
+                'by_type': [e.to_dict() for e in sorted(estimates, key=lambda e: -e.estimated)],
+            })
+        rows.sort(key=lambda row: (row['scanned'] == 0, -row['estimated_total'], -row['ci95_high_total'], row['directory']))
+        return rows
+
+    def to_dict(self) -> dict:
+        strata = sorted(self.strata.values(), key=lambda s: (s.directory, s.extension))
+        return {
+            'root': str(self.root), 'fraction': self.fraction, 'seconds_per_stratum': self.seconds_per_stratum,
+            'files': sum(s.population for s in strata), 'scanned': sum(len(s.scanned) for s in strata),
+            'skipped_by_time_budget': self._skipped_by_budget,
+            'estimates': [e.to_dict() for e in self.estimates()],
+            'recommended_directories': self.directory_rankings(),
+            'strata': [{'directory': s.directory, 'extension': s.extension, 'files': s.population, 'scanned': len(s.scanned),
+                        'seconds': round(s.seconds, 3), 'findings': sum(sum(c.values()) for c in s.scanned)} for s in strata],
+        }
+
+    def write_json(self, path: pathlib.Path):
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding='utf-8')
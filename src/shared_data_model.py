@@ -15,10 +15,27 @@ class FileStatus(str, enum.Enum):
 class ValidationStatus(str, enum.Enum):
     VALID = "驗證通過"; INVALID = "驗證失敗"; NOT_APPLICABLE = "不適用"
 
+class TriageCategory(str, enum.Enum):
+    TEXT = "text"; BINARY = "binary"; MINIFIED = "minified"
+    BASE64_HEAVY = "base64"; GENERATED = "generated"
+
+class TriageAction(str, enum.Enum):
+    SCAN = "scan"; SKIP = "skip"; SAMPLE = "sample"; REGEX_ONLY = "regex_only"
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TriageDecision:
+    """檔案分流的判定結果：檔案被歸類為哪一種內容、採取什麼處理方式，以及判定依據。"""
+    category: TriageCategory; action: TriageAction; reason: str
+
 @dataclasses.dataclass(frozen=True, slots=True)
 class FileContext:
     file_path: pathlib.Path; mime_type: str; file_size_bytes: int; status: FileStatus
     error_message: Optional[str] = None
+    encoding: Optional[str] = None
+    triage: Optional[TriageDecision] = None
+    content_hash: Optional[str] = None
+    suppressed: tuple[tuple[str, str, int], ...] = ()  # (個資類型, 過濾原因, 筆數)
+    boilerplate_blocks: tuple[str, ...] = ()  # 頁面中被去除的樣板區塊編號
     timestamp_utc: datetime = dataclasses.field(default_factory=lambda: datetime.now(timezone.utc))
     def is_successful(self) -> bool: return self.status == FileStatus.COMPLETED
 
@@ -27,6 +44,7 @@ class ScanResult:
     file_context: FileContext; pii_type: str; matched_value: str
     confidence_score: float; scanner_source: str; validation_status: ValidationStatus
     context: str; location: Optional[str] = None
+    offset: Optional[int] = None
     timestamp_utc: datetime = dataclasses.field(default_factory=lambda: datetime.now(timezone.utc))
 
     def __post_init__(self):
@@ -39,4 +57,45 @@ class ScanResult:
             quarter = len(value) // 4
             return f"{value[:quarter]}...{value[-quarter:]}"
         return (f"ScanResult(pii_type='{self.pii_type}', matched_value='{mask_value(self.matched_value)}', "
-                f"confidence_score={self.confidence_score}, file_path='{self.file_context.file_path.name}')")
\ No newline at end of file
+                f"confidence_score={self.confidence_score}, file_path='{self.file_context.file_path.name}')")
+
+# --- 序列化 (分散式掃描、檢查點等需要跨進程/跨節點傳遞結果的功能共用) ---
+def context_to_dict(ctx: FileContext) -> dict:
+    return {
+        'file_path': str(ctx.file_path), 'mime_type': ctx.mime_type, 'file_size_bytes': ctx.file_size_bytes,
+        'status': ctx.status.name, 'error_message': ctx.error_message, 'encoding': ctx.encoding,
+        'triage': [ctx.triage.category.value, ctx.triage.action.value, ctx.triage.reason] if ctx.triage else None,
+        'content_hash': ctx.content_hash, 'suppressed': [list(item) for item in ctx.suppressed],
+        'boilerplate_blocks': list(ctx.boilerplate_blocks), 'timestamp_utc': ctx.timestamp_utc.isoformat(),
+    }
+
+def context_from_dict(data: dict) -> FileContext:
+    triage = data.get('triage')
+    return FileContext(
+        file_path=pathlib.Path(data['file_path']), mime_type=data['mime_type'], file_size_bytes=data['file_size_bytes'],
+        status=FileStatus[data['status']], error_message=data.get('error_message'), encoding=data.get('encoding'),
+        triage=TriageDecision(TriageCategory(triage[0]), TriageAction(triage[1]), triage[2]) if triage else None,
+        content_hash=data.get('content_hash'), suppressed=tuple(tuple(item) for item in data.get('suppressed', ())),
+        boilerplate_blocks=tuple(data.get('boilerplate_blocks', ())),
+        timestamp_utc=datetime.fromisoformat(data['timestamp_utc']),
+    )
+
+def result_to_dict(result: ScanResult, include_context: bool = True) -> dict:
+    """include_context=False 時省略 file_context，由呼叫端以其他方式 (例如檔案編號) 對應，減少重複傳輸。"""
+    data = {
+        'pii_type': result.pii_type, 'matched_value': result.matched_value, 'confidence_score': result.confidence_score,
+        'scanner_source': result.scanner_source, 'validation_status': result.validation_status.name,
+        'context': result.context, 'location': result.location, 'offset': result.offset,
+        'timestamp_utc': result.timestamp_utc.isoformat(),
+    }
+    if include_context: data['file_context'] = context_to_dict(result.file_context)
+    return data
+
+def result_from_dict(data: dict, file_context: Optional[FileContext] = None) -> ScanResult:
+    return ScanResult(
+        file_context=file_context or context_from_dict(data['file_context']), pii_type=data['pii_type'],
+        matched_value=data['matched_value'], confidence_score=data['confidence_score'],
+        scanner_source=data['scanner_source'], validation_status=ValidationStatus[data['validation_status']],
+        context=data['context'], location=data.get('location'), offset=data.get('offset'),
+        timestamp_utc=datetime.fromisoformat(data['timestamp_utc']),
+    )
@@ -0,0 +1,120 @@
+# src/summary.py
+"""
+掃描摘要統計
+
+在掃描過程中隨著每個檔案完成逐步累加，不需要保留明細：
+- 各個資類型的發現筆數與信賴分數區間分布。
+- 各目錄前綴 (相對於掃描根目錄，第 1 層到第 N 層) × 個資類型的發現筆數與檔案數，找出熱點目錄。
+- 發現最多的前幾個檔案 (固定大小的堆積)。
+佔用的記憶體取決於目錄、類型等鍵的數量，而非發現筆數；明細多到無法寫入 Excel 時，摘要仍然完整。
+"""
+import heapq
+import json
+import math
+import pathlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Iterable, Sequence
+
+from src.nlp_cache import CacheStats
+from src.shared_data_model import ScanReport, ScanResult
+
+# 與報告的條件格式化相同的分界：(上限, 標籤)
+CONFIDENCE_BANDS = ((0.5, "<0.5"), (0.6, "0.5-0.6"), (0.8, "0.6-0.8"), (math.inf, ">=0.8"))
+HIGH_CONFIDENCE = 0.8
+ROOT_DIRECTORY = "."
+
+
+def confidence_band(score: float) -> str:
+    for upper, label in CONFIDENCE_BANDS:
+        if score < upper: return label
+    return CONFIDENCE_BANDS[-1][1]
+
+
+class ScanSummary:
+    """
+    Args:
+        root: 掃描根目錄，目錄統計以相對路徑表示。
+        directory_depth: 目錄統計彙整到第幾層。
+        top_files: 保留發現最多的檔案數。
+    """
+
+    def __init__(self, root: pathlib.Path, directory_depth: int = 2, top_files: int = 100):
+        self.root = root; self.directory_depth = directory_depth; self.top_files = top_files
+        self.files_scanned = 0
+        self.files_not_scanned = 0  # 超過時間預算而未掃描的檔案
+        self.files_with_findings = 0
+        self.by_type: Counter = Counter()
+        self.by_confidence: Counter = Counter()        # (個資類型, 區間) → 筆數
+        self.by_directory: Counter = Counter()         # (目錄前綴, 個資類型) → 筆數
+        self.files_by_directory: Counter = Counter()   # (目錄前綴, 個資類型) → 檔案數
+        self._top: list[tuple[int, int, str, dict[str, int]]] = []  # 最小堆積：(筆數, 高信賴筆數, 路徑, 各類型筆數)
+        self.nlp_cache = CacheStats()  # 各檔案 NLP 推論快取統計的加總
+
+    @property
+    def total_findings(self) -> int: return sum(self.by_type.values())
+
+    def _prefixes(self, file_path: pathlib.Path) -> list[str]:
+        try: parts = file_path.relative_to(self.root).parent.parts
+        except ValueError: parts = file_path.parent.parts
+        if not parts: return [ROOT_DIRECTORY]
+        return ["/".join(parts[:level]) for level in range(1, min(len(parts), self.directory_depth) + 1)]
+
+    def add_file(self, file_path: pathlib.Path, results: Sequence[ScanResult]):
+        """記錄一個已完成的檔案與它的所有發現 (每個檔案只呼叫一次)。"""
+        self.files_scanned += 1
+        if results: self.files_with_findings += 1; self._add_findings(file_path, results)
+
+    def add_extra_findings(self, file_path: pathlib.Path, results: Sequence[ScanResult]):
+        """追加不屬於單一檔案掃描的發現 (例如樣板區塊)：只計入筆數，不計入檔案數與發現最多的檔案。"""
+        if results: self._add_findings(file_path, results, as_file=False)
+
+    def _add_findings(self, file_path: pathlib.Path, results: Sequence[ScanResult], as_file: bool = True):
+        per_type: Counter = Counter()
+        high = 0
+        for result in results:
+            per_type[result.pii_type] += 1
+            self.by_confidence[(result.pii_type, confidence_band(result.confidence_score))] += 1
+            if result.confidence_score >= HIGH_CONFIDENCE: high += 1
+        self.by_type.update(per_type)
+        for prefix in self._prefixes(file_path):
+            for pii_type, count in per_type.items():
+                self.by_directory[(prefix, pii_type)] += count
+                if as_file: self.files_by_directory[(prefix, pii_type)] += 1
+        if not as_file: return
+        entry = (len(results), high, str(file_path), dict(per_type))
+        if len(self._top) < self.top_files: heapq.heappush(self._top, entry)
+        elif entry[:2] > self._top[0][:2]: heapq.heapreplace(self._top, entry)
+
+    def add_report(self, completed: Iterable[pathlib.Path], results: ScanReport):
+        """由一批已完成的檔案與扁平的結果清單累加 (例如從檢查點日誌接續時)。"""
+        by_file: dict[pathlib.Path, ScanReport] = {}
+        for result in results: by_file.setdefault(result.file_context.file_path, []).append(result)
+        for file_path in completed: self.add_file(file_path, by_file.get(file_path, []))
+
+    # --- 輸出 ---
+    def top_offenders(self) -> list[tuple[int, int, str, dict[str, int]]]:
+        return sorted(self._top, key=lambda entry: (-entry[0], -entry[1], entry[2]))
+
+    def directory_rows(self) -> list[tuple[str, int, str, int, int]]:
+        """(目錄, 層級, 個資類型, 發現筆數, 檔案數)，依筆數由多到少排列。"""
+        rows = [(prefix, 0 if prefix == ROOT_DIRECTORY else prefix.count("/") + 1, pii_type, count, self.files_by_directory[(prefix, pii_type)])
+                for (prefix, pii_type), count in self.by_directory.items()]
+        return sorted(rows, key=lambda row: (-row[3], row[1], row[0], row[2]))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'generated_utc': datetime.now(timezone.utc).isoformat(), 'scan_root': str(self.root),
+            'directory_depth': self.directory_depth,
+            'totals': {'files_scanned': self.files_scanned, 'files_not_scanned': self.files_not_scanned, 'files_with_findings': self.files_with_findings,
+                       'findings': self.total_findings, 'by_type': dict(self.by_type.most_common())},
+            'by_confidence': {pii_type: {label: self.by_confidence[(pii_type, label)] for _, label in CONFIDENCE_BANDS} for pii_type in sorted(self.by_type)},
+            'by_directory': [{'directory': prefix, 'depth': depth, 'pii_type': pii_type, 'findings': count, 'files': files}
+                             for prefix, depth, pii_type, count, files in self.directory_rows()],
+            'top_files': [{'file_path': path, 'findings': total, 'high_confidence': high, 'by_type': per_type}
+                          for total, high, path, per_type in self.top_offenders()],
+            'nlp_cache': self.nlp_cache.to_dict() if self.nlp_cache.lookups else None,
+        }
+
+    def write_json(self, path: pathlib.Path):
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding='utf-8')
@@ -0,0 +1,52 @@
+# tests/test_daemon.py
+import time
+
+import pytest
+
+from src.daemon import ScanDaemon
+from src.engine import ScanConfig
+from src.name_dictionary import NAME_PROFILE_FAST
+from src.parsers.txt_parser import TxtParser
+
+
+_parse = TxtParser.parse
+
+
+def _hang_on_marker(self, file_path, max_bytes=None):
+    # 工作進程由 fork 建立，沿用這裡替換的方法；只有標記內容會卡住
+    if file_path.read_bytes().startswith(b"HANG"):
+        while True: time.sleep(0.05)
+    return _parse(self, file_path, max_bytes)
+
+
+@pytest.fixture
+def make_daemon(tmp_path):
+    daemons = []
+    def make(**overrides) -> ScanDaemon:
+        config = ScanConfig(scan_path=tmp_path, output_path=tmp_path / "report.jsonl", enabled_plugins=["RegexEmailScanner"],
+                            name_profile=NAME_PROFILE_FAST, **overrides)
+        daemon = ScanDaemon(config, max_concurrency=1, max_queue=0)
+        daemon.warm_up(); daemons.append(daemon)
+        return daemon
+    yield make
+    for daemon in daemons: daemon.shutdown()
+
+
+def test_upload_is_scanned_in_worker(make_daemon):
+    daemon = make_daemon(parse_timeout=5.0, file_timeout=30.0)
+    reply, = daemon.scan_documents([("a.txt", b"mail a@b.com\n")])
+    assert reply["status"] == "SUCCESS" and reply["file"]["file_path"] == "a.txt"
+    assert [finding["matched_value"] for finding in reply["findings"]] == ["a@b.com"]
+
+
+@pytest.mark.parametrize("parse_timeout, file_timeout", [(1.0, None), (None, 1.0)])
+def test_hanging_upload_frees_the_slot(make_daemon, monkeypatch, parse_timeout, file_timeout):
+    monkeypatch.setattr(TxtParser, "parse", _hang_on_marker)
+    daemon = make_daemon(parse_timeout=parse_timeout, file_timeout=file_timeout)
+    reply, = daemon.scan_documents([("hang.txt", b"HANG mail a@b.com\n")])
+    # 解析逾時記為 ERROR 狀態的檔案；工作進程被終止時整份文件記為錯誤
+    assert reply["findings"] == []
+    assert reply["status"] == "ERROR" or reply["file"]["status"] == "ERROR"
+    # 唯一的掃描名額已經釋放，下一份文件照常掃描
+    reply, = daemon.scan_documents([("b.txt", b"mail c@d.org\n")])
+    assert [finding["matched_value"] for finding in reply["findings"]] == ["c@d.org"]
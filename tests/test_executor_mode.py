@@ -0,0 +1,43 @@
+# tests/test_executor_mode.py
+import time
+
+import pytest
+
+from src.engine import EXECUTOR_AUTO, EXECUTOR_PROCESS, EXECUTOR_SERIAL, EXECUTOR_THREAD, CoreEngine, ScanConfig
+from src.parsers.txt_parser import TxtParser
+from src.name_dictionary import NAME_PROFILE_FAST
+from src.shared_data_model import FileStatus
+
+
+def _hang(self, file_path, max_bytes=None):
+    while True: time.sleep(0.05)
+
+
+def _engine(tmp_path, **overrides) -> CoreEngine:
+    config = ScanConfig(scan_path=tmp_path, output_path=tmp_path / "report.jsonl", enabled_plugins=["RegexEmailScanner"],
+                        name_profile=NAME_PROFILE_FAST, num_workers=1, executor_mode=EXECUTOR_AUTO, **overrides)
+    return CoreEngine(config)
+
+
+@pytest.mark.parametrize("parse_timeout, file_timeout, expected", [
+    (120.0, 600.0, EXECUTOR_PROCESS),
+    (None, 600.0, EXECUTOR_PROCESS),
+    (120.0, None, EXECUTOR_SERIAL),
+    (None, None, EXECUTOR_THREAD),
+])
+def test_auto_keeps_timeouts_for_small_scans(tmp_path, parse_timeout, file_timeout, expected):
+    (tmp_path / "a.txt").write_text("a@b.com\n", encoding="utf-8")
+    engine = _engine(tmp_path, parse_timeout=parse_timeout, file_timeout=file_timeout)
+    assert engine._select_executor_mode(engine._discover_files()) == expected
+
+
+@pytest.mark.parametrize("parse_timeout, file_timeout", [(1.0, None), (None, 1.0), (1.0, 600.0)])
+def test_auto_with_hanging_parser_returns_error(tmp_path, monkeypatch, parse_timeout, file_timeout):
+    (tmp_path / "hang.txt").write_text("a@b.com\n", encoding="utf-8")
+    monkeypatch.setattr(TxtParser, "parse", _hang)
+    engine = _engine(tmp_path, parse_timeout=parse_timeout, file_timeout=file_timeout)
+    files = engine._discover_files()
+    results, errors, contexts = engine._run_parallel_processing(files, engine.plugin_manager.get_enabled(engine.config.enabled_plugins))
+    # 解析逾時記為 ERROR 狀態的檔案；工作進程被終止時記為處理失敗
+    errored = {error['path'] for error in errors} | {ctx.file_path for ctx in contexts if ctx.status == FileStatus.ERROR}
+    assert results == [] and errored == set(files)
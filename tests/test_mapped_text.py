@@ -0,0 +1,90 @@
+# tests/test_mapped_text.py
+import functools
+
+import pytest
+
+from src.engine import FileRange, FileScanner, merge_range_results
+from src.metrics import ScanMetrics
+from src.parsers.txt_parser import TxtParser
+from src.plugins.regex_credit_card_scanner import RegexCreditCardScanner
+from src.plugins.regex_email_scanner import RegexEmailScanner
+from src.plugins.regex_passport_scanner import RegexPassportScanner
+from src.plugins.regex_phone_scanner import RegexPhoneScanner
+from src.plugins.regex_taiwan_id_scanner import RegexTaiwanIdScanner
+from src.shared_data_model import FileContext, FileStatus
+
+PLUGINS = [RegexEmailScanner, RegexCreditCardScanner, RegexTaiwanIdScanner, RegexPhoneScanner, RegexPassportScanner]
+# 位元組樣式與 str 樣式語意不同之處：CJK 相鄰的 \b、全形數字、只有 str 的 \s 比對得到的控制字元
+LINES = [
+    "contact a@b.com or card 4111111111111111, id A123456789, tel 0912-345-678\n",
+    "王小明a@b.com 卡號4111111111111111 身分證A123456789 手機0912345678\n",
+    "電話：０９１２３４５６７８，身分證Ａ１２３４５６７８９\n",
+    "sep\x1c0912 345 678\x1f and x@y.org\n",
+    "passport 312345678 tel (02)2345-6789 mail Ming.Wang+t@Example.COM.tw\n",
+]
+
+
+def _context(file_path, text: str) -> FileContext:
+    return FileContext(file_path=file_path, mime_type="text/plain", file_size_bytes=len(text.encode("utf-8")), status=FileStatus.COMPLETED)
+
+
+def _text_findings(plugin, text: str, file_context: FileContext) -> list[tuple]:
+    return sorted((result.matched_value, len(text[:result.offset].encode("utf-8")), result.location.startswith("附近 ("))
+                  for result in plugin.scan(text, file_context))
+
+
+def _mapped_findings(plugin, file_path, file_context: FileContext, segment_size: int) -> list[tuple]:
+    with TxtParser().open_mapped(file_path) as mapped:
+        mapped.iter_segments = functools.partial(mapped.iter_segments, segment_size=segment_size, overlap=64)
+        return sorted((result.matched_value, result.offset, result.location.startswith("附近 ("))
+                      for result in plugin.scan_mapped(mapped, file_context))
+
+
+@pytest.mark.parametrize("plugin_class", PLUGINS)
+@pytest.mark.parametrize("lines", [LINES[:1], LINES, LINES[::-1] * 3])
+@pytest.mark.parametrize("segment_size", [128, 8 * 1024 * 1024])
+def test_mapped_scan_matches_text_scan(tmp_path, plugin_class, lines, segment_size):
+    text = "".join(lines)
+    file_path = tmp_path / "app.log"
+    file_path.write_bytes(text.encode("utf-8"))
+    file_context = _context(file_path, text)
+    plugin = plugin_class()
+    assert _mapped_findings(plugin, file_path, file_context, segment_size) == _text_findings(plugin, text, file_context)
+
+
+def test_plain_ascii_segments(tmp_path):
+    file_path = tmp_path / "app.log"
+    file_path.write_bytes("".join(LINES).encode("utf-8"))
+    with TxtParser().open_mapped(file_path) as mapped:
+        first_line_end = len(LINES[0])
+        assert mapped.is_plain_ascii(0, first_line_end)
+        assert not mapped.is_plain_ascii(0, first_line_end + 1)
+        assert not mapped.is_plain_ascii(mapped.size - len(LINES[-2].encode("utf-8")) - len(LINES[-1]), mapped.size)
+
+
+def test_offsets_after_multibyte_text(tmp_path):
+    text = "中文日誌 護照 312345678 ok\n" * 2000
+    file_path = tmp_path / "app.log"
+    file_path.write_bytes(text.encode("utf-8"))
+    file_context = _context(file_path, text)
+    plugin = RegexPassportScanner()
+    assert _mapped_findings(plugin, file_path, file_context, 4096) == _text_findings(plugin, text, file_context)
+
+
+def test_range_metrics_count_overlap_once(tmp_path):
+    text = "x" * 1000 + " a@b.com " + "y" * 1000 + "\n"
+    file_path = tmp_path / "app.log"
+    file_path.write_bytes(text.encode("utf-8"))
+    file_context = _context(file_path, text)
+    metrics = ScanMetrics(["RegexEmailScanner"], rows=1); metrics.claim_row()
+    scanner = FileScanner([RegexEmailScanner()], metrics=metrics)
+    scanner.parser = lambda path: (file_context, TxtParser().open_mapped(path))
+    # 郵件落在第二個範圍，同時也在第一個範圍的重疊區內
+    split = text.index("a@b.com") - 5
+    parts = [scanner.scan_file(FileRange(file_path, start, end, index, 2)) for index, (start, end) in enumerate([(0, split), (split, len(text))])]
+    assert [result.matched_value for result in merge_range_results(parts).results] == ["a@b.com"]
+    snapshot = metrics.snapshot()
+    assert snapshot['plugins']["RegexEmailScanner"] == {'hits': 1, 'files': 1, 'skipped': 0, 'hit_rate': 1.0}
+    assert snapshot['findings_total'] == 1 and snapshot['bytes_scanned'] == len(text)
+    # 範圍不計入工作進程完成的檔案數，整個檔案由主進程在合併後計算
+    assert snapshot['workers'][0]['files_completed'] == 0
@@ -0,0 +1,52 @@
+# tests/test_markup.py
+import pathlib
+
+import pytest
+
+from src.engine import FileScanner
+from src.parsers.markup import normalize_markup
+from src.plugins.regex_email_scanner import RegexEmailScanner
+from src.plugins.regex_taiwan_id_scanner import RegexTaiwanIdScanner
+
+
+@pytest.mark.parametrize("raw, expected", [
+    # 沒有屬性值的行內標籤不能在文字中間插入換行
+    ("A12<span>3456789</span>", "A123456789"),
+    ("<span title=\"\">A12</span>3456789", "A123456789"),
+    # 行內標籤旁的空白收合成一個空格，而不是整個丟掉
+    ("<a>a@b.com</a> tw", "a@b.com tw"),
+    ("<p>王<b>小明</b> a@b.com</p>", "王小明 a@b.com"),
+    ("a <b> b </b> c", "a b c"),
+    # 區塊元素與屬性值仍以換行分隔
+    ("<div>x</div>\n  <div>y</div>", "x\ny"),
+    ("<a href=\"mailto:q@r.com\">q</a>", "mailto:q@r.com\nq"),
+])
+def test_normalized_text(raw, expected):
+    normalized = normalize_markup(raw, "utf-8")
+    assert str(normalized) == expected
+
+
+@pytest.mark.parametrize("raw", ["<a>a@b.com</a> tw", "<p>王<b>小明</b> a@b.com</p>"])
+def test_email_next_to_inline_tag(raw):
+    results = RegexEmailScanner().scan(normalize_markup(raw, "utf-8"), None)
+    assert [result.matched_value for result in results] == ["a@b.com"]
+
+
+def _scan(tmp_path: pathlib.Path, markup: str) -> list[tuple[str, str, int]]:
+    file_path = tmp_path / "page.html"
+    file_path.write_text(markup, encoding="utf-8")
+    result = FileScanner([RegexEmailScanner(), RegexTaiwanIdScanner()]).scan_file(file_path)
+    assert result.status == "SUCCESS"
+    return sorted((result.pii_type, result.matched_value, result.offset) for result in result.results)
+
+
+def test_inline_tag_inside_id(tmp_path):
+    markup = "<p>身分證 A12<span>3456789</span></p>"
+    [(_, value, offset)] = _scan(tmp_path, markup)
+    assert value == "A123456789" and offset == len(markup[:markup.index("A12")].encode("utf-8"))
+
+
+def test_findings_match_raw_text(tmp_path):
+    markup = "<p>王<b>小明</b> a@b.com</p>"
+    [(_, value, offset)] = _scan(tmp_path, markup)
+    assert value == "a@b.com" and offset == len(markup[:markup.index("a@b")].encode("utf-8"))
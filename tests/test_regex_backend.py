@@ -0,0 +1,83 @@
+# tests/test_regex_backend.py
+import re
+
+import pytest
+
+from src.regex_backend import (_COMPAT_CORPUS, UnsupportedPattern, _compile_candidate, _compile_guarded, _plugin_patterns,
+                               compile_pattern, is_equivalent, to_re2_syntax)
+
+PLUGIN_PATTERNS = _plugin_patterns()
+
+
+def test_plugin_patterns_found():
+    assert {name.split('.')[0] for name, _ in PLUGIN_PATTERNS} >= {
+        'RegexEmailScanner', 'RegexCreditCardScanner', 'RegexTaiwanIdScanner', 'RegexPhoneScanner', 'RegexAddressScanner'}
+
+
+@pytest.mark.parametrize("name, pattern", PLUGIN_PATTERNS, ids=[name for name, _ in PLUGIN_PATTERNS])
+def test_plugin_pattern_equivalent_on_corpus(name, pattern):
+    """每個插件樣式都能交給 RE2 (整個樣式，或去掉邊界條件的主體)，且比對結果與 re 完全相同。"""
+    pytest.importorskip("re2")
+    assert is_equivalent(pattern.reference, _compile_candidate(pattern.pattern, pattern.flags, pattern.reference))
+    assert compile_pattern(pattern.pattern, pattern.flags, backend="re2").engine == "re2"
+    assert pattern.engine == "re2"
+
+
+@pytest.mark.parametrize("name, pattern", PLUGIN_PATTERNS, ids=[name for name, _ in PLUGIN_PATTERNS])
+def test_plugin_pattern_matches_reference(name, pattern):
+    """不論選用哪個引擎，BackendPattern 的比對都與 re 相同。"""
+    for text in _COMPAT_CORPUS:
+        if isinstance(pattern.pattern, bytes): text = text.encode('utf-8')
+        assert [m.span() for m in pattern.finditer(text)] == [m.span() for m in pattern.reference.finditer(text)]
+
+
+@pytest.mark.parametrize("name, pattern", PLUGIN_PATTERNS, ids=[name for name, _ in PLUGIN_PATTERNS])
+def test_plugin_pattern_matches_reference_within_range(name, pattern):
+    """mmap 分段以 pos / endpos 限定範圍：結尾邊界在 endpos 處的判斷必須與 re 相同。"""
+    text = "".join(_COMPAT_CORPUS)
+    if isinstance(pattern.pattern, bytes): text = text.encode('utf-8')
+    for pos, endpos in [(0, 40), (5, 97), (13, 160), (40, len(text) - 7)]:
+        assert ([m.span() for m in pattern.finditer(text, pos, endpos)] ==
+                [m.span() for m in pattern.reference.finditer(text, pos, endpos)])
+
+
+@pytest.mark.parametrize("pattern, flags, text", [
+    (r'\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b', re.IGNORECASE, "中a@b.com 王b@c.org中 _x@y.io ı@ı.ıı %a@b.cd"),
+    (r'(?<!\d)\d{9}(?!\d)', 0, "1234567890 123456789 ١٢٣٤٥٦٧٨٩ a123456789b ０123456789"),
+    (r'\b(?:(?:\d[ -]?){13,16})\b', 0, "4111 1111 1111 1111 x 4111111111111111中 41111111111111112 4111-1111-1111-111 "),
+    (rb'(?<![\d\w])09\d{8}(?![\d\w])', 0, b"0912345678 a0912345678 0912345678b 09123456789 \xe4\xb8\xad0912345678"),
+])
+def test_guarded_pattern_matches_reference(pattern, flags, text):
+    pytest.importorskip("re2")
+    guarded = _compile_guarded(pattern, flags, re.compile(pattern, flags))
+    assert [m.span() for m in guarded.finditer(text)] == [m.span() for m in re.finditer(pattern, text, flags)]
+
+
+def test_guarded_pattern_handles_unencodable_text():
+    pytest.importorskip("re2")
+    pattern = r'(?<!\d)\d{9}(?!\d)'; text = "\udc80123456789 中123456789\ud800"
+    guarded = _compile_guarded(pattern, 0, re.compile(pattern))
+    assert [m.span() for m in guarded.finditer(text)] == [m.span() for m in re.finditer(pattern, text)]
+
+
+def test_guarded_pattern_needs_edge_boundaries():
+    with pytest.raises(UnsupportedPattern): _compile_guarded(r'a(?<!b)c', 0, re.compile(r'a(?<!b)c'))
+
+
+@pytest.mark.parametrize("pattern, flags, expected", [
+    (r'\d{4}', 0, r'[\p{Nd}]{4}'),
+    (r'[\w.]+', 0, r'[\p{L}\p{N}_.]+'),
+    (rb'\s', 0, r'[\t\n\x0b\f\r\x20]'),
+    (r'\bA\b', re.ASCII, r'\bA\b'),
+    (r'a{,3}', re.IGNORECASE, r'(?i)a{0,3}'),
+    (r'[a-z]i', re.IGNORECASE, r'(?i)[\x{130}\x{131}a-z][i\x{130}\x{131}]'),
+    (r'[a-z]i', re.IGNORECASE | re.ASCII, r'(?i)[a-z]i'),
+    (r'(?P<id>i)', re.IGNORECASE, r'(?i)(?P<id>[i\x{130}\x{131}])'),
+])
+def test_to_re2_syntax(pattern, flags, expected):
+    assert to_re2_syntax(pattern, flags) == expected
+
+
+@pytest.mark.parametrize("pattern", [r'(?<!\d)1', r'\bword\b', r'(a)\1', r'a$', r'a++'])
+def test_unsupported_syntax(pattern):
+    with pytest.raises(UnsupportedPattern): to_re2_syntax(pattern)